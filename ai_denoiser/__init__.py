@@ -5,7 +5,8 @@ Supports SpeechBrain (GPU) and DeepFilterNet (CPU) engines.
 """
 
 from .detector import detect_gpu
+from .downloader import ModelDownloader
 from .model_manager import get_denoiser, needs_download
 from .interface import BaseDenoiser
 
-__all__ = ["detect_gpu", "get_denoiser", "needs_download", "BaseDenoiser"]
+__all__ = ["detect_gpu", "get_denoiser", "needs_download", "BaseDenoiser", "ModelDownloader"]
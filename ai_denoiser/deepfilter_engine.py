@@ -13,6 +13,7 @@ import os
 import subprocess
 import numpy as np
 from typing import Optional
+from .downloader import cached_model_dir
 from .interface import BaseDenoiser
 
 
@@ -72,7 +73,10 @@ class DeepFilterDenoiser(BaseDenoiser):
             return False
 
     def load_model(self) -> bool:
-        """Load model from cache or download
+        """Load model from the download cache
+
+        The model is fetched by ModelDownloader (settings dialog) on a worker
+        thread; this never downloads, so it is safe on any thread.
 
         Returns:
             True if model loaded successfully
@@ -81,27 +85,10 @@ class DeepFilterDenoiser(BaseDenoiser):
             return False
 
         try:
-            import os
-            from huggingface_hub import snapshot_download
-            import warnings
-
-            local_dir = os.path.join(self.cache_dir, self.MODEL_NAME)
-            os.makedirs(local_dir, exist_ok=True)
-
-            # Check if already downloaded
-            if not os.path.exists(os.path.join(local_dir, "model.pt")):
-                print(f"Downloading DeepFilterNet model to {local_dir}...")
-                try:
-                    # Try downloading from a smaller, well-known repo
-                    snapshot_download(
-                        repo_id="mf0e6/deepfilter",  # Official DeepFilterNet repo
-                        allow_patterns=["*.pt", "*.yaml"],
-                        cache_dir=local_dir,
-                        local_dir=local_dir,
-                    )
-                except Exception as e:
-                    print(f"HuggingFace download failed: {e}")
-                    print("Model download failed. Using built-in if available...")
+            local_dir = cached_model_dir(self.cache_dir, self.MODEL_NAME)
+            if local_dir is None:
+                print("DeepFilterNet model not downloaded. Download it from Settings.")
+                return False
 
             # Initialize model - try different initialization methods
             try:
@@ -0,0 +1,371 @@
+"""Background model download manager
+
+Streams denoiser model files to disk on a worker thread instead of calling
+``snapshot_download`` from the caller's thread. Downloads are resumable
+(partial ``.part`` files are continued with HTTP Range requests), every file
+is hashed while it streams, and a manifest records verified models so later
+startups can answer ``needs_download`` without scanning the cache directory.
+
+Any HuggingFace-compatible HTTP endpoint works as the source, which lets the
+tests run against a local stand-in server.
+"""
+
+import fnmatch
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Callable, Dict, List, Optional
+
+HF_BASE_URL = "https://huggingface.co"
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# denoiser_type -> (repo_id, local directory name, allow patterns)
+MODEL_REPOS = {
+    "speechbrain": (
+        "speechbrain/sepformer-librispeech-voxconverse",
+        "speechbrain_sepformer-librispeech-voxconverse",
+        None,
+    ),
+    "deepfilter": ("mf0e6/deepfilter", "deepfilter", ["*.pt", "*.yaml"]),
+}
+
+ProgressCallback = Callable[[int, int, str], None]
+
+
+class DownloadError(Exception):
+    """Raised when a model file cannot be fetched or fails verification"""
+
+
+def manifest_path(cache_dir: str) -> str:
+    """Return the manifest location for a model cache directory"""
+    return os.path.join(cache_dir, MANIFEST_NAME)
+
+
+def load_manifest(cache_dir: str) -> Dict:
+    """Load the download manifest
+
+    Args:
+        cache_dir: Model cache directory
+
+    Returns:
+        Manifest dictionary; empty manifest if missing or unreadable
+    """
+    try:
+        with open(manifest_path(cache_dir), "r") as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {"version": MANIFEST_VERSION, "models": {}}
+
+
+def save_manifest(cache_dir: str, manifest: Dict) -> None:
+    """Atomically write the download manifest"""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = manifest_path(cache_dir)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def is_model_cached(cache_dir: str, denoiser_type: str) -> Optional[bool]:
+    """Check the manifest for a verified model
+
+    Args:
+        cache_dir: Model cache directory
+        denoiser_type: "speechbrain" or "deepfilter"
+
+    Returns:
+        True if the manifest lists a completed download whose directory still
+        exists, False if the directory has gone away, or None if the manifest
+        has no entry (caller should fall back to scanning the filesystem)
+    """
+    entry = load_manifest(cache_dir)["models"].get(denoiser_type)
+    if not entry or not entry.get("completed"):
+        return None
+    return os.path.isdir(os.path.join(cache_dir, entry["local_dir"]))
+
+
+def cached_model_dir(cache_dir: str, denoiser_type: str) -> Optional[str]:
+    """Locate a downloaded model without touching the network
+
+    The manifest is consulted first; the directory scan only runs for
+    models that were fetched before the manifest existed.
+
+    Args:
+        cache_dir: Model cache directory
+        denoiser_type: "speechbrain" or "deepfilter"
+
+    Returns:
+        Local model directory, or None if the model still has to be downloaded
+    """
+    local_dir = os.path.join(cache_dir, MODEL_REPOS[denoiser_type][1])
+    cached = is_model_cached(cache_dir, denoiser_type)
+    if cached is None:
+        cached = os.path.isdir(local_dir) and bool(os.listdir(local_dir))
+    return local_dir if cached else None
+
+
+class ModelDownloader:
+    """Resumable, verified model downloader running on a worker thread
+
+    Attributes:
+        cache_dir: Directory models are downloaded into
+        base_url: HuggingFace-compatible endpoint
+        progress_callback: Called as (bytes_done, bytes_total, filename)
+        finished_callback: Called with True/False when a background download ends
+    """
+
+    CHUNK_SIZE = 256 * 1024
+
+    def __init__(
+        self,
+        cache_dir: str,
+        base_url: str = HF_BASE_URL,
+        timeout: float = 30.0,
+        progress_callback: Optional[ProgressCallback] = None,
+        finished_callback: Optional[Callable[[bool], None]] = None,
+    ):
+        self.cache_dir = cache_dir
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.progress_callback = progress_callback
+        self.finished_callback = finished_callback
+        self.error: Optional[str] = None
+        self._cancel = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._bytes_done = 0
+        self._bytes_total = 0
+
+    def start(self, denoiser_type: str) -> threading.Thread:
+        """Start downloading on a background worker thread
+
+        Args:
+            denoiser_type: "speechbrain" or "deepfilter"
+
+        Returns:
+            The worker thread
+        """
+        if self._thread is not None and self._thread.is_alive():
+            raise RuntimeError("Download already in progress")
+
+        self._cancel.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(denoiser_type,), name="model-download", daemon=True
+        )
+        self._thread.start()
+        return self._thread
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the background download; returns False if still running"""
+        if self._thread is None:
+            return True
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def cancel(self) -> None:
+        """Request cancellation; partial files are kept for resuming"""
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """True once cancel() has been called for the current download"""
+        return self._cancel.is_set()
+
+    def is_running(self) -> bool:
+        """Check if a background download is in progress"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self, denoiser_type: str) -> None:
+        success = self.download(denoiser_type)
+        if self.finished_callback:
+            try:
+                self.finished_callback(success)
+            except Exception as e:
+                print(f"Download finished callback failed: {e}")
+
+    def download(self, denoiser_type: str) -> bool:
+        """Download and verify a model synchronously
+
+        Args:
+            denoiser_type: "speechbrain" or "deepfilter"
+
+        Returns:
+            True if every file was downloaded and verified
+        """
+        if denoiser_type not in MODEL_REPOS:
+            self.error = f"Unknown denoiser type: {denoiser_type}"
+            return False
+
+        repo_id, local_name, patterns = MODEL_REPOS[denoiser_type]
+        local_dir = os.path.join(self.cache_dir, local_name)
+        os.makedirs(local_dir, exist_ok=True)
+        self.error = None
+
+        try:
+            files = self._list_files(repo_id, patterns)
+            self._bytes_total = sum(f.get("size") or 0 for f in files)
+            self._bytes_done = 0
+
+            manifest = load_manifest(self.cache_dir)
+            previous = manifest["models"].get(denoiser_type, {}).get("files", {})
+            verified = {}
+
+            for info in files:
+                name = info["rfilename"]
+                dest = os.path.join(local_dir, *name.split("/"))
+                known = previous.get(name)
+                if (
+                    known
+                    and os.path.exists(dest)
+                    and os.path.getsize(dest) == known["size"]
+                    and known["sha256"] == (info.get("sha256") or known["sha256"])
+                ):
+                    self._bytes_done += known["size"]
+                    self._report(name)
+                    verified[name] = known
+                    continue
+
+                sha256, size = self._fetch_file(repo_id, name, dest, info)
+                verified[name] = {"size": size, "sha256": sha256}
+
+            manifest["models"][denoiser_type] = {
+                "repo_id": repo_id,
+                "local_dir": local_name,
+                "files": verified,
+                "completed": time.time(),
+            }
+            save_manifest(self.cache_dir, manifest)
+            print(f"{denoiser_type.capitalize()} model downloaded and verified")
+            return True
+
+        except Exception as e:
+            self.error = str(e)
+            print(f"Failed to download {denoiser_type} model: {e}")
+            return False
+
+    def _list_files(self, repo_id: str, patterns: Optional[List[str]]) -> List[Dict]:
+        """Fetch the repository file list with sizes and LFS hashes"""
+        url = f"{self.base_url}/api/models/{repo_id}?blobs=true"
+        with urllib.request.urlopen(url, timeout=self.timeout) as response:
+            info = json.loads(response.read().decode())
+
+        files = []
+        for sibling in info.get("siblings", []):
+            name = sibling.get("rfilename")
+            if not name:
+                continue
+            if patterns and not any(fnmatch.fnmatch(name, p) for p in patterns):
+                continue
+            lfs = sibling.get("lfs") or {}
+            files.append(
+                {
+                    "rfilename": name,
+                    "size": lfs.get("size", sibling.get("size")),
+                    "sha256": lfs.get("sha256"),
+                }
+            )
+        return files
+
+    def _fetch_file(self, repo_id: str, name: str, dest: str, info: Dict) -> tuple:
+        """Stream one file to disk, resuming a previous partial download
+
+        Returns:
+            (sha256 hex digest, size in bytes)
+        """
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        part_path = dest + ".part"
+        expected_size = info.get("size")
+        expected_sha = info.get("sha256")
+
+        hasher = hashlib.sha256()
+        offset = 0
+        if os.path.exists(part_path):
+            # Re-hash what we already have so verification covers the whole file
+            with open(part_path, "rb") as f:
+                for block in iter(lambda: f.read(self.CHUNK_SIZE), b""):
+                    hasher.update(block)
+                    offset += len(block)
+        self._bytes_done += offset
+
+        url = f"{self.base_url}/{repo_id}/resolve/main/{urllib.parse.quote(name)}"
+        if expected_size is not None and offset > expected_size:
+            # Left over from a different version of the file
+            offset = self._discard_part(part_path, offset)
+            hasher = hashlib.sha256()
+
+        try:
+            response = self._open(url, offset)
+        except urllib.error.HTTPError as e:
+            if e.code != 416 or not offset:
+                raise DownloadError(f"{name}: HTTP {e.code}") from e
+            if offset == expected_size:
+                response = None  # Partial file is already complete
+            else:
+                # The remote file changed size since the partial download
+                offset = self._discard_part(part_path, offset)
+                hasher = hashlib.sha256()
+                try:
+                    response = self._open(url, 0)
+                except urllib.error.HTTPError as e:
+                    raise DownloadError(f"{name}: HTTP {e.code}") from e
+
+        if response is not None:
+            with response:
+                mode = "ab"
+                if offset and response.status != 206:
+                    # Server ignored the range request; start over
+                    self._bytes_done -= offset
+                    offset = 0
+                    hasher = hashlib.sha256()
+                    mode = "wb"
+
+                with open(part_path, mode) as f:
+                    while True:
+                        if self._cancel.is_set():
+                            raise DownloadError("Download cancelled")
+                        block = response.read(self.CHUNK_SIZE)
+                        if not block:
+                            break
+                        f.write(block)
+                        hasher.update(block)
+                        offset += len(block)
+                        self._bytes_done += len(block)
+                        self._report(name)
+
+        digest = hasher.hexdigest()
+        if expected_size is not None and offset != expected_size:
+            raise DownloadError(f"{name}: size mismatch ({offset} != {expected_size})")
+        if expected_sha and digest != expected_sha:
+            os.remove(part_path)
+            raise DownloadError(f"{name}: checksum mismatch")
+
+        os.replace(part_path, dest)
+        return digest, offset
+
+    def _open(self, url: str, offset: int):
+        request = urllib.request.Request(url)
+        if offset:
+            request.add_header("Range", f"bytes={offset}-")
+        return urllib.request.urlopen(request, timeout=self.timeout)
+
+    def _discard_part(self, part_path: str, offset: int) -> int:
+        """Delete a partial download that cannot be resumed; returns the new offset"""
+        os.remove(part_path)
+        self._bytes_done -= offset
+        return 0
+
+    def _report(self, name: str) -> None:
+        if self.progress_callback:
+            try:
+                self.progress_callback(self._bytes_done, self._bytes_total, name)
+            except Exception as e:
+                print(f"Download progress callback failed: {e}")
@@ -9,6 +9,7 @@ Handles automatic selection of appropriate denoiser engine based on:
 import os
 from typing import Optional
 from .detector import detect_gpu
+from .downloader import ModelDownloader, cached_model_dir
 from .interface import BaseDenoiser
 
 
@@ -27,6 +28,20 @@ def _import_deepfilter_engine():
     return DeepFilterDenoiser
 
 
+def _import_onnx_engine():
+    """Import ONNX Runtime engine only when needed"""
+    from .onnx_engine import OnnxDenoiser
+
+    return OnnxDenoiser
+
+
+def _import_dsp_engine():
+    """Import spectral gate DSP engine only when needed"""
+    from .dsp_engine import SpectralGateDenoiser
+
+    return SpectralGateDenoiser
+
+
 def get_denoiser(config: dict) -> Optional[BaseDenoiser]:
     """Select and initialize appropriate denoiser based on config and GPU availability
 
@@ -35,8 +50,11 @@ def get_denoiser(config: dict) -> Optional[BaseDenoiser]:
                 Keys:
                 - enabled: bool
                 - model_cache_dir: str
-                - fallback_mode: str ("deepfilter" or "disable")
+                - fallback_mode: str ("deepfilter", "onnx", "dsp" or "disable")
                 - manual_fallback: bool
+                - onnx_model_path: str (optional, exported ONNX model)
+                - onnx_quantize: bool (optional, default True)
+                - onnx_threads: int (optional, 0 = all cores)
 
     Returns:
         Initialized denoiser instance or None if disabled/unavailable
@@ -62,8 +80,26 @@ def get_denoiser(config: dict) -> Optional[BaseDenoiser]:
             return denoiser
         print("SpeechBrain failed, falling back to CPU mode")
 
+    if fallback_mode == "dsp":
+        print("Using spectral gate DSP denoiser")
+        SpectralGateDenoiser = _import_dsp_engine()
+        return SpectralGateDenoiser()
+
+    if fallback_mode == "onnx":
+        print("Using ONNX Runtime CPU denoiser")
+        OnnxDenoiser = _import_onnx_engine()
+        denoiser = OnnxDenoiser(
+            cache_dir,
+            model_path=config.get("onnx_model_path"),
+            quantize=config.get("onnx_quantize", True),
+            num_threads=config.get("onnx_threads", 0),
+        )
+        if denoiser.load_model():
+            return denoiser
+        print("ONNX Runtime failed, falling back to DeepFilterNet")
+
     # Fallback modes
-    use_cpu_fallback = fallback_mode == "deepfilter" or manual_fallback
+    use_cpu_fallback = fallback_mode in ("deepfilter", "onnx") or manual_fallback
 
     if use_cpu_fallback:
         print("Using CPU-friendly DeepFilterNet denoiser")
@@ -105,14 +141,10 @@ def needs_download(config: dict) -> dict:
     needs_df = False
 
     if gpu_info.get("meets_requirement", False):
-        # Check SpeechBrain
-        local_name = "speechbrain_sepformer_librispeech_voxconverse"
-        local_dir = os.path.join(cache_dir, local_name)
-        needs_sp = not os.path.exists(local_dir) or not os.listdir(local_dir)
+        needs_sp = _model_missing(cache_dir, "speechbrain")
 
     # Check DeepFilterNet (always check for CPU fallback)
-    df_dir = os.path.join(cache_dir, "deepfilter")
-    needs_df = not os.path.exists(df_dir) or not os.listdir(df_dir)
+    needs_df = _model_missing(cache_dir, "deepfilter")
 
     if needs_sp or needs_df:
         if gpu_info.get("meets_requirement"):
@@ -131,46 +163,28 @@ def needs_download(config: dict) -> dict:
     }
 
 
+def _model_missing(cache_dir: str, denoiser_type: str) -> bool:
+    """Check whether a model still has to be downloaded"""
+    return cached_model_dir(cache_dir, denoiser_type) is None
+
+
 def download_model(denoiser_type: str, cache_dir: str, callback=None) -> bool:
-    """Download model file
+    """Download model files synchronously
+
+    Blocks until the download finishes; GUI code should use
+    ``ModelDownloader.start`` instead so the event loop keeps running.
 
     Args:
         denoiser_type: "speechbrain" or "deepfilter"
         cache_dir: Directory to download to
-        callback: Optional progress callback function
+        callback: Optional progress callback (bytes_done, bytes_total, filename)
 
     Returns:
         True if download successful
     """
-    from huggingface_hub import snapshot_download
-    import os
-
-    try:
-        if denoiser_type == "speechbrain":
-            repo_id = "speechbrain/sepformer-librispeech-voxconverse"
-            local_name = repo_id.replace("/", "_")
-        else:  # deepfilter
-            repo_id = "mf0e6/deepfilter"
-            local_name = "deepfilter"
-
-        local_dir = os.path.join(cache_dir, local_name)
-        os.makedirs(local_dir, exist_ok=True)
-
-        print(f"Downloading {denoiser_type} model to {local_dir}...")
-
-        snapshot_download(
-            repo_id=repo_id,
-            cache_dir=cache_dir,
-            local_dir=local_dir,
-            local_dir_use_symlinks=False,
-        )
-
-        print(f"{denoiser_type.capitalize()} model downloaded successfully")
-        return True
-
-    except Exception as e:
-        print(f"Failed to download {denoiser_type} model: {e}")
-        return False
+    print(f"Downloading {denoiser_type} model to {cache_dir}...")
+    downloader = ModelDownloader(cache_dir, progress_callback=callback)
+    return downloader.download(denoiser_type)
 
 
 def get_status_message(config: dict) -> str:
@@ -0,0 +1,249 @@
+"""ONNX Runtime engine for quantized CPU denoising
+
+This module runs an exported denoising model through ONNX Runtime on the CPU
+execution provider. It is intended for ARM64 hosts without a usable GPU,
+where the PyTorch path is too slow and DeepFilterNet may not be installed.
+
+Model: any ONNX graph with one float32 waveform input and one float32
+       waveform output of the same shape, e.g. [1, frames]
+Quantization: int8 dynamic quantization, cached next to the source model
+Requirements: onnxruntime >= 1.16 (onnx is only needed for quantization)
+"""
+
+import os
+from typing import List, Optional
+
+import numpy as np
+
+from .interface import BaseDenoiser
+
+
+class OnnxDenoiser(BaseDenoiser):
+    """Denoiser backed by a persistent ONNX Runtime CPU session
+
+    The session is created once in ``load_model`` and reused for every chunk.
+    Input and output buffers are preallocated and bound with IO binding, so
+    ``process`` only copies samples in and out of those buffers.
+
+    Attributes:
+        cache_dir: Directory for model cache
+        model_path: Exported float32 model
+        quantize: Whether to run an int8 dynamically quantized copy
+        num_threads: Intra-op thread count (0 = one per available core)
+        pin_threads: Whether to pin intra-op threads to distinct cores
+        session: ONNX Runtime inference session
+        ready: Whether model is loaded and ready
+    """
+
+    MODEL_NAME = "onnx"
+    MODEL_FILE = "denoiser.onnx"
+    SAMPLE_RATE = 48000
+    CHUNK_SIZE = 1024
+
+    def __init__(
+        self,
+        cache_dir: str,
+        model_path: Optional[str] = None,
+        quantize: bool = True,
+        num_threads: int = 0,
+        pin_threads: bool = True,
+    ):
+        """Initialize ONNX Runtime denoiser
+
+        Args:
+            cache_dir: Directory to cache model files
+            model_path: Exported model; defaults to <cache_dir>/onnx/denoiser.onnx
+            quantize: Run the int8 dynamically quantized model
+            num_threads: Intra-op thread count (0 = one per available core)
+            pin_threads: Pin intra-op threads to distinct cores
+        """
+        self.cache_dir = cache_dir
+        self.model_path = model_path or os.path.join(
+            cache_dir, self.MODEL_NAME, self.MODEL_FILE
+        )
+        self.quantize = quantize
+        self.num_threads = num_threads
+        self.pin_threads = pin_threads
+        self.session = None
+        self.ready = False
+        self.frames = self.CHUNK_SIZE
+        self._binding = None
+        self._input: Optional[np.ndarray] = None
+        self._output: Optional[np.ndarray] = None
+
+    def load_model(self) -> bool:
+        """Create the inference session and bind IO buffers
+
+        Returns:
+            True if model loaded successfully
+        """
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            print("ONNX Runtime not installed. Install with:")
+            print("  pip install onnxruntime")
+            return False
+
+        if not os.path.exists(self.model_path):
+            print(f"ONNX denoiser model not found: {self.model_path}")
+            return False
+
+        try:
+            path = self._quantized_model() if self.quantize else self.model_path
+            threads = self.num_threads or len(self._available_cores())
+
+            options, pinned = self._session_options(ort, threads, self.pin_threads)
+            try:
+                self.session = ort.InferenceSession(
+                    path, sess_options=options, providers=["CPUExecutionProvider"]
+                )
+            except Exception as e:
+                if not pinned:
+                    raise
+                print(f"Thread pinning rejected ({e}), retrying without affinity")
+                options, _ = self._session_options(ort, threads, False)
+                self.session = ort.InferenceSession(
+                    path, sess_options=options, providers=["CPUExecutionProvider"]
+                )
+
+            self._bind_buffers()
+            self.ready = True
+            print(
+                f"ONNX denoiser loaded ({'int8' if path != self.model_path else 'fp32'}, "
+                f"{threads} threads, {self.frames} frames/run)"
+            )
+            return True
+
+        except Exception as e:
+            print(f"Failed to load ONNX denoiser model: {e}")
+            self.session = None
+            return False
+
+    def _quantized_model(self) -> str:
+        """Return the int8 model path, quantizing the source model if stale"""
+        root, ext = os.path.splitext(self.model_path)
+        quantized = f"{root}.int8{ext}"
+        if os.path.exists(quantized) and os.path.getmtime(quantized) >= os.path.getmtime(
+            self.model_path
+        ):
+            return quantized
+
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        print(f"Quantizing {self.model_path} to int8...")
+        quantize_dynamic(self.model_path, quantized, weight_type=QuantType.QInt8)
+        return quantized
+
+    def _available_cores(self) -> List[int]:
+        try:
+            return sorted(os.sched_getaffinity(0))
+        except AttributeError:
+            return list(range(os.cpu_count() or 1))
+
+    def _session_options(self, ort, threads: int, pin: bool):
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        # Audio arrives in a steady stream; spinning avoids wake-up latency
+        options.add_session_config_entry("session.intra_op.allow_spinning", "1")
+
+        cores = self._available_cores()
+        pinned = pin and 1 < threads <= len(cores)
+        if pinned:
+            # The calling thread runs work too; pin the threads ORT creates.
+            # Affinity ids are 1-based logical processors, one group per thread.
+            affinities = ";".join(str(core + 1) for core in cores[1:threads])
+            options.add_session_config_entry("session.intra_op_thread_affinities", affinities)
+        return options, pinned
+
+    def _bind_buffers(self) -> None:
+        """Preallocate input/output arrays and bind them once"""
+        model_input = self.session.get_inputs()[0]
+        model_output = self.session.get_outputs()[0]
+
+        frames = model_input.shape[-1]
+        self.frames = frames if isinstance(frames, int) and frames > 0 else self.CHUNK_SIZE
+        shape = [d if isinstance(d, int) and d > 0 else 1 for d in model_input.shape[:-1]]
+        shape.append(self.frames)
+
+        self._input = np.zeros(shape, dtype=np.float32)
+        self._output = np.zeros(shape, dtype=np.float32)
+
+        self._binding = self.session.io_binding()
+        self._binding.bind_input(
+            model_input.name,
+            "cpu",
+            0,
+            np.float32,
+            self._input.shape,
+            self._input.ctypes.data,
+        )
+        self._binding.bind_output(
+            model_output.name,
+            "cpu",
+            0,
+            np.float32,
+            self._output.shape,
+            self._output.ctypes.data,
+        )
+        self._flat_input = self._input.reshape(-1)
+        self._flat_output = self._output.reshape(-1)
+
+    def process_float(self, samples: np.ndarray) -> np.ndarray:
+        """Denoise float32 samples in [-1, 1]
+
+        Args:
+            samples: Mono waveform of any length
+
+        Returns:
+            Denoised waveform with the same length
+        """
+        result = np.empty(len(samples), dtype=np.float32)
+        for start in range(0, len(samples), self.frames):
+            chunk = samples[start : start + self.frames]
+            n = len(chunk)
+            self._flat_input[:n] = chunk
+            if n < self.frames:
+                self._flat_input[n:] = 0.0
+            self.session.run_with_iobinding(self._binding)
+            result[start : start + n] = self._flat_output[:n]
+        return result
+
+    def process(self, audio_data: bytes) -> Optional[bytes]:
+        """Process audio data with denoising
+
+        Args:
+            audio_data: Raw 16-bit PCM audio data
+
+        Returns:
+            Denoised audio data, or None if processing failed
+        """
+        if not self.ready or not audio_data:
+            return None
+
+        try:
+            if len(audio_data) % 2 != 0:
+                audio_data = audio_data[:-1]
+            samples = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32) / 32768.0
+            enhanced = self.process_float(samples)
+            enhanced = np.clip(enhanced, -1.0, 32767 / 32768.0) * 32768.0
+            return enhanced.astype(np.int16).tobytes()
+
+        except Exception as e:
+            print(f"Denoising failed: {e}")
+            return None
+
+    def is_ready(self) -> bool:
+        """Check if denoiser is ready"""
+        return self.ready
+
+    def cleanup(self) -> None:
+        """Release resources"""
+        self._binding = None
+        self.session = None
+        self._input = None
+        self._output = None
+        self.ready = False
+        print("ONNX denoiser unloaded")
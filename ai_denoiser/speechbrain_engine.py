@@ -9,11 +9,11 @@ Latency: ~100ms
 Requirements: torch >= 2.0.0, speechbrain >= 1.0.0
 """
 
-import os
 import torch
 import torch.nn.functional as F
 import numpy as np
 from typing import Optional
+from .downloader import cached_model_dir
 from .interface import BaseDenoiser
 
 
@@ -47,38 +47,25 @@ class SpeechBrainDenoiser(BaseDenoiser):
         self.ready = False
 
     def load_model(self) -> bool:
-        """Load model from cache or download
+        """Load model from the download cache
+
+        The model is fetched by ModelDownloader (settings dialog) on a worker
+        thread; this never downloads, so it is safe on any thread.
 
         Returns:
             True if model loaded successfully
         """
         try:
             from speechbrain.inference import SEPR
-            from huggingface_hub import snapshot_download
-            import shutil
-
-            # Ensure cache directory exists
-            local_name = self.MODEL_ID.replace("/", "_")
-            local_dir = os.path.join(self.cache_dir, local_name)
-            os.makedirs(local_dir, exist_ok=True)
-
-            # Check if already downloaded
-            if not os.path.exists(os.path.join(local_dir, "pretrained.yaml")):
-                print(f"Downloading model to {local_dir}...")
-                try:
-                    snapshot_download(
-                        repo_id=self.MODEL_ID,
-                        allow_patterns=["*.yaml", "*.pt", "*.json"],
-                        cache_dir=local_dir,
-                        local_dir=local_dir,
-                    )
-                except Exception as e:
-                    print(f"HuggingFace download failed: {e}")
-                    print("Trying SpeechBrain native download...")
-
-            # Load pretrained model via SpeechBrain
+
+            local_dir = cached_model_dir(self.cache_dir, "speechbrain")
+            if local_dir is None:
+                print("SpeechBrain model not downloaded. Download it from Settings.")
+                return False
+
+            # Load from the local directory only, so SpeechBrain never fetches
             self.model = SEPR.from_hparams(
-                source=self.MODEL_ID,
+                source=local_dir,
                 savedir=local_dir,
                 run_args={"device": str(self.device)},
             )
@@ -0,0 +1,147 @@
+import logging
+import time
+from typing import Optional
+
+import numpy as np
+
+from vita49 import PACKET_CLASS_AUDIO_FLOAT32, PACKET_CLASS_AUDIO_INT16, PACKET_CLASS_OPUS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class CodecStats:
+    """Measured payload bitrate and decode CPU time since the last snapshot"""
+
+    def __init__(self):
+        self.total_bytes = 0
+        self.total_decode_time = 0.0
+        self._window_bytes = 0
+        self._window_decode = 0.0
+        self._window_start = time.monotonic()
+        self.bitrate_kbps = 0.0
+        self.decode_ms_per_s = 0.0
+
+    def record(self, payload_bytes: int, decode_seconds: float):
+        self.total_bytes += payload_bytes
+        self.total_decode_time += decode_seconds
+        self._window_bytes += payload_bytes
+        self._window_decode += decode_seconds
+
+    def snapshot(self):
+        """Close the measurement window; returns (bitrate_kbps, decode_ms_per_s)"""
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed > 0:
+            self.bitrate_kbps = self._window_bytes * 8 / elapsed / 1000.0
+            self.decode_ms_per_s = self._window_decode * 1000.0 / elapsed
+        self._window_bytes = 0
+        self._window_decode = 0.0
+        self._window_start = now
+        return self.bitrate_kbps, self.decode_ms_per_s
+
+
+class PcmCodec:
+    """Uncompressed radio audio: big-endian float32 or int16, stereo"""
+
+    name = "pcm"
+
+    def __init__(self, sample_rate: int = 24000, channels: int = 2, float32: bool = True):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.packet_class = PACKET_CLASS_AUDIO_FLOAT32 if float32 else PACKET_CLASS_AUDIO_INT16
+        self._dtype = np.dtype(">f4") if float32 else np.dtype(">i2")
+        self._scale = 1.0 if float32 else 1.0 / 32768.0
+        self._last = np.zeros(0, dtype=np.float32)
+        self.frame_size = 128
+
+    def decode(self, payload: bytes) -> np.ndarray:
+        samples = np.frombuffer(payload, dtype=self._dtype)
+        usable = len(samples) - len(samples) % self.channels
+        mono = samples[:usable].reshape(-1, self.channels).mean(axis=1, dtype=np.float32)
+        if self._scale != 1.0:
+            mono *= self._scale
+        self._last = mono
+        return mono
+
+    def conceal(self, next_payload: Optional[bytes] = None) -> np.ndarray:
+        """Replace a lost packet by fading out the previous one"""
+        self._last = self._last * np.linspace(0.5, 0.0, len(self._last), dtype=np.float32)
+        return self._last
+
+    def encode(self, samples: np.ndarray) -> bytes:
+        stereo = np.repeat(samples[:, None] / self._scale, self.channels, axis=1)
+        return stereo.astype(self._dtype).tobytes()
+
+
+class OpusCodec:
+    """Opus remote audio (48 kHz stereo, 10 ms frames) via opuslib
+
+    Lost packets are concealed with Opus forward error correction when the
+    following packet is already buffered, otherwise with the decoder's PLC.
+    """
+
+    name = "opus"
+    packet_class = PACKET_CLASS_OPUS
+
+    def __init__(self, bitrate: int = 24000, channels: int = 2, frame_ms: int = 10):
+        try:
+            import opuslib
+        except Exception as e:
+            raise RuntimeError(f"Opus support requires opuslib and libopus: {e}") from e
+
+        self.sample_rate = 48000
+        self.channels = channels
+        self.frame_size = self.sample_rate * frame_ms // 1000
+        self.decoder = opuslib.Decoder(self.sample_rate, channels)
+        self.encoder = opuslib.Encoder(self.sample_rate, channels, opuslib.APPLICATION_VOIP)
+        self.encoder.bitrate = bitrate
+        # In-band FEC lets the receiver rebuild a lost frame from its successor
+        self.encoder.inband_fec = 1
+        self.encoder.packet_loss_perc = 10
+
+    def _to_mono(self, pcm: bytes) -> np.ndarray:
+        samples = np.frombuffer(pcm, dtype="<i2").reshape(-1, self.channels)
+        return samples.mean(axis=1, dtype=np.float32) / 32768.0
+
+    def decode(self, payload: bytes) -> np.ndarray:
+        return self._to_mono(self.decoder.decode(bytes(payload), self.frame_size))
+
+    def conceal(self, next_payload: Optional[bytes] = None) -> np.ndarray:
+        if next_payload is not None:
+            pcm = self.decoder.decode(bytes(next_payload), self.frame_size, decode_fec=True)
+        else:
+            pcm = self.decoder.decode(b"", self.frame_size)
+        return self._to_mono(pcm)
+
+    def encode(self, samples: np.ndarray) -> bytes:
+        pcm = np.clip(samples, -1.0, 32767 / 32768.0) * 32768.0
+        stereo = np.repeat(pcm.astype("<i2")[:, None], self.channels, axis=1)
+        return self.encoder.encode(stereo.tobytes(), self.frame_size)
+
+
+def create_codec(audio_config: dict):
+    """Build the codec selected by the ``audio.codec`` config key"""
+    name = audio_config.get("codec", "pcm")
+    if name == "opus":
+        return OpusCodec(bitrate=audio_config.get("opus_bitrate", 24000))
+    if name != "pcm":
+        logger.warning(f"Unknown audio codec '{name}', using PCM")
+    return PcmCodec(sample_rate=audio_config.get("rx_radio_rate", 24000))
+
+
+def create_codecs(audio_config: dict):
+    """Returns (rx_codec, tx_codec, compression) for the configured audio codec
+
+    ``tx_codec`` and ``compression`` are None for uncompressed audio, which
+    is also the fallback when the configured codec is not available.
+    """
+    try:
+        rx_codec = create_codec(audio_config)
+        tx_codec = create_codec(audio_config)
+    except RuntimeError as e:
+        logger.error(f"{e}; falling back to uncompressed audio")
+        return PcmCodec(audio_config.get("rx_radio_rate", 24000)), None, None
+    if rx_codec.name == "pcm":
+        return rx_codec, None, None
+    return rx_codec, tx_codec, rx_codec.name
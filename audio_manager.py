@@ -1,14 +1,21 @@
 import logging
+import threading
+import time
 from typing import Any, Callable, Dict, List, Optional
 
 import pyaudio
 
+from dsp_chain import DspChain, build_rx_stages, build_tx_stages, load_denoiser
+from metrics import REGISTRY, MetricsRegistry
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 class AudioManager:
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(
+        self, config: Dict[str, Any], metrics: Optional[MetricsRegistry] = None, dsp: bool = True
+    ):
         self.sample_rate = config["audio"]["sample_rate"]
         self.channels = config["audio"]["channels"]
         self.chunk_size = config["audio"]["chunk_size"]
@@ -18,20 +25,118 @@ class AudioManager:
         self.selected_input_device: Optional[int] = None
         self.rx_callback: Optional[Callable[[], bytes]] = None
         self.tx_callback: Optional[Callable[[bytes], None]] = None
+        self.recorder = None
+
+        metrics = metrics or REGISTRY
+        self._rx_time = metrics.histogram("audio_rx_callback_seconds", "RX audio callback time")
+        self._tx_time = metrics.histogram("audio_tx_callback_seconds", "TX audio callback time")
+        self._underflows = metrics.counter(
+            "audio_output_underflows_total", "Speaker buffer underruns reported by PortAudio"
+        )
+        self._overflows = metrics.counter(
+            "audio_input_overflows_total", "Microphone buffer overruns reported by PortAudio"
+        )
+        metrics.gauge(
+            "denoiser_realtime_factor", "Denoiser processing time per second of audio"
+        ).set_function(self.denoiser_realtime_factor)
 
         # Initialize AI denoiser if enabled
         self.denoiser = None
-        if config.get("ai_denoiser", {}).get("enabled", False):
-            try:
-                from ai_denoiser.model_manager import get_denoiser
-
-                self.denoiser = get_denoiser(config["ai_denoiser"])
-                if self.denoiser and self.denoiser.is_ready():
-                    logger.info("AI Denoiser enabled and ready")
-                else:
-                    logger.warning("AI Denoiser requested but not available")
-            except Exception as e:
-                logger.error(f"Failed to initialize AI Denoiser: {e}")
+        # ai_denoiser config the current, or currently loading, denoiser is for
+        self._denoiser_config: Optional[Dict[str, Any]] = None
+        self._audio_config = config["audio"]
+        # Guards the chain rebuilds shared by reconfigure() and the loader thread
+        self._lock = threading.Lock()
+        self._loader: Optional[threading.Thread] = None
+        # RX callbacks completed; tells when a replaced chain is out of use
+        self._rx_blocks = 0
+        # False when the audio is processed elsewhere, e.g. by the radio daemon:
+        # both chains stay empty and no denoiser is loaded
+        self.dsp = dsp
+        if dsp:
+            self._denoiser_config = self._denoiser_settings(config)
+            self.denoiser = load_denoiser(self._denoiser_config)
+
+        self.rx_chain = DspChain(build_rx_stages(config["audio"], self.denoiser) if dsp else ())
+        self.tx_chain = DspChain(build_tx_stages(config["audio"]) if dsp else ())
+
+    def reconfigure(self, config: Dict[str, Any]):
+        """Rebuild the DSP chains from config without restarting the streams
+
+        When the ``ai_denoiser`` settings changed, the denoiser is loaded on a
+        worker thread and swapped in once ready; until then the chain keeps
+        the previous one. A replaced denoiser is released only after the RX
+        callback has moved on to the new chain.
+        """
+        if not self.dsp:
+            return
+        denoiser_config = self._denoiser_settings(config)
+        with self._lock:
+            self._audio_config = config["audio"]
+            self._rebuild()
+            if denoiser_config == self._denoiser_config:
+                return
+            self._denoiser_config = denoiser_config
+        self._loader = threading.Thread(
+            target=self._swap_denoiser, args=(denoiser_config,), name="denoiser-loader",
+            daemon=True,
+        )
+        self._loader.start()
+
+    def wait_denoiser(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a denoiser change from reconfigure(); returns False if still running"""
+        if self._loader is None:
+            return True
+        self._loader.join(timeout)
+        return not self._loader.is_alive()
+
+    @staticmethod
+    def _denoiser_settings(config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """The ai_denoiser settings to load a denoiser from, None when disabled"""
+        denoiser_config = config.get("ai_denoiser", {})
+        return dict(denoiser_config) if denoiser_config.get("enabled", False) else None
+
+    def _rebuild(self):
+        self.rx_chain.set_stages(build_rx_stages(self._audio_config, self.denoiser))
+        self.tx_chain.set_stages(build_tx_stages(self._audio_config))
+
+    def _swap_denoiser(self, denoiser_config: Optional[Dict[str, Any]]):
+        denoiser = load_denoiser(denoiser_config)
+        old = None
+        with self._lock:
+            if denoiser_config is self._denoiser_config:
+                old, self.denoiser = self.denoiser, denoiser
+                self._rebuild()
+                denoiser = None
+        if denoiser is not None:
+            # Settings changed again while loading
+            denoiser.cleanup()
+        if old is not None:
+            self._wait_rx_blocks()
+            old.cleanup()
+            if self.denoiser is None:
+                logger.info("AI Denoiser disabled")
+
+    def _wait_rx_blocks(self, timeout: float = 2.0):
+        """Wait until an RX callback has run entirely on the current chain
+
+        The callback in progress during the swap may still hold the old
+        stages, so the one after it is the first certain to use the new ones.
+        Gives up when the stream stops or stops calling back.
+        """
+        target = self._rx_blocks + 2
+        deadline = time.monotonic() + timeout
+        while self.rx_stream is not None and self._rx_blocks < target:
+            if time.monotonic() > deadline:
+                break
+            time.sleep(0.005)
+
+    def denoiser_realtime_factor(self) -> float:
+        """Mean denoise stage time divided by the audio block duration"""
+        histogram = self.rx_chain.histograms.get("denoise")
+        if histogram is None or not histogram.count:
+            return 0.0
+        return histogram.mean_us / 1e6 / (self.chunk_size / self.sample_rate)
 
     def get_input_devices(self) -> List[Dict[str, Any]]:
         devices = []
@@ -61,6 +166,10 @@ class AudioManager:
         """
         self.tx_callback = callback
 
+    def set_recorder(self, recorder):
+        """Tap processed RX/TX audio into an AudioRecorder (None to stop)"""
+        self.recorder = recorder
+
     def start_rx(self):
         if self.rx_stream is not None:
             return
@@ -84,19 +193,20 @@ class AudioManager:
         Called by PyAudio when the output stream (speaker) needs audio data to play.
         Returns audio bytes to be played.
         """
+        start = time.perf_counter()
+        if status & pyaudio.paOutputUnderflow:
+            self._underflows.inc()
         try:
             if self.rx_callback:
-                audio_data = self.rx_callback()
-
-                # Apply denoising if available
-                if self.denoiser and self.denoiser.is_ready():
-                    denoised = self.denoiser.process(audio_data)
-                    if denoised:
-                        audio_data = denoised
-
+                audio_data = self.rx_chain.process_bytes(self.rx_callback())
+                if self.recorder:
+                    self.recorder.submit("rx", audio_data)
+                self._rx_time.record(time.perf_counter() - start)
                 return (audio_data, pyaudio.paContinue)
         except Exception as e:
             logger.error(f"RX stream callback error: {e}")
+        finally:
+            self._rx_blocks += 1
         return (b"\x00" * frame * 2, pyaudio.paContinue)
 
     def stop_rx(self):
@@ -136,9 +246,16 @@ class AudioManager:
         Called by PyAudio when the input stream (microphone) captures audio data.
         Processes captured audio data for transmission.
         """
+        start = time.perf_counter()
+        if status & pyaudio.paInputOverflow:
+            self._overflows.inc()
         try:
             if self.tx_callback:
-                self.tx_callback(in_data)
+                audio_data = self.tx_chain.process_bytes(in_data)
+                if self.recorder:
+                    self.recorder.submit("tx", audio_data)
+                self.tx_callback(audio_data)
+                self._tx_time.record(time.perf_counter() - start)
         except Exception as e:
             logger.error(f"TX stream callback error: {e}")
         return (None, pyaudio.paContinue)
@@ -159,10 +276,15 @@ class AudioManager:
         self.stop_rx()
         self.stop_tx()
 
-        # Cleanup denoiser
-        if self.denoiser:
-            self.denoiser.cleanup()
-            self.denoiser = None
+        # Cleanup denoiser; one still loading is released by its thread
+        with self._lock:
+            denoiser, self.denoiser = self.denoiser, None
+            self._denoiser_config = None
+            self.rx_chain.set_stages(
+                s for s in self.rx_chain.stages if s.name != "denoise"
+            )
+        if denoiser:
+            denoiser.cleanup()
             logger.info("AI Denoiser cleaned up")
 
         self.pyaudio.terminate()
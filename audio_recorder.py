@@ -0,0 +1,260 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import wave
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SAMPLE_WIDTH = 2  # 16-bit PCM
+
+
+class _TrackFile:
+    """One open output file for a track plus its metadata sidecar"""
+
+    def __init__(self, path: str, fmt: str, sample_rate: int, channels: int, start: float):
+        self.path = path
+        self.fmt = fmt
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.start = start
+        self.frames = 0
+        self.bytes = 0
+        self.metadata: Dict[str, Any] = {}
+        self.events: List[Dict[str, Any]] = []
+
+        if fmt == "flac":
+            import soundfile
+
+            self._file = soundfile.SoundFile(
+                path,
+                "w",
+                samplerate=sample_rate,
+                channels=channels,
+                format="FLAC",
+                subtype="PCM_16",
+            )
+        else:
+            self._file = wave.open(path, "wb")
+            self._file.setnchannels(channels)
+            self._file.setsampwidth(SAMPLE_WIDTH)
+            self._file.setframerate(sample_rate)
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.sample_rate
+
+    def write(self, data: bytes):
+        if self.fmt == "flac":
+            self._file.buffer_write(data, dtype="int16")
+        else:
+            # writeframesraw skips the per-call header rewrite; close() fixes it up
+            self._file.writeframesraw(data)
+        self.frames += len(data) // (SAMPLE_WIDTH * self.channels)
+        self.bytes += len(data)
+
+    def add_event(self, offset: float, fields: Dict[str, Any]):
+        self.events.append({"offset_s": round(offset, 3), **fields})
+
+    def close(self):
+        self._file.close()
+        sidecar = {
+            "file": os.path.basename(self.path),
+            "format": self.fmt,
+            "sample_rate": self.sample_rate,
+            "channels": self.channels,
+            "sample_width": SAMPLE_WIDTH,
+            "start_time": datetime.fromtimestamp(self.start).isoformat(timespec="milliseconds"),
+            "start_timestamp": self.start,
+            "duration_s": round(self.duration, 3),
+            "frames": self.frames,
+            "metadata": self.metadata,
+            "events": self.events,
+        }
+        with open(os.path.splitext(self.path)[0] + ".json", "w") as f:
+            json.dump(sidecar, f, indent=2)
+
+
+class AudioRecorder:
+    """Records RX/TX audio tracks to WAV or FLAC from a background writer thread
+
+    ``submit`` is called from the PortAudio callbacks and never blocks: it
+    puts the buffer on a bounded queue and counts a dropped buffer when the
+    queue is full. The writer thread batches buffers per track into large
+    sequential writes and rotates files by size or duration. Every file gets
+    a JSON sidecar with its start timestamp and the frequency/mode changes
+    (``set_metadata``) at their offsets into the recording.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        sample_rate: int = 48000,
+        channels: int = 1,
+        fmt: str = "wav",
+        max_file_bytes: int = 512 * 1024 * 1024,
+        max_file_seconds: float = 3600.0,
+        queue_size: int = 512,
+        write_chunk_bytes: int = 1024 * 1024,
+        flush_interval: float = 0.5,
+    ):
+        self.directory = os.path.expanduser(directory)
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.fmt = fmt.lower()
+        self.max_file_bytes = max_file_bytes
+        self.max_file_seconds = max_file_seconds
+        self.write_chunk_bytes = write_chunk_bytes
+        self.flush_interval = flush_interval
+
+        if self.fmt == "flac":
+            try:
+                import soundfile  # noqa: F401
+            except Exception as e:
+                logger.warning(f"FLAC recording needs soundfile ({e}), recording WAV instead")
+                self.fmt = "wav"
+
+        self.dropped_buffers = 0
+        self.files: List[str] = []
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._submitted: Dict[str, int] = {}
+        self._written: Dict[str, int] = {}
+        self._metadata: Dict[str, Any] = {}
+        self._open: Dict[str, _TrackFile] = {}
+        self._pending: Dict[str, bytearray] = {}
+        self._file_index = 0
+        self._thread: Optional[threading.Thread] = None
+        self.running = False
+
+    @property
+    def bytes_behind(self) -> int:
+        """Audio bytes accepted by submit but not yet written to disk"""
+        return sum(list(self._submitted.values())) - sum(list(self._written.values()))
+
+    def start(self):
+        if self.running:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name="audio-recorder", daemon=True)
+        self._thread.start()
+        logger.info(f"Recording audio to {self.directory} ({self.fmt})")
+
+    def stop(self):
+        """Stop accepting audio, drain the queue and close all files"""
+        if not self.running:
+            return
+        self.running = False
+        self._queue.put(None)
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        logger.info(
+            f"Recording stopped: {len(self.files)} files, "
+            f"{self.dropped_buffers} buffers dropped"
+        )
+
+    def submit(self, track: str, data: bytes) -> bool:
+        """Queue a 16-bit PCM buffer for a track; never blocks"""
+        if not self.running or not data:
+            return False
+        self._submitted[track] = self._submitted.get(track, 0) + len(data)
+        try:
+            self._queue.put_nowait(("audio", track, time.time(), data))
+        except queue.Full:
+            self._submitted[track] -= len(data)
+            self.dropped_buffers += 1
+            return False
+        return True
+
+    def set_metadata(self, **fields):
+        """Record radio state (e.g. frequency, mode) in the sidecar files"""
+        try:
+            self._queue.put_nowait(("meta", None, time.time(), fields))
+        except queue.Full:
+            self._metadata.update(fields)
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._flush_all()
+                continue
+            if item is None:
+                break
+
+            kind, track, timestamp, payload = item
+            if kind == "meta":
+                changed = {k: v for k, v in payload.items() if self._metadata.get(k) != v}
+                self._metadata.update(changed)
+                for name, track_file in self._open.items() if changed else ():
+                    offset = track_file.duration + len(self._pending[name]) / (
+                        SAMPLE_WIDTH * self.channels * self.sample_rate
+                    )
+                    track_file.add_event(offset, changed)
+            else:
+                self._append(track, timestamp, payload)
+
+        self._flush_all()
+        for track in list(self._open):
+            self._close(track)
+
+    def _append(self, track: str, timestamp: float, data: bytes):
+        track_file = self._open.get(track)
+        if track_file is not None and timestamp - track_file.start >= self.max_file_seconds:
+            self._flush(track)
+            self._close(track)
+            track_file = None
+        if track_file is None:
+            track_file = self._open_file(track, timestamp)
+
+        pending = self._pending[track]
+        pending += data
+        if len(pending) >= self.write_chunk_bytes:
+            self._flush(track)
+
+    def _open_file(self, track: str, timestamp: float) -> _TrackFile:
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(timestamp))
+        self._file_index += 1
+        ext = "flac" if self.fmt == "flac" else "wav"
+        path = os.path.join(self.directory, f"{track}_{stamp}_{self._file_index:03d}.{ext}")
+        track_file = _TrackFile(path, self.fmt, self.sample_rate, self.channels, timestamp)
+        track_file.metadata = dict(self._metadata)
+        self._open[track] = track_file
+        self._pending.setdefault(track, bytearray())
+        return track_file
+
+    def _flush(self, track: str):
+        pending = self._pending.get(track)
+        track_file = self._open.get(track)
+        if not pending or track_file is None:
+            return
+        try:
+            track_file.write(bytes(pending))
+        except Exception as e:
+            logger.error(f"Recording write failed for {track_file.path}: {e}")
+        self._written[track] = self._written.get(track, 0) + len(pending)
+        pending.clear()
+        if track_file.bytes >= self.max_file_bytes:
+            self._close(track)
+
+    def _flush_all(self):
+        for track in list(self._open):
+            self._flush(track)
+
+    def _close(self, track: str):
+        track_file = self._open.pop(track, None)
+        if track_file is None:
+            return
+        try:
+            track_file.close()
+            self.files.append(track_file.path)
+            logger.info(f"Recorded {track_file.path} ({track_file.duration:.1f}s)")
+        except Exception as e:
+            logger.error(f"Failed to close recording {track_file.path}: {e}")
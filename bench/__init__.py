@@ -0,0 +1,5 @@
+"""Performance benchmarks
+
+Standalone scripts, run as modules from the repository root, e.g.
+``python -m bench.onnx_vs_torch``. They are not collected by pytest.
+"""
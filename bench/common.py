@@ -0,0 +1,64 @@
+"""Shared helpers for benchmark scripts"""
+
+import json
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+def system_info() -> Dict[str, Any]:
+    """Describe the machine a benchmark ran on"""
+    try:
+        import os
+
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = None
+    return {
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "python": platform.python_version(),
+        "cpu_count": cores,
+        "timestamp": time.time(),
+    }
+
+
+def latency_summary(samples_ms: List[float]) -> Dict[str, float]:
+    """Summarize per-iteration latencies in milliseconds"""
+    if not samples_ms:
+        return {"count": 0}
+    values = np.asarray(samples_ms, dtype=np.float64)
+    return {
+        "count": int(values.size),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max()),
+    }
+
+
+def write_json(results: Dict[str, Any], path: Optional[str]) -> None:
+    """Write results to a file, or stdout when no path is given"""
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if path:
+        with open(path, "w") as f:
+            f.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+def git_commit() -> Optional[str]:
+    """Commit hash of the working tree, if it is a git checkout"""
+    try:
+        return (
+            subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL)
+            .decode()
+            .strip()
+        )
+    except Exception:
+        return None
@@ -0,0 +1,318 @@
+"""Denoiser benchmark and quality harness
+
+Feeds synthetic SSB-plus-noise audio, and optionally recorded WAV files,
+through every BaseDenoiser engine in 1024-sample chunks, the way
+AudioManager's RX callback does. For each engine it reports real-time
+factor, per-chunk latency percentiles, peak RSS and, where a clean
+reference exists, SI-SNR and segmental SNR improvement.
+
+Runs CPU-only and never downloads models: the ONNX engine uses a reference
+model built on the fly, DeepFilterNet is measured only when its model is
+already in the download cache, and SpeechBrain is skipped.
+
+Usage:
+    python -m bench.denoiser_harness [--engines passthrough,dsp,deepfilter,onnx]
+                                     [--seconds 10] [--snr 5] [--wav rec.wav ...]
+                                     [--no-isolate] [--output results.json]
+
+A recording ``name.wav`` is scored against ``name.clean.wav`` when that file
+exists; otherwise only timing is reported for it.
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+import wave
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ai_denoiser.interface import BaseDenoiser
+from bench.common import git_commit, latency_summary, system_info, write_json
+
+SAMPLE_RATE = 48000
+CHUNK_SIZE = 1024
+MAX_ALIGN_LAG = 4096
+# Same default as ai_denoiser.model_cache_dir
+MODEL_CACHE_DIR = os.path.expanduser("~/.cache/flexradio/ai_models")
+
+
+class PassthroughDenoiser(BaseDenoiser):
+    """Stub engine: returns its input, measuring harness overhead"""
+
+    def process(self, audio_data: bytes) -> Optional[bytes]:
+        return audio_data
+
+    def is_ready(self) -> bool:
+        return True
+
+    def cleanup(self) -> None:
+        pass
+
+
+def _make_passthrough(tmp_dir: str):
+    return PassthroughDenoiser(), None
+
+
+def _make_dsp(tmp_dir: str):
+    from ai_denoiser.dsp_engine import SpectralGateDenoiser
+
+    return SpectralGateDenoiser(), None
+
+
+def _make_deepfilter(tmp_dir: str):
+    from ai_denoiser.deepfilter_engine import DeepFilterDenoiser
+
+    # Without a model process() returns its input, which would be reported
+    # as a measurement of the engine
+    denoiser = DeepFilterDenoiser(MODEL_CACHE_DIR)
+    if not denoiser.load_model():
+        return None, "model not downloaded or DeepFilterNet not installed"
+    return denoiser, None
+
+
+def _make_onnx(tmp_dir: str):
+    try:
+        import onnx  # noqa: F401
+        import onnxruntime  # noqa: F401
+    except ImportError:
+        return None, "onnxruntime/onnx not installed"
+
+    from ai_denoiser.onnx_engine import OnnxDenoiser
+    from bench.onnx_vs_torch import export_reference_model
+
+    model_path = os.path.join(tmp_dir, "denoiser.onnx")
+    export_reference_model(model_path, CHUNK_SIZE)
+    denoiser = OnnxDenoiser(tmp_dir, model_path=model_path, quantize=False)
+    if not denoiser.load_model():
+        return None, "failed to load reference model"
+    return denoiser, "reference conv model (quality not meaningful)"
+
+
+def _make_speechbrain(tmp_dir: str):
+    return None, "requires model download and GPU"
+
+
+ENGINES = {
+    "passthrough": _make_passthrough,
+    "dsp": _make_dsp,
+    "deepfilter": _make_deepfilter,
+    "onnx": _make_onnx,
+    "speechbrain": _make_speechbrain,
+}
+
+
+def synthesize_ssb(seconds: float, seed: int = 0) -> np.ndarray:
+    """Voice-like SSB audio: harmonic syllables in 300-2700 Hz with pauses"""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * SAMPLE_RATE)
+    t = np.arange(n) / SAMPLE_RATE
+    clean = np.zeros(n, dtype=np.float64)
+
+    pos = 0
+    while pos < n:
+        length = int(rng.uniform(0.15, 0.4) * SAMPLE_RATE)
+        gap = int(rng.uniform(0.05, 0.3) * SAMPLE_RATE)
+        end = min(pos + length, n)
+        seg_t = t[pos:end] - t[pos]
+        f0 = rng.uniform(100, 200) * (1 + 0.1 * np.sin(2 * np.pi * 3 * seg_t))
+        phase = 2 * np.pi * np.cumsum(f0) / SAMPLE_RATE
+        formant = rng.uniform(500, 1500)
+        segment = np.zeros(end - pos)
+        for k in range(1, 28):
+            freq = k * f0.mean()
+            if 300 <= freq <= 2700:
+                amplitude = np.exp(-(((freq - formant) / 700) ** 2))
+                segment += amplitude * np.sin(k * phase)
+        segment *= np.hanning(len(segment))
+        clean[pos:end] = segment
+        pos = end + gap
+
+    clean /= max(np.max(np.abs(clean)), 1e-9)
+    return (clean * 0.5).astype(np.float32)
+
+
+def add_noise(clean: np.ndarray, snr_db: float, seed: int = 1) -> np.ndarray:
+    """Add receiver-like noise band-limited to 200-3000 Hz at a given SNR"""
+    rng = np.random.default_rng(seed)
+    spectrum = np.fft.rfft(rng.standard_normal(len(clean)))
+    freqs = np.fft.rfftfreq(len(clean), 1 / SAMPLE_RATE)
+    spectrum[(freqs < 200) | (freqs > 3000)] = 0
+    noise = np.fft.irfft(spectrum, n=len(clean))
+
+    active = np.abs(clean) > 0.01
+    signal_power = np.mean(clean[active] ** 2) if active.any() else np.mean(clean**2)
+    noise *= np.sqrt(signal_power / (np.mean(noise**2) * 10 ** (snr_db / 10)))
+    return np.clip(clean + noise, -1.0, 1.0).astype(np.float32)
+
+
+def read_wav(path: str) -> np.ndarray:
+    """Read a 16-bit PCM WAV as mono float32 at 48 kHz"""
+    with wave.open(path, "rb") as f:
+        if f.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV is supported")
+        rate = f.getframerate()
+        channels = f.getnchannels()
+        data = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+
+    samples = data.reshape(-1, channels).mean(axis=1).astype(np.float32) / 32768.0
+    if rate != SAMPLE_RATE:
+        positions = np.arange(int(len(samples) * SAMPLE_RATE / rate)) * rate / SAMPLE_RATE
+        samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+    return samples
+
+
+def _align(reference: np.ndarray, estimate: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Remove engine latency by cross-correlating against the reference"""
+    n = min(len(reference), len(estimate))
+    reference, estimate = reference[:n], estimate[:n]
+    size = 1 << int(np.ceil(np.log2(2 * n)))
+    corr = np.fft.irfft(np.fft.rfft(estimate, size) * np.conj(np.fft.rfft(reference, size)), size)
+    lag = int(np.argmax(corr[: MAX_ALIGN_LAG + 1]))
+    return reference[: n - lag], estimate[lag:n]
+
+
+def si_snr(reference: np.ndarray, estimate: np.ndarray) -> float:
+    """Scale-invariant SNR in dB"""
+    reference = reference - reference.mean()
+    estimate = estimate - estimate.mean()
+    target = np.dot(estimate, reference) / max(np.dot(reference, reference), 1e-12) * reference
+    error = estimate - target
+    power = max(np.dot(target, target), 1e-12) / max(np.dot(error, error), 1e-12)
+    return float(10 * np.log10(power))
+
+
+def segmental_snr(reference: np.ndarray, estimate: np.ndarray, frame: int = CHUNK_SIZE) -> float:
+    """Mean per-frame SNR over active frames, clamped to [-10, 35] dB"""
+    values = []
+    for start in range(0, len(reference) - frame + 1, frame):
+        ref = reference[start : start + frame]
+        energy = np.dot(ref, ref)
+        if energy < frame * 1e-5:
+            continue
+        err = ref - estimate[start : start + frame]
+        snr = 10 * np.log10(energy / max(np.dot(err, err), 1e-12))
+        values.append(min(max(snr, -10.0), 35.0))
+    return float(np.mean(values)) if values else 0.0
+
+
+def _quality(clean: np.ndarray, noisy: np.ndarray, output: np.ndarray) -> Dict[str, float]:
+    ref_in, est_in = _align(clean, noisy)
+    ref_out, est_out = _align(clean, output)
+    si_in, si_out = si_snr(ref_in, est_in), si_snr(ref_out, est_out)
+    seg_in, seg_out = segmental_snr(ref_in, est_in), segmental_snr(ref_out, est_out)
+    return {
+        "si_snr_in_db": si_in,
+        "si_snr_out_db": si_out,
+        "si_snr_improvement_db": si_out - si_in,
+        "seg_snr_improvement_db": seg_out - seg_in,
+    }
+
+
+def run_engine(name: str, signals: List[Tuple[str, np.ndarray, Optional[np.ndarray]]]) -> Dict:
+    """Benchmark one engine over every signal"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        denoiser, note = ENGINES[name](tmp_dir)
+        if denoiser is None:
+            return {"skipped": note}
+
+        result: Dict = {"note": note} if note else {}
+        latencies: List[float] = []
+        processing = 0.0
+        audio_seconds = 0.0
+        quality = {}
+
+        for signal_name, noisy, clean in signals:
+            pcm = (np.clip(noisy, -1.0, 32767 / 32768.0) * 32768).astype(np.int16).tobytes()
+            out_chunks = []
+            step = CHUNK_SIZE * 2
+            for offset in range(0, len(pcm) - step + 1, step):
+                chunk = pcm[offset : offset + step]
+                t0 = time.perf_counter()
+                processed = denoiser.process(chunk)
+                elapsed = time.perf_counter() - t0
+                latencies.append(elapsed * 1000.0)
+                processing += elapsed
+                out_chunks.append(processed if processed else chunk)
+
+            audio_seconds += (len(pcm) // step) * CHUNK_SIZE / SAMPLE_RATE
+            if clean is not None:
+                output = np.frombuffer(b"".join(out_chunks), dtype=np.int16) / 32768.0
+                quality[signal_name] = _quality(clean, noisy, output.astype(np.float32))
+
+        denoiser.cleanup()
+
+    result["realtime_factor"] = processing / audio_seconds if audio_seconds else None
+    result["latency"] = latency_summary(latencies)
+    result["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    result["quality"] = quality
+    return result
+
+
+def _run_isolated(name: str, signals) -> Dict:
+    # A fresh interpreter per engine keeps peak RSS attributable to that engine
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1) as pool:
+        return pool.apply(run_engine, (name, signals))
+
+
+def build_signals(seconds: float, snr_db: float, wav_paths: List[str]):
+    clean = synthesize_ssb(seconds)
+    signals = [(f"synthetic_ssb_{snr_db:g}db", add_noise(clean, snr_db), clean)]
+    for path in wav_paths:
+        root, _ = os.path.splitext(path)
+        reference = f"{root}.clean.wav"
+        clean_ref = read_wav(reference) if os.path.exists(reference) else None
+        signals.append((os.path.basename(path), read_wav(path), clean_ref))
+    return signals
+
+
+def run(engines: List[str], seconds: float, snr_db: float, wav_paths: List[str], isolate: bool):
+    signals = build_signals(seconds, snr_db, wav_paths)
+    results = {}
+    for name in engines:
+        results[name] = _run_isolated(name, signals) if isolate else run_engine(name, signals)
+    return {
+        "benchmark": "denoiser_harness",
+        "system": system_info(),
+        "git_commit": git_commit(),
+        "config": {
+            "seconds": seconds,
+            "snr_db": snr_db,
+            "chunk_size": CHUNK_SIZE,
+            "sample_rate": SAMPLE_RATE,
+            "wav": wav_paths,
+        },
+        "engines": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--engines",
+        default=",".join(ENGINES),
+        help=f"Comma-separated engines (default: {','.join(ENGINES)})",
+    )
+    parser.add_argument("--seconds", type=float, default=10.0, help="Synthetic audio length")
+    parser.add_argument("--snr", type=float, default=5.0, help="Synthetic input SNR in dB")
+    parser.add_argument("--wav", action="append", default=[], help="Recorded WAV fixture")
+    parser.add_argument(
+        "--no-isolate", action="store_true", help="Run engines in this process (shared RSS)"
+    )
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    engines = [e.strip() for e in args.engines.split(",") if e.strip()]
+    unknown = [e for e in engines if e not in ENGINES]
+    if unknown:
+        parser.error(f"unknown engines: {', '.join(unknown)}")
+
+    write_json(run(engines, args.seconds, args.snr, args.wav, not args.no_isolate), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""ONNX Runtime vs PyTorch CPU denoiser benchmark
+
+Times the same convolutional denoiser through PyTorch (CPU) and through
+``OnnxDenoiser`` in fp32 and int8, reporting throughput and per-chunk
+latency. Intended to be run on the ARM64 target; results include the
+machine architecture so runs from different hosts are not confused.
+
+Usage:
+    python -m bench.onnx_vs_torch [--model denoiser.onnx] [--seconds 10]
+                                  [--frames 1024] [--threads 0] [--output out.json]
+
+Without --model a reference model is built: exported from PyTorch when it
+is installed (which also enables the torch column), otherwise assembled
+directly with the onnx helper API.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from typing import Callable, Dict
+
+import numpy as np
+
+from ai_denoiser.onnx_engine import OnnxDenoiser
+from bench.common import latency_summary, system_info, write_json
+
+SAMPLE_RATE = 48000
+CHANNELS = 16
+KERNEL = 31
+
+
+def _reference_weights(seed: int = 0):
+    rng = np.random.default_rng(seed)
+    w1 = (rng.standard_normal((CHANNELS, 1, KERNEL)) * 0.1).astype(np.float32)
+    b1 = np.zeros(CHANNELS, dtype=np.float32)
+    w2 = (rng.standard_normal((1, CHANNELS, KERNEL)) * 0.1).astype(np.float32)
+    b2 = np.zeros(1, dtype=np.float32)
+    return w1, b1, w2, b2
+
+
+def build_torch_model():
+    """Build the reference conv denoiser in PyTorch, or None if unavailable"""
+    try:
+        import torch
+    except ImportError:
+        return None
+
+    w1, b1, w2, b2 = _reference_weights()
+
+    class ConvDenoiser(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.conv1 = torch.nn.Conv1d(1, CHANNELS, KERNEL, padding=KERNEL // 2)
+            self.conv2 = torch.nn.Conv1d(CHANNELS, 1, KERNEL, padding=KERNEL // 2)
+            with torch.no_grad():
+                self.conv1.weight.copy_(torch.from_numpy(w1))
+                self.conv1.bias.copy_(torch.from_numpy(b1))
+                self.conv2.weight.copy_(torch.from_numpy(w2))
+                self.conv2.bias.copy_(torch.from_numpy(b2))
+
+        def forward(self, x):
+            y = torch.relu(self.conv1(x.unsqueeze(1)))
+            return self.conv2(y).squeeze(1)
+
+    return ConvDenoiser().eval()
+
+
+def export_reference_model(path: str, frames: int, torch_model=None) -> None:
+    """Write the reference model as ONNX with a [1, frames] waveform IO"""
+    if torch_model is not None:
+        import torch
+
+        torch.onnx.export(
+            torch_model,
+            torch.zeros(1, frames),
+            path,
+            input_names=["audio"],
+            output_names=["enhanced"],
+        )
+        return
+
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+
+    w1, b1, w2, b2 = _reference_weights()
+    pad = [KERNEL // 2, KERNEL // 2]
+    nodes = [
+        helper.make_node("Unsqueeze", ["audio", "axis1"], ["x3"]),
+        helper.make_node("Conv", ["x3", "w1", "b1"], ["h"], pads=pad),
+        helper.make_node("Relu", ["h"], ["hr"]),
+        helper.make_node("Conv", ["hr", "w2", "b2"], ["y3"], pads=pad),
+        helper.make_node("Squeeze", ["y3", "axis1"], ["enhanced"]),
+    ]
+    initializers = [
+        numpy_helper.from_array(np.array([1], dtype=np.int64), "axis1"),
+        numpy_helper.from_array(w1, "w1"),
+        numpy_helper.from_array(b1, "b1"),
+        numpy_helper.from_array(w2, "w2"),
+        numpy_helper.from_array(b2, "b2"),
+    ]
+    graph = helper.make_graph(
+        nodes,
+        "reference_denoiser",
+        [helper.make_tensor_value_info("audio", TensorProto.FLOAT, [1, frames])],
+        [helper.make_tensor_value_info("enhanced", TensorProto.FLOAT, [1, frames])],
+        initializers,
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)], ir_version=8)
+    onnx.save(model, path)
+
+
+def _time_chunks(run: Callable[[np.ndarray], np.ndarray], audio: np.ndarray, frames: int):
+    for _ in range(5):
+        run(audio[:frames])  # warm-up
+
+    latencies = []
+    start = time.perf_counter()
+    for offset in range(0, len(audio) - frames + 1, frames):
+        t0 = time.perf_counter()
+        run(audio[offset : offset + frames])
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+    elapsed = time.perf_counter() - start
+
+    audio_seconds = len(latencies) * frames / SAMPLE_RATE
+    result = latency_summary(latencies)
+    result["realtime_factor"] = elapsed / audio_seconds
+    result["throughput_x_realtime"] = audio_seconds / elapsed
+    return result
+
+
+def run_benchmark(model_path: str, seconds: float, frames: int, threads: int, torch_model=None):
+    rng = np.random.default_rng(1)
+    audio = (rng.standard_normal(int(seconds * SAMPLE_RATE)) * 0.1).astype(np.float32)
+    results: Dict[str, Dict] = {}
+
+    if torch_model is not None:
+        import torch
+
+        if threads:
+            torch.set_num_threads(threads)
+
+        def torch_run(chunk):
+            with torch.no_grad():
+                return torch_model(torch.from_numpy(chunk).unsqueeze(0)).numpy()
+
+        results["torch_fp32"] = _time_chunks(torch_run, audio, frames)
+
+    for name, quantize in (("onnx_fp32", False), ("onnx_int8", True)):
+        denoiser = OnnxDenoiser(
+            os.path.dirname(model_path),
+            model_path=model_path,
+            quantize=quantize,
+            num_threads=threads,
+        )
+        if not denoiser.load_model():
+            results[name] = {"error": "failed to load"}
+            continue
+        results[name] = _time_chunks(denoiser.process_float, audio, denoiser.frames)
+        denoiser.cleanup()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", help="Exported ONNX model (default: reference model)")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Audio to process")
+    parser.add_argument("--frames", type=int, default=1024, help="Samples per chunk")
+    parser.add_argument("--threads", type=int, default=0, help="Threads (0 = all cores)")
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    torch_model = build_torch_model()
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = args.model
+        if model_path is None:
+            model_path = os.path.join(tmp, "denoiser.onnx")
+            export_reference_model(model_path, args.frames, torch_model)
+        else:
+            torch_model = None  # No torch equivalent for an arbitrary model
+
+        results = run_benchmark(model_path, args.seconds, args.frames, args.threads, torch_model)
+
+    write_json(
+        {
+            "benchmark": "onnx_vs_torch",
+            "system": system_info(),
+            "frames": args.frames,
+            "results": results,
+        },
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,772 @@
+"""End-to-end performance suite with regression gates
+
+Measures the application's hot paths without a radio:
+
+- command: round-trip latency and pipelined throughput through
+  FlexRadioClient against the local RadioSimulator
+- ptt: ``xmit`` latency while a burst of slider commands is outstanding,
+  with the priority queue and with an unbounded (FIFO) in-flight window
+- receive: TCP line framing rate in RadioProtocol versus the old
+  StreamReader readline loop, and CPU share at 10k status lines/s
+- sessions: client CPU with 1 to 4 simulated radios in a SessionManager,
+  with background radios throttled and with every radio at full rate
+- fanout: WebSocketFanout CPU serving 10 and 20 viewers 30 fps panadapter
+  frames plus waterfall rows, and bytes per frame versus raw and JSON
+- cat: rigctld server poll rate and CPU with 5 clients polling 50 times a
+  second, as WSJT-X and loggers do
+- memory: ChannelStore with 50k channels: bulk insert, nearest channel to
+  the VFO, name prefix and fuzzy search, and a deep page of the list
+- import: channel_io import and export rate of 100k channels as CSV,
+  CHIRP CSV and ADIF, 5% of them invalid
+- status: ``S|slice`` line parse rate in FlexRadioAPI._handle_status
+- pan: VITA-49 panadapter decode and PanadapterWidget render time
+- waterfall: WaterfallWidget line update cost
+- audio: RX audio callback work (jitter buffer, decode, resample, DSP chain)
+- denoiser: real-time factor of the spectral gate engine
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python -m bench.perf_suite [--only pan,waterfall]
+        [--quick] [--output results.json]
+        [--baseline baseline.json] [--threshold 0.25]
+
+With ``--baseline`` every gated metric is compared to the saved run and
+the process exits with status 1 when one regresses by more than the
+threshold (a fraction, 0.25 = 25% worse).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from bench.common import git_commit, latency_summary, system_info, write_json  # noqa: E402
+
+# (benchmark, metric) -> True when higher is better
+GATES = {
+    ("command", "roundtrip_p50_ms"): False,
+    ("command", "commands_per_s"): True,
+    ("ptt", "ptt_p50_ms"): False,
+    ("receive", "lines_per_s"): True,
+    ("sessions", "cpu_4_radios_pct"): False,
+    ("fanout", "cpu_10_viewers_pct"): False,
+    ("cat", "polls_per_s"): True,
+    ("memory", "nearest_us"): False,
+    ("import", "csv_rows_per_s"): True,
+    ("status", "lines_per_s"): True,
+    ("pan", "decode_us"): False,
+    ("pan", "render_ms"): False,
+    ("waterfall", "update_ms"): False,
+    ("audio", "callback_p99_ms"): False,
+    ("denoiser", "realtime_factor"): False,
+}
+
+
+def _timed(fn: Callable[[], None], iterations: int) -> List[float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return samples
+
+
+def bench_command(quick: bool) -> Dict:
+    from flexradio_client import FlexRadioClient
+    from radio_simulator import RadioSimulator
+
+    sequential = 100 if quick else 1000
+    pipelined = 200 if quick else 900
+
+    async def run():
+        sim = RadioSimulator(port=0, heartbeat_interval=0)
+        await sim.start()
+        client = FlexRadioClient("127.0.0.1", sim.port)
+        await client.connect()
+        try:
+            samples = []
+            for _ in range(sequential):
+                start = time.perf_counter()
+                await client.send_command("ping")
+                samples.append((time.perf_counter() - start) * 1000.0)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(client.send_command("ping") for _ in range(pipelined)))
+            throughput = pipelined / (time.perf_counter() - start)
+        finally:
+            await client.disconnect()
+            await sim.stop()
+        return samples, throughput
+
+    samples, throughput = asyncio.run(run())
+    summary = latency_summary(samples)
+    return {
+        "roundtrip": summary,
+        "roundtrip_p50_ms": summary["p50_ms"],
+        "commands_per_s": throughput,
+    }
+
+
+def bench_ptt(quick: bool) -> Dict:
+    from flexradio_client import FlexRadioClient
+    from radio_simulator import RadioSimulator
+
+    rounds = 10 if quick else 50
+    burst = 200
+
+    async def measure(max_in_flight: int) -> List[float]:
+        # 1 ms per command: a burst of 200 keeps the radio busy for ~200 ms
+        sim = RadioSimulator(port=0, heartbeat_interval=0, command_time=0.001)
+        await sim.start()
+        client = FlexRadioClient("127.0.0.1", sim.port, max_in_flight=max_in_flight)
+        await client.connect()
+        try:
+            await client.send_command("slice create 0 usb")
+            samples = []
+            for i in range(rounds):
+                load = [
+                    asyncio.ensure_future(client.send_command(f"slice set 0 af_gain={j % 100}"))
+                    for j in range(burst)
+                ]
+                await asyncio.sleep(0)
+                start = time.perf_counter()
+                await client.send_command("xmit 0" if i % 2 == 0 else "xmit off")
+                samples.append((time.perf_counter() - start) * 1000.0)
+                await asyncio.gather(*load)
+        finally:
+            await client.disconnect()
+            await sim.stop()
+        return samples
+
+    prioritized = latency_summary(asyncio.run(measure(8)))
+    fifo = latency_summary(asyncio.run(measure(1_000_000)))
+    return {
+        "ptt": prioritized,
+        "ptt_p50_ms": prioritized["p50_ms"],
+        "fifo": fifo,
+        "fifo_p50_ms": fifo["p50_ms"],
+    }
+
+
+def bench_receive(quick: bool) -> Dict:
+    from unittest.mock import Mock
+
+    from flexradio_client import FlexRadioClient, RadioProtocol
+
+    lines = [
+        f"S{i:08X}|meter|{i % 64}.num={i % 512}#{i % 64 + 1}.num={i % 256}#\n"
+        for i in range(10000)
+    ]
+    data = "".join(lines).encode()
+    # Status floods arrive as full TCP segments, not one line per read
+    chunks = [data[i : i + 4096] for i in range(0, len(data), 4096)]
+    rounds = 5 if quick else 50
+
+    async def protocol_rate() -> float:
+        client = FlexRadioClient("127.0.0.1")
+        client.set_status_callback(lambda line: None)
+        protocol = RadioProtocol(client)
+        protocol.connection_made(Mock())
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for chunk in chunks:
+                protocol.data_received(chunk)
+        return rounds * len(lines) / (time.perf_counter() - start)
+
+    async def readline_rate() -> float:
+        # The receive loop this replaced: one readline/decode/strip per line
+        callback = lambda line: None  # noqa: E731
+        start = time.perf_counter()
+        for _ in range(rounds):
+            reader = asyncio.StreamReader()
+            for chunk in chunks:
+                reader.feed_data(chunk)
+            reader.feed_eof()
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                line = raw.decode().strip()
+                if line.startswith("S"):
+                    callback(line)
+        return rounds * len(lines) / (time.perf_counter() - start)
+
+    rate = asyncio.run(protocol_rate())
+    legacy = asyncio.run(readline_rate())
+    return {
+        "lines_per_s": rate,
+        "cpu_at_10k_lines_per_s": 10000 / rate,
+        "readline_lines_per_s": legacy,
+        "readline_cpu_at_10k_lines_per_s": 10000 / legacy,
+    }
+
+
+def _serve_simulators(hosts: List[str], ports, stop):
+    """Child process: one RadioSimulator per host until ``stop`` is set"""
+    from radio_simulator import RadioSimulator
+
+    async def serve():
+        sims = [RadioSimulator(host=host, port=0, heartbeat_interval=0) for host in hosts]
+        for sim in sims:
+            await sim.start()
+        ports.put([sim.port for sim in sims])
+        while not stop.is_set():
+            await asyncio.sleep(0.05)
+        for sim in sims:
+            await sim.stop()
+
+    asyncio.run(serve())
+
+
+def bench_sessions(quick: bool) -> Dict:
+    import multiprocessing
+
+    from session_manager import SessionManager
+
+    seconds = 1.0 if quick else 3.0
+    # One loopback address per radio so the shared ingest can tell them apart
+    hosts = [f"127.0.0.{i}" for i in range(2, 6)]
+    # The simulators run in another process so only the client's CPU is measured
+    ctx = multiprocessing.get_context("spawn")
+    ports, stop = ctx.Queue(), ctx.Event()
+    server = ctx.Process(target=_serve_simulators, args=(hosts, ports, stop), daemon=True)
+    server.start()
+
+    async def measure(radio_ports: List[int], count: int, background_fps: int) -> float:
+        manager = SessionManager(
+            udp_port=0, udp_host="127.0.0.1", active_fps=15, background_fps=background_fps
+        )
+        await manager.start()
+        try:
+            for i in range(count):
+                session = await manager.add_radio(f"radio{i}", hosts[i], radio_ports[i])
+                # Level to dB conversion, as a display would do per frame
+                session.display.add_pan_callback(lambda bins: -bins.astype(np.float32) / 8.0)
+            await asyncio.sleep(0.5)
+            cpu, wall = time.process_time(), time.perf_counter()
+            await asyncio.sleep(seconds)
+            return 100.0 * (time.process_time() - cpu) / (time.perf_counter() - wall)
+        finally:
+            await manager.stop()
+
+    try:
+        radio_ports = ports.get(timeout=30)
+        throttled = {n: asyncio.run(measure(radio_ports, n, 2)) for n in range(1, 5)}
+        full_rate = {n: asyncio.run(measure(radio_ports, n, 15)) for n in range(1, 5)}
+    finally:
+        stop.set()
+        server.join(5)
+    return {
+        "cpu_pct": {str(n): pct for n, pct in throttled.items()},
+        "full_rate_cpu_pct": {str(n): pct for n, pct in full_rate.items()},
+        "cpu_4_radios_pct": throttled[4],
+        "full_rate_cpu_4_radios_pct": full_rate[4],
+    }
+
+
+def _run_viewers(port: int, count: int, ready, stop, received):
+    """Child process: ``count`` WebSocket viewers reading frames until ``stop`` is set"""
+    from ws_fanout import FanoutViewer
+
+    async def view(index: int) -> int:
+        viewer = FanoutViewer()
+        await viewer.connect("127.0.0.1", port)
+        # Half the viewers want full width, half a decimated 512 bin view
+        await viewer.subscribe("bench", width=0 if index % 2 else 512, fps=30)
+        ready.put(index)
+        frames = 0
+        try:
+            while not stop.is_set():
+                try:
+                    await asyncio.wait_for(viewer.receive(), 0.2)
+                    frames += 1
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            await viewer.close()
+        return frames
+
+    async def main():
+        received.put(sum(await asyncio.gather(*(view(i) for i in range(count)))))
+
+    asyncio.run(main())
+
+
+def bench_fanout(quick: bool) -> Dict:
+    import multiprocessing
+
+    from metrics import MetricsRegistry
+    from vita49 import WaterfallTile
+    from ws_fanout import WebSocketFanout, encode_rows
+
+    seconds = 1.0 if quick else 3.0
+    rng = np.random.default_rng(0)
+    floor = rng.normal(800, 6, 1024)
+
+    def pan_frame():
+        bins = floor + rng.normal(0, 4, 1024)
+        bins[480:500] -= 400  # A signal
+        return np.clip(bins, 0, 1023).astype(np.uint16)
+
+    async def measure(count: int) -> Dict:
+        metrics = MetricsRegistry()
+        fanout = WebSocketFanout(port=0, metrics=metrics)
+        await fanout.start()
+        # The viewers run in another process so only the server's CPU is measured
+        ctx = multiprocessing.get_context("spawn")
+        ready, stop, received = ctx.Queue(), ctx.Event(), ctx.Queue()
+        viewers = ctx.Process(
+            target=_run_viewers, args=(fanout.port, count, ready, stop, received), daemon=True
+        )
+        viewers.start()
+        loop = asyncio.get_running_loop()
+        try:
+            for _ in range(count):
+                await loop.run_in_executor(None, ready.get, True, 30)
+            await asyncio.sleep(0.2)
+            frames = int(seconds * 30)
+            cpu, wall = time.process_time(), time.perf_counter()
+            for index in range(frames):
+                fanout.publish_pan("bench", pan_frame())
+                if index % 3 == 0:
+                    data = pan_frame()[np.newaxis, :]
+                    tile = WaterfallTile(14.0e6, 200.0, 100, 1024, 1, index, 0, data)
+                    fanout.publish_waterfall("bench", tile)
+                await asyncio.sleep(1 / 30)
+            pct = 100.0 * (time.process_time() - cpu) / (time.perf_counter() - wall)
+            await asyncio.sleep(0.3)
+            stop.set()
+            delivered = await loop.run_in_executor(None, received.get, True, 30)
+        finally:
+            stop.set()
+            await fanout.stop()
+            viewers.join(5)
+        return {
+            "cpu_pct": pct,
+            "frames_sent": metrics.get("fanout_frames_total").value,
+            "frames_received": delivered,
+            "frames_dropped": metrics.get("fanout_frames_dropped_total").value,
+        }
+
+    results = {count: asyncio.run(measure(count)) for count in (10, 20)}
+    bins = pan_frame()
+    encoded = len(encode_rows(bins)[1])
+    as_json = len(json.dumps({"event": "pan", "radio": "bench", "bins": bins.tolist()}))
+    return {
+        "viewers": {str(count): result for count, result in results.items()},
+        "cpu_10_viewers_pct": results[10]["cpu_pct"],
+        "cpu_20_viewers_pct": results[20]["cpu_pct"],
+        "bytes_per_frame": {"encoded": encoded, "raw": bins.nbytes, "json": as_json},
+    }
+
+
+def _run_cat_clients(port: int, count: int, rate: float, seconds: float, results):
+    """Child process: ``count`` clients sending ``f``/``m`` polls, ``rate`` per second each
+
+    A rate of 0 polls back to back. Puts the total number of replies read.
+    """
+
+    async def poll() -> int:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        deadline = time.perf_counter() + seconds
+        polls = 0
+        while time.perf_counter() < deadline:
+            writer.write(b"f\nm\n")
+            await reader.readline()
+            await reader.readline()
+            await reader.readline()
+            polls += 2
+            if rate:
+                await asyncio.sleep(2 / rate)
+        writer.write(b"q\n")
+        writer.close()
+        return polls
+
+    async def main():
+        results.put(sum(await asyncio.gather(*(poll() for _ in range(count)))))
+
+    asyncio.run(main())
+
+
+def bench_cat(quick: bool) -> Dict:
+    import multiprocessing
+    from unittest.mock import AsyncMock, Mock
+
+    from cat_server import RigctldServer
+    from flexradio_api import FlexRadioAPI
+    from metrics import MetricsRegistry
+
+    seconds = 1.0 if quick else 3.0
+    client = Mock()
+    client.send_command = AsyncMock(return_value="")
+    api = FlexRadioAPI(client, metrics=MetricsRegistry())
+    api.slice_id = "0"
+
+    async def measure(rate: float) -> Dict:
+        server = RigctldServer(api, port=0, metrics=MetricsRegistry())
+        await server.start()
+        # The clients run in another process so only the server's CPU is measured
+        ctx = multiprocessing.get_context("spawn")
+        results = ctx.Queue()
+        clients = ctx.Process(
+            target=_run_cat_clients, args=(server.port, 5, rate, seconds, results), daemon=True
+        )
+        clients.start()
+        loop = asyncio.get_running_loop()
+        try:
+            # Skip the child's start-up before measuring
+            while not server.writers:
+                await asyncio.sleep(0.01)
+            cpu, wall = time.process_time(), time.perf_counter()
+            polls = await loop.run_in_executor(None, results.get, True, 60)
+            elapsed = time.perf_counter() - wall
+            pct = 100.0 * (time.process_time() - cpu) / elapsed
+        finally:
+            await server.stop()
+            clients.join(5)
+        return {"polls_per_s": polls / elapsed, "cpu_pct": pct}
+
+    paced = asyncio.run(measure(50))
+    flat_out = asyncio.run(measure(0))
+    return {
+        "polls_per_s": flat_out["polls_per_s"],
+        "flat_out_cpu_pct": flat_out["cpu_pct"],
+        "cpu_5_clients_50hz_pct": paced["cpu_pct"],
+    }
+
+
+def bench_memory(quick: bool) -> Dict:
+    import random
+
+    from channel_store import ChannelStore
+    from memory_manager import MemoryChannel
+
+    count = 10000 if quick else 50000
+    rng = random.Random(0)
+    words = ["Repeater", "Net", "Beacon", "Club", "County", "Emergency", "Contest", "Broadcast"]
+    channels = [
+        MemoryChannel(
+            f"{rng.choice(words)} {rng.choice(words)} {i}",
+            rng.randrange(1800000, 30000000),
+            rng.choice(["usb", "lsb", "cw", "am", "fm"]),
+        )
+        for i in range(count)
+    ]
+    store = ChannelStore()
+    start = time.perf_counter()
+    store.add_many(channels)
+    insert_s = time.perf_counter() - start
+
+    lookups = 200 if quick else 2000
+    vfo = [rng.randrange(1800000, 30000000) for _ in range(lookups)]
+    start = time.perf_counter()
+    for frequency in vfo:
+        store.nearest(frequency)
+    nearest_us = (time.perf_counter() - start) * 1e6 / lookups
+
+    search_ms = _timed(lambda: store.search("emergency c"), 50)
+    fuzzy_ms = _timed(lambda: store.fuzzy_search("emrg cnty"), 10)
+    middle = store.channel_at(count // 2)
+    page_ms = _timed(lambda: store.page(200, after=middle), 20)
+    store.close()
+    return {
+        "channels": count,
+        "insert_s": insert_s,
+        "nearest_us": nearest_us,
+        "search_p50_ms": float(np.median(search_ms)),
+        "fuzzy_p50_ms": float(np.median(fuzzy_ms)),
+        "page_p50_ms": float(np.median(page_ms)),
+    }
+
+
+def bench_import(quick: bool) -> Dict:
+    import random
+    import tempfile
+
+    from channel_io import export_channels, import_channels
+    from channel_store import ChannelStore
+    from memory_manager import MemoryChannel
+
+    count = 20000 if quick else 100000
+    rng = random.Random(0)
+    source = ChannelStore()
+    source.add_many(
+        MemoryChannel(
+            f"Channel {i}",
+            rng.randrange(1800000, 30000000),
+            rng.choice(["usb", "lsb", "cw", "am", "fm"]),
+            comment="Imported" if i % 3 else "",
+        )
+        for i in range(count)
+    )
+    results = {"channels": count}
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt, name in (("csv", "list.csv"), ("chirp", "chirp.csv"), ("adif", "log.adi")):
+            path = os.path.join(tmp, name)
+            start = time.perf_counter()
+            export_channels(source, path, fmt)
+            export_s = time.perf_counter() - start
+            # Make 5% of the rows invalid so the error path is measured too
+            with open(path, "a", encoding="utf-8") as f:
+                for i in range(count // 20):
+                    if fmt == "adif":
+                        f.write(f"<CALL:4>BAD{i % 10} <FREQ:5>146.5 <MODE:2>FM <EOR>\n")
+                    elif fmt == "chirp":
+                        f.write(f"{i},Bad,146.520000,,0,,88.5,88.5,023,NN,FM,5.00,,,,,\n")
+                    else:
+                        f.write(f"Bad {i},146520000,fm,50,50,\n")
+            target = ChannelStore(os.path.join(tmp, f"{fmt}.db"))
+            start = time.perf_counter()
+            report = import_channels(target, path, fmt)
+            import_s = time.perf_counter() - start
+            target.close()
+            assert report.imported == count and report.skipped == count // 20
+            results[f"{fmt}_rows_per_s"] = (count + count // 20) / import_s
+            results[f"{fmt}_import_s"] = import_s
+            results[f"{fmt}_export_s"] = export_s
+    source.close()
+    return results
+
+
+def bench_status(quick: bool) -> Dict:
+    from unittest.mock import Mock
+
+    from flexradio_api import FlexRadioAPI
+
+    api = FlexRadioAPI(Mock())
+    api.slice_id = "0"
+    api.add_state_callback(lambda state: None)
+    lines = [
+        f"S|slice|0|frequency={7000000 + i * 10}|mode=usb|rfpower=50|af_gain={i % 100}"
+        for i in range(1000)
+    ]
+    rounds = 20 if quick else 200
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for line in lines:
+            api._handle_status(line)
+    elapsed = time.perf_counter() - start
+    count = rounds * len(lines)
+    return {"lines_per_s": count / elapsed, "us_per_line": elapsed * 1e6 / count}
+
+
+def _qt_app():
+    from PyQt6.QtWidgets import QApplication
+
+    return QApplication.instance() or QApplication(sys.argv[:1])
+
+
+def bench_pan(quick: bool) -> Dict:
+    from panadapter_display import PanadapterWidget
+    from vita49 import (
+        PACKET_CLASS_PANADAPTER,
+        PacketHeaderWriter,
+        pack_pan_payload,
+        parse_packet,
+        parse_pan_payload,
+    )
+
+    app = _qt_app()
+    width = 1024
+    header = PacketHeaderWriter(0x40000000, PACKET_CLASS_PANADAPTER, 1)
+    rng = np.random.default_rng(0)
+    datagrams = []
+    for frame in range(50):
+        bins = rng.integers(0, 1024, width).astype(np.uint16)
+        payload = pack_pan_payload(bins, frame)
+        datagrams.append(bytes(header.next_header(len(payload), 0)) + payload)
+
+    freqs = 7150000 + (np.arange(width) - width / 2) * (192000 / width)
+    iterations = 200 if quick else 2000
+
+    def decode(i=[0]):
+        data = datagrams[i[0] % len(datagrams)]
+        i[0] += 1
+        frame = parse_pan_payload(parse_packet(data).payload)
+        return -frame.bins.astype(np.float32) / 8.0
+
+    decode_ms = _timed(decode, iterations)
+
+    widget = PanadapterWidget()
+    widget.resize(800, 300)
+    widget.show()
+    magnitudes = [decode() for _ in range(len(datagrams))]
+
+    def render(i=[0]):
+        widget.update(freqs, magnitudes[i[0] % len(magnitudes)])
+        i[0] += 1
+        app.processEvents()
+
+    render_ms = _timed(render, iterations // 10)
+    widget.close()
+    return {
+        "decode_us": float(np.median(decode_ms)) * 1000.0,
+        "render_ms": float(np.median(render_ms)),
+        "render": latency_summary(render_ms),
+    }
+
+
+def bench_waterfall(quick: bool) -> Dict:
+    from waterfall_display import WaterfallWidget
+
+    app = _qt_app()
+    widget = WaterfallWidget(history_lines=100)
+    widget.resize(800, 300)
+    widget.show()
+    lines = np.random.default_rng(0).uniform(0, 255, (50, 1024))
+
+    def update(i=[0]):
+        widget.update(lines[i[0] % len(lines)])
+        i[0] += 1
+        app.processEvents()
+
+    samples = _timed(update, 50 if quick else 500)
+    widget.close()
+    return {"update_ms": float(np.median(samples)), "update": latency_summary(samples)}
+
+
+def bench_audio(quick: bool) -> Dict:
+    from audio_codec import PcmCodec
+    from dsp_chain import AgcStage, DspChain, GainStage, LimiterStage
+    from rx_audio import RxAudioStream
+
+    chunk = 1024
+    stream = RxAudioStream(PcmCodec(24000), output_rate=48000, chunk_size=chunk, jitter_packets=2)
+    chain = DspChain([GainStage(0.8), AgcStage(), LimiterStage()])
+    t = np.arange(128) / 24000
+    payload = np.repeat((0.3 * np.sin(2 * np.pi * 700 * t))[:, None], 2, axis=1).astype(">f4")
+    payload = payload.tobytes()
+    sequence = [0]
+
+    def callback():
+        # Enough packets for one callback, as the UDP receiver would deliver them
+        for _ in range(5):
+            stream.jitter.push(sequence[0] & 0xF, payload)
+            sequence[0] += 1
+        chain.process_bytes(stream.read_bytes())
+
+    samples = _timed(callback, 200 if quick else 2000)
+    summary = latency_summary(samples)
+    budget_ms = chunk / 48000 * 1000.0
+    return {
+        "callback": summary,
+        "callback_p99_ms": summary["p99_ms"],
+        "budget_fraction_p99": summary["p99_ms"] / budget_ms,
+        "underruns": stream.underruns,
+    }
+
+
+def bench_denoiser(quick: bool) -> Dict:
+    from bench import denoiser_harness
+
+    signals = denoiser_harness.build_signals(2.0 if quick else 10.0, 5.0, [])
+    result = denoiser_harness.run_engine("dsp", signals)
+    return {"realtime_factor": result["realtime_factor"], "latency": result["latency"]}
+
+
+BENCHMARKS = {
+    "command": bench_command,
+    "ptt": bench_ptt,
+    "receive": bench_receive,
+    "sessions": bench_sessions,
+    "fanout": bench_fanout,
+    "cat": bench_cat,
+    "memory": bench_memory,
+    "import": bench_import,
+    "status": bench_status,
+    "pan": bench_pan,
+    "waterfall": bench_waterfall,
+    "audio": bench_audio,
+    "denoiser": bench_denoiser,
+}
+
+
+def run(names: List[str], quick: bool = False) -> Dict:
+    results = {}
+    for name in names:
+        print(f"Running {name}...", file=sys.stderr)
+        try:
+            results[name] = BENCHMARKS[name](quick)
+        except Exception as e:
+            results[name] = {"error": str(e)}
+    return {
+        "system": system_info(),
+        "git_commit": git_commit(),
+        "quick": quick,
+        "benchmarks": results,
+    }
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[Dict]:
+    """Gated metrics that are more than ``threshold`` worse than the baseline
+
+    A gated metric the baseline has but a benchmark that ran did not report
+    (it failed or stopped measuring it) counts as a regression too, with
+    ``current`` None. Benchmarks left out with ``--only`` are not compared.
+    """
+    regressions = []
+    for (bench, metric), higher_is_better in GATES.items():
+        old = baseline.get("benchmarks", {}).get(bench, {}).get(metric)
+        current = results.get("benchmarks", {})
+        if not old or bench not in current:
+            continue
+        new = current[bench].get(metric)
+        if new is None:
+            regressions.append(
+                {"metric": f"{bench}.{metric}", "baseline": old, "current": None, "change": None}
+            )
+            continue
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        if worse > threshold:
+            regressions.append(
+                {
+                    "metric": f"{bench}.{metric}",
+                    "baseline": old,
+                    "current": new,
+                    "change": round(change, 4),
+                }
+            )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help="Comma-separated list")
+    parser.add_argument("--quick", action="store_true", help="Fewer iterations (smoke run)")
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    parser.add_argument("--baseline", help="Saved results to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="Allowed regression (0.25 = 25%%)"
+    )
+    args = parser.parse_args(argv)
+
+    results = run([n for n in args.only.split(",") if n], args.quick)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        results["regressions"] = compare(results, baseline, args.threshold)
+    write_json(results, args.output)
+
+    for regression in results.get("regressions", []):
+        if regression["current"] is None:
+            print(f"MISSING {regression['metric']}: not in current results", file=sys.stderr)
+            continue
+        print(
+            f"REGRESSION {regression['metric']}: {regression['baseline']:.4g} -> "
+            f"{regression['current']:.4g} ({regression['change']:+.1%})",
+            file=sys.stderr,
+        )
+    failed = any("error" in r for r in results["benchmarks"].values())
+    return 1 if results.get("regressions") or failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
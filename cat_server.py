@@ -0,0 +1,333 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set
+
+from flexradio_api import FlexRadioAPI
+from metrics import REGISTRY, MetricsRegistry
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 4532
+
+# Hamlib error codes sent as "RPRT <code>"
+RIG_OK = 0
+RIG_EINVAL = -1
+RIG_ENIMPL = -4
+RIG_EIO = -6
+RIG_ENAVAIL = -11
+
+# Hamlib mode names -> radio modes; data modes use the radio's DIGU/DIGL so
+# that reading the mode back returns what a data program set
+MODES_TO_RADIO = {
+    "USB": "usb",
+    "LSB": "lsb",
+    "CW": "cw",
+    "CWR": "cw",
+    "AM": "am",
+    "FM": "fm",
+    "PKTUSB": "digu",
+    "PKTLSB": "digl",
+}
+MODES_FROM_RADIO = {
+    "usb": "USB",
+    "lsb": "LSB",
+    "cw": "CW",
+    "am": "AM",
+    "fm": "FM",
+    "digu": "PKTUSB",
+    "digl": "PKTLSB",
+}
+# Passband reported for each Hamlib mode, in Hz
+PASSBANDS = {
+    "USB": 2700,
+    "LSB": 2700,
+    "PKTUSB": 3000,
+    "PKTLSB": 3000,
+    "CW": 500,
+    "AM": 6000,
+    "FM": 12000,
+}
+
+# Hamlib RIG_MODE_* bits of the modes above, and RIG_VFO_A | RIG_VFO_B
+_MODE_BITS = 0xCAF
+_VFO_BITS = 0x3
+# Hamlib model number of the "NET rigctl" backend
+_RIG_MODEL = 2
+
+
+class CommandCoalescer:
+    """Latest-value-wins writes, at most one in flight per key
+
+    A write for a key that is idle is sent at once. Writes that arrive
+    while one is in flight replace each other, and only the newest is sent
+    when the radio replies, so a client stepping the VFO fifty times a
+    second costs one command per round trip instead of fifty queued ones.
+    :meth:`value` returns the newest value written, so a client that reads
+    straight back what it wrote sees its own write before the radio
+    confirms it.
+    """
+
+    def __init__(self, metrics: Optional[MetricsRegistry] = None):
+        # Key -> (value, send) waiting for the in-flight write of that key
+        self._pending: Dict[Hashable, tuple] = {}
+        self._in_flight: Dict[Hashable, Any] = {}
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+
+        metrics = metrics or REGISTRY
+        self._coalesced = metrics.counter(
+            "cat_writes_coalesced_total", "CAT writes replaced by a newer one before being sent"
+        )
+
+    def submit(self, key: Hashable, value: Any, send: Callable[[Any], Awaitable[None]]):
+        if key in self._pending:
+            self._coalesced.inc()
+        self._pending[key] = (value, send)
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.ensure_future(self._drain(key))
+
+    def value(self, key: Hashable, default: Any = None) -> Any:
+        """Newest value written for ``key``, or ``default`` when none is outstanding"""
+        pending = self._pending.get(key)
+        if pending is not None:
+            return pending[0]
+        return self._in_flight.get(key, default)
+
+    async def flush(self):
+        """Wait until every write has been sent"""
+        while self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    async def _drain(self, key: Hashable):
+        try:
+            while key in self._pending:
+                value, send = self._pending.pop(key)
+                self._in_flight[key] = value
+                try:
+                    await send(value)
+                except Exception as e:
+                    logger.error(f"CAT write {key} failed: {e}")
+        finally:
+            self._in_flight.pop(key, None)
+            self._tasks.pop(key, None)
+
+
+class RigctldServer:
+    """Hamlib ``rigctld`` protocol server on top of :class:`FlexRadioAPI`
+
+    Logging and digital mode programs configured for Hamlib's "NET rigctl"
+    rig share this app's connection instead of each opening their own.
+    Reads (``f``, ``m``, ``t``...) are answered from the API's slice state
+    without a radio round trip; writes (``F``, ``M``, ``T``) go through a
+    :class:`CommandCoalescer` per slice and setting. Commands act on the
+    active slice. ``api`` may be replaced (or set to None) on reconnect.
+    """
+
+    def __init__(
+        self,
+        api: Optional[FlexRadioAPI] = None,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_PORT,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.api = api
+        self.host = host
+        self.port = port
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.writers: Set[asyncio.StreamWriter] = set()
+        self.coalescer = CommandCoalescer(metrics)
+        # Short and long command names -> handler(args) returning the reply text
+        self.commands: Dict[str, Callable[[List[str]], str]] = {}
+        for short, long, handler in (
+            ("f", "get_freq", self._get_freq),
+            ("F", "set_freq", self._set_freq),
+            ("m", "get_mode", self._get_mode),
+            ("M", "set_mode", self._set_mode),
+            ("t", "get_ptt", self._get_ptt),
+            ("T", "set_ptt", self._set_ptt),
+            ("v", "get_vfo", self._get_vfo),
+            ("V", "set_vfo", self._set_vfo),
+            ("s", "get_split_vfo", self._get_split_vfo),
+            ("S", "set_split_vfo", self._set_split_vfo),
+            ("_", "get_info", self._get_info),
+            (None, "dump_state", self._dump_state),
+            (None, "chk_vfo", self._chk_vfo),
+            (None, "get_powerstat", self._get_powerstat),
+        ):
+            if short:
+                self.commands[short] = handler
+            self.commands["\\" + long] = handler
+
+        metrics = metrics or REGISTRY
+        self._requests = metrics.counter("cat_requests_total", "CAT commands handled")
+        metrics.gauge("cat_clients", "Connected CAT clients").set_function(
+            lambda: len(self.writers)
+        )
+
+    async def start(self) -> bool:
+        try:
+            self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        except OSError as e:
+            logger.error(f"Failed to start CAT server on {self.host}:{self.port}: {e}")
+            return False
+        self.port = self.server.sockets[0].getsockname()[1]
+        logger.info(f"rigctld CAT server listening on {self.host}:{self.port}")
+        return True
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            for writer in list(self.writers):
+                writer.close()
+            await self.server.wait_closed()
+            self.server = None
+        await self.coalescer.flush()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.writers.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                words = line.decode("ascii", "replace").split()
+                if not words:
+                    continue
+                if words[0] in ("q", "Q", "\\quit"):
+                    break
+                writer.write(self.execute(words).encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+
+    def execute(self, words: List[str]) -> str:
+        """Reply to one command line split into words"""
+        self._requests.inc()
+        handler = self.commands.get(words[0])
+        if handler is None:
+            return f"RPRT {RIG_ENIMPL}\n"
+        # Clients in VFO mode name the VFO first; there is only the active slice
+        args = [word for word in words[1:] if not word.startswith(("VFO", "currVFO"))]
+        try:
+            return handler(args)
+        except (ValueError, IndexError):
+            return f"RPRT {RIG_EINVAL}\n"
+
+    # -- state ------------------------------------------------------------
+
+    def _connected_api(self) -> Optional[FlexRadioAPI]:
+        api = self.api
+        if api is None or api.client.writer is None or api.slice_id is None:
+            return None
+        return api
+
+    def _current(self, api: FlexRadioAPI, setting: str) -> Any:
+        """Active slice ``setting``, including a write not yet confirmed"""
+        state = api.slice_state
+        return self.coalescer.value((state.slice_id, setting), getattr(state, setting))
+
+    def _write(self, setting: str, value: Any, send: Callable[[Any], Awaitable[None]]) -> str:
+        api = self._connected_api()
+        if api is None:
+            return f"RPRT {RIG_EIO}\n"
+        self.coalescer.submit((api.slice_id, setting), value, send)
+        return f"RPRT {RIG_OK}\n"
+
+    # -- commands ---------------------------------------------------------
+
+    def _get_freq(self, args: List[str]) -> str:
+        api = self._connected_api()
+        if api is None:
+            return f"RPRT {RIG_EIO}\n"
+        return f"{self._current(api, 'frequency')}\n"
+
+    def _set_freq(self, args: List[str]) -> str:
+        hz = int(float(args[0]))
+        api = self._connected_api()
+        if api is not None and not api._validate_frequency(hz):
+            return f"RPRT {RIG_EINVAL}\n"
+        slice_id = api.slice_id if api else None
+        return self._write("frequency", hz, lambda value: api.set_frequency(value, slice_id))
+
+    def _get_mode(self, args: List[str]) -> str:
+        api = self._connected_api()
+        if api is None:
+            return f"RPRT {RIG_EIO}\n"
+        mode = self._current(api, "mode")
+        name = MODES_FROM_RADIO.get(mode.lower(), mode.upper())
+        return f"{name}\n{PASSBANDS.get(name, 0)}\n"
+
+    def _set_mode(self, args: List[str]) -> str:
+        # The passband argument is accepted and ignored, filters stay as set on the radio
+        mode = MODES_TO_RADIO.get(args[0].upper())
+        if mode is None:
+            return f"RPRT {RIG_EINVAL}\n"
+        api = self._connected_api()
+        slice_id = api.slice_id if api else None
+        return self._write("mode", mode, lambda value: api.set_mode(value, slice_id))
+
+    def _get_ptt(self, args: List[str]) -> str:
+        api = self._connected_api()
+        if api is None:
+            return f"RPRT {RIG_EIO}\n"
+        return f"{int(bool(self._current(api, 'ptt')))}\n"
+
+    def _set_ptt(self, args: List[str]) -> str:
+        # 1-3 are PTT on via CAT, data or mic port; all key the active slice
+        on = int(args[0]) != 0
+        api = self._connected_api()
+        return self._write("ptt", on, lambda value: api.set_ptt(value))
+
+    def _get_vfo(self, args: List[str]) -> str:
+        return "VFOA\n"
+
+    def _set_vfo(self, args: List[str]) -> str:
+        return f"RPRT {RIG_OK}\n"
+
+    def _get_split_vfo(self, args: List[str]) -> str:
+        return "0\nVFOA\n"
+
+    def _set_split_vfo(self, args: List[str]) -> str:
+        return f"RPRT {RIG_OK if int(args[0]) == 0 else RIG_ENAVAIL}\n"
+
+    def _get_info(self, args: List[str]) -> str:
+        return "FlexRadio 6400\n"
+
+    def _chk_vfo(self, args: List[str]) -> str:
+        return "0\n"
+
+    def _get_powerstat(self, args: List[str]) -> str:
+        return "1\n"
+
+    def _dump_state(self, args: List[str]) -> str:
+        """Capabilities in the protocol version 0 layout Hamlib's netrigctl backend reads"""
+        no_range = "0 0 0 0 0 0 0"
+        lines = [
+            "0",
+            str(_RIG_MODEL),
+            "2",  # ITU region
+            f"1800000.000000 30000000.000000 {_MODE_BITS:#x} -1 -1 {_VFO_BITS:#x} 0x0",
+            no_range,
+            f"1800000.000000 30000000.000000 {_MODE_BITS:#x} 1000 100000 {_VFO_BITS:#x} 0x0",
+            no_range,
+            f"{_MODE_BITS:#x} 1",  # Tuning steps
+            "0 0",
+            f"{_MODE_BITS:#x} 2700",  # Filters
+            "0 0",
+            "0",  # Max RIT
+            "0",  # Max XIT
+            "0",  # Max IF shift
+            "0",  # Announces
+            "",  # Preamps
+            "",  # Attenuators
+            "0x0",  # get/set func, get/set level, get/set parm
+            "0x0",
+            "0x0",
+            "0x0",
+            "0x0",
+            "0x0",
+        ]
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,495 @@
+import argparse
+import codecs
+import collections
+import csv
+import io
+import logging
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Union
+
+import numpy as np
+
+from channel_store import ChannelStore, name_key
+from memory_manager import BANDS, MAX_FREQUENCY, MIN_FREQUENCY, MODES, MemoryChannel
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "chirp", "adif")
+BATCH_SIZE = 10000
+# Source rows listed per error reason in ImportReport
+EXAMPLE_ROWS = 5
+
+CSV_FIELDS = ("name", "frequency", "mode", "rf_gain", "af_gain", "comment")
+CHIRP_FIELDS = (
+    "Location",
+    "Name",
+    "Frequency",
+    "Duplex",
+    "Offset",
+    "Tone",
+    "rToneFreq",
+    "cToneFreq",
+    "DtcsCode",
+    "DtcsPolarity",
+    "Mode",
+    "TStep",
+    "Skip",
+    "Comment",
+    "URCALL",
+    "RPT1CALL",
+    "RPT2CALL",
+)
+CHIRP_MODES = {
+    "FM": "fm",
+    "NFM": "fm",
+    "AM": "am",
+    "NAM": "am",
+    "USB": "usb",
+    "LSB": "lsb",
+    "CW": "cw",
+}
+# ADIF modes carried on a sideband, imported as USB
+ADIF_DATA_MODES = {"FT8", "FT4", "MFSK", "JT65", "JT9", "JS8", "PSK", "RTTY", "OLIVIA", "WSPR"}
+ADIF_PROGRAM = "FLEXRADIO"
+
+# ADIF field lengths count bytes, so tags are matched in the raw file
+_ADIF_TAG = re.compile(rb"<([A-Za-z0-9_]+)(?::(\d+)(?::[A-Za-z])?)?>")
+
+# Band edges for np.searchsorted: a frequency inside band k lands at index 2k + 1
+_BAND_EDGES = np.array([edge for _, low, high in BANDS for edge in (low, high + 1)])
+_BAND_NAMES = np.array([name for name, _, _ in BANDS] + [""])
+
+
+@dataclass
+class ImportReport:
+    """Outcome of an import: rows stored and rows skipped, grouped by reason"""
+
+    imported: int = 0
+    errors: Dict[str, int] = field(default_factory=collections.Counter)
+    # Reason -> first few source rows (CSV line or ADIF record numbers)
+    examples: Dict[str, List[int]] = field(default_factory=dict)
+
+    @property
+    def skipped(self) -> int:
+        return sum(self.errors.values())
+
+    def add(self, reason: str, rows: np.ndarray):
+        if len(rows):
+            self.errors[reason] += len(rows)
+            examples = self.examples.setdefault(reason, [])
+            examples.extend(int(row) for row in rows[: EXAMPLE_ROWS - len(examples)])
+
+    def summary(self) -> str:
+        text = f"Imported {self.imported} channels"
+        if self.errors:
+            reasons = "; ".join(
+                f"{reason}: {count} (rows {', '.join(map(str, self.examples[reason]))}"
+                + (", ...)" if count > len(self.examples[reason]) else ")")
+                for reason, count in self.errors.items()
+            )
+            text += f", skipped {self.skipped} ({reasons})"
+        return text
+
+
+@dataclass
+class _Batch:
+    """Up to ``BATCH_SIZE`` source rows as columns of strings"""
+
+    rows: List[int] = field(default_factory=list)
+    names: List[str] = field(default_factory=list)
+    frequencies: List[str] = field(default_factory=list)
+    modes: List[str] = field(default_factory=list)
+    rf_gains: List[str] = field(default_factory=list)
+    af_gains: List[str] = field(default_factory=list)
+    comments: List[str] = field(default_factory=list)
+
+
+def detect_format(path: Union[str, Path]) -> str:
+    """"adif" for .adi/.adif files, "chirp" for a CSV with CHIRP's header, else "csv" """
+    path = Path(path)
+    if path.suffix.lower() in (".adi", ".adif"):
+        return "adif"
+    with open(path, newline="", encoding="utf-8-sig", errors="replace") as f:
+        header = f.readline()
+    return "chirp" if header.startswith("Location,") else "csv"
+
+
+def _numbers(values: List[str], default: float = np.nan) -> np.ndarray:
+    """Strings as float64, NaN where unparsable and ``default`` where empty"""
+    try:
+        return np.array(values, dtype=np.float64)
+    except ValueError:
+        pass
+    numbers = np.empty(len(values))
+    for i, value in enumerate(values):
+        value = value.strip()
+        if not value:
+            numbers[i] = default
+            continue
+        try:
+            numbers[i] = float(value)
+        except ValueError:
+            numbers[i] = np.nan
+    return numbers
+
+
+def _validate(batch: _Batch, scale: float, report: ImportReport) -> List[tuple]:
+    """Store rows for the valid part of ``batch``; the rest is counted in ``report``
+
+    Checks the same rules as :class:`MemoryChannel` for the whole batch at
+    once. Each rejected row is reported under its first failing check.
+    """
+    rows = np.array(batch.rows)
+    frequency = np.rint(_numbers(batch.frequencies) * scale)
+    modes = np.array(batch.modes, dtype=str)
+    rf_gain = _numbers(batch.rf_gains, 50)
+    af_gain = _numbers(batch.af_gains, 50)
+
+    valid = np.ones(len(rows), dtype=bool)
+    for reason, ok in (
+        ("invalid frequency", (frequency >= MIN_FREQUENCY) & (frequency <= MAX_FREQUENCY)),
+        ("unsupported mode", np.isin(modes, MODES)),
+        ("invalid RF gain", (rf_gain >= 0) & (rf_gain <= 100)),
+        ("invalid AF gain", (af_gain >= 0) & (af_gain <= 100)),
+    ):
+        report.add(reason, rows[valid & ~ok])
+        valid &= ok
+
+    keep = np.flatnonzero(valid)
+    frequency = frequency[keep].astype(np.int64)
+    band_index = np.searchsorted(_BAND_EDGES, frequency, side="right")
+    bands = _BAND_NAMES[np.where(band_index % 2 == 1, band_index // 2, -1)]
+    names = [batch.names[i].strip() for i in keep]
+    # Unnamed channels (common in CHIRP files) are named by frequency
+    names = [name or f"{hz / 1e6:.4f} MHz" for name, hz in zip(names, frequency.tolist())]
+    return list(
+        zip(
+            names,
+            map(name_key, names),
+            frequency.tolist(),
+            modes[keep].tolist(),
+            bands.tolist(),
+            rf_gain[keep].astype(np.int64).tolist(),
+            af_gain[keep].astype(np.int64).tolist(),
+            [batch.comments[i] for i in keep],
+        )
+    )
+
+
+# -- readers ---------------------------------------------------------------
+
+
+def _csv_rows(stream: TextIO, required: Iterable[str]) -> Iterator[tuple]:
+    """(line number, field by column name getter) for each data row of a CSV file"""
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = {name.strip(): i for i, name in enumerate(header)}
+    missing = [name for name in required if name not in columns]
+    if missing:
+        raise ValueError(f"CSV file has no {', '.join(missing)} column")
+    width = len(header)
+    for row in reader:
+        if not row:
+            continue
+        if len(row) < width:
+            row += [""] * (width - len(row))
+        yield reader.line_num, row, columns
+
+
+def _read_csv(stream: TextIO, batch_size: int) -> Iterator[_Batch]:
+    batch = _Batch()
+    for line, row, columns in _csv_rows(stream, ("name", "frequency", "mode")):
+        batch.rows.append(line)
+        batch.names.append(row[columns["name"]])
+        batch.frequencies.append(row[columns["frequency"]])
+        batch.modes.append(row[columns["mode"]].strip().lower())
+        batch.rf_gains.append(row[columns["rf_gain"]] if "rf_gain" in columns else "")
+        batch.af_gains.append(row[columns["af_gain"]] if "af_gain" in columns else "")
+        batch.comments.append(row[columns["comment"]] if "comment" in columns else "")
+        if len(batch.rows) >= batch_size:
+            yield batch
+            batch = _Batch()
+    if batch.rows:
+        yield batch
+
+
+def _chirp_comment(row: List[str], columns: Dict[str, int]) -> str:
+    """CHIRP comment plus the repeater split and tone, which have no columns of their own"""
+
+    def get(name: str) -> str:
+        i = columns.get(name)
+        return row[i].strip() if i is not None else ""
+
+    parts = [get("Comment")] if get("Comment") else []
+    duplex, tone = get("Duplex"), get("Tone")
+    if duplex in ("+", "-"):
+        parts.append(f"{duplex}{get('Offset')} MHz")
+    elif duplex == "split":
+        parts.append(f"TX {get('Offset')} MHz")
+    if tone == "Tone":
+        parts.append(f"T {get('rToneFreq')}")
+    elif tone == "TSQL":
+        parts.append(f"TSQL {get('cToneFreq')}")
+    elif tone == "DTCS":
+        parts.append(f"DCS {get('DtcsCode')}")
+    return " ".join(parts)
+
+
+def _read_chirp(stream: TextIO, batch_size: int) -> Iterator[_Batch]:
+    batch = _Batch()
+    for line, row, columns in _csv_rows(stream, ("Name", "Frequency", "Mode")):
+        mode = row[columns["Mode"]].strip().upper()
+        batch.rows.append(line)
+        batch.names.append(row[columns["Name"]])
+        batch.frequencies.append(row[columns["Frequency"]])
+        batch.modes.append(CHIRP_MODES.get(mode, mode))
+        batch.rf_gains.append("")
+        batch.af_gains.append("")
+        batch.comments.append(_chirp_comment(row, columns))
+        if len(batch.rows) >= batch_size:
+            yield batch
+            batch = _Batch()
+    if batch.rows:
+        yield batch
+
+
+def _adif_records(stream: BinaryIO, chunk_size: int = 1 << 20) -> Iterator[Dict[str, str]]:
+    """ADIF records as {FIELD: value}, read ``chunk_size`` bytes at a time
+
+    Field lengths are byte counts, so the file is parsed as bytes and each
+    value decoded (UTF-8) on its own; a multi-byte character in one value
+    cannot shift the fields after it.
+    """
+    # Enough for a byte order mark and the first character
+    buffer = stream.read(max(chunk_size, len(codecs.BOM_UTF8) + 1))
+    if buffer.startswith(codecs.BOM_UTF8):
+        buffer = buffer[len(codecs.BOM_UTF8) :]
+    # Without a leading "<" the file starts with a header ended by <EOH>
+    in_header = not buffer.startswith(b"<")
+    record: Dict[str, str] = {}
+    pos = 0
+    eof = False
+    while True:
+        match = _ADIF_TAG.search(buffer, pos)
+        end = match.end() + int(match.group(2) or 0) if match else 0
+        if match is None or end > len(buffer):
+            if eof:
+                break
+            # Keep the incomplete tag or value and read more
+            keep = match.start() if match else buffer.rfind(b"<", pos)
+            buffer = buffer[keep:] if keep >= 0 else b""
+            pos = 0
+            chunk = stream.read(chunk_size)
+            eof = not chunk
+            buffer += chunk
+            continue
+        name = match.group(1).decode("ascii").upper()
+        pos = end
+        if name == "EOH":
+            in_header = False
+            record = {}
+        elif name == "EOR":
+            if not in_header:
+                yield record
+            record = {}
+        elif match.group(2):
+            record[name] = buffer[match.end() : end].decode("utf-8", errors="replace")
+
+
+def _adif_mode(record: Dict[str, str]) -> str:
+    mode = record.get("MODE", "").strip().upper()
+    if mode == "SSB":
+        submode = record.get("SUBMODE", "").strip().lower()
+        if submode in ("usb", "lsb"):
+            return submode
+        # Conventional sideband: LSB below 10 MHz
+        try:
+            return "lsb" if float(record.get("FREQ", "")) < 10 else "usb"
+        except ValueError:
+            return "usb"
+    if mode in ADIF_DATA_MODES:
+        return "usb"
+    return mode.lower()
+
+
+def _read_adif(stream: BinaryIO, batch_size: int) -> Iterator[_Batch]:
+    batch = _Batch()
+    app = f"APP_{ADIF_PROGRAM}_"
+    for number, record in enumerate(_adif_records(stream), 1):
+        batch.rows.append(number)
+        batch.names.append(record.get(app + "NAME") or record.get("CALL", ""))
+        batch.frequencies.append(record.get("FREQ", ""))
+        batch.modes.append(_adif_mode(record))
+        batch.rf_gains.append(record.get(app + "RF_GAIN", ""))
+        batch.af_gains.append(record.get(app + "AF_GAIN", ""))
+        batch.comments.append(record.get("COMMENT", ""))
+        if len(batch.rows) >= batch_size:
+            yield batch
+            batch = _Batch()
+    if batch.rows:
+        yield batch
+
+
+# (reader, frequency unit in Hz)
+_READERS: Dict[str, tuple] = {
+    "csv": (_read_csv, 1.0),
+    "chirp": (_read_chirp, 1e6),
+    "adif": (_read_adif, 1e6),
+}
+# Formats whose reader takes the raw file rather than decoded text
+_BINARY_FORMATS = {"adif"}
+
+
+def import_channels(
+    store: ChannelStore,
+    path: Union[str, Path],
+    fmt: Optional[str] = None,
+    replace: bool = False,
+    batch_size: int = BATCH_SIZE,
+) -> ImportReport:
+    """Stream a CSV, CHIRP CSV or ADIF file into ``store`` in one transaction
+
+    Rows are parsed and validated ``batch_size`` at a time, so memory use
+    does not grow with the file. Invalid rows are skipped and counted by
+    reason in the returned report; a file that cannot be read at all (e.g.
+    a CSV without a frequency column) raises ValueError and leaves the
+    store unchanged.
+    """
+    fmt = fmt or detect_format(path)
+    if fmt not in _READERS:
+        raise ValueError(f"Unknown channel file format: {fmt}")
+    reader, scale = _READERS[fmt]
+    report = ImportReport()
+    with open(path, "rb") as f:
+        stream = f
+        if fmt not in _BINARY_FORMATS:
+            stream = io.TextIOWrapper(f, encoding="utf-8-sig", errors="replace", newline="")
+        batches = (_validate(batch, scale, report) for batch in reader(stream, batch_size))
+        report.imported = store.import_rows(batches, replace=replace)
+    logger.info(f"{path}: {report.summary()}")
+    return report
+
+
+# -- writers ---------------------------------------------------------------
+
+
+def _write_csv(channels: Iterable[MemoryChannel], f: TextIO):
+    writer = csv.writer(f)
+    writer.writerow(CSV_FIELDS)
+    writer.writerows(
+        (ch.name, ch.frequency, ch.mode, ch.rf_gain, ch.af_gain, ch.comment) for ch in channels
+    )
+
+
+def _write_chirp(channels: Iterable[MemoryChannel], f: TextIO):
+    writer = csv.writer(f)
+    writer.writerow(CHIRP_FIELDS)
+    writer.writerows(
+        (
+            location,
+            ch.name,
+            f"{ch.frequency / 1e6:.6f}",
+            "",
+            "0.000000",
+            "",
+            "88.5",
+            "88.5",
+            "023",
+            "NN",
+            ch.mode.upper(),
+            "5.00",
+            "",
+            ch.comment,
+            "",
+            "",
+            "",
+        )
+        for location, ch in enumerate(channels)
+    )
+
+
+def _adif_field(name: str, value: str) -> str:
+    # The length is in bytes of the UTF-8 file, not characters
+    return f"<{name}:{len(value.encode())}>{value}"
+
+
+def _write_adif(channels: Iterable[MemoryChannel], f: TextIO):
+    f.write("FlexRadio 6400 Control memory channels\n")
+    f.write(_adif_field("ADIF_VER", "3.1.4") + _adif_field("PROGRAMID", ADIF_PROGRAM))
+    f.write("<EOH>\n")
+    app = f"APP_{ADIF_PROGRAM}_"
+    for ch in channels:
+        mode = ch.mode.lower()
+        fields = [
+            _adif_field(app + "NAME", ch.name),
+            _adif_field("FREQ", f"{ch.frequency / 1e6:.6f}"),
+            _adif_field("MODE", "SSB" if mode in ("usb", "lsb") else mode.upper()),
+        ]
+        if mode in ("usb", "lsb"):
+            fields.append(_adif_field("SUBMODE", mode.upper()))
+        fields.append(_adif_field(app + "RF_GAIN", str(ch.rf_gain)))
+        fields.append(_adif_field(app + "AF_GAIN", str(ch.af_gain)))
+        if ch.comment:
+            fields.append(_adif_field("COMMENT", ch.comment))
+        f.write(" ".join(fields) + " <EOR>\n")
+
+
+_WRITERS: Dict[str, Callable[[Iterable[MemoryChannel], TextIO], None]] = {
+    "csv": _write_csv,
+    "chirp": _write_chirp,
+    "adif": _write_adif,
+}
+
+
+def export_channels(store: ChannelStore, path: Union[str, Path], fmt: Optional[str] = None) -> int:
+    """Write every channel to ``path``, streamed from the database; returns the count"""
+    path = Path(path)
+    fmt = fmt or ("adif" if path.suffix.lower() in (".adi", ".adif") else "csv")
+    if fmt not in _WRITERS:
+        raise ValueError(f"Unknown channel file format: {fmt}")
+    count = 0
+
+    def counted() -> Iterator[MemoryChannel]:
+        nonlocal count
+        for channel in store.channels():
+            count += 1
+            yield channel
+
+    # Write to a temporary file so a failed export never truncates an existing one
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        _WRITERS[fmt](counted(), f)
+    tmp.replace(path)
+    logger.info(f"Exported {count} channels to {path}")
+    return count
+
+
+def main():
+    from config_manager import ConfigManager
+
+    parser = argparse.ArgumentParser(description="Import or export memory channels")
+    parser.add_argument("action", choices=("import", "export"))
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS, help="Default: from the file")
+    parser.add_argument("--replace", action="store_true", help="Delete existing channels first")
+    parser.add_argument("--db", help="Channel database (default: the app's channels.db)")
+    args = parser.parse_args()
+
+    store = ChannelStore(args.db or ConfigManager().config_dir / "channels.db")
+    try:
+        if args.action == "import":
+            report = import_channels(store, args.path, args.format, replace=args.replace)
+            print(report.summary())
+        else:
+            print(f"Exported {export_channels(store, args.path, args.format)} channels")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+import difflib
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+from memory_manager import MemoryChannel, band_for
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS channels (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    frequency INTEGER NOT NULL,
+    mode TEXT NOT NULL,
+    band TEXT NOT NULL,
+    rf_gain INTEGER NOT NULL DEFAULT 50,
+    af_gain INTEGER NOT NULL DEFAULT 50,
+    comment TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS channels_frequency ON channels (frequency, id);
+CREATE INDEX IF NOT EXISTS channels_band ON channels (band, frequency, id);
+CREATE INDEX IF NOT EXISTS channels_mode ON channels (mode, frequency, id);
+CREATE INDEX IF NOT EXISTS channels_name ON channels (name_key, id);
+"""
+
+_COLUMNS = "id, name, frequency, mode, rf_gain, af_gain, comment"
+_INSERT = (
+    "INSERT INTO channels (name, name_key, frequency, mode, band, rf_gain, af_gain, comment)"
+    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+# Rows ranked by similarity in fuzzy_search, at most
+FUZZY_CANDIDATES = 2000
+
+
+def name_key(name: str) -> str:
+    """Case- and whitespace-insensitive form of a channel name, used for search"""
+    return " ".join(name.split()).casefold()
+
+
+def row_values(channel: MemoryChannel) -> tuple:
+    """Insert parameters for ``channel``: name, name key, frequency, mode, band, gains, comment"""
+    return (
+        channel.name,
+        name_key(channel.name),
+        channel.frequency,
+        channel.mode.lower(),
+        band_for(channel.frequency),
+        channel.rf_gain,
+        channel.af_gain,
+        channel.comment,
+    )
+
+
+def _channel(row: tuple) -> MemoryChannel:
+    channel_id, name, frequency, mode, rf_gain, af_gain, comment = row
+    return MemoryChannel(name, frequency, mode, rf_gain, af_gain, comment, channel_id)
+
+
+class ChannelStore:
+    """Memory channels in an SQLite database
+
+    Sized for imported repeater and broadcast lists of tens of thousands of
+    channels, kept out of the YAML config so loading it stays fast. Every
+    lookup the GUI makes is an index range scan: :meth:`nearest` (closest
+    channel to the VFO), :meth:`search` (name prefix) and :meth:`page`
+    (one screenful of a list ordered by frequency or name, optionally
+    restricted to a band or mode). Pages are keyset paged: they continue
+    from a channel already shown, so a deep page costs the same as the
+    first. :meth:`fuzzy_search` ranks the name prefix range first, then
+    scans names for the typed letters in order.
+    """
+
+    def __init__(self, path: Union[str, Path] = ":memory:"):
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path))
+        if path != ":memory:":
+            self.db.execute("PRAGMA journal_mode=WAL")
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            logger.warning(f"Channel database {path} is from a newer version ({version})")
+        self.db.executescript(_SCHEMA)
+        self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        self.db.close()
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM channels").fetchone()[0]
+
+    # -- editing ----------------------------------------------------------
+
+    def add(self, channel: MemoryChannel) -> int:
+        with self.db:
+            cursor = self.db.execute(_INSERT, row_values(channel))
+        channel.channel_id = cursor.lastrowid
+        return cursor.lastrowid
+
+    def add_many(self, channels: Iterable[MemoryChannel]) -> int:
+        """Insert ``channels`` in one transaction; returns how many were added"""
+        with self.db:
+            cursor = self.db.executemany(_INSERT, (row_values(ch) for ch in channels))
+        return cursor.rowcount
+
+    def import_rows(self, batches: Iterable[List[tuple]], replace: bool = False) -> int:
+        """Insert batches of rows (see :func:`row_values`) in a single transaction
+
+        With ``replace`` the existing channels are deleted first, in the
+        same transaction, so an import that fails part way leaves the store
+        as it was.
+        """
+        count = 0
+        with self.db:
+            if replace:
+                self.db.execute("DELETE FROM channels")
+            for rows in batches:
+                self.db.executemany(_INSERT, rows)
+                count += len(rows)
+        return count
+
+    def update(self, channel_id: int, channel: MemoryChannel) -> bool:
+        with self.db:
+            cursor = self.db.execute(
+                "UPDATE channels SET name = ?, name_key = ?, frequency = ?, mode = ?, band = ?,"
+                " rf_gain = ?, af_gain = ?, comment = ? WHERE id = ?",
+                row_values(channel) + (channel_id,),
+            )
+        if cursor.rowcount:
+            channel.channel_id = channel_id
+        return cursor.rowcount > 0
+
+    def delete(self, channel_id: int) -> bool:
+        with self.db:
+            cursor = self.db.execute("DELETE FROM channels WHERE id = ?", (channel_id,))
+        return cursor.rowcount > 0
+
+    def clear(self):
+        with self.db:
+            self.db.execute("DELETE FROM channels")
+
+    # -- lookups ----------------------------------------------------------
+
+    def channels(self) -> Iterator[MemoryChannel]:
+        """Every channel by frequency, read from the database as the iterator advances"""
+        for row in self.db.execute(f"SELECT {_COLUMNS} FROM channels ORDER BY frequency, id"):
+            yield _channel(row)
+
+    def get(self, channel_id: int) -> Optional[MemoryChannel]:
+        row = self.db.execute(
+            f"SELECT {_COLUMNS} FROM channels WHERE id = ?", (channel_id,)
+        ).fetchone()
+        return _channel(row) if row else None
+
+    def nearest(
+        self, frequency: int, band: Optional[str] = None, mode: Optional[str] = None
+    ) -> Optional[MemoryChannel]:
+        """Channel closest to ``frequency``; the lower one on a tie"""
+        where, params = self._filter(band, mode)
+        below = self.db.execute(
+            f"SELECT {_COLUMNS} FROM channels WHERE frequency <= ?{where}"
+            " ORDER BY frequency DESC, id DESC LIMIT 1",
+            (frequency, *params),
+        ).fetchone()
+        above = self.db.execute(
+            f"SELECT {_COLUMNS} FROM channels WHERE frequency > ?{where}"
+            " ORDER BY frequency, id LIMIT 1",
+            (frequency, *params),
+        ).fetchone()
+        if below is None or (above is not None and above[2] - frequency < frequency - below[2]):
+            below = above
+        return _channel(below) if below else None
+
+    def search(
+        self, prefix: str, limit: int = 50, after: Optional[MemoryChannel] = None
+    ) -> List[MemoryChannel]:
+        """Channels whose name starts with ``prefix`` (ignoring case), by name"""
+        return self.page(limit, after, prefix=prefix)
+
+    def fuzzy_search(self, text: str, limit: int = 20) -> List[MemoryChannel]:
+        """Channels whose name contains the letters of ``text`` in order, best match first
+
+        Names starting with ``text`` come first, ranked among themselves; a
+        range on the name index finds them, the first ``FUZZY_CANDIDATES`` in
+        name order, so the candidates do not depend on storage order and an
+        exact match always comes first. Only when they are fewer than
+        ``limit`` are the remaining names scanned for the letters in order.
+        """
+        key = name_key(text)
+        if not key:
+            return []
+        matcher = difflib.SequenceMatcher(b=key, autojunk=False)
+
+        def ranked(rows: List[tuple], count: int) -> List[MemoryChannel]:
+            def score(row) -> float:
+                matcher.set_seq1(row[-1])
+                return -matcher.ratio()
+
+            rows.sort(key=score)
+            return [_channel(row[:-1]) for row in rows[:count]]
+
+        where, params = self._filter(prefix=key)
+        rows = self.db.execute(
+            f"SELECT {_COLUMNS}, name_key FROM channels WHERE 1{where}"
+            " ORDER BY name_key, id LIMIT ?",
+            (*params, FUZZY_CANDIDATES),
+        ).fetchall()
+        matches = ranked(rows, limit)
+        if len(matches) == limit:
+            return matches
+
+        pattern = "%" + "%".join(_escape_like(char) for char in key if char != " ") + "%"
+        rows = self.db.execute(
+            f"SELECT {_COLUMNS}, name_key FROM channels WHERE name_key LIKE ? ESCAPE '\\'"
+            " AND NOT (name_key >= ? AND name_key < ?) LIMIT ?",
+            (pattern, *params, FUZZY_CANDIDATES),
+        ).fetchall()
+        return matches + ranked(rows, limit - len(matches))
+
+    def page(
+        self,
+        limit: int,
+        after: Optional[MemoryChannel] = None,
+        band: Optional[str] = None,
+        mode: Optional[str] = None,
+        prefix: Optional[str] = None,
+        before: Optional[MemoryChannel] = None,
+    ) -> List[MemoryChannel]:
+        """``limit`` channels following ``after`` (from the start without it)
+
+        By name with ``prefix``, else by frequency. With ``before`` instead,
+        the ``limit`` channels preceding it, still in list order. Either way
+        this is a range scan on the ordering index from the given channel's
+        key, as :meth:`position` counts it.
+        """
+        where, params = self._filter(band, mode, prefix)
+        columns = "name_key, id" if prefix else "frequency, id"
+        order = "name_key {0}, id {0}" if prefix else "frequency {0}, id {0}"
+        anchor = before if before is not None else after
+        if anchor is not None:
+            where += f" AND ({columns}) {'<' if before is not None else '>'} (?, ?)"
+            params += self._key(anchor, prefix)
+        rows = self.db.execute(
+            f"SELECT {_COLUMNS} FROM channels WHERE 1{where}"
+            f" ORDER BY {order.format('DESC' if before is not None else 'ASC')} LIMIT ?",
+            (*params, limit),
+        ).fetchall()
+        if before is not None:
+            rows.reverse()
+        return [_channel(row) for row in rows]
+
+    def channel_at(
+        self,
+        row: int,
+        band: Optional[str] = None,
+        mode: Optional[str] = None,
+        prefix: Optional[str] = None,
+    ) -> Optional[MemoryChannel]:
+        """Channel at ``row`` of the :meth:`page` list, for jumping into it
+
+        Steps over ``row`` index entries without reading the rows, so it is
+        meant for the occasional jump (a dragged scroll bar); moving between
+        neighbouring pages should continue from a channel with :meth:`page`.
+        """
+        where, params = self._filter(band, mode, prefix)
+        order = "name_key, id" if prefix else "frequency, id"
+        found = self.db.execute(
+            f"SELECT id FROM channels WHERE 1{where} ORDER BY {order} LIMIT 1 OFFSET ?",
+            (*params, row),
+        ).fetchone()
+        return self.get(found[0]) if found else None
+
+    def count(
+        self, band: Optional[str] = None, mode: Optional[str] = None, prefix: Optional[str] = None
+    ) -> int:
+        where, params = self._filter(band, mode, prefix)
+        row = self.db.execute(f"SELECT COUNT(*) FROM channels WHERE 1{where}", params).fetchone()
+        return row[0]
+
+    def position(self, channel: MemoryChannel, band: Optional[str] = None) -> int:
+        """Row of ``channel`` in the frequency ordered :meth:`page` list"""
+        where, params = self._filter(band)
+        return self.db.execute(
+            "SELECT COUNT(*) FROM channels WHERE (frequency < ? OR (frequency = ? AND id < ?))"
+            f"{where}",
+            (channel.frequency, channel.frequency, channel.channel_id, *params),
+        ).fetchone()[0]
+
+    def bands(self) -> List[str]:
+        """Bands that have channels, in frequency order"""
+        rows = self.db.execute(
+            "SELECT band FROM channels WHERE band != '' GROUP BY band ORDER BY MIN(frequency)"
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    @staticmethod
+    def _key(channel: MemoryChannel, prefix: Optional[str] = None) -> tuple:
+        """``channel``'s position key in the :meth:`page` order"""
+        if prefix:
+            return (name_key(channel.name), channel.channel_id)
+        return (channel.frequency, channel.channel_id)
+
+    @staticmethod
+    def _filter(
+        band: Optional[str] = None, mode: Optional[str] = None, prefix: Optional[str] = None
+    ) -> Tuple[str, tuple]:
+        """SQL conditions (each starting with " AND") and their parameters"""
+        where, params = "", ()
+        if band is not None:
+            where += " AND band = ?"
+            params += (band,)
+        if mode is not None:
+            where += " AND mode = ?"
+            params += (mode.lower(),)
+        key = name_key(prefix) if prefix else ""
+        if key:
+            # A range on the name index; the upper bound is the prefix with its
+            # last character incremented
+            where += " AND name_key >= ? AND name_key < ?"
+            params += (key, key[:-1] + chr(ord(key[-1]) + 1))
+        return where, params
+
+
+def _escape_like(char: str) -> str:
+    return "\\" + char if char in "%_\\" else char
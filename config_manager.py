@@ -24,6 +24,21 @@ class ConfigManager:
                 "ip_address": "192.168.1.100",
                 "tcp_port": 4992,
                 "udp_port": 4991,
+                "max_slices": 2,
+                "reconnect": {
+                    "enabled": True,
+                    "keepalive_interval": 2.0,
+                    "max_backoff": 30.0,
+                },
+                "link": {
+                    "ping_interval": 1.0,
+                    "heartbeat_interval": 1.0,
+                },
+                "discovery": {
+                    "enabled": True,
+                    "port": 4992,
+                    "auto_connect": True,
+                },
             },
             "display": {
                 "panadapter_enabled": True,
@@ -41,6 +56,63 @@ class ConfigManager:
                 "tx_gain": 1.0,
                 "input_device": None,
                 "backend": "pipewire",
+                "tx_radio_rate": 24000,
+                "tx_max_latency_ms": 40,
+                "codec": "pcm",
+                "opus_bitrate": 24000,
+                "rx_radio_rate": 24000,
+                "jitter_packets": 3,
+                "slice_audio": True,
+                "rx_agc": {"enabled": False, "target": 0.25, "max_gain": 10.0},
+                "tx_agc": {"enabled": False, "target": 0.25, "max_gain": 4.0},
+                "rx_eq": [],
+                "tx_eq": [],
+                "rx_limiter": {"enabled": False, "threshold": 0.9, "release": 0.1},
+                "tx_limiter": {"enabled": True, "threshold": 0.9, "release": 0.1},
+            },
+            "recording": {
+                "directory": "~/FlexRadio/recordings",
+                "format": "wav",
+                "max_file_mb": 512,
+                "max_file_minutes": 60,
+            },
+            "capture": {
+                "enabled": False,
+                "directory": "~/FlexRadio/captures",
+            },
+            "daemon": {
+                "socket": "~/.config/flexradio-6400/daemon.sock",
+                "host": "127.0.0.1",
+                "port": 4993,
+                "background_fps": 2,
+                "audio": True,
+                "connect": False,
+                "radio": None,
+                "websocket": {
+                    "enabled": False,
+                    "host": "127.0.0.1",
+                    "port": 4994,
+                    "queue_size": 4,
+                },
+            },
+            "cat": {
+                "enabled": False,
+                "host": "127.0.0.1",
+                "port": 4532,
+            },
+            "metrics": {
+                "overlay": False,
+                "exporter": {
+                    "enabled": False,
+                    "host": "127.0.0.1",
+                    "port": 9464,
+                },
+            },
+            "watchdog": {
+                "enabled": True,
+                "threshold_ms": 250,
+                "ring_size": 20,
+                "log_file": "~/.config/flexradio-6400/stalls.log",
             },
             "memory": {
                 "max_channels": 10,
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import time
+from typing import Callable, List, Optional
+
+from flexradio_api import FlexRadioAPI
+from flexradio_client import FlexRadioClient
+from link_monitor import LinkMonitor
+from metrics import REGISTRY, MetricsRegistry
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LINK_LOST = "lost"
+LINK_RESTORED = "restored"
+
+
+class ConnectionSupervisor:
+    """Keeps the radio link up and restores API state after a drop
+
+    Loss is detected from read EOF/errors (via the client's disconnect
+    callback) or, when the radio has been silent for ``keepalive_interval``,
+    from a ``ping`` that gets no reply. The client then fails every pending
+    command at once, and the supervisor reconnects with exponential backoff
+    and calls :meth:`FlexRadioAPI.resync`. Link callbacks receive
+    ``LINK_LOST`` or ``LINK_RESTORED`` on the event loop thread.
+
+    With a ``link_monitor``, the supervisor is the link's only pinger: it
+    pings every ``link_monitor.ping_interval`` whether or not the radio is
+    quiet, so the monitor gets its RTT samples and misses from the same
+    keepalive that detects a dead link.
+    """
+
+    def __init__(
+        self,
+        client: FlexRadioClient,
+        api: FlexRadioAPI,
+        udp_port: int = 4991,
+        keepalive_interval: float = 2.0,
+        initial_backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        link_monitor: Optional[LinkMonitor] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.client = client
+        self.api = api
+        self.udp_port = udp_port
+        self.keepalive_interval = keepalive_interval
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.link_monitor = link_monitor
+        self.link_callbacks: List[Callable[[str], None]] = []
+        self.reconnecting = False
+        self._lost = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        metrics = metrics or REGISTRY
+        self._reconnects = metrics.counter("reconnects_total", "Successful automatic reconnects")
+        self._outage = metrics.histogram("reconnect_seconds", "Time from link loss to resync")
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._lost.clear()
+        self.client.set_disconnect_callback(self._on_disconnect)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self.client.set_disconnect_callback(None)
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self.reconnecting = False
+
+    def add_link_callback(self, callback: Callable[[str], None]):
+        self.link_callbacks.append(callback)
+
+    def remove_link_callback(self, callback: Callable[[str], None]):
+        if callback in self.link_callbacks:
+            self.link_callbacks.remove(callback)
+
+    def _on_disconnect(self, reason: str):
+        self._lost.set()
+
+    def _notify(self, state: str):
+        for callback in self.link_callbacks:
+            callback(state)
+
+    async def _run(self):
+        if self.link_monitor is not None:
+            interval = self.link_monitor.ping_interval
+        else:
+            interval = self.keepalive_interval / 2
+        while True:
+            try:
+                await asyncio.wait_for(self._lost.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                await self._keepalive()
+                continue
+            await self._recover()
+
+    async def _keepalive(self):
+        """Ping when the radio has gone quiet; no reply means the link is dead
+
+        With a link monitor, ping every time and let it record the result.
+        """
+        if not self.client.running:
+            return
+        if self.link_monitor is not None:
+            # The monitor wants RTT samples even while status traffic flows
+            try:
+                alive = await self.link_monitor.ping(self.client, self.keepalive_interval)
+            except Exception as e:
+                logger.debug(f"Keepalive ping failed: {e}")
+                return
+            if not alive:
+                self.client.abort("keepalive timeout")
+            return
+        if time.monotonic() - self.client.last_received < self.keepalive_interval:
+            return
+        try:
+            await asyncio.wait_for(self.client.send_command("ping"), self.keepalive_interval)
+        except (asyncio.TimeoutError, TimeoutError):
+            self.client.abort("keepalive timeout")
+        except Exception as e:
+            logger.debug(f"Keepalive ping failed: {e}")
+
+    async def _recover(self):
+        lost_at = time.monotonic()
+        self.reconnecting = True
+        self._notify(LINK_LOST)
+        backoff = self.initial_backoff
+        while True:
+            logger.info(f"Reconnecting to {self.client.host}:{self.client.port}")
+            self._lost.clear()
+            if await self.client.connect():
+                if await self.api.resync(self.udp_port):
+                    break
+                await self.client.disconnect()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+        self.reconnecting = False
+        self._reconnects.inc()
+        self._outage.record(time.monotonic() - lost_at)
+        logger.info(f"Link restored after {time.monotonic() - lost_at:.2f} s")
+        self._notify(LINK_RESTORED)
@@ -0,0 +1,219 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from metrics import REGISTRY, MetricsRegistry
+from vita49 import PACKET_CLASS_DISCOVERY, parse_discovery_payload, parse_packet
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DISCOVERY_PORT = 4992
+
+
+@dataclass
+class DiscoveredRadio:
+    serial: str
+    model: str = ""
+    ip: str = ""
+    port: int = 4992
+    version: str = ""
+    nickname: str = ""
+    callsign: str = ""
+    status: str = ""
+    # Wall clock time, so it stays meaningful in the cache file across runs
+    last_seen: float = 0.0
+
+    @classmethod
+    def from_fields(cls, values: Dict[str, str], sender: str) -> Optional["DiscoveredRadio"]:
+        """Radio described by a discovery payload; None without a serial number"""
+        serial = values.get("serial")
+        if not serial:
+            return None
+        ip = values.get("ip", "")
+        try:
+            port = int(values.get("port", 4992))
+        except ValueError:
+            port = 4992
+        return cls(
+            serial=serial,
+            model=values.get("model", ""),
+            ip=ip if ip and ip != "0.0.0.0" else sender,
+            port=port,
+            version=values.get("version", ""),
+            nickname=values.get("nickname", ""),
+            callsign=values.get("callsign", ""),
+            status=values.get("status", ""),
+        )
+
+    def same_as(self, other: "DiscoveredRadio") -> bool:
+        """Equal apart from ``last_seen``"""
+        return all(
+            getattr(self, f.name) == getattr(other, f.name)
+            for f in fields(self)
+            if f.name != "last_seen"
+        )
+
+
+class RadioCache:
+    """Discovered radios by serial number, persisted as JSON
+
+    ``last_serial`` is the radio we last connected to, so startup can go
+    straight to its last known address before any broadcast arrives. The
+    file is rewritten only when a radio appears or changes (or on
+    :meth:`save` with ``force``), not for every ``last_seen`` update.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else None
+        self.radios: Dict[str, DiscoveredRadio] = {}
+        self.last_serial: Optional[str] = None
+        self._dirty = False
+
+    def load(self):
+        if not self.path or not self.path.exists():
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            names = {f.name for f in fields(DiscoveredRadio)}
+            self.radios = {
+                entry["serial"]: DiscoveredRadio(**{k: v for k, v in entry.items() if k in names})
+                for entry in data.get("radios", [])
+            }
+            self.last_serial = data.get("last_serial")
+            logger.info(f"Loaded {len(self.radios)} cached radios from {self.path}")
+        except Exception as e:
+            logger.warning(f"Ignoring radio cache {self.path}: {e}")
+
+    def save(self, force: bool = False):
+        if not self.path or not (self._dirty or force):
+            return
+        data = {
+            "last_serial": self.last_serial,
+            "radios": [asdict(radio) for radio in self.radios.values()],
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Write then rename so a crash never leaves a truncated cache
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except OSError as e:
+            logger.error(f"Failed to save radio cache {self.path}: {e}")
+
+    def update(self, radio: DiscoveredRadio) -> bool:
+        """Store ``radio``; True if it is new or anything but ``last_seen`` changed"""
+        known = self.radios.get(radio.serial)
+        self.radios[radio.serial] = radio
+        if known is not None and known.same_as(radio):
+            return False
+        self._dirty = True
+        return True
+
+    def set_last_radio(self, serial: Optional[str]):
+        """Radio to reconnect to at startup; None for an address not seen in discovery"""
+        if serial != self.last_serial:
+            self.last_serial = serial
+            self._dirty = True
+
+    def last_radio(self) -> Optional[DiscoveredRadio]:
+        return self.radios.get(self.last_serial) if self.last_serial else None
+
+    def find_by_ip(self, ip: str) -> Optional[DiscoveredRadio]:
+        for radio in self.radios.values():
+            if radio.ip == ip:
+                return radio
+        return None
+
+    def sorted(self) -> List[DiscoveredRadio]:
+        """Radios, most recently seen first"""
+        return sorted(self.radios.values(), key=lambda radio: radio.last_seen, reverse=True)
+
+
+class DiscoveryListener(asyncio.DatagramProtocol):
+    """Listens for the discovery packets radios broadcast about once a second
+
+    Each radio's last payload is kept per sender address; a repeat of it
+    (the usual case) only refreshes ``last_seen``, so the steady stream of
+    broadcasts costs a header parse and a byte comparison. Radio callbacks
+    fire when a radio first appears or its details change, e.g. a new IP
+    address after a DHCP renewal.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[RadioCache] = None,
+        port: int = DISCOVERY_PORT,
+        host: str = "0.0.0.0",
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.cache = cache or RadioCache()
+        self.port = port
+        self.host = host
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.radio_callbacks: List[Callable[[DiscoveredRadio], None]] = []
+        # Sender address -> (last discovery payload, radio it described)
+        self._last: Dict[str, Tuple[bytes, DiscoveredRadio]] = {}
+
+        metrics = metrics or REGISTRY
+        self._packets = metrics.counter("discovery_packets_total", "Discovery packets received")
+        metrics.gauge("radios_discovered", "Radios in the discovery cache").set_function(
+            lambda: len(self.cache.radios)
+        )
+
+    def add_radio_callback(self, callback: Callable[[DiscoveredRadio], None]):
+        self.radio_callbacks.append(callback)
+
+    async def start(self) -> bool:
+        loop = asyncio.get_running_loop()
+        try:
+            # Share the port with other clients on this machine listening for radios
+            self.transport, _ = await loop.create_datagram_endpoint(
+                lambda: self,
+                local_addr=(self.host, self.port),
+                reuse_port=hasattr(socket, "SO_REUSEPORT"),
+                allow_broadcast=True,
+            )
+            self.port = self.transport.get_extra_info("sockname")[1]
+            logger.info(f"Listening for radio discovery on port {self.port}")
+            return True
+        except OSError as e:
+            logger.error(f"Failed to open discovery port {self.port}: {e}")
+            return False
+
+    def stop(self):
+        if self.transport:
+            self.transport.close()
+            self.transport = None
+        self.cache.save(force=True)
+
+    def datagram_received(self, data: bytes, addr):
+        packet = parse_packet(data)
+        if packet is None or packet.packet_class != PACKET_CLASS_DISCOVERY:
+            return
+        self._packets.inc()
+        sender = addr[0]
+        last = self._last.get(sender)
+        if last is not None and packet.payload == last[0]:
+            last[1].last_seen = time.time()
+            return
+
+        radio = DiscoveredRadio.from_fields(parse_discovery_payload(packet.payload), sender)
+        if radio is None:
+            return
+        radio.last_seen = time.time()
+        self._last[sender] = (bytes(packet.payload), radio)
+        if self.cache.update(radio):
+            logger.info(f"Discovered {radio.model} {radio.serial} at {radio.ip}:{radio.port}")
+            self.cache.save()
+            for callback in self.radio_callbacks:
+                callback(radio)
@@ -0,0 +1,44 @@
+from dataclasses import dataclass, field
+from typing import Dict, Set
+
+import numpy as np
+
+# Streams of a subscription that does not name any; audio must be asked for
+DEFAULT_STREAMS = ("state", "pan", "waterfall")
+
+
+def decimate_bins(bins: np.ndarray, width: int, axis: int = -1) -> np.ndarray:
+    """Reduce ``bins`` to ``width`` along ``axis``, keeping each bucket's peak
+
+    Levels run from 0 (strongest) upward, so the peak is the minimum. A
+    ``width`` of 0 or at least the input size returns ``bins`` unchanged.
+    """
+    size = bins.shape[axis]
+    if width <= 0 or size <= width:
+        return bins
+    edges = (np.arange(width) * size) // width
+    return np.minimum.reduceat(bins, edges, axis=axis)
+
+
+@dataclass
+class Subscription:
+    """What one control client or fan-out viewer receives from one radio"""
+
+    streams: Set[str] = field(default_factory=lambda: set(DEFAULT_STREAMS))
+    # Bins per pan frame or waterfall row, 0 for the radio's full width
+    width: int = 0
+    # Frames per second of each display stream, 0 for every frame the daemon gets
+    fps: float = 0.0
+    _next: Dict[str, float] = field(default_factory=dict)
+
+    def take(self, stream: str, now: float) -> bool:
+        """True if a ``stream`` frame should go out now, and start its next interval"""
+        if stream not in self.streams:
+            return False
+        if not self.fps:
+            return True
+        if now < self._next.get(stream, 0.0):
+            return False
+        # 10% early, as in DisplayFeed, so jitter does not halve a matching rate
+        self._next[stream] = now + 0.9 / self.fps
+        return True
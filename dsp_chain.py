@@ -0,0 +1,361 @@
+import logging
+import math
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from metrics import Histogram
+
+try:
+    from scipy.signal import lfilter
+except ImportError:
+    lfilter = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class DspStage(ABC):
+    """One block-processing step of a :class:`DspChain`
+
+    ``process`` receives a float32 block and returns the block to pass on.
+    Stages work in place and keep the block length, which the PortAudio
+    callbacks rely on; sample-rate conversion happens where the radio
+    streams are framed (RxAudioStream, TxAudioPipeline).
+    """
+
+    name = "stage"
+
+    @abstractmethod
+    def process(self, buf: np.ndarray) -> np.ndarray:
+        pass
+
+    def reset(self):
+        pass
+
+
+class GainStage(DspStage):
+    name = "gain"
+
+    def __init__(self, gain: float = 1.0):
+        self.gain = gain
+
+    def process(self, buf):
+        if self.gain != 1.0:
+            buf *= self.gain
+        return buf
+
+
+class _RampStage(DspStage):
+    """Applies a per-block gain change as a linear ramp to avoid zipper noise"""
+
+    def __init__(self):
+        self._base = np.zeros(0, dtype=np.float32)
+        self._ramp = np.zeros(0, dtype=np.float32)
+        self.current_gain = 1.0
+
+    def _apply_gain(self, buf: np.ndarray, new_gain: float):
+        n = len(buf)
+        if len(self._base) != n:
+            self._base = np.linspace(0.0, 1.0, n, endpoint=False, dtype=np.float32)
+            self._ramp = np.empty(n, dtype=np.float32)
+        if new_gain == self.current_gain:
+            if new_gain != 1.0:
+                buf *= new_gain
+            return
+        np.multiply(self._base, new_gain - self.current_gain, out=self._ramp)
+        self._ramp += self.current_gain
+        buf *= self._ramp
+        self.current_gain = new_gain
+
+    def reset(self):
+        self.current_gain = 1.0
+
+
+class AgcStage(_RampStage):
+    """Block RMS automatic gain control with separate attack and release"""
+
+    name = "agc"
+
+    def __init__(
+        self,
+        target: float = 0.25,
+        max_gain: float = 10.0,
+        attack: float = 0.5,
+        release: float = 0.05,
+        noise_floor: float = 1e-4,
+    ):
+        super().__init__()
+        self.target = target
+        self.max_gain = max_gain
+        self.attack = attack
+        self.release = release
+        self.noise_floor = noise_floor
+
+    def process(self, buf):
+        if len(buf) == 0:
+            return buf
+        rms = math.sqrt(float(np.dot(buf, buf)) / len(buf))
+        if rms < self.noise_floor:
+            desired = self.current_gain
+        else:
+            desired = min(self.target / rms, self.max_gain)
+        # Reduce gain quickly on loud signals, recover slowly
+        rate = self.attack if desired < self.current_gain else self.release
+        self._apply_gain(buf, self.current_gain + (desired - self.current_gain) * rate)
+        return buf
+
+
+class LimiterStage(_RampStage):
+    """Peak limiter: smoothed gain reduction plus a hard ceiling"""
+
+    name = "limiter"
+
+    def __init__(self, threshold: float = 0.9, release: float = 0.1):
+        super().__init__()
+        self.threshold = threshold
+        self.release = release
+
+    def process(self, buf):
+        if len(buf) == 0:
+            return buf
+        peak = max(float(buf.max()), -float(buf.min()))
+        if peak * self.current_gain > self.threshold:
+            desired = self.threshold / peak
+        else:
+            desired = self.current_gain + (1.0 - self.current_gain) * self.release
+        self._apply_gain(buf, min(desired, 1.0))
+        np.clip(buf, -self.threshold, self.threshold, out=buf)
+        return buf
+
+
+def biquad_coefficients(kind: str, freq: float, sample_rate: int, gain_db: float = 0.0, q=0.707):
+    """RBJ audio EQ cookbook biquad, returns normalized (b, a)"""
+    a_gain = 10 ** (gain_db / 40)
+    w0 = 2 * math.pi * freq / sample_rate
+    cos_w0 = math.cos(w0)
+    alpha = math.sin(w0) / (2 * q)
+
+    if kind == "peak":
+        b = [1 + alpha * a_gain, -2 * cos_w0, 1 - alpha * a_gain]
+        a = [1 + alpha / a_gain, -2 * cos_w0, 1 - alpha / a_gain]
+    elif kind == "lowpass":
+        b = [(1 - cos_w0) / 2, 1 - cos_w0, (1 - cos_w0) / 2]
+        a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+    elif kind == "highpass":
+        b = [(1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2]
+        a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+    elif kind in ("lowshelf", "highshelf"):
+        sign = 1 if kind == "lowshelf" else -1
+        root = 2 * math.sqrt(a_gain) * alpha
+        b = [
+            a_gain * ((a_gain + 1) - sign * (a_gain - 1) * cos_w0 + root),
+            sign * 2 * a_gain * ((a_gain - 1) - sign * (a_gain + 1) * cos_w0),
+            a_gain * ((a_gain + 1) - sign * (a_gain - 1) * cos_w0 - root),
+        ]
+        a = [
+            (a_gain + 1) + sign * (a_gain - 1) * cos_w0 + root,
+            -sign * 2 * ((a_gain - 1) + sign * (a_gain + 1) * cos_w0),
+            (a_gain + 1) + sign * (a_gain - 1) * cos_w0 - root,
+        ]
+    else:
+        raise ValueError(f"Unknown EQ band type: {kind}")
+
+    return np.array(b) / a[0], np.array(a) / a[0]
+
+
+class EqStage(DspStage):
+    """Cascade of biquad bands, e.g. ``[("highpass", 200), ("peak", 1500, 3.0, 1.0)]``
+
+    Uses scipy's lfilter when available, otherwise a per-sample loop.
+    """
+
+    name = "eq"
+
+    def __init__(self, bands: Sequence[Sequence], sample_rate: int = 48000):
+        self.sample_rate = sample_rate
+        self.sections = []
+        for band in bands:
+            kind, freq, *rest = band
+            b, a = biquad_coefficients(kind, float(freq), sample_rate, *rest)
+            self.sections.append((b, a))
+        self.reset()
+
+    def reset(self):
+        self._state = [np.zeros(2) for _ in self.sections]
+
+    def process(self, buf):
+        for i, (b, a) in enumerate(self.sections):
+            if lfilter is not None:
+                buf[:], self._state[i] = lfilter(b, a, buf, zi=self._state[i])
+            else:
+                self._state[i] = self._filter_loop(b, a, buf, self._state[i])
+        return buf
+
+    @staticmethod
+    def _filter_loop(b, a, buf, state):
+        # Transposed direct form II, same state layout as lfilter's zi
+        b0, b1, b2 = float(b[0]), float(b[1]), float(b[2])
+        a1, a2 = float(a[1]), float(a[2])
+        z1, z2 = float(state[0]), float(state[1])
+        for n in range(len(buf)):
+            x = float(buf[n])
+            y = b0 * x + z1
+            z1 = b1 * x - a1 * y + z2
+            z2 = b2 * x - a2 * y
+            buf[n] = y
+        state[0], state[1] = z1, z2
+        return state
+
+
+class DenoiseStage(DspStage):
+    """Wraps an ai_denoiser engine; float engines are called directly"""
+
+    name = "denoise"
+
+    def __init__(self, denoiser):
+        self.denoiser = denoiser
+
+    def process(self, buf):
+        if not self.denoiser.is_ready():
+            return buf
+        if hasattr(self.denoiser, "process_float"):
+            result = self.denoiser.process_float(buf)
+        else:
+            pcm = (np.clip(buf, -1.0, 32767 / 32768.0) * 32768.0).astype("<i2").tobytes()
+            data = self.denoiser.process(pcm)
+            if not data:
+                return buf
+            result = np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+        n = min(len(result), len(buf))
+        buf[:n] = result[:n]
+        buf[n:] = 0.0
+        return buf
+
+
+class DspChain:
+    """Ordered list of DSP stages run on every audio block
+
+    The stage list is an immutable tuple that ``set_stages`` swaps in one
+    assignment, so the chain can be reconfigured from the GUI thread while
+    the audio callback is running. Per-stage execution times are kept in
+    histograms keyed by stage name; they survive reconfiguration.
+    """
+
+    def __init__(self, stages: Iterable[DspStage] = ()):
+        self.histograms: Dict[str, Histogram] = {}
+        self._stages: tuple = ()
+        self._float_buf = np.zeros(0, dtype=np.float32)
+        self._pcm_buf = np.zeros(0, dtype="<i2")
+        self.set_stages(stages)
+
+    @property
+    def stages(self) -> tuple:
+        return self._stages
+
+    def set_stages(self, stages: Iterable[DspStage]):
+        stages = tuple(stages)
+        for stage in stages:
+            self.histograms.setdefault(stage.name, Histogram())
+        self._stages = stages
+        logger.info(f"DSP chain: {' -> '.join(s.name for s in stages) or 'bypass'}")
+
+    def get_stage(self, name: str) -> Optional[DspStage]:
+        for stage in self._stages:
+            if stage.name == name:
+                return stage
+        return None
+
+    def reset(self):
+        for stage in self._stages:
+            stage.reset()
+
+    def process(self, buf: np.ndarray) -> np.ndarray:
+        """Run all stages on a float32 block; returns the processed block"""
+        histograms = self.histograms
+        for stage in self._stages:
+            start = time.perf_counter()
+            buf = stage.process(buf)
+            histograms[stage.name].record(time.perf_counter() - start)
+        return buf
+
+    def process_bytes(self, data: bytes) -> bytes:
+        """Run the chain on 16-bit mono PCM using reusable conversion buffers"""
+        if not self._stages or not data:
+            return data
+        n = len(data) // 2
+        if len(self._float_buf) < n:
+            self._float_buf = np.zeros(n, dtype=np.float32)
+        buf = self._float_buf[:n]
+        np.multiply(np.frombuffer(data, dtype="<i2", count=n), 1.0 / 32768.0, out=buf)
+
+        out = self.process(buf)
+
+        if len(self._pcm_buf) < len(out):
+            self._pcm_buf = np.zeros(len(out), dtype="<i2")
+        pcm = self._pcm_buf[: len(out)]
+        np.clip(out, -1.0, 32767 / 32768.0, out=out)
+        out *= 32768.0
+        pcm[:] = out
+        return pcm.tobytes()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {stage.name: self.histograms[stage.name].summary() for stage in self._stages}
+
+
+def load_denoiser(denoiser_config: Optional[dict]):
+    """AI denoiser for the ``ai_denoiser`` config, None when disabled or unavailable"""
+    if not denoiser_config or not denoiser_config.get("enabled", False):
+        return None
+    try:
+        from ai_denoiser.model_manager import get_denoiser
+
+        denoiser = get_denoiser(denoiser_config)
+        if denoiser and denoiser.is_ready():
+            logger.info("AI Denoiser enabled and ready")
+        else:
+            logger.warning("AI Denoiser requested but not available")
+        return denoiser
+    except Exception as e:
+        logger.error(f"Failed to initialize AI Denoiser: {e}")
+        return None
+
+
+def build_rx_stages(audio_config: dict, denoiser=None) -> List[DspStage]:
+    """RX chain from the ``audio`` config: gain -> AGC -> EQ -> denoise -> limiter"""
+    return _build_stages(audio_config, "rx", denoiser)
+
+
+def build_tx_stages(audio_config: dict) -> List[DspStage]:
+    """TX chain from the ``audio`` config: gain -> AGC -> EQ -> limiter"""
+    return _build_stages(audio_config, "tx", None)
+
+
+def _build_stages(audio_config: dict, direction: str, denoiser) -> List[DspStage]:
+    sample_rate = audio_config.get("sample_rate", 48000)
+    stages: List[DspStage] = []
+
+    gain = audio_config.get(f"{direction}_gain", 1.0)
+    if gain != 1.0:
+        stages.append(GainStage(gain))
+
+    agc = audio_config.get(f"{direction}_agc") or {}
+    if agc.get("enabled", False):
+        params = {k: v for k, v in agc.items() if k != "enabled"}
+        stages.append(AgcStage(**params))
+
+    bands = audio_config.get(f"{direction}_eq") or []
+    if bands:
+        stages.append(EqStage(bands, sample_rate))
+
+    if denoiser is not None:
+        stages.append(DenoiseStage(denoiser))
+
+    limiter = audio_config.get(f"{direction}_limiter") or {}
+    if limiter.get("enabled", False):
+        params = {k: v for k, v in limiter.items() if k != "enabled"}
+        stages.append(LimiterStage(**params))
+
+    return stages
@@ -1,13 +1,18 @@
 import asyncio
 import logging
+import time
 from dataclasses import dataclass
-from typing import Callable, List, Optional
+from typing import Callable, Dict, List, Optional
 
 from flexradio_client import FlexRadioClient
+from metrics import REGISTRY, MetricsRegistry
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# DAX channels available for per-slice RX audio streams
+DAX_CHANNELS = range(1, 9)
+
 
 @dataclass
 class SliceState:
@@ -16,21 +21,83 @@ class SliceState:
     rf_gain: int = 50
     af_gain: int = 50
     ptt: bool = False
+    slice_id: Optional[str] = None
+    # DAX channel and stream carrying this slice's own RX audio, 0/None when off
+    dax_channel: int = 0
+    audio_stream_id: Optional[str] = None
 
 
 class FlexRadioAPI:
-    def __init__(self, client: FlexRadioClient):
+    """Radio state on top of :class:`FlexRadioClient`
+
+    Every slice this client owns has a :class:`SliceState` in ``slices``,
+    keyed by slice ID so status lines are routed with one dict lookup. One
+    of them is the active slice (``slice_id``/``slice_state``): the one the
+    setters act on by default and the one PTT transmits on. State callbacks
+    receive the :class:`SliceState` that changed.
+    """
+
+    def __init__(self, client: FlexRadioClient, metrics: Optional[MetricsRegistry] = None):
         self.client = client
-        self.slice_id: Optional[str] = None
+        self.slices: Dict[str, SliceState] = {}
+        self._active_slice: Optional[str] = None
+        # Settings used before the first slice exists, e.g. the pan center
+        self._default_state = SliceState()
         self.pan_id: Optional[str] = None
-        self.slice_state = SliceState()
+        self.rx_audio_stream_id: Optional[str] = None
+        self.tx_audio_stream_id: Optional[str] = None
+        self.pan_width: Optional[int] = None
+        self.pan_fps: Optional[int] = None
+        # Stream create commands by direction ("rx"/"tx"), replayed by resync()
+        self.audio_commands: Dict[str, str] = {}
         self.state_callbacks: List[Callable] = []
 
+        metrics = metrics or REGISTRY
+        self._status_messages = metrics.counter("status_messages_total", "Status lines received")
+        self._state_update_time = metrics.histogram(
+            "state_update_seconds", "Slice status handling including state callbacks"
+        )
         self.client.set_status_callback(self._handle_status)
 
-    async def connect(self) -> bool:
+    @property
+    def slice_id(self) -> Optional[str]:
+        """ID of the active slice"""
+        return self._active_slice
+
+    @slice_id.setter
+    def slice_id(self, slice_id: Optional[str]):
+        if slice_id is not None and slice_id not in self.slices:
+            self.slices[slice_id] = SliceState(slice_id=slice_id)
+        self._active_slice = slice_id
+
+    @property
+    def slice_state(self) -> SliceState:
+        """State of the active slice"""
+        if self._active_slice is None:
+            return self._default_state
+        return self.slices[self._active_slice]
+
+    @slice_state.setter
+    def slice_state(self, state: SliceState):
+        if self._active_slice is None:
+            self._default_state = state
+        else:
+            state.slice_id = self._active_slice
+            self.slices[self._active_slice] = state
+
+    def set_active_slice(self, slice_id: str) -> bool:
+        if slice_id not in self.slices:
+            return False
+        self._active_slice = slice_id
+        return True
+
+    def _slice(self, slice_id: Optional[str]) -> Optional[SliceState]:
+        """The given slice, or the active one when ``slice_id`` is None"""
+        return self.slices.get(slice_id or self._active_slice)
+
+    async def connect(self, udp_port: int = 4991) -> bool:
         try:
-            result = await self.client.send_command("client udpport 4991")
+            result = await self.client.send_command(f"client udpport {udp_port}")
             logger.info(f"UDP port set: {result}")
             return True
         except Exception as e:
@@ -38,13 +105,14 @@ class FlexRadioAPI:
             return False
 
     async def disconnect(self):
-        if self.slice_id:
-            await self.remove_slice(self.slice_id)
+        for slice_id in list(self.slices):
+            await self.remove_slice(slice_id)
         if self.pan_id is not None:
             await self.disable_panadapter()
         await self.client.disconnect()
 
     async def create_slice(self, mode: str = "usb") -> Optional[str]:
+        """Create a slice and subscribe to it; the first one becomes active"""
         try:
             result = await self.client.send_command(f"slice create 0 {mode}")
             if result:
@@ -54,7 +122,9 @@ class FlexRadioAPI:
                     # Handle format like "R0|0|1" -> extract last part
                     if "|" in slice_id:
                         slice_id = slice_id.split("|")[-1]
-                    self.slice_id = slice_id
+                    self.slices[slice_id] = SliceState(mode=mode, slice_id=slice_id)
+                    if self._active_slice is None:
+                        self._active_slice = slice_id
                     await self.client.send_command(f"sub slice {slice_id} all")
                     logger.info(f"Slice created: {slice_id}")
                     return slice_id
@@ -63,16 +133,22 @@ class FlexRadioAPI:
         return None
 
     async def remove_slice(self, slice_id: str):
+        """Remove a slice; another remaining slice becomes active if it was"""
         try:
+            state = self.slices.get(slice_id)
+            if state is not None and state.audio_stream_id:
+                await self.client.send_command(f"stream remove {state.audio_stream_id}")
             await self.client.send_command(f"slice remove {slice_id}")
-            if self.slice_id == slice_id:
-                self.slice_id = None
+            self.slices.pop(slice_id, None)
+            if self._active_slice == slice_id:
+                self._active_slice = next(iter(self.slices), None)
             logger.info(f"Slice removed: {slice_id}")
         except Exception as e:
             logger.error(f"Failed to remove slice: {e}")
 
-    async def set_frequency(self, hz: int):
-        if not self.slice_id:
+    async def set_frequency(self, hz: int, slice_id: Optional[str] = None):
+        state = self._slice(slice_id)
+        if state is None:
             return
         if not self._validate_frequency(hz):
             logger.error(
@@ -80,53 +156,56 @@ class FlexRadioAPI:
             )
             return
         try:
-            await self.client.send_command(f"slice set {self.slice_id} frequency={hz}")
-            self.slice_state.frequency = hz
+            await self.client.send_command(f"slice set {state.slice_id} frequency={hz}")
+            state.frequency = hz
         except Exception as e:
             logger.error(f"Failed to set frequency: {e}")
 
     async def get_frequency(self) -> int:
         return self.slice_state.frequency
 
-    async def set_mode(self, mode: str):
-        if not self.slice_id:
+    async def set_mode(self, mode: str, slice_id: Optional[str] = None):
+        state = self._slice(slice_id)
+        if state is None:
             return
         if not self._validate_mode(mode):
-            logger.error(f"Invalid mode: {mode}. Must be one of: USB, LSB, CW, AM, FM")
+            logger.error(f"Invalid mode: {mode}. Must be one of: USB, LSB, CW, AM, FM, DIGU, DIGL")
             return
         try:
-            await self.client.send_command(f"slice set {self.slice_id} mode={mode}")
-            self.slice_state.mode = mode
+            await self.client.send_command(f"slice set {state.slice_id} mode={mode}")
+            state.mode = mode
         except Exception as e:
             logger.error(f"Failed to set mode: {e}")
 
     async def get_mode(self) -> str:
         return self.slice_state.mode
 
-    async def set_rf_gain(self, level: int):
-        if not self.slice_id:
+    async def set_rf_gain(self, level: int, slice_id: Optional[str] = None):
+        state = self._slice(slice_id)
+        if state is None:
             return
         if not self._validate_gain(level):
             logger.error(f"Invalid RF gain: {level}. Must be between 0 and 100")
             return
         try:
-            await self.client.send_command(f"slice set {self.slice_id} rfpower={level}")
-            self.slice_state.rf_gain = level
+            await self.client.send_command(f"slice set {state.slice_id} rfpower={level}")
+            state.rf_gain = level
         except Exception as e:
             logger.error(f"Failed to set RF gain: {e}")
 
     async def get_rf_gain(self) -> int:
         return self.slice_state.rf_gain
 
-    async def set_af_gain(self, level: int):
-        if not self.slice_id:
+    async def set_af_gain(self, level: int, slice_id: Optional[str] = None):
+        state = self._slice(slice_id)
+        if state is None:
             return
         if not self._validate_gain(level):
             logger.error(f"Invalid AF gain: {level}. Must be between 0 and 100")
             return
         try:
-            await self.client.send_command(f"slice set {self.slice_id} af_gain={level}")
-            self.slice_state.af_gain = level
+            await self.client.send_command(f"slice set {state.slice_id} af_gain={level}")
+            state.af_gain = level
         except Exception as e:
             logger.error(f"Failed to set AF gain: {e}")
 
@@ -141,7 +220,8 @@ class FlexRadioAPI:
                 await self.client.send_command(f"xmit {self.slice_id}")
             else:
                 await self.client.send_command("xmit off")
-            self.slice_state.ptt = on
+            for state in self.slices.values():
+                state.ptt = on and state.slice_id == self.slice_id
         except Exception as e:
             logger.error(f"Failed to set PTT: {e}")
 
@@ -164,49 +244,205 @@ class FlexRadioAPI:
                     if "|" in pan_id:
                         pan_id = pan_id.split("|")[-1]
                     self.pan_id = pan_id
+                    self.pan_width = width
                     logger.info(f"Panadapter enabled: {self.pan_id}")
                     return result
         except Exception as e:
             logger.error(f"Failed to enable panadapter: {e}")
         return None
 
+    async def set_pan_fps(self, fps: int):
+        if self.pan_id is None:
+            return
+        try:
+            await self.client.send_command(f"display pan set {self.pan_id} fps={fps}")
+            self.pan_fps = fps
+            logger.info(f"Panadapter FPS set to {fps}")
+        except Exception as e:
+            logger.error(f"Failed to set panadapter FPS: {e}")
+
     async def disable_panadapter(self):
         if self.pan_id is not None:
             try:
                 await self.client.send_command(f"display pan remove {self.pan_id}")
                 self.pan_id = None
+                self.pan_width = None
+                self.pan_fps = None
                 logger.info("Panadapter disabled")
             except Exception as e:
                 logger.error(f"Failed to disable panadapter: {e}")
 
-    async def enable_rx_audio(self, sample_rate: int = 48000):
+    async def enable_rx_audio(
+        self, sample_rate: int = 48000, compression: Optional[str] = None
+    ) -> Optional[str]:
         try:
-            result = await self.client.send_command(
-                f"audio client create rx {sample_rate}"
-            )
+            if compression:
+                command = f"stream create type=remote_audio_rx compression={compression.upper()}"
+            else:
+                command = f"audio client create rx {sample_rate}"
+            result = await self.client.send_command(command)
+            self.rx_audio_stream_id = self._parse_stream_id(result)
+            self.audio_commands["rx"] = command
             logger.info(f"RX audio enabled: {result}")
+            return self.rx_audio_stream_id
         except Exception as e:
             logger.error(f"Failed to enable RX audio: {e}")
+        return None
 
-    async def enable_tx_audio(self, sample_rate: int = 48000):
+    async def enable_tx_audio(
+        self, sample_rate: int = 48000, compression: Optional[str] = None
+    ) -> Optional[str]:
         try:
-            result = await self.client.send_command(
-                f"audio client create tx {sample_rate}"
-            )
+            if compression:
+                command = f"stream create type=remote_audio_tx compression={compression.upper()}"
+            else:
+                command = f"audio client create tx {sample_rate}"
+            result = await self.client.send_command(command)
+            self.tx_audio_stream_id = self._parse_stream_id(result)
+            self.audio_commands["tx"] = command
             logger.info(f"TX audio enabled: {result}")
+            return self.tx_audio_stream_id
         except Exception as e:
             logger.error(f"Failed to enable TX audio: {e}")
+        return None
 
     async def disable_audio(self):
         try:
             await self.client.send_command("audio client remove all")
+            self.rx_audio_stream_id = None
+            self.tx_audio_stream_id = None
+            self.audio_commands.clear()
             logger.info("Audio streams disabled")
         except Exception as e:
             logger.error(f"Failed to disable audio: {e}")
 
+    async def enable_slice_audio(self, slice_id: str) -> Optional[str]:
+        """Stream one slice's RX audio on its own DAX channel; returns the stream ID
+
+        Unlike the client's remote audio, which the radio mixes from all
+        slices, these streams are separate so they can be mixed locally with
+        per-slice gain.
+        """
+        state = self.slices.get(slice_id)
+        if state is None:
+            return None
+        if state.audio_stream_id:
+            return state.audio_stream_id
+        used = {s.dax_channel for s in self.slices.values()}
+        channel = next((c for c in DAX_CHANNELS if c not in used), None)
+        if channel is None:
+            logger.error(f"No free DAX channel for slice {slice_id}")
+            return None
+        commands = [
+            f"slice set {slice_id} dax={channel}",
+            f"stream create type=dax_rx dax_channel={channel}",
+        ]
+        try:
+            results = await self.client.send_commands(commands)
+            for command, result in zip(commands, results):
+                if isinstance(result, Exception):
+                    raise Exception(f"{command}: {result}")
+            state.dax_channel = channel
+            state.audio_stream_id = self._parse_stream_id(results[1])
+            logger.info(f"Slice {slice_id} audio on DAX {channel}: {state.audio_stream_id}")
+            return state.audio_stream_id
+        except Exception as e:
+            logger.error(f"Failed to enable slice audio: {e}")
+        return None
+
+    async def disable_slice_audio(self, slice_id: str):
+        state = self.slices.get(slice_id)
+        if state is None or not state.audio_stream_id:
+            return
+        try:
+            await self.client.send_commands(
+                [f"stream remove {state.audio_stream_id}", f"slice set {slice_id} dax=0"]
+            )
+            state.dax_channel = 0
+            state.audio_stream_id = None
+            logger.info(f"Slice {slice_id} audio disabled")
+        except Exception as e:
+            logger.error(f"Failed to disable slice audio: {e}")
+
+    async def resync(self, udp_port: int = 4991) -> bool:
+        """Rebuild slices, panadapter, audio streams and subscriptions after a reconnect
+
+        The radio discards a client's objects when its connection drops, so
+        everything is recreated from local state in two pipelined bursts: the
+        creates, whose replies carry the new IDs, then the subscriptions, slice
+        settings and panadapter rate. PTT is deliberately left off.
+        """
+        slices = list(self.slices.values())
+        active = self._active_slice
+        had_pan = self.pan_id is not None
+        commands = [f"client udpport {udp_port}"]
+        commands.extend(f"slice create 0 {state.mode}" for state in slices)
+        if had_pan:
+            commands.append(f"display pan create {self.pan_width} {self.slice_state.frequency}")
+        audio = list(self.audio_commands.items())
+        commands.extend(command for _, command in audio)
+        dax = [state for state in slices if state.dax_channel]
+        commands.extend(f"stream create type=dax_rx dax_channel={s.dax_channel}" for s in dax)
+
+        try:
+            results = await self.client.send_commands(commands)
+            failed = [(c, r) for c, r in zip(commands, results) if isinstance(r, Exception)]
+            for command, error in failed:
+                logger.error(f"Resync command failed: {command}: {error}")
+            if failed:
+                return False
+
+            results = iter(results[1:])
+            self.slices = {}
+            self._active_slice = None
+            for state in slices:
+                old_id = state.slice_id
+                state.slice_id = self._parse_stream_id(next(results))
+                if state.slice_id is None:
+                    continue
+                self.slices[state.slice_id] = state
+                if old_id == active or self._active_slice is None:
+                    self._active_slice = state.slice_id
+            if had_pan:
+                self.pan_id = self._parse_stream_id(next(results))
+            for direction, _ in audio:
+                stream_id = self._parse_stream_id(next(results))
+                if direction == "rx":
+                    self.rx_audio_stream_id = stream_id
+                else:
+                    self.tx_audio_stream_id = stream_id
+            for state in dax:
+                state.audio_stream_id = self._parse_stream_id(next(results))
+
+            commands = []
+            for state in self.slices.values():
+                state.ptt = False
+                settings = (
+                    f"slice set {state.slice_id} frequency={state.frequency} mode={state.mode} "
+                    f"rfpower={state.rf_gain} af_gain={state.af_gain}"
+                )
+                if state.dax_channel:
+                    settings += f" dax={state.dax_channel}"
+                commands.append(f"sub slice {state.slice_id} all")
+                commands.append(settings)
+            if had_pan and self.pan_fps:
+                commands.append(f"display pan set {self.pan_id} fps={self.pan_fps}")
+            if commands:
+                results = await self.client.send_commands(commands)
+                for command, result in zip(commands, results):
+                    if isinstance(result, Exception):
+                        logger.error(f"Resync command failed: {command}: {result}")
+                        return False
+        except Exception as e:
+            logger.error(f"Resync failed: {e}")
+            return False
+
+        logger.info(f"Resynced slices {list(self.slices)}, pan {self.pan_id}")
+        return True
+
     async def subscribe_to_updates(self):
-        if self.slice_id:
-            await self.client.send_command(f"sub slice {self.slice_id} all")
+        for slice_id in self.slices:
+            await self.client.send_command(f"sub slice {slice_id} all")
 
     def _handle_status(self, line: str):
         parts = line.split("|")
@@ -218,37 +454,42 @@ class FlexRadioAPI:
             return
 
         msg_type = parts[1]
+        self._status_messages.inc()
 
         if msg_type == "slice" and len(parts) > 3:
-            slice_id = parts[2]
-            if slice_id == self.slice_id:
+            state = self.slices.get(parts[2])
+            if state is not None:
+                start = time.perf_counter()
                 params = parts[3:]
-                self._update_slice_state(params)
-                self._notify_state_change()
+                self._update_slice_state(params, state)
+                self._notify_state_change(state)
+                self._state_update_time.record(time.perf_counter() - start)
 
-    def _update_slice_state(self, params: List[str]):
+    def _update_slice_state(self, params: List[str], state: Optional[SliceState] = None):
+        state = state or self.slice_state
         for param in params:
             if "frequency=" in param:
                 try:
-                    self.slice_state.frequency = int(param.split("=")[1])
+                    state.frequency = int(param.split("=")[1])
                 except (ValueError, IndexError) as e:
                     logger.warning(f"Invalid frequency parameter: {param}")
             elif "mode=" in param:
-                self.slice_state.mode = param.split("=")[1]
+                state.mode = param.split("=")[1]
             elif "rfpower=" in param:
                 try:
-                    self.slice_state.rf_gain = int(param.split("=")[1])
+                    state.rf_gain = int(param.split("=")[1])
                 except (ValueError, IndexError) as e:
                     logger.warning(f"Invalid RF power parameter: {param}")
             elif "af_gain=" in param:
                 try:
-                    self.slice_state.af_gain = int(param.split("=")[1])
+                    state.af_gain = int(param.split("=")[1])
                 except (ValueError, IndexError) as e:
                     logger.warning(f"Invalid AF gain parameter: {param}")
 
-    def _notify_state_change(self):
+    def _notify_state_change(self, state: Optional[SliceState] = None):
+        state = state or self.slice_state
         for callback in self.state_callbacks:
-            callback(self.slice_state)
+            callback(state)
 
     def add_state_callback(self, callback: Callable):
         self.state_callbacks.append(callback)
@@ -257,6 +498,15 @@ class FlexRadioAPI:
         if callback in self.state_callbacks:
             self.state_callbacks.remove(callback)
 
+    def _parse_stream_id(self, result: str) -> Optional[str]:
+        """Extract a stream ID such as "0x60000000" from a command result"""
+        if not result:
+            return None
+        stream_id = result.split()[0]
+        if "|" in stream_id:
+            stream_id = stream_id.split("|")[-1]
+        return stream_id or None
+
     def _validate_frequency(self, hz: int) -> bool:
         """Validate frequency range (1.8 MHz - 30 MHz)"""
         return 1800000 <= hz <= 30000000
@@ -267,4 +517,4 @@ class FlexRadioAPI:
 
     def _validate_mode(self, mode: str) -> bool:
         """Validate mode"""
-        return mode.lower() in ["usb", "lsb", "cw", "am", "fm"]
+        return mode.lower() in ["usb", "lsb", "cw", "am", "fm", "digu", "digl"]
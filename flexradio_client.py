@@ -1,28 +1,169 @@
 import asyncio
+import collections
 import logging
-from typing import Any, Callable, Dict, Optional
+import time
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Union
+
+from metrics import REGISTRY, MetricsRegistry
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Outgoing command priorities, most urgent first
+PRIORITY_PTT = 0
+PRIORITY_TUNING = 1
+PRIORITY_DISPLAY = 2
+PRIORITY_BULK = 3
+
+
+def command_priority(command: str) -> int:
+    """Default priority of a command, from its verb"""
+    words = command.split(None, 2)
+    if not words:
+        return PRIORITY_BULK
+    verb = words[0]
+    if verb in ("xmit", "interlock"):
+        return PRIORITY_PTT
+    if verb == "ping" or (verb == "slice" and len(words) > 1 and words[1] in ("set", "tune")):
+        return PRIORITY_TUNING
+    if verb == "display":
+        return PRIORITY_DISPLAY
+    return PRIORITY_BULK
+
+
+class RadioProtocol(asyncio.Protocol):
+    """TCP stream from the radio, split into lines in bulk
+
+    Each ``data_received`` appends to a ``bytearray``, decodes every complete
+    line with a single ``decode`` and hands the text to the client, so a
+    flood of status lines costs one callback per TCP read instead of one
+    coroutine resumption and several allocations per line. The protocol is
+    also the client's writer: ``write``, ``drain`` (transport flow control),
+    ``close`` and ``wait_closed``.
+    """
+
+    MAX_LINE = 65536
+
+    def __init__(self, client: "FlexRadioClient"):
+        self.client = client
+        self.transport: Optional[asyncio.Transport] = None
+        self._buffer = bytearray()
+        self._paused = False
+        self._drain_waiter: Optional[asyncio.Future] = None
+        self._lost = False
+        self._closed = asyncio.get_running_loop().create_future()
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data: bytes):
+        buffer = self._buffer
+        buffer += data
+        end = buffer.rfind(b"\n")
+        if end < 0:
+            if len(buffer) > self.MAX_LINE:
+                logger.warning(f"Discarding {len(buffer)} bytes without a line end")
+                buffer.clear()
+            return
+        text = buffer[:end].decode(errors="replace")
+        del buffer[: end + 1]
+        self.client._dispatch(text)
+
+    def connection_lost(self, exc: Optional[Exception]):
+        self._lost = True
+        if not self._closed.done():
+            self._closed.set_result(None)
+        self._wake_drain()
+        self.client._transport_lost(self, exc)
+
+    def pause_writing(self):
+        self._paused = True
+
+    def resume_writing(self):
+        self._paused = False
+        self._wake_drain()
+
+    def _wake_drain(self):
+        waiter, self._drain_waiter = self._drain_waiter, None
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def write(self, data: bytes):
+        self.transport.write(data)
+
+    async def drain(self):
+        if self._lost:
+            raise ConnectionResetError("Connection lost")
+        if not self._paused:
+            return
+        self._drain_waiter = asyncio.get_running_loop().create_future()
+        await self._drain_waiter
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+
+    async def wait_closed(self):
+        await self._closed
+
 
 class FlexRadioClient:
-    def __init__(self, host: str, port: int = 4992, timeout: float = 5.0):
+    """TCP command channel to the radio
+
+    The radio executes commands in arrival order, so a burst of slider or
+    display commands already sent would delay a later ``xmit``. Outgoing
+    commands therefore wait in per-priority queues and at most
+    ``max_in_flight`` are sent but unanswered at a time; each reply frees a
+    slot and the queues are drained most urgent first. Queued commands are
+    flushed once per event loop iteration, so everything submitted in one
+    iteration goes out in a single write. PTT commands bypass the queues and
+    the window and flush immediately.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 4992,
+        timeout: float = 5.0,
+        metrics: Optional[MetricsRegistry] = None,
+        max_in_flight: int = 8,
+    ):
         self.host = host
         self.port = port
         self.timeout = timeout
-        self.reader = None
-        self.writer = None
+        self.max_in_flight = max_in_flight
+        self.writer: Optional[RadioProtocol] = None
+        self.version: Optional[str] = None
         self.sequence = 0
         self.pending_commands: Dict[int, asyncio.Future] = {}
         self.status_callback = None
+        self.disconnect_callback = None
+        self.heartbeat_callback = None
         self.running = False
+        self.last_received = 0.0
+        # (seq, line, time queued) per priority
+        self._queues: List[Deque[tuple]] = [collections.deque() for _ in range(PRIORITY_BULK + 1)]
+        self._in_flight: Set[int] = set()
+        self._flush_handle: Optional[asyncio.Handle] = None
+
+        metrics = metrics or REGISTRY
+        self._commands = metrics.counter("commands_total", "Commands sent to the radio")
+        self._timeouts = metrics.counter("command_timeouts_total", "Commands without a response")
+        self._rtt = metrics.histogram("command_rtt_seconds", "Command round-trip time")
+        self._queue_wait = metrics.histogram(
+            "command_queue_seconds", "Time commands wait for a send slot"
+        )
+        self._connected = metrics.gauge("radio_connected", "1 while the TCP connection is up")
 
     async def connect(self) -> bool:
         try:
-            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            loop = asyncio.get_running_loop()
+            _, self.writer = await loop.create_connection(
+                lambda: RadioProtocol(self), self.host, self.port
+            )
             self.running = True
-            asyncio.create_task(self._receive_responses())
+            self.last_received = time.monotonic()
+            self._connected.set(1)
             logger.info(f"Connected to {self.host}:{self.port}")
             return True
         except Exception as e:
@@ -31,67 +172,205 @@ class FlexRadioClient:
 
     async def disconnect(self):
         self.running = False
+        self._connected.set(0)
+        self._fail_pending(ConnectionError("Disconnected"))
         if self.writer:
             self.writer.close()
             try:
                 await self.writer.wait_closed()
             except Exception as e:
                 logger.warning(f"Error closing writer: {e}")
-        self.reader = None
         self.writer = None
         logger.info("Disconnected")
 
-    async def send_command(self, command: str) -> str:
-        if self.writer is None:
-            raise RuntimeError("Not connected to radio. Call connect() first.")
+    def abort(self, reason: str):
+        """Drop a connection that is known to be dead, e.g. after a missed keepalive"""
+        if self.running:
+            self._connection_lost(reason)
 
-        self.sequence = (self.sequence + 1) % 1000
-        seq = self.sequence
+    def _connection_lost(self, reason: str):
+        """Tear down after EOF, a read error or a dead keepalive and wake every waiting command"""
+        logger.warning(f"Connection lost: {reason}")
+        self.running = False
+        self._connected.set(0)
+        self._fail_pending(ConnectionError(f"Connection lost: {reason}"))
+        if self.writer:
+            self.writer.close()
+        self.writer = None
+        if self.disconnect_callback:
+            self.disconnect_callback(reason)
 
-        cmd_str = f"C{seq}|{command}\n"
-        self.writer.write(cmd_str.encode())
-        await self.writer.drain()
+    def _fail_pending(self, exc: Exception):
+        for future in self.pending_commands.values():
+            if not future.done():
+                future.set_exception(exc)
+        self.pending_commands.clear()
+        for queue in self._queues:
+            queue.clear()
+        self._in_flight.clear()
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
 
+    def _register(self, command: str) -> tuple:
+        """Allocate a sequence number and a response future for ``command``"""
+        self.sequence = (self.sequence + 1) % 1000
+        seq = self.sequence
         future = asyncio.Future()
         self.pending_commands[seq] = future
+        self._commands.inc()
+        return seq, future, f"C{seq}|{command}\n"
+
+    def _submit(self, items: List[tuple], priority: int):
+        """Queue ``(seq, line)`` items for the next flush; PTT flushes right away"""
+        now = time.perf_counter()
+        entries = [(seq, line, now) for seq, line in items]
+        if priority == PRIORITY_PTT:
+            self._flush(entries)
+            return
+        self._queues[priority].extend(entries)
+        self._schedule_flush()
 
+    def _schedule_flush(self):
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_soon(self._flush)
+
+    def _flush(self, urgent: List[tuple] = ()):
+        """Write ``urgent`` plus queued commands, most urgent first, that fit the window"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self.writer is None:
+            return
+        batch = list(urgent)
+        room = self.max_in_flight - len(self._in_flight) - len(batch)
+        for queue in self._queues:
+            while queue and room > 0:
+                batch.append(queue.popleft())
+                room -= 1
+        if not batch:
+            return
+        now = time.perf_counter()
+        for seq, _, queued in batch:
+            self._in_flight.add(seq)
+            self._queue_wait.record(now - queued)
+        self.writer.write("".join(line for _, line, _ in batch).encode())
+
+    def _forget(self, seq: int):
+        """Drop a command that timed out or was cancelled, queued or not"""
+        self.pending_commands.pop(seq, None)
+        if seq in self._in_flight:
+            self._in_flight.discard(seq)
+        else:
+            for queue in self._queues:
+                for item in queue:
+                    if item[0] == seq:
+                        queue.remove(item)
+                        break
+        if self.writer is not None and any(self._queues):
+            self._schedule_flush()
+
+    async def _await_response(self, seq: int, future: asyncio.Future, command: str, start: float):
         try:
             result = await asyncio.wait_for(future, timeout=self.timeout)
+            self._rtt.record(time.perf_counter() - start)
             return result
         except asyncio.TimeoutError:
-            if seq in self.pending_commands:
-                del self.pending_commands[seq]
+            self._timeouts.inc()
+            self._forget(seq)
             raise TimeoutError(f"Command timeout: {command}")
+        except asyncio.CancelledError:
+            self._forget(seq)
+            raise
 
-    async def _receive_responses(self):
-        while self.running and self.reader:
+    async def send_command(self, command: str, priority: Optional[int] = None) -> str:
+        """Send ``command`` and return the reply message
+
+        ``priority`` defaults to :func:`command_priority` of the command.
+        """
+        if self.writer is None:
+            raise RuntimeError("Not connected to radio. Call connect() first.")
+
+        # Register before writing so a fast reply cannot arrive ahead of its future
+        seq, future, cmd_str = self._register(command)
+        start = time.perf_counter()
+        if priority is None:
+            priority = command_priority(command)
+        self._submit([(seq, cmd_str)], priority)
+        await self.writer.drain()
+        return await self._await_response(seq, future, command, start)
+
+    async def send_commands(
+        self, commands: List[str], priority: Optional[int] = None
+    ) -> List[Union[str, Exception]]:
+        """Pipeline ``commands`` in order and wait for all replies
+
+        The batch is queued at ``priority`` (default: that of its most urgent
+        command) so it stays in order and goes out in as few writes as the
+        in-flight window allows. Results are returned in order; a failed
+        command yields its exception instead of a reply so one bad command
+        does not hide the others.
+        """
+        if self.writer is None:
+            raise RuntimeError("Not connected to radio. Call connect() first.")
+        if not commands:
+            return []
+
+        registered = [self._register(command) for command in commands]
+        start = time.perf_counter()
+        if priority is None:
+            priority = min(command_priority(command) for command in commands)
+        self._submit([(seq, line) for seq, _, line in registered], priority)
+        await self.writer.drain()
+        return await asyncio.gather(
+            *(
+                self._await_response(seq, future, command, start)
+                for (seq, future, _), command in zip(registered, commands)
+            ),
+            return_exceptions=True,
+        )
+
+    def _transport_lost(self, protocol: RadioProtocol, exc: Optional[Exception]):
+        # A previous connection closing late must not tear down its replacement
+        if self.running and protocol is self.writer:
+            self._connection_lost(str(exc) if exc else "connection closed by radio")
+
+    def _dispatch(self, text: str):
+        """Handle a chunk of complete lines from :class:`RadioProtocol`"""
+        self.last_received = time.monotonic()
+        if "\r" in text:
+            text = text.replace("\r", "")
+        status = self.status_callback
+        for line in text.split("\n"):
+            if not line:
+                continue
+            kind = line[0]
             try:
-                line = await self.reader.readline()
-                if not line:
-                    break
-
-                line_str = line.decode().strip()
-
-                if not line_str:
-                    continue
-
-                if line_str[0] == "H":
-                    self._handle_heartbeat(line_str)
-                elif line_str[0] == "R":
-                    seq, errno, message = self._parse_response(line_str)
-                    if seq in self.pending_commands:
-                        if errno == "0":
-                            self.pending_commands[seq].set_result(message)
-                        else:
-                            self.pending_commands[seq].set_exception(
-                                Exception(f"{errno}: {message}")
-                            )
-                elif line_str[0] == "S":
-                    self._handle_status(line_str)
+                if kind == "S":
+                    if status is not None:
+                        status(line)
+                elif kind == "R":
+                    self._handle_response(line)
+                elif kind == "H":
+                    self._handle_heartbeat(line)
+                elif kind == "M":
+                    self._handle_message(line)
+                elif kind == "V":
+                    self.version = line[1:]
             except Exception as e:
-                logger.error(f"Error receiving response: {e}")
-                if not self.running:
-                    break
+                logger.error(f"Error handling line {line!r}: {e}")
+
+    def _handle_response(self, line: str):
+        seq, errno, message = self._parse_response(line)
+        self._in_flight.discard(seq)
+        if any(self._queues):
+            self._schedule_flush()
+        future = self.pending_commands.pop(seq, None)
+        if future is not None and not future.done():
+            if errno == "0":
+                future.set_result(message)
+            else:
+                future.set_exception(Exception(f"{errno}: {message}"))
 
     def _parse_response(self, line: str) -> tuple:
         parts = line[1:].split("|", 2)
@@ -101,11 +380,18 @@ class FlexRadioClient:
         return seq, errno, message
 
     def _handle_heartbeat(self, line: str):
-        pass
+        if self.heartbeat_callback:
+            self.heartbeat_callback(line)
 
-    def _handle_status(self, line: str):
-        if self.status_callback:
-            self.status_callback(line)
+    def _handle_message(self, line: str):
+        logger.info(f"Radio message: {line[1:]}")
 
     def set_status_callback(self, callback: Callable[[str], None]):
         self.status_callback = callback
+
+    def set_heartbeat_callback(self, callback: Callable[[str], None]):
+        self.heartbeat_callback = callback
+
+    def set_disconnect_callback(self, callback: Callable[[str], None]):
+        """Called with a reason when the link drops without disconnect() being called"""
+        self.disconnect_callback = callback
@@ -1,11 +1,15 @@
 import asyncio
 import logging
+import os
 import sys
+import threading
+import time
 
 from PyQt6.QtCore import QSettings, Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QKeySequence, QShortcut
 from PyQt6.QtWidgets import (
     QApplication,
+    QFileDialog,
     QHBoxLayout,
     QLabel,
     QLineEdit,
@@ -18,13 +22,31 @@ from PyQt6.QtWidgets import (
     QWidget,
 )
 
+from audio_codec import PcmCodec, create_codecs
 from audio_manager import AudioManager
+from audio_recorder import AudioRecorder
+from cat_server import RigctldServer
+from channel_io import export_channels, import_channels
+from channel_store import ChannelStore
 from config_manager import ConfigManager
+from connection_supervisor import LINK_LOST, ConnectionSupervisor
+from discovery import DiscoveryListener, RadioCache
 from flexradio_api import FlexRadioAPI, SliceState
 from flexradio_client import FlexRadioClient
+from link_monitor import LINK_ADAPTATION, LinkMonitor
+from memory_browser import MemoryBrowser
 from memory_manager import MemoryManager
+from metrics import REGISTRY
+from metrics_exporter import MetricsExporter
+from metrics_overlay import MetricsOverlay
 from panadapter_display import PanadapterWidget
+from radio_daemon import AudioPlayout, DaemonAPI, DaemonClient
+from rx_audio import RxAudioMixer, RxAudioStream
 from settings_dialog import SettingsDialog
+from stall_watchdog import StallWatchdog, run_asyncio_probe
+from tx_audio import TxAudioPipeline
+from udp_ingest import UdpIngest
+from vita_capture import CaptureError, CaptureWriter
 from waterfall_display import WaterfallWidget
 
 logging.basicConfig(level=logging.INFO)
@@ -32,16 +54,44 @@ logger = logging.getLogger(__name__)
 
 
 class FlexRadioGUI(QMainWindow):
+    # ImportReport, or the exception, from a channel import thread
+    import_finished = pyqtSignal(object)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("FlexRadio 6400 Control")
         self.resize(1200, 800)
 
         self.config_manager = ConfigManager()
-        self.client = FlexRadioClient(self.config_manager.get_radio_ip())
+        self.radio_cache = RadioCache(self.config_manager.config_dir / "radios.json")
+        self.radio_cache.load()
+        self.discovery = None
+        self.client = FlexRadioClient(self._radio_ip())
         self.api = FlexRadioAPI(self.client)
-        self.audio_manager = AudioManager(self.config_manager.config)
+        # Attach through the headless daemon, which runs the link, audio and DSP
+        self.use_daemon = self.config_manager.get("daemon.connect", False)
+        self.daemon_client = None
+        self.playout = None
+        self.audio_manager = AudioManager(self.config_manager.config, dsp=not self.use_daemon)
         self.memory_manager = MemoryManager(max_channels=10)
+        # All stored channels; the memory buttons are the first few from the config
+        self.channel_store = ChannelStore(self.config_manager.config_dir / "channels.db")
+        self.tx_pipeline = None
+        self.rx_audio = None
+        self.rx_mixer = None
+        # DAX channel -> registered stream ID of each slice audio stream
+        self.slice_stream_ids = {}
+        self.udp_ingest = None
+        self.recorder = None
+        self.capture = None
+        self.supervisor = None
+        self.rx_stream_id = None
+        self.link_monitor = LinkMonitor(
+            ping_interval=self.config_manager.get("radio.link.ping_interval", 1.0),
+            heartbeat_interval=self.config_manager.get("radio.link.heartbeat_interval", 1.0),
+        )
+        self.link_monitor.add_level_callback(self._on_link_quality)
+        self._link_task = None
 
         self.panadapter = PanadapterWidget()
         self.waterfall = WaterfallWidget(history_lines=100)
@@ -57,6 +107,34 @@ class FlexRadioGUI(QMainWindow):
         except:
             self.async_loop = asyncio.get_event_loop()
 
+        self._loop_lag = REGISTRY.histogram(
+            "event_loop_lag_seconds", "Delay of the 10 ms event loop tick"
+        )
+        self._last_tick = time.perf_counter()
+        REGISTRY.gauge("rx_jitter_underruns", "RX jitter buffer underruns").set_function(
+            lambda: self.rx_audio.underruns if self.rx_audio else 0
+        )
+        REGISTRY.gauge("rx_jitter_depth", "Packets waiting in the RX jitter buffer").set_function(
+            lambda: len(self.rx_audio.jitter) if self.rx_audio else 0
+        )
+        self.metrics_exporter = None
+        if self.config_manager.get("metrics.exporter.enabled", False):
+            self.metrics_exporter = MetricsExporter(
+                self.config_manager.get("metrics.exporter.host", "127.0.0.1"),
+                self.config_manager.get("metrics.exporter.port", 9464),
+            )
+            asyncio.run_coroutine_threadsafe(self.metrics_exporter.start(), self.async_loop)
+        self.cat_server = None
+        if self.config_manager.get("cat.enabled", False):
+            self.cat_server = RigctldServer(
+                self.api,
+                self.config_manager.get("cat.host", "127.0.0.1"),
+                self.config_manager.get("cat.port", 4532),
+            )
+            asyncio.run_coroutine_threadsafe(self.cat_server.start(), self.async_loop)
+        self._start_watchdog()
+        self._start_discovery()
+
         self.setup_ui()
         self.setup_connections()
         self._load_window_geometry()
@@ -65,11 +143,26 @@ class FlexRadioGUI(QMainWindow):
         self.qt_timer.timeout.connect(self._process_asyncio_tasks)
         self.qt_timer.start(10)
 
+        self.audio_stats_timer = QTimer()
+        self.audio_stats_timer.timeout.connect(self._update_audio_stats)
+        self.audio_stats_timer.start(1000)
+
         self.api.add_state_callback(self._on_state_changed)
 
+        # Connect to the last radio used right away; discovery keeps running
+        if self.config_manager.get(
+            "radio.discovery.auto_connect", True
+        ) and self.radio_cache.last_radio():
+            QTimer.singleShot(0, self.on_connect)
+
         logger.info("FlexRadio GUI initialized")
 
     def _process_asyncio_tasks(self):
+        now = time.perf_counter()
+        self._loop_lag.record(now - self._last_tick - 0.010)
+        self._last_tick = now
+        if self.watchdog:
+            self._qt_probe.beat()
         if self.async_loop.is_running():
             return
         try:
@@ -78,6 +171,56 @@ class FlexRadioGUI(QMainWindow):
         except:
             pass
 
+    def _radio_ip(self) -> str:
+        """Last known address of the last radio used, else the configured address"""
+        last = self.radio_cache.last_radio()
+        return last.ip if last else self.config_manager.get_radio_ip()
+
+    def _start_discovery(self):
+        """Listen for radio broadcasts in the background (radio.discovery)"""
+        if not self.config_manager.get("radio.discovery.enabled", True):
+            return
+        self.discovery = DiscoveryListener(
+            self.radio_cache, port=self.config_manager.get("radio.discovery.port", 4992)
+        )
+        self.discovery.add_radio_callback(self._on_radio_discovered)
+        asyncio.run_coroutine_threadsafe(self.discovery.start(), self.async_loop)
+
+    def _on_radio_discovered(self, radio):
+        # Runs on the asyncio loop, which is pumped on the GUI thread
+        if self.connected and radio.ip == self.client.host:
+            self.radio_cache.set_last_radio(radio.serial)
+            self.radio_cache.save()
+        elif not self.connected and radio.serial == self.radio_cache.last_serial:
+            # The last radio used came back, possibly at a new address
+            self.ip_label.setText(f"Radio IP: {radio.ip}")
+        name = " ".join(part for part in (radio.model, radio.nickname) if part)
+        self.status_bar.showMessage(f"Found {name} at {radio.ip}", 3000)
+
+    def _start_watchdog(self):
+        """Watch the Qt timer tick and the asyncio loop for stalls (watchdog config)"""
+        self.watchdog = None
+        self._asyncio_probe_task = None
+        if not self.config_manager.get("watchdog.enabled", True):
+            return
+        self.watchdog = StallWatchdog(
+            threshold=self.config_manager.get("watchdog.threshold_ms", 250) / 1000.0,
+            log_path=self.config_manager.get("watchdog.log_file"),
+            ring_size=self.config_manager.get("watchdog.ring_size", 20),
+        )
+        self._qt_probe = self.watchdog.add_probe("qt")
+        asyncio_probe = self.watchdog.add_probe("asyncio")
+        self._asyncio_probe_task = asyncio.run_coroutine_threadsafe(
+            run_asyncio_probe(
+                asyncio_probe,
+                histogram=REGISTRY.histogram(
+                    "asyncio_lag_seconds", "Lateness of a 50 ms asyncio sleep"
+                ),
+            ),
+            self.async_loop,
+        )
+        self.watchdog.start()
+
     def setup_ui(self):
         menubar = self.menuBar()
         file_menu = menubar.addMenu("&File")
@@ -87,6 +230,18 @@ class FlexRadioGUI(QMainWindow):
         file_menu.addSeparator()
         file_menu.addAction("&Quit", self.close)
 
+        view_menu = menubar.addMenu("&View")
+        self.overlay_action = view_menu.addAction("Performance &Overlay")
+        self.overlay_action.setCheckable(True)
+        self.overlay_action.setShortcut(QKeySequence(Qt.Key.Key_F3))
+        self.overlay_action.toggled.connect(self.on_overlay_toggled)
+
+        memory_menu = menubar.addMenu("&Memory")
+        memory_menu.addAction("&Channels...", self.show_memory_browser)
+        memory_menu.addAction("&Import...", self.import_memory_channels)
+        memory_menu.addAction("&Export...", self.export_memory_channels)
+        self.import_finished.connect(self._on_import_finished)
+
         central_widget = QWidget()
         display_layout = QHBoxLayout()
 
@@ -106,15 +261,20 @@ class FlexRadioGUI(QMainWindow):
         self.setup_controls(central_widget)
         self.setCentralWidget(central_widget)
 
+        self.metrics_overlay = MetricsOverlay(central_widget)
+        self.overlay_action.setChecked(self.config_manager.get("metrics.overlay", False))
+
         self.status_bar = QStatusBar()
         self.setStatusBar(self.status_bar)
+        self.audio_stats_label = QLabel("")
+        self.status_bar.addPermanentWidget(self.audio_stats_label)
 
     def setup_controls(self, central):
         control_panel = QWidget()
         controls_layout = QVBoxLayout()
 
         ip_layout = QHBoxLayout()
-        self.ip_label = QLabel(f"Radio IP: {self.config_manager.get_radio_ip()}")
+        self.ip_label = QLabel(f"Radio IP: {self._radio_ip()}")
         ip_layout.addWidget(self.ip_label)
         controls_layout.addLayout(ip_layout)
 
@@ -125,6 +285,18 @@ class FlexRadioGUI(QMainWindow):
         freq_layout.addWidget(self.freq_input)
         controls_layout.addLayout(freq_layout)
 
+        slice_layout = QHBoxLayout()
+        slice_layout.addWidget(QLabel("Slice:"))
+        self.slice_buttons = {}
+        self.slice_buttons_layout = QHBoxLayout()
+        slice_layout.addLayout(self.slice_buttons_layout)
+        self.dual_watch_btn = QPushButton("Dual Watch")
+        self.dual_watch_btn.setCheckable(True)
+        self.dual_watch_btn.setEnabled(False)
+        slice_layout.addWidget(self.dual_watch_btn)
+        slice_layout.addStretch()
+        controls_layout.addLayout(slice_layout)
+
         band_layout = QHBoxLayout()
         self.band_buttons = []
         bands = [
@@ -189,8 +361,12 @@ class FlexRadioGUI(QMainWindow):
         self.rx_btn.setCheckable(True)
         self.rx_btn.setChecked(True)
         self.rx_btn.setStyleSheet("QPushButton:checked { background-color: #4caf50; }")
+        self.rec_btn = QPushButton("REC")
+        self.rec_btn.setCheckable(True)
+        self.rec_btn.setStyleSheet("QPushButton:checked { background-color: #ff9800; }")
         ptt_layout.addWidget(self.tx_btn)
         ptt_layout.addWidget(self.rx_btn)
+        ptt_layout.addWidget(self.rec_btn)
         controls_layout.addLayout(ptt_layout)
 
         self.status_label = QLabel("Status: Disconnected")
@@ -222,6 +398,8 @@ class FlexRadioGUI(QMainWindow):
         self.rf_gain_slider.valueChanged.connect(self.on_rf_gain_changed)
         self.af_gain_slider.valueChanged.connect(self.on_af_gain_changed)
         self.tx_btn.clicked.connect(self.on_ptt_toggled)
+        self.rec_btn.toggled.connect(self.on_record_toggled)
+        self.dual_watch_btn.clicked.connect(self.on_dual_watch_toggled)
         self.panadapter.frequency_clicked.connect(self.on_panadapter_clicked)
 
         for i, btn in enumerate(self.memory_buttons):
@@ -233,29 +411,57 @@ class FlexRadioGUI(QMainWindow):
         QShortcut(QKeySequence(Qt.Key.Key_Space), self, self.on_space_key)
 
         self.memory_manager.load_from_config(self.config_manager.config)
+        if len(self.channel_store) == 0:
+            self.channel_store.add_many(self.memory_manager.all_channels())
         self._update_memory_buttons()
         self._update_band_buttons()
 
     def on_connect(self):
-        ip = self.config_manager.get_radio_ip()
+        ip = self._radio_ip()
         self.status_bar.showMessage("Connecting to radio...")
+        if self.use_daemon:
+            self._connect_daemon(ip)
+            return
 
         self.client = FlexRadioClient(ip)
         self.api = FlexRadioAPI(self.client)
         self.api.add_state_callback(self._on_state_changed)
+        if self.cat_server:
+            self.cat_server.api = self.api
 
         async def connect_task():
+            await self._stop_supervisor()
+            self._stop_link_monitor()
             if await self.client.connect():
                 logger.info("Connected to radio")
-                if await self.api.connect():
+                if await self.api.connect(self.config_manager.get("radio.udp_port", 4991)):
                     slice_id = await self.api.create_slice(mode="usb")
                     if slice_id:
                         logger.info(f"Slice created: {slice_id}")
                         await self.api.enable_panadapter()
-                        await self.api.enable_rx_audio()
+                        rx_codec, tx_codec, compression = create_codecs(
+                            self.config_manager.config["audio"]
+                        )
+                        rx_stream_id = await self.api.enable_rx_audio(
+                            compression=compression
+                        )
+                        if rx_stream_id:
+                            await self._start_rx_audio(rx_stream_id, rx_codec)
+                        tx_stream_id = await self.api.enable_tx_audio(
+                            compression=compression
+                        )
+                        if tx_stream_id:
+                            self._start_tx_pipeline(ip, tx_stream_id, tx_codec)
                         self.connected = True
+                        radio = self.radio_cache.find_by_ip(ip)
+                        if radio:
+                            self.radio_cache.set_last_radio(radio.serial)
+                            self.radio_cache.save()
+                        self._start_supervisor()
+                        self._start_link_monitor()
                         self._update_memory_buttons()
                         self._update_band_buttons()
+                        self._update_slice_controls()
                         self.update_status()
                         self.status_bar.showMessage("Connected to radio", 3000)
                     else:
@@ -290,10 +496,285 @@ class FlexRadioGUI(QMainWindow):
 
         asyncio.run_coroutine_threadsafe(connect_task(), self.async_loop)
 
+    def _connect_daemon(self, ip):
+        """Attach to the radio through the daemon (daemon.connect) instead of directly
+
+        The daemon connects to the radio at ``ip`` unless it already runs
+        ``daemon.radio`` or, without that, any radio. RX audio arrives
+        processed; microphone audio is sent to the daemon unprocessed.
+        """
+        previous = self.daemon_client
+        self.daemon_client = DaemonClient()
+        self.daemon_client.add_close_callback(self._on_daemon_closed)
+        self.api = DaemonAPI(self.daemon_client, self.config_manager.get("daemon.radio"))
+        self.api.add_state_callback(self._on_state_changed)
+        self.api.add_link_callback(self._on_link_state)
+        if self.cat_server:
+            self.cat_server.api = self.api
+
+        async def connect_task():
+            if previous:
+                self._stop_playout()
+                await previous.close()
+            socket_path = self.config_manager.get("daemon.socket")
+            if not await self.daemon_client.connect(
+                os.path.expanduser(socket_path) if socket_path else None,
+                host=self.config_manager.get("daemon.host", "127.0.0.1"),
+                port=self.config_manager.get("daemon.port", 4993),
+            ):
+                self.status_bar.showMessage("Daemon connection failed", 5000)
+                QMessageBox.warning(
+                    self,
+                    "Connection Error",
+                    "Failed to connect to the radio daemon.\n\n"
+                    "Start it with: python -m radio_daemon",
+                )
+                return
+            if not await self.api.connect(ip):
+                await self.daemon_client.close()
+                self.status_bar.showMessage("Daemon has no radio", 5000)
+                QMessageBox.warning(
+                    self, "Connection Error", f"The radio daemon could not connect to {ip}."
+                )
+                return
+            if self.api.audio:
+                self._start_playout()
+            self.connected = True
+            self._update_memory_buttons()
+            self._update_band_buttons()
+            self._update_slice_controls()
+            self._show_slice_state(self.api.slice_state)
+            self.status_bar.showMessage(f"Connected to {self.api.radio} via daemon", 3000)
+
+        asyncio.run_coroutine_threadsafe(connect_task(), self.async_loop)
+
+    def _start_playout(self):
+        audio_config = self.config_manager.config["audio"]
+        self.playout = AudioPlayout(
+            self.api.radio,
+            audio_config["sample_rate"],
+            audio_config["chunk_size"],
+            jitter_blocks=audio_config.get("jitter_packets", 3),
+        )
+        self.daemon_client.add_event_callback(self.playout.on_event)
+        self.audio_manager.set_rx_callback(self.playout.read_bytes)
+        self.audio_manager.set_tx_callback(self._send_tx_audio)
+        self.audio_manager.start_rx()
+
+    def _stop_playout(self):
+        if self.playout:
+            self.audio_manager.set_rx_callback(None)
+            self.audio_manager.set_tx_callback(None)
+            self.audio_manager.stop_rx()
+            self.playout = None
+
+    def _send_tx_audio(self, pcm):
+        # Runs on the PortAudio thread; the daemon connection belongs to the event loop
+        self.async_loop.call_soon_threadsafe(self._forward_tx_audio, pcm)
+
+    def _forward_tx_audio(self, pcm):
+        if self.daemon_client and self.daemon_client.writer is not None:
+            self.daemon_client.send_tx_audio(pcm, self.api.radio)
+
+    def _on_daemon_closed(self):
+        self._stop_playout()
+        self.audio_manager.stop_tx()
+        self.connected = False
+        self.ptt_active = False
+        self.tx_btn.setChecked(False)
+        self.rx_btn.setChecked(True)
+        self._update_memory_buttons()
+        self._update_band_buttons()
+        self._update_slice_controls()
+        self.update_status()
+        self.status_bar.showMessage("Daemon connection lost")
+
+    def _start_supervisor(self):
+        """Reconnect and resync automatically when the link drops (radio.reconnect)"""
+        if not self.config_manager.get("radio.reconnect.enabled", True):
+            return
+        self.supervisor = ConnectionSupervisor(
+            self.client,
+            self.api,
+            udp_port=self.config_manager.get("radio.udp_port", 4991),
+            keepalive_interval=self.config_manager.get("radio.reconnect.keepalive_interval", 2.0),
+            max_backoff=self.config_manager.get("radio.reconnect.max_backoff", 30.0),
+            link_monitor=self.link_monitor,
+        )
+        self.supervisor.add_link_callback(self._on_link_state)
+        self.supervisor.start()
+
+    async def _stop_supervisor(self):
+        if self.supervisor:
+            await self.supervisor.stop()
+            self.supervisor = None
+
+    def _start_link_monitor(self):
+        self.client.set_heartbeat_callback(self.link_monitor.on_heartbeat)
+        # The supervisor's keepalive pings feed the monitor when reconnect is on
+        if self.supervisor is None:
+            self._link_task = asyncio.create_task(self.link_monitor.run(self.client))
+
+    def _stop_link_monitor(self):
+        if self._link_task:
+            self._link_task.cancel()
+            self._link_task = None
+
+    def _on_link_quality(self, level):
+        """Lower the pan rate and deepen RX buffering while the link is degraded"""
+        fps_scale, extra_packets = LINK_ADAPTATION[level]
+        if self.rx_mixer:
+            for stream in self.rx_mixer.sources().values():
+                stream.jitter.set_target_depth(
+                    self.config_manager.get("audio.jitter_packets", 3) + extra_packets
+                )
+        if self.connected:
+            fps = max(1, round(self.config_manager.get("display.panadapter_fps", 15) * fps_scale))
+            asyncio.run_coroutine_threadsafe(self.api.set_pan_fps(fps), self.async_loop)
+        self.status_bar.showMessage(f"Link quality: {level}", 3000)
+
+    def _on_link_state(self, state):
+        if state == LINK_LOST:
+            self.audio_manager.stop_tx()
+            if self.tx_pipeline:
+                self.tx_pipeline.flush()
+            self.connected = False
+            self.ptt_active = False
+            self.tx_btn.setChecked(False)
+            self.rx_btn.setChecked(True)
+            self.update_status()
+            self.status_bar.showMessage("Connection lost, reconnecting...")
+            return
+
+        if self.daemon_client is None:
+            self._rebind_streams()
+        self.connected = True
+        self._update_slice_controls()
+        self.update_status()
+        self.status_bar.showMessage("Reconnected to radio", 3000)
+
+    def _rebind_streams(self):
+        """Follow the stream IDs the radio assigned during resync"""
+        rx_id = self.api.rx_audio_stream_id
+        if self.rx_audio and self.udp_ingest and rx_id and int(rx_id, 16) != self.rx_stream_id:
+            self.udp_ingest.unregister(self.rx_stream_id)
+            self.rx_stream_id = int(rx_id, 16)
+            self.udp_ingest.register(self.rx_stream_id, self.rx_audio.on_packet)
+        for state in self.api.slices.values():
+            old_id = self.slice_stream_ids.get(state.dax_channel)
+            stream = self.rx_mixer.get_source(f"dax{state.dax_channel}") if self.rx_mixer else None
+            if self.udp_ingest and stream and old_id and state.audio_stream_id:
+                self.udp_ingest.unregister(old_id)
+                self.slice_stream_ids[state.dax_channel] = int(state.audio_stream_id, 16)
+                self.udp_ingest.register(int(state.audio_stream_id, 16), stream.on_packet)
+        tx_id = self.api.tx_audio_stream_id
+        if self.tx_pipeline and tx_id and int(tx_id, 16) != self.tx_pipeline.stream_id:
+            self._start_tx_pipeline(self.tx_pipeline.radio_host, tx_id, self.tx_pipeline.codec)
+
+    async def _start_rx_audio(self, stream_id, codec):
+        self._stop_rx_audio()
+        audio_config = self.config_manager.config["audio"]
+        self.udp_ingest = UdpIngest(port=self.config_manager.get("radio.udp_port", 4991))
+        if not await self.udp_ingest.start():
+            self.udp_ingest = None
+            return
+        self._start_capture()
+        try:
+            self.rx_audio = RxAudioStream(
+                codec,
+                output_rate=audio_config["sample_rate"],
+                chunk_size=audio_config["chunk_size"],
+                jitter_packets=audio_config.get("jitter_packets", 3)
+                + LINK_ADAPTATION[self.link_monitor.level][1],
+            )
+            self.rx_stream_id = int(stream_id, 16)
+            self.udp_ingest.register(self.rx_stream_id, self.rx_audio.on_packet)
+            self.rx_mixer = RxAudioMixer(chunk_size=audio_config["chunk_size"])
+            self.rx_mixer.add_source("remote", self.rx_audio)
+            self.audio_manager.set_rx_callback(self.rx_mixer.read_bytes)
+            self.audio_manager.start_rx()
+        except ValueError as e:
+            logger.error(f"Failed to start RX audio stream: {e}")
+            self.rx_audio = None
+            self.rx_mixer = None
+
+    def _stop_rx_audio(self):
+        if self.rx_audio:
+            self.audio_manager.set_rx_callback(None)
+            self.rx_audio = None
+            self.rx_mixer = None
+            self.slice_stream_ids.clear()
+        if self.udp_ingest:
+            self.udp_ingest.stop()
+            self.udp_ingest = None
+        if self.capture:
+            self.capture.close()
+            self.capture = None
+
+    def _start_capture(self):
+        """Capture every received datagram when capture.enabled is set (debugging)"""
+        capture_config = self.config_manager.config.get("capture", {})
+        if not capture_config.get("enabled", False):
+            return
+        name = time.strftime("vita_%Y%m%d-%H%M%S.vcap")
+        path = os.path.join(os.path.expanduser(capture_config.get("directory", ".")), name)
+        try:
+            self.capture = CaptureWriter(path)
+            self.udp_ingest.add_tap(self.capture.tap)
+            logger.info(f"Capturing VITA-49 streams to {path}")
+        except (OSError, CaptureError) as e:
+            logger.error(f"Failed to start capture: {e}")
+            self.capture = None
+
+    def _update_audio_stats(self):
+        parts = []
+        if self.rx_audio:
+            bitrate, decode_ms = self.rx_audio.stats.snapshot()
+            parts.append(
+                f"{self.rx_audio.codec.name.upper()} {bitrate:.0f} kbps | "
+                f"decode {decode_ms:.1f} ms/s"
+            )
+        if self.recorder:
+            parts.append(
+                f"REC {self.recorder.bytes_behind // 1024} KB behind, "
+                f"{self.recorder.dropped_buffers} dropped"
+            )
+        self.audio_stats_label.setText(" | ".join(parts))
+
+    def _start_tx_pipeline(self, ip, stream_id, codec=None):
+        self._stop_tx_pipeline()
+        audio_config = self.config_manager.config["audio"]
+        try:
+            self.tx_pipeline = TxAudioPipeline(
+                ip,
+                int(stream_id, 16),
+                radio_port=self.config_manager.get("radio.udp_port", 4991),
+                input_rate=audio_config["sample_rate"],
+                radio_rate=audio_config.get("tx_radio_rate", 24000),
+                max_latency_ms=audio_config.get("tx_max_latency_ms", 40),
+                codec=codec,
+            )
+            self.tx_pipeline.start()
+            self.audio_manager.set_tx_callback(self.tx_pipeline.submit)
+        except (ValueError, OSError) as e:
+            logger.error(f"Failed to start TX audio pipeline: {e}")
+            self.tx_pipeline = None
+
+    def _stop_tx_pipeline(self):
+        if self.tx_pipeline:
+            self.audio_manager.set_tx_callback(None)
+            self.tx_pipeline.stop()
+            self.tx_pipeline = None
+
     def on_disconnect(self):
         self.status_bar.showMessage("Disconnecting...")
 
         async def disconnect_task():
+            await self._stop_supervisor()
+            self._stop_link_monitor()
+            self._stop_tx_pipeline()
+            self._stop_rx_audio()
+            self._stop_playout()
             await self.api.disconnect()
             await self.client.disconnect()
             self.audio_manager.cleanup()
@@ -301,6 +782,7 @@ class FlexRadioGUI(QMainWindow):
             self.ptt_active = False
             self._update_memory_buttons()
             self._update_band_buttons()
+            self._update_slice_controls()
             self.update_status()
             self.status_bar.showMessage("Disconnected", 3000)
 
@@ -359,6 +841,8 @@ class FlexRadioGUI(QMainWindow):
                     await self.api.set_ptt(True)
                 else:
                     self.audio_manager.stop_tx()
+                    if self.tx_pipeline:
+                        self.tx_pipeline.flush()
                     await self.api.set_ptt(False)
                 self.update_status()
 
@@ -367,6 +851,163 @@ class FlexRadioGUI(QMainWindow):
             self.tx_btn.setChecked(False)
             self.rx_btn.setChecked(True)
 
+    def on_dual_watch_toggled(self, checked):
+        """Add a second slice for dual watch / SO2V, or remove all but the first"""
+        if not self.connected:
+            self.dual_watch_btn.setChecked(False)
+            return
+
+        async def task():
+            if checked:
+                await self._add_slice()
+            else:
+                for slice_id in list(self.api.slices)[1:]:
+                    await self._remove_slice(slice_id)
+                self._show_slice_state(self.api.slice_state)
+            self._update_slice_controls()
+
+        asyncio.run_coroutine_threadsafe(task(), self.async_loop)
+
+    async def _add_slice(self):
+        if len(self.api.slices) >= self.config_manager.get("radio.max_slices", 2):
+            self.status_bar.showMessage("No more slices available", 3000)
+            return None
+        slice_id = await self.api.create_slice(mode=self.current_mode)
+        if not slice_id:
+            self.status_bar.showMessage("Failed to create slice", 5000)
+            return None
+        await self.api.set_frequency(self.current_frequency, slice_id)
+        if self.config_manager.get("audio.slice_audio", True):
+            for sid in self.api.slices:
+                await self._start_slice_audio(sid)
+        return slice_id
+
+    async def _remove_slice(self, slice_id):
+        await self._stop_slice_audio(slice_id)
+        await self.api.remove_slice(slice_id)
+        self.panadapter.remove_slice_marker(slice_id)
+        # With one slice left its stream duplicates the radio's remote audio
+        remaining = [state for state in self.api.slices.values() if state.dax_channel]
+        if len(remaining) == 1:
+            await self._stop_slice_audio(remaining[0].slice_id)
+        if self.rx_mixer and not self.slice_stream_ids:
+            self.rx_mixer.set_gain("remote", 1.0)
+
+    async def _start_slice_audio(self, slice_id):
+        """Give a slice its own RX stream in the mixer; the radio-mixed stream is muted"""
+        if not self.rx_mixer or not self.udp_ingest:
+            return
+        state = self.api.slices[slice_id]
+        if state.dax_channel and f"dax{state.dax_channel}" in self.rx_mixer:
+            return
+        stream_id = await self.api.enable_slice_audio(slice_id)
+        if not stream_id:
+            return
+        audio_config = self.config_manager.config["audio"]
+        stream = RxAudioStream(
+            PcmCodec(audio_config.get("rx_radio_rate", 24000)),
+            output_rate=audio_config["sample_rate"],
+            chunk_size=audio_config["chunk_size"],
+            jitter_packets=audio_config.get("jitter_packets", 3)
+            + LINK_ADAPTATION[self.link_monitor.level][1],
+        )
+        self.slice_stream_ids[state.dax_channel] = int(stream_id, 16)
+        self.udp_ingest.register(int(stream_id, 16), stream.on_packet)
+        self.rx_mixer.add_source(f"dax{state.dax_channel}", stream)
+        self.rx_mixer.set_gain("remote", 0.0)
+
+    async def _stop_slice_audio(self, slice_id):
+        state = self.api.slices.get(slice_id)
+        if state is None or not state.dax_channel:
+            return
+        stream_id = self.slice_stream_ids.pop(state.dax_channel, None)
+        if self.udp_ingest and stream_id:
+            self.udp_ingest.unregister(stream_id)
+        if self.rx_mixer:
+            self.rx_mixer.remove_source(f"dax{state.dax_channel}")
+        await self.api.disable_slice_audio(slice_id)
+
+    def on_slice_selected(self, slice_id):
+        """Make a slice active: the VFO controls and PTT follow it"""
+        if self.api.set_active_slice(slice_id):
+            self._show_slice_state(self.api.slice_state)
+        self._update_slice_controls()
+
+    def _show_slice_state(self, state):
+        self.current_frequency = state.frequency
+        self.freq_input.setText(f"{state.frequency / 1_000_000:.3f}")
+        self.current_mode = state.mode
+        self.usb_btn.setChecked(state.mode == "usb")
+        self.lsb_btn.setChecked(state.mode == "lsb")
+        # Reflect the slice's levels without echoing them back to the radio
+        for slider, label, value in (
+            (self.rf_gain_slider, self.rf_gain_label, state.rf_gain),
+            (self.af_gain_slider, self.af_gain_label, state.af_gain),
+        ):
+            slider.blockSignals(True)
+            slider.setValue(value)
+            slider.blockSignals(False)
+            label.setText(f"{value}%")
+        self.update_status()
+
+    def _slice_label(self, slice_id):
+        return chr(ord("A") + list(self.api.slices).index(slice_id))
+
+    def _update_slice_controls(self):
+        """Rebuild the slice selector buttons and panadapter markers from the API"""
+        slices = self.api.slices if self.connected else {}
+        for slice_id in list(self.slice_buttons):
+            if slice_id not in slices:
+                self.slice_buttons.pop(slice_id).deleteLater()
+        for slice_id in list(self.panadapter.slice_markers):
+            if slice_id not in slices:
+                self.panadapter.remove_slice_marker(slice_id)
+        for slice_id, state in slices.items():
+            label = self._slice_label(slice_id)
+            btn = self.slice_buttons.get(slice_id)
+            if btn is None:
+                btn = QPushButton()
+                btn.setCheckable(True)
+                btn.clicked.connect(lambda checked, sid=slice_id: self.on_slice_selected(sid))
+                self.slice_buttons_layout.addWidget(btn)
+                self.slice_buttons[slice_id] = btn
+            btn.setText(label)
+            btn.setChecked(slice_id == self.api.slice_id)
+            self.panadapter.set_slice_marker(
+                slice_id, state.frequency, label, slice_id == self.api.slice_id
+            )
+        self.dual_watch_btn.setEnabled(self.connected)
+        self.dual_watch_btn.setChecked(len(slices) > 1)
+
+    def on_record_toggled(self, checked):
+        if checked and self.recorder is None:
+            rec_config = self.config_manager.config.get("recording", {})
+            self.recorder = AudioRecorder(
+                rec_config.get("directory", "~/FlexRadio/recordings"),
+                sample_rate=self.audio_manager.sample_rate,
+                channels=self.audio_manager.channels,
+                fmt=rec_config.get("format", "wav"),
+                max_file_bytes=rec_config.get("max_file_mb", 512) * 1024 * 1024,
+                max_file_seconds=rec_config.get("max_file_minutes", 60) * 60,
+            )
+            self.recorder.set_metadata(frequency=self.current_frequency, mode=self.current_mode)
+            self.recorder.start()
+            self.audio_manager.set_recorder(self.recorder)
+            self.status_bar.showMessage(f"Recording to {self.recorder.directory}", 3000)
+        elif not checked and self.recorder is not None:
+            self._stop_recorder()
+
+    def _stop_recorder(self):
+        if self.recorder:
+            self.audio_manager.set_recorder(None)
+            self.recorder.stop()
+            if self.recorder.dropped_buffers:
+                logger.warning(f"Recorder dropped {self.recorder.dropped_buffers} buffers")
+            self.recorder = None
+
+    def on_overlay_toggled(self, checked):
+        self.metrics_overlay.set_enabled(checked)
+
     def on_space_key(self):
         new_state = not self.ptt_active
         self.on_ptt_toggled(new_state)
@@ -380,7 +1021,59 @@ class FlexRadioGUI(QMainWindow):
         asyncio.run_coroutine_threadsafe(task(), self.async_loop)
 
     def on_memory_recall(self, index):
-        channel = self.memory_manager.get_channel(index)
+        self._recall_channel(self.memory_manager.get_channel(index))
+
+    def show_memory_browser(self):
+        dialog = MemoryBrowser(self.channel_store, self.current_frequency, self)
+        dialog.channel_selected.connect(self._recall_channel)
+        dialog.exec()
+
+    def import_memory_channels(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Import Channels", "", "Channel lists (*.csv *.adi *.adif);;All files (*)"
+        )
+        if path:
+            self.start_channel_import(path)
+
+    def start_channel_import(self, path: str) -> threading.Thread:
+        """Import ``path`` on a worker thread with its own database connection"""
+
+        def run():
+            store = ChannelStore(self.channel_store.path)
+            try:
+                self.import_finished.emit(import_channels(store, path))
+            except Exception as e:
+                logger.error(f"Channel import from {path} failed: {e}")
+                self.import_finished.emit(e)
+            finally:
+                store.close()
+
+        self.status_bar.showMessage(f"Importing {os.path.basename(path)}...")
+        thread = threading.Thread(target=run, name="channel-import", daemon=True)
+        thread.start()
+        return thread
+
+    def _on_import_finished(self, result):
+        if isinstance(result, Exception):
+            self.status_bar.showMessage("Channel import failed")
+            QMessageBox.warning(self, "Import Channels", str(result))
+        else:
+            self.status_bar.showMessage(result.summary())
+
+    def export_memory_channels(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Channels", "channels.csv", "CSV (*.csv);;ADIF (*.adi)"
+        )
+        if not path:
+            return
+        try:
+            count = export_channels(self.channel_store, path)
+        except OSError as e:
+            QMessageBox.warning(self, "Export Channels", str(e))
+            return
+        self.status_bar.showMessage(f"Exported {count} channels")
+
+    def _recall_channel(self, channel):
         if channel and self.connected:
             self.freq_input.setText(f"{channel.frequency / 1_000_000:.3f}")
             self.on_mode_changed(channel.mode)
@@ -394,15 +1087,28 @@ class FlexRadioGUI(QMainWindow):
             asyncio.run_coroutine_threadsafe(task(), self.async_loop)
 
     def show_settings(self):
-        dialog = SettingsDialog(self.config_manager, self.audio_manager, self)
+        dialog = SettingsDialog(
+            self.config_manager, self.audio_manager, self, radios=self.radio_cache.sorted()
+        )
         dialog.settings_changed.connect(self._on_settings_changed)
         dialog.exec()
 
     def _on_settings_changed(self, settings):
         if "radio.ip_address" in settings:
-            self.ip_label.setText(f"Radio IP: {settings['radio.ip_address']}")
+            ip = settings["radio.ip_address"]
+            self.config_manager.set_radio_ip(ip)
+            radio = self.radio_cache.find_by_ip(ip)
+            self.radio_cache.set_last_radio(radio.serial if radio else None)
+            self.radio_cache.save()
+            self.ip_label.setText(f"Radio IP: {ip}")
             if not self.connected:
-                self.client.host = settings["radio.ip_address"]
+                self.client.host = ip
+        for key, value in settings.items():
+            if key.startswith("ai_denoiser.") and self.config_manager.get(key) != value:
+                self.config_manager.set(key, value)
+        if any(key.startswith(("audio.", "ai_denoiser.")) for key in settings):
+            # Rebuilds the DSP chains; a denoiser change loads on a worker thread
+            self.audio_manager.reconfigure(self.config_manager.config)
 
     def _update_memory_buttons(self):
         channels = self.memory_manager.all_channels()
@@ -450,6 +1156,15 @@ class FlexRadioGUI(QMainWindow):
         settings.setValue("window_state", self.saveState())
 
     def _on_state_changed(self, state):
+        if state.slice_id in self.api.slices and state.slice_id in self.panadapter.slice_markers:
+            self.panadapter.set_slice_marker(
+                state.slice_id,
+                state.frequency,
+                self._slice_label(state.slice_id),
+                state.slice_id == self.api.slice_id,
+            )
+        if state.slice_id is not None and state.slice_id != self.api.slice_id:
+            return
         if state.frequency != self.current_frequency:
             self.current_frequency = state.frequency
             self.freq_input.setText(f"{state.frequency / 1_000_000:.3f}")
@@ -457,6 +1172,8 @@ class FlexRadioGUI(QMainWindow):
             self.current_mode = state.mode
             self.usb_btn.setChecked(state.mode == "usb")
             self.lsb_btn.setChecked(state.mode == "lsb")
+        if self.recorder:
+            self.recorder.set_metadata(frequency=state.frequency, mode=state.mode)
 
     def update_status(self):
         if not self.connected:
@@ -472,11 +1189,27 @@ class FlexRadioGUI(QMainWindow):
 
     def closeEvent(self, event):
         self._save_window_geometry()
+        self.channel_store.close()
+        if self.watchdog:
+            self.watchdog.stop()
+            self._asyncio_probe_task.cancel()
+        self._stop_recorder()
 
         async def cleanup():
+            await self._stop_supervisor()
+            self._stop_link_monitor()
+            self._stop_tx_pipeline()
+            self._stop_rx_audio()
+            self._stop_playout()
+            if self.cat_server:
+                await self.cat_server.stop()
             await self.api.disconnect()
             await self.client.disconnect()
             self.audio_manager.cleanup()
+            if self.metrics_exporter:
+                await self.metrics_exporter.stop()
+            if self.discovery:
+                self.discovery.stop()
 
         asyncio.run_coroutine_threadsafe(cleanup(), self.async_loop)
         super().closeEvent(event)
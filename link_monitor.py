@@ -0,0 +1,180 @@
+import asyncio
+import collections
+import logging
+import time
+from typing import Callable, Deque, List, Optional
+
+from metrics import REGISTRY, MetricsRegistry
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LINK_GOOD = "good"
+LINK_DEGRADED = "degraded"
+LINK_POOR = "poor"
+
+# Per level: (panadapter FPS scale, extra RX jitter buffer packets)
+LINK_ADAPTATION = {
+    LINK_GOOD: (1.0, 0),
+    LINK_DEGRADED: (0.5, 2),
+    LINK_POOR: (0.25, 5),
+}
+
+
+def _ramp(value: float, good: float, bad: float) -> float:
+    """1.0 at or below ``good``, 0.0 at or above ``bad``, linear in between"""
+    if value <= good:
+        return 1.0
+    if value >= bad:
+        return 0.0
+    return 1.0 - (value - good) / (bad - good)
+
+
+class LinkMonitor:
+    """Link quality from periodic pings and radio heartbeats
+
+    Ping round trips feed a smoothed RTT and RTT variation (the RFC 6298
+    estimator). Heartbeats arriving later than ``heartbeat_interval`` and
+    pings without a reply count as misses in a sliding window. The three are
+    combined into a 0..1 health score, exported as ``link_health`` and
+    mapped to a level (good/degraded/poor) with hysteresis so level
+    callbacks do not flap around a threshold.
+    """
+
+    GOOD_THRESHOLD = 0.8
+    DEGRADED_THRESHOLD = 0.5
+    HYSTERESIS = 0.05
+
+    def __init__(
+        self,
+        ping_interval: float = 1.0,
+        heartbeat_interval: float = 1.0,
+        good_rtt: float = 0.05,
+        bad_rtt: float = 0.5,
+        good_jitter: float = 0.01,
+        bad_jitter: float = 0.1,
+        window: int = 20,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.ping_interval = ping_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.good_rtt = good_rtt
+        self.bad_rtt = bad_rtt
+        self.good_jitter = good_jitter
+        self.bad_jitter = bad_jitter
+        self.srtt: Optional[float] = None
+        self.rttvar = 0.0
+        self.last_heartbeat: Optional[float] = None
+        self.heartbeats = 0
+        self.missed_heartbeats = 0
+        self.level = LINK_GOOD
+        self.level_callbacks: List[Callable[[str], None]] = []
+        # 1 for each miss, 0 for each on-time heartbeat or answered ping
+        self._events: Deque[int] = collections.deque(maxlen=window)
+
+        metrics = metrics or REGISTRY
+        self._missed = metrics.counter("heartbeats_missed_total", "Heartbeats or pings missed")
+        self._ping_rtt = metrics.histogram("ping_rtt_seconds", "Keepalive ping round-trip time")
+        metrics.gauge("link_rtt_seconds", "Smoothed ping RTT").set_function(
+            lambda: self.srtt or 0.0
+        )
+        metrics.gauge("link_jitter_seconds", "Ping RTT variation").set_function(
+            lambda: self.rttvar
+        )
+        metrics.gauge("link_health", "Link health score, 1 = clean LAN").set_function(self.health)
+
+    def add_level_callback(self, callback: Callable[[str], None]):
+        self.level_callbacks.append(callback)
+
+    def remove_level_callback(self, callback: Callable[[str], None]):
+        if callback in self.level_callbacks:
+            self.level_callbacks.remove(callback)
+
+    def record_rtt(self, rtt: float):
+        self._ping_rtt.record(rtt)
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+        self._events.append(0)
+        self._update_level()
+
+    def record_missed(self, count: int = 1):
+        self.missed_heartbeats += count
+        self._missed.inc(count)
+        self._events.extend([1] * count)
+        self._update_level()
+
+    def on_heartbeat(self, line: str = "", now: Optional[float] = None):
+        """Client heartbeat callback; a gap of k intervals means k - 1 were missed"""
+        now = time.monotonic() if now is None else now
+        if self.last_heartbeat is not None:
+            missed = round((now - self.last_heartbeat) / self.heartbeat_interval) - 1
+            if missed > 0:
+                self.record_missed(missed)
+        self.last_heartbeat = now
+        self.heartbeats += 1
+        self._events.append(0)
+        self._update_level()
+
+    def health(self, now: Optional[float] = None) -> float:
+        """1.0 for a clean link, falling toward 0 as RTT, jitter and misses grow"""
+        now = time.monotonic() if now is None else now
+        misses = sum(self._events)
+        samples = len(self._events)
+        if self.heartbeats >= 2:
+            # Heartbeats that are overdue right now, before the next one shows the gap.
+            # The radio's first H line is its handle, so wait until they repeat.
+            overdue = int((now - self.last_heartbeat) / self.heartbeat_interval) - 1
+            if overdue > 0:
+                misses += overdue
+                samples += overdue
+        score = 1.0 - misses / samples if samples else 1.0
+        if self.srtt is not None:
+            score *= _ramp(self.srtt, self.good_rtt, self.bad_rtt)
+            score *= _ramp(self.rttvar, self.good_jitter, self.bad_jitter)
+        return score
+
+    def _update_level(self):
+        score = self.health()
+        if score >= self.GOOD_THRESHOLD + (self.HYSTERESIS if self.level != LINK_GOOD else 0):
+            level = LINK_GOOD
+        elif score >= self.DEGRADED_THRESHOLD + (
+            self.HYSTERESIS if self.level == LINK_POOR else 0
+        ):
+            level = LINK_DEGRADED
+        else:
+            level = LINK_POOR
+        if level != self.level:
+            logger.info(f"Link quality {self.level} -> {level} (health {score:.2f})")
+            self.level = level
+            for callback in self.level_callbacks:
+                callback(level)
+
+    async def ping(self, client, timeout: Optional[float] = None) -> bool:
+        """Ping ``client`` once, recording the RTT or a miss; False if unanswered"""
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(client.send_command("ping"), timeout)
+        except (asyncio.TimeoutError, TimeoutError):
+            self.record_missed()
+            return False
+        self.record_rtt(time.perf_counter() - start)
+        return True
+
+    async def run(self, client):
+        """Ping ``client`` every ``ping_interval`` seconds; cancel to stop
+
+        Only for links without a ConnectionSupervisor: a supervisor given
+        this monitor sends the pings itself.
+        """
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            if not client.running:
+                continue
+            try:
+                await self.ping(client)
+            except Exception as e:
+                logger.debug(f"Ping failed: {e}")
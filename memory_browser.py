@@ -0,0 +1,238 @@
+import collections
+from typing import Dict, List, Optional
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
+from PyQt6.QtWidgets import (
+    QAbstractItemView,
+    QComboBox,
+    QDialog,
+    QHBoxLayout,
+    QHeaderView,
+    QLabel,
+    QLineEdit,
+    QPushButton,
+    QTableView,
+    QVBoxLayout,
+)
+
+from channel_store import ChannelStore
+from memory_manager import MemoryChannel
+
+
+class ChannelTableModel(QAbstractTableModel):
+    """Channels of a :class:`ChannelStore`, read a page at a time as rows are shown
+
+    Only the pages the view asks for are loaded and the most recently used
+    ``MAX_PAGES`` are kept, so a list of any size opens instantly. A page is
+    read from the store by key, continuing from a known channel next to or
+    inside it (a neighbouring page's edge, or the channel :meth:`row_of`
+    located), so scrolling does not get slower deeper into the list. With a
+    search text the list is the channels whose name starts with it, or the
+    best fuzzy matches when none does.
+    """
+
+    COLUMNS = ("Name", "Frequency (MHz)", "Mode", "Band", "Comment")
+    PAGE_SIZE = 200
+    MAX_PAGES = 20
+    FUZZY_LIMIT = 200
+
+    def __init__(self, store: ChannelStore, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.band: Optional[str] = None
+        self.text = ""
+        self.total = 0
+        # Fuzzy matches when the search text is not a name prefix
+        self.matches: Optional[List[MemoryChannel]] = None
+        self._pages: Dict[int, List[MemoryChannel]] = collections.OrderedDict()
+        # Channels at known rows (page edges, located channels) to page from
+        self._known: Dict[int, MemoryChannel] = {}
+        self.refresh()
+
+    def set_filter(self, text: str = "", band: Optional[str] = None):
+        self.text = text.strip()
+        self.band = band
+        self.refresh()
+
+    def refresh(self):
+        self.beginResetModel()
+        self._pages.clear()
+        self._known.clear()
+        self.matches = None
+        self.total = self.store.count(band=self.band, prefix=self.text or None)
+        if self.text and self.total == 0:
+            self.matches = [
+                channel
+                for channel in self.store.fuzzy_search(self.text, self.FUZZY_LIMIT)
+                if self.band is None or channel.band == self.band
+            ]
+            self.total = len(self.matches)
+        self.endResetModel()
+
+    def channel(self, row: int) -> Optional[MemoryChannel]:
+        if not 0 <= row < self.total:
+            return None
+        if self.matches is not None:
+            return self.matches[row]
+        number, index = divmod(row, self.PAGE_SIZE)
+        page = self._pages.get(number)
+        if page is None:
+            page = self._load(number * self.PAGE_SIZE)
+            self._pages[number] = page
+            if len(self._pages) > self.MAX_PAGES:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(number)
+        return page[index] if index < len(page) else None
+
+    def _load(self, start: int) -> List[MemoryChannel]:
+        """The page of rows from ``start``, keyset paged from the nearest known channel"""
+        end = min(start + self.PAGE_SIZE, self.total)
+        filters = {"band": self.band, "prefix": self.text or None}
+        known = self._known
+        if start == 0:
+            page = self.store.page(end, **filters)
+        elif start - 1 in known:
+            page = self.store.page(end - start, after=known[start - 1], **filters)
+        elif end in known:
+            page = self.store.page(end - start, before=known[end], **filters)
+        else:
+            inside = next((row for row in range(start, end) if row in known), None)
+            if inside is not None:
+                channel = known[inside]
+                page = (
+                    self.store.page(inside - start, before=channel, **filters)
+                    + [channel]
+                    + self.store.page(end - inside - 1, after=channel, **filters)
+                )
+            else:
+                # A jump, e.g. a dragged scroll bar: seek to the row before the page
+                anchor = self.store.channel_at(start - 1, **filters)
+                page = self.store.page(end - start, after=anchor, **filters) if anchor else []
+        if page:
+            known[start] = page[0]
+            known[start + len(page) - 1] = page[-1]
+        return page
+
+    def row_of(self, channel: MemoryChannel) -> int:
+        """Row of ``channel`` in the frequency ordered list (no search text)"""
+        row = self.store.position(channel, band=self.band)
+        self._known[row] = channel
+        return row
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else self.total
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        channel = self.channel(index.row())
+        if channel is None:
+            return None
+        column = index.column()
+        if column == 0:
+            return channel.name
+        if column == 1:
+            return f"{channel.frequency / 1_000_000:.4f}"
+        if column == 2:
+            return channel.mode.upper()
+        if column == 3:
+            return channel.band
+        return channel.comment
+
+    def headerData(self, section: int, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.COLUMNS[section]
+        return None
+
+
+class MemoryBrowser(QDialog):
+    """Searchable list of all stored channels; opens scrolled to the one nearest the VFO"""
+
+    channel_selected = pyqtSignal(object)
+
+    def __init__(self, store: ChannelStore, frequency: int, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.frequency = frequency
+        self.setWindowTitle("Memory Channels")
+        self.resize(700, 500)
+
+        self.model = ChannelTableModel(store, self)
+
+        layout = QVBoxLayout()
+        filter_layout = QHBoxLayout()
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search names...")
+        self.search_input.textChanged.connect(self._apply_filter)
+        filter_layout.addWidget(self.search_input)
+        self.band_combo = QComboBox()
+        self.band_combo.addItem("All bands", None)
+        for band in store.bands():
+            self.band_combo.addItem(band, band)
+        self.band_combo.currentIndexChanged.connect(self._apply_filter)
+        filter_layout.addWidget(self.band_combo)
+        layout.addLayout(filter_layout)
+
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        # Fixed row heights so the view never measures rows it does not show
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.table.verticalHeader().hide()
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.doubleClicked.connect(self._recall)
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        self.count_label = QLabel()
+        button_layout.addWidget(self.count_label)
+        button_layout.addStretch()
+        nearest_btn = QPushButton("Nearest")
+        nearest_btn.clicked.connect(self.select_nearest)
+        button_layout.addWidget(nearest_btn)
+        recall_btn = QPushButton("Recall")
+        recall_btn.clicked.connect(self._recall)
+        button_layout.addWidget(recall_btn)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.close)
+        button_layout.addWidget(close_btn)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+        self._update_count()
+        self.select_nearest()
+
+    def _apply_filter(self):
+        self.model.set_filter(self.search_input.text(), self.band_combo.currentData())
+        self._update_count()
+        if not self.model.text:
+            self.select_nearest()
+
+    def _update_count(self):
+        self.count_label.setText(f"{self.model.total} channels")
+
+    def select_nearest(self):
+        """Select the channel closest to the VFO frequency in the unsearched list"""
+        if self.model.text:
+            self.search_input.clear()  # Re-filters and calls back here
+            return
+        channel = self.store.nearest(self.frequency, band=self.model.band)
+        if channel is None:
+            return
+        index = self.model.index(self.model.row_of(channel), 0)
+        self.table.selectRow(index.row())
+        self.table.scrollTo(index, QAbstractItemView.ScrollHint.PositionAtCenter)
+
+    def selected_channel(self) -> Optional[MemoryChannel]:
+        rows = self.table.selectionModel().selectedRows()
+        return self.model.channel(rows[0].row()) if rows else None
+
+    def _recall(self):
+        channel = self.selected_channel()
+        if channel is not None:
+            self.channel_selected.emit(channel)
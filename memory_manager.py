@@ -1,6 +1,52 @@
-from dataclasses import dataclass
+import collections
+import logging
+from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
 
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MIN_FREQUENCY = 1800000
+MAX_FREQUENCY = 30000000
+MODES = ("usb", "lsb", "cw", "am", "fm")
+# Skipped channel names listed per error kind when loading the config
+EXAMPLE_NAMES = 3
+
+# Amateur band edges in Hz (IARU region 2)
+BANDS = [
+    ("160m", 1800000, 2000000),
+    ("80m", 3500000, 4000000),
+    ("60m", 5330000, 5410000),
+    ("40m", 7000000, 7300000),
+    ("30m", 10100000, 10150000),
+    ("20m", 14000000, 14350000),
+    ("17m", 18068000, 18168000),
+    ("15m", 21000000, 21450000),
+    ("12m", 24890000, 24990000),
+    ("10m", 28000000, 29700000),
+]
+
+
+def _error_kind(error: Exception) -> str:
+    """What was wrong with a channel, without the offending value
+
+    "Invalid RF gain: 150. Must be ..." becomes "invalid RF gain", so bad
+    channels group by kind whatever their values.
+    """
+    message = str(error)
+    if isinstance(error, ValueError) and message.startswith("Invalid ") and ":" in message:
+        kind = message.split(":", 1)[0]
+        return kind[0].lower() + kind[1:]
+    return f"invalid entry ({type(error).__name__})"
+
+
+def band_for(frequency: int) -> str:
+    """Name of the amateur band containing ``frequency``, "" outside them"""
+    for name, low, high in BANDS:
+        if low <= frequency <= high:
+            return name
+    return ""
+
 
 @dataclass
 class MemoryChannel:
@@ -9,14 +55,21 @@ class MemoryChannel:
     mode: str
     rf_gain: int = 50
     af_gain: int = 50
+    comment: str = ""
+    # Row ID once stored in a ChannelStore
+    channel_id: Optional[int] = field(default=None, compare=False)
+
+    @property
+    def band(self) -> str:
+        return band_for(self.frequency)
 
     def __post_init__(self):
         """Validate channel parameters after initialization"""
-        if not (1800000 <= self.frequency <= 30000000):
+        if not (MIN_FREQUENCY <= self.frequency <= MAX_FREQUENCY):
             raise ValueError(
                 f"Invalid frequency: {self.frequency} Hz. " f"Must be between 1.8 MHz and 30 MHz"
             )
-        if self.mode.lower() not in ["usb", "lsb", "cw", "am", "fm"]:
+        if self.mode.lower() not in MODES:
             raise ValueError(f"Invalid mode: {self.mode}. Must be one of: USB, LSB, CW, AM, FM")
         if not (0 <= self.rf_gain <= 100):
             raise ValueError(f"Invalid RF gain: {self.rf_gain}. Must be between 0 and 100")
@@ -33,6 +86,9 @@ class MemoryManager:
         self.channels = []
         mem_config = config.get("memory", {})
         channels_list = mem_config.get("channels", [])
+        # Error kind -> count and the first few channel names, logged once at the end
+        errors = collections.Counter()
+        examples: Dict[str, List[str]] = collections.defaultdict(list)
 
         for ch in channels_list:
             try:
@@ -42,23 +98,39 @@ class MemoryManager:
                     mode=ch["mode"],
                     rf_gain=ch.get("rf_gain", 50),
                     af_gain=ch.get("af_gain", 50),
+                    comment=ch.get("comment", ""),
                 )
                 self.channels.append(channel)
+                continue
+            except KeyError as e:
+                kind = f"missing {e}"
             except Exception as e:
-                print(f"Error loading memory channel: {e}")
+                kind = _error_kind(e)
+            errors[kind] += 1
+            if len(examples[kind]) < EXAMPLE_NAMES:
+                name = ch.get("name") if isinstance(ch, dict) else None
+                examples[kind].append(str(name) if name is not None else "unnamed")
+        if errors:
+            summary = "; ".join(
+                f"{kind} ({count}x: {', '.join(examples[kind])}"
+                f"{', ...' if count > len(examples[kind]) else ''})"
+                for kind, count in errors.items()
+            )
+            logger.warning(f"Skipped {sum(errors.values())} memory channels: {summary}")
 
     def save_to_config(self) -> Dict[str, Any]:
         channels_list = []
         for ch in self.channels:
-            channels_list.append(
-                {
-                    "name": ch.name,
-                    "frequency": ch.frequency,
-                    "mode": ch.mode,
-                    "rf_gain": ch.rf_gain,
-                    "af_gain": ch.af_gain,
-                }
-            )
+            entry = {
+                "name": ch.name,
+                "frequency": ch.frequency,
+                "mode": ch.mode,
+                "rf_gain": ch.rf_gain,
+                "af_gain": ch.af_gain,
+            }
+            if ch.comment:
+                entry["comment"] = ch.comment
+            channels_list.append(entry)
         return {"memory": {"max_channels": self.max_channels, "channels": channels_list}}
 
     def add_channel(self, channel: MemoryChannel) -> bool:
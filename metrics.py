@@ -0,0 +1,239 @@
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+
+class Counter:
+    """Monotonically increasing count, e.g. packets received"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str = ""):
+        self.name = name
+        self.help = help
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        self.value += amount
+
+
+class Gauge:
+    """Value that can go up and down
+
+    Either set explicitly or backed by a function that is called whenever
+    the value is read, for state that another object already tracks.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str = ""):
+        self.name = name
+        self.help = help
+        self._value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        self._value = value
+
+    def set_function(self, function: Optional[Callable[[], float]]):
+        self._function = function
+
+    @property
+    def value(self) -> float:
+        if self._function is not None:
+            try:
+                return float(self._function())
+            except Exception:
+                return math.nan
+        return self._value
+
+
+class Histogram:
+    """Duration histogram with log-linear (HDR-style) microsecond buckets
+
+    Every power-of-two range is split into ``2**sub_bucket_bits`` linear
+    sub-buckets, so percentiles are within 1/2**sub_bucket_bits of the true
+    value (12.5% by default) from 1 us up to ~35 minutes. Recording is a few
+    integer operations and one list increment, cheap enough for audio
+    callbacks.
+    """
+
+    kind = "histogram"
+    MAX_BITS = 31
+
+    def __init__(self, name: str = "", help: str = "", sub_bucket_bits: int = 3):
+        self.name = name
+        self.help = help
+        self.sub_bucket_bits = sub_bucket_bits
+        self._sub = 1 << sub_bucket_bits
+        self.buckets = (self.MAX_BITS - sub_bucket_bits + 1) * self._sub
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * self.buckets
+        self.count = 0
+        self.total_us = 0.0
+        self.max_us = 0.0
+
+    def _index(self, us: int) -> int:
+        if us < self._sub:
+            return us
+        shift = us.bit_length() - self.sub_bucket_bits - 1
+        return min((shift << self.sub_bucket_bits) + (us >> shift), self.buckets - 1)
+
+    def upper_bound(self, index: int) -> float:
+        """Exclusive upper bound (us) of a bucket"""
+        if index < self._sub:
+            return float(index + 1)
+        shift = (index >> self.sub_bucket_bits) - 1
+        return float(((index & (self._sub - 1)) + self._sub + 1) << shift)
+
+    def record(self, seconds: float):
+        us = seconds * 1e6 if seconds > 0 else 0.0
+        self.counts[self._index(int(us))] += 1
+        self.count += 1
+        self.total_us += us
+        if us > self.max_us:
+            self.max_us = us
+
+    @property
+    def mean_us(self) -> float:
+        return self.total_us / self.count if self.count else 0.0
+
+    def snapshot(self) -> List[int]:
+        """Copy of the bucket counts, for percentiles over an interval"""
+        return list(self.counts)
+
+    def percentile(self, q: float, since: Optional[List[int]] = None) -> float:
+        """Upper bound (us) of the bucket holding the q-th percentile
+
+        With ``since`` (an earlier :meth:`snapshot`) only samples recorded
+        after that snapshot are considered.
+        """
+        counts = self.counts if since is None else [a - b for a, b in zip(self.counts, since)]
+        total = sum(counts)
+        if not total:
+            return 0.0
+        rank = max(1, math.ceil(total * q / 100.0))
+        seen = 0
+        for i, n in enumerate(counts):
+            seen += n
+            if seen >= rank:
+                bound = self.upper_bound(i)
+                return min(bound, self.max_us) if since is None else bound
+        return self.max_us
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean_us": round(self.mean_us, 1),
+            "p50_us": self.percentile(50),
+            "p99_us": self.percentile(99),
+            "max_us": round(self.max_us, 1),
+        }
+
+
+Metric = Union[Counter, Gauge, Histogram]
+
+
+class Sample(NamedTuple):
+    """One labelled counter or gauge value produced by a collector"""
+
+    name: str
+    kind: str
+    help: str
+    labels: Dict[str, str]
+    value: float
+
+
+Collector = Callable[[], Iterable[Sample]]
+
+
+class MetricsRegistry:
+    """Named metrics shared by the client, API, audio path and displays
+
+    Metrics are looked up once, usually in constructors, and then updated
+    without locking: each metric has a single writer thread and readers such
+    as the overlay only take snapshots, so a read may miss the update in
+    flight. Asking for an existing name returns the same object.
+
+    Components that exist once per radio get a registry each, attached to
+    the shared one with :meth:`add_child` and a label such as the radio's
+    name, so their counters stay apart while one exporter serves them all.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Collector] = []
+        self._children: List[Tuple["MetricsRegistry", Dict[str, str]]] = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, help: str, **kwargs) -> Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        return self._get_or_create(Counter, name, help)
+
+    def gauge(self, name: str, help: str = "") -> Gauge:
+        return self._get_or_create(Gauge, name, help)
+
+    def histogram(self, name: str, help: str = "", sub_bucket_bits: int = 3) -> Histogram:
+        return self._get_or_create(Histogram, name, help, sub_bucket_bits=sub_bucket_bits)
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def metrics(self) -> List[Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def add_collector(self, collector: Collector):
+        """Register a callable producing labelled samples when metrics are read
+
+        For per-instance values such as per-stream statistics; collectors
+        only run when an exporter scrapes, never on the hot path.
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def remove_collector(self, collector: Collector):
+        with self._lock:
+            if collector in self._collectors:
+                self._collectors.remove(collector)
+
+    def add_child(self, registry: "MetricsRegistry", labels: Dict[str, str]):
+        """Export ``registry``'s metrics along with these, labelled with ``labels``"""
+        with self._lock:
+            self._children.append((registry, dict(labels)))
+
+    def remove_child(self, registry: "MetricsRegistry"):
+        with self._lock:
+            self._children = [(r, l) for r, l in self._children if r is not registry]
+
+    def children(self) -> List[Tuple["MetricsRegistry", Dict[str, str]]]:
+        with self._lock:
+            return list(self._children)
+
+    def collect(self) -> List[Sample]:
+        with self._lock:
+            collectors = list(self._collectors)
+        samples = []
+        for collector in collectors:
+            samples.extend(collector())
+        return samples
+
+    def snapshot(self) -> Dict[str, object]:
+        """Counter and gauge values and histogram summaries by name"""
+        return {
+            m.name: m.summary() if isinstance(m, Histogram) else m.value for m in self.metrics()
+        }
+
+
+# Process-wide registry used when a component is not given its own
+REGISTRY = MetricsRegistry()
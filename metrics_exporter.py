@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from metrics import REGISTRY, Histogram, MetricsRegistry
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Exported histogram bucket bounds in seconds
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _histogram_lines(
+    name: str, histogram: Histogram, buckets: Sequence[float], labels: Dict[str, str]
+) -> List[str]:
+    lines = []
+    counts = histogram.snapshot()
+    cumulative = 0
+    i = 0
+    for le in buckets:
+        bound_us = le * 1e6
+        while i < len(counts) and histogram.upper_bound(i) <= bound_us:
+            cumulative += counts[i]
+            i += 1
+        lines.append(f"{name}_bucket{_labels({**labels, 'le': _format_value(le)})} {cumulative}")
+    total = sum(counts)
+    lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {total}")
+    lines.append(f"{name}_sum{_labels(labels)} {_format_value(histogram.total_us / 1e6)}")
+    lines.append(f"{name}_count{_labels(labels)} {total}")
+    return lines
+
+
+def render(
+    registry: MetricsRegistry,
+    prefix: str = "flexradio_",
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+) -> str:
+    """Registry contents in the Prometheus text exposition format
+
+    Metrics of child registries and collector samples with the same name
+    are written as labelled series of one family under a single header.
+    """
+    # name -> (kind, help, [(labels, histogram or value)])
+    families: Dict[str, Tuple[str, str, List[Tuple[Dict[str, str], Any]]]] = {}
+
+    def add(name: str, kind: str, help: str, labels: Dict[str, str], value: Any):
+        family = families.setdefault(name, (kind, help, []))
+        family[2].append((labels, value))
+
+    def add_metrics(metrics: MetricsRegistry, labels: Dict[str, str]):
+        for metric in metrics.metrics():
+            value = metric if isinstance(metric, Histogram) else metric.value
+            add(metric.name, metric.kind, metric.help, labels, value)
+
+    add_metrics(registry, {})
+    for sample in registry.collect():
+        add(sample.name, sample.kind, sample.help, sample.labels, sample.value)
+    for child, labels in registry.children():
+        add_metrics(child, labels)
+        for sample in child.collect():
+            add(sample.name, sample.kind, sample.help, {**labels, **sample.labels}, sample.value)
+
+    lines = []
+    for metric_name in sorted(families):
+        kind, help, series = families[metric_name]
+        name = prefix + metric_name
+        if help:
+            lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in series:
+            if isinstance(value, Histogram):
+                lines.extend(_histogram_lines(name, value, buckets, labels))
+            else:
+                lines.append(f"{name}{_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    """Minimal HTTP endpoint serving ``GET /metrics`` for a Prometheus scraper
+
+    Metrics are only rendered when a request arrives; with the exporter not
+    started nothing runs at all. Requests are read with a size and time limit
+    and every response closes the connection.
+    """
+
+    MAX_REQUEST_BYTES = 8192
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 9464,
+        metrics: Optional[MetricsRegistry] = None,
+        timeout: float = 5.0,
+    ):
+        self.host = host
+        self.port = port
+        self.metrics = metrics or REGISTRY
+        self.timeout = timeout
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.scrapes = 0
+
+    async def start(self) -> bool:
+        try:
+            self.server = await asyncio.start_server(
+                self._handle, self.host, self.port, limit=self.MAX_REQUEST_BYTES
+            )
+        except OSError as e:
+            logger.error(f"Failed to start metrics exporter on {self.host}:{self.port}: {e}")
+            return False
+        self.port = self.server.sockets[0].getsockname()[1]
+        logger.info(f"Metrics exporter listening on http://{self.host}:{self.port}/metrics")
+        return True
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+            logger.info("Metrics exporter stopped")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await asyncio.wait_for(
+                reader.readuntil(b"\r\n\r\n"), timeout=self.timeout
+            )
+            method, path = self._parse_request_line(request)
+            if method not in ("GET", "HEAD"):
+                await self._respond(writer, 405, "Method Not Allowed", b"")
+            elif path.split("?", 1)[0] != "/metrics":
+                await self._respond(writer, 404, "Not Found", b"")
+            else:
+                self.scrapes += 1
+                body = render(self.metrics).encode()
+                await self._respond(writer, 200, "OK", body, head=method == "HEAD")
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        except ConnectionError:
+            pass
+        except Exception as e:
+            logger.error(f"Metrics request failed: {e}")
+        finally:
+            writer.close()
+
+    def _parse_request_line(self, request: bytes):
+        line = request.split(b"\r\n", 1)[0]
+        parts = line.decode("latin-1").split()
+        if len(parts) < 2:
+            return "", ""
+        return parts[0], parts[1]
+
+    async def _respond(
+        self, writer: asyncio.StreamWriter, status: int, reason: str, body: bytes, head=False
+    ):
+        header = (
+            f"HTTP/1.1 {status} {reason}\r\n"
+            f"Content-Type: {CONTENT_TYPE}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        writer.write(header.encode() + (b"" if head else body))
+        await writer.drain()
@@ -0,0 +1,115 @@
+import time
+from typing import Dict, List, Optional, Tuple
+
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtWidgets import QLabel, QWidget
+
+from metrics import REGISTRY, MetricsRegistry
+
+
+class MetricsOverlay(QLabel):
+    """Semi-transparent performance readout drawn over the displays
+
+    Refreshes once per interval while visible. Rates and percentiles cover
+    the last interval rather than the whole session, so a stutter shows up
+    immediately and clears once it is over.
+    """
+
+    def __init__(
+        self,
+        parent: QWidget,
+        metrics: Optional[MetricsRegistry] = None,
+        interval_ms: int = 1000,
+    ):
+        super().__init__(parent)
+        self.metrics = metrics or REGISTRY
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.setStyleSheet(
+            "background-color: rgba(0, 0, 0, 170); color: #9f9; "
+            "font-family: monospace; padding: 6px;"
+        )
+        self._counters: Dict[str, float] = {}
+        self._histograms: Dict[str, List[int]] = {}
+        self._last_refresh = time.monotonic()
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.refresh)
+        self.hide()
+
+    def set_enabled(self, enabled: bool):
+        if enabled:
+            self.refresh()
+            self.show()
+            self.raise_()
+            self.timer.start()
+        else:
+            self.timer.stop()
+            self.hide()
+
+    def _delta(self, name: str) -> float:
+        metric = self.metrics.get(name)
+        value = metric.value if metric is not None else 0
+        previous = self._counters.get(name, value)
+        self._counters[name] = value
+        return max(value - previous, 0)
+
+    def _percentiles(self, name: str, *qs: float) -> Optional[Tuple[float, ...]]:
+        """Percentiles in ms over the last interval, None without samples"""
+        histogram = self.metrics.get(name)
+        if histogram is None:
+            return None
+        since = self._histograms.get(name)
+        self._histograms[name] = histogram.snapshot()
+        if since is not None and sum(histogram.counts) == sum(since):
+            return None
+        if since is None and not histogram.count:
+            return None
+        return tuple(histogram.percentile(q, since) / 1000.0 for q in qs)
+
+    def lines(self) -> List[str]:
+        now = time.monotonic()
+        elapsed = max(now - self._last_refresh, 1e-3)
+        self._last_refresh = now
+
+        rtt = self._percentiles("command_rtt_seconds", 50, 99)
+        packets = self._delta("udp_packets_total")
+        lost = self._delta("udp_lost_packets_total")
+        loss = lost / (packets + lost) if packets + lost else 0.0
+        underflows = self._delta("audio_output_underflows_total")
+        jitter = self._delta("rx_jitter_underruns")
+        pan_fps = self._delta("pan_frames_total") / elapsed
+        wf_fps = self._delta("waterfall_lines_total") / elapsed
+        pan_ms = self._percentiles("pan_render_seconds", 50)
+        wf_ms = self._percentiles("waterfall_render_seconds", 50)
+        lag = self._percentiles("event_loop_lag_seconds", 50, 99)
+        health = self.metrics.get("link_health")
+        link_rtt = self.metrics.get("link_rtt_seconds")
+        link_jitter = self.metrics.get("link_jitter_seconds")
+
+        def ms(values, i=0):
+            return f"{values[i]:.1f}" if values else "-"
+
+        rows = [
+            ("RTT", f"p50 {ms(rtt)} ms  p99 {ms(rtt, 1)} ms"),
+            ("UDP", f"{packets / elapsed:.0f} pkt/s  loss {loss:.2%}"),
+            ("Audio", f"underruns {underflows:.0f} device, {jitter:.0f} jitter"),
+            ("Pan", f"{pan_fps:.0f} fps  {ms(pan_ms)} ms"),
+            ("Waterfall", f"{wf_fps:.0f} fps  {ms(wf_ms)} ms"),
+            ("Loop lag", f"p50 {ms(lag)} ms  p99 {ms(lag, 1)} ms"),
+        ]
+        if health is not None:
+            rows.insert(
+                1,
+                (
+                    "Link",
+                    f"health {health.value:.2f}  srtt {link_rtt.value * 1000:.1f} ms  "
+                    f"jitter {link_jitter.value * 1000:.1f} ms",
+                ),
+            )
+        return [f"{label:<10}{text}" for label, text in rows]
+
+    def refresh(self):
+        self.setText("\n".join(self.lines()))
+        self.adjustSize()
+        self.move(8, 8)
@@ -1,13 +1,18 @@
+import time
+from typing import Dict, Optional
+
 import numpy as np
 import pyqtgraph as pg
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtWidgets import QLabel, QVBoxLayout, QWidget
 
+from metrics import REGISTRY, MetricsRegistry
+
 
 class PanadapterWidget(pg.PlotWidget):
     frequency_clicked = pyqtSignal(int)
 
-    def __init__(self):
+    def __init__(self, metrics: Optional[MetricsRegistry] = None):
         super().__init__()
         self.setBackground("k")
         self.showGrid(x=True, y=True, alpha=0.3)
@@ -22,17 +27,47 @@ class PanadapterWidget(pg.PlotWidget):
 
         self.freq_bins = None
         self.magnitudes = None
+        self.slice_markers: Dict[str, pg.InfiniteLine] = {}
+
+        metrics = metrics or REGISTRY
+        self._frames = metrics.counter("pan_frames_total", "Panadapter frames drawn")
+        self._render_time = metrics.histogram("pan_render_seconds", "Panadapter update time")
 
         self.plotItem.scene().sigMouseClicked.connect(self._on_scene_clicked)
 
     def update(self, frequency_bins: np.ndarray, magnitude_db: np.ndarray):
+        start = time.perf_counter()
         self.freq_bins = frequency_bins
         self.magnitudes = magnitude_db
         self.curve.setData(frequency_bins, magnitude_db)
+        self._frames.inc()
+        self._render_time.record(time.perf_counter() - start)
 
     def set_center_frequency(self, hz: int):
         self.center_freq_line.setValue(x=hz)
 
+    def set_slice_marker(self, slice_id: str, hz: int, label: str = "", active: bool = False):
+        """Mark a slice's frequency; the active slice is drawn solid, others dashed"""
+        marker = self.slice_markers.get(slice_id)
+        if marker is None:
+            marker = pg.InfiniteLine(
+                angle=90, movable=False, label=label or " ", labelOpts={"position": 0.95}
+            )
+            self.addItem(marker)
+            self.slice_markers[slice_id] = marker
+        if active:
+            pen = pg.mkPen("red", width=2, style=Qt.PenStyle.SolidLine)
+        else:
+            pen = pg.mkPen("orange", width=1, style=Qt.PenStyle.DashLine)
+        marker.setPen(pen)
+        marker.label.setFormat(label or " ")
+        marker.setValue(hz)
+
+    def remove_slice_marker(self, slice_id: str):
+        marker = self.slice_markers.pop(slice_id, None)
+        if marker is not None:
+            self.removeItem(marker)
+
     def _on_scene_clicked(self, event):
         pos = event.scenePos()
         mouse_point = self.plotItem.vb.mapSceneToView(pos)
@@ -0,0 +1,968 @@
+import argparse
+import asyncio
+import base64
+import collections
+import json
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+import numpy as np
+
+from connection_supervisor import LINK_LOST
+from display_subscription import DEFAULT_STREAMS, Subscription, decimate_bins
+from flexradio_api import SliceState
+from metrics import MetricsRegistry
+from rx_audio import JitterBuffer
+from session_audio import SessionAudio
+from session_manager import RadioSession, SessionManager
+from vita49 import WaterfallTile
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 4993
+STREAMS = ("state", "pan", "waterfall", "audio")
+
+
+class DaemonError(Exception):
+    """A control request that could not be carried out; sent back as the error message"""
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+class _ControlClient:
+    """One control connection
+
+    Replies go out in order. Events are latest-wins: each (radio, stream,
+    slice) keeps only its newest encoded event until the socket drains, so a
+    client that reads slowly sees fewer frames and never holds up the radio
+    side or the other clients. Audio blocks are queued in order instead,
+    up to ``MAX_AUDIO_BLOCKS``; beyond that the oldest are dropped.
+    """
+
+    MAX_REPLIES = 256
+    MAX_AUDIO_BLOCKS = 16
+
+    def __init__(self, writer: asyncio.StreamWriter, dropped):
+        self.writer = writer
+        self.subscriptions: Dict[str, Subscription] = {}
+        self._replies: Deque[bytes] = collections.deque()
+        self._events: Dict[tuple, bytes] = {}
+        self._audio: Deque[bytes] = collections.deque()
+        self._wakeup = asyncio.Event()
+        self._dropped = dropped
+        self.task: Optional[asyncio.Task] = None
+
+    def reply(self, message: Dict[str, Any]):
+        if len(self._replies) >= self.MAX_REPLIES:
+            # Sending requests without reading the replies
+            logger.warning("Control client is not reading replies, closing it")
+            self.writer.close()
+            return
+        self._replies.append(_encode(message))
+        self._wakeup.set()
+
+    def event(self, key: tuple, line: bytes):
+        if key in self._events:
+            self._dropped.inc()
+        self._events[key] = line
+        self._wakeup.set()
+
+    def audio(self, line: bytes):
+        if len(self._audio) >= self.MAX_AUDIO_BLOCKS:
+            self._audio.popleft()
+            self._dropped.inc()
+        self._audio.append(line)
+        self._wakeup.set()
+
+    async def run(self):
+        try:
+            while True:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                while self._replies or self._events or self._audio:
+                    chunks = list(self._replies)
+                    chunks.extend(self._events.values())
+                    chunks.extend(self._audio)
+                    self._replies.clear()
+                    self._events.clear()
+                    self._audio.clear()
+                    self.writer.write(b"".join(chunks))
+                    await self.writer.drain()
+        except ConnectionError:
+            pass
+
+
+class RadioDaemon:
+    """Headless radio host with a local control API
+
+    Runs a :class:`SessionManager` (radio links and the shared UDP ingest)
+    and, with an ``audio`` config, each radio's :class:`SessionAudio` (RX
+    and TX audio with their DSP chains) without a GUI, and serves frontends
+    over a Unix socket, or over TCP on loopback where Unix sockets are not
+    available. The protocol is one JSON object per line. Requests carry an
+    ``id`` and a ``cmd``; each gets a reply with the same ``id`` and either
+    ``"ok": true`` and a ``result``, or ``"ok": false`` and an ``error``.
+    Requests without an ``id``, such as ``tx_audio``, are only answered
+    when they fail.
+
+    After ``subscribe``, the client also receives ``state`` (and ``link``),
+    ``pan`` and ``waterfall`` events for that radio, each at the width and
+    rate it asked for, and ``audio`` events if it asked for them: processed
+    RX audio as base64 16-bit mono PCM blocks numbered by ``seq``. Frames
+    and audio blocks are encoded once, however many clients share them.
+    Microphone audio goes the other way in ``tx_audio`` requests.
+    """
+
+    MAX_REQUEST_BYTES = 65536
+
+    def __init__(
+        self,
+        manager: SessionManager,
+        socket_path: Optional[str] = None,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_PORT,
+        slice_mode: str = "usb",
+        fanout=None,
+        audio: Optional[Dict[str, Any]] = None,
+        tx_port: int = 4991,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.manager = manager
+        # Config with the audio and ai_denoiser sections; None leaves radio audio off
+        self.audio_config = audio
+        # Port the radios receive TX audio on
+        self.tx_port = tx_port
+        self.audio: Dict[str, SessionAudio] = {}
+        # Optional ws_fanout.WebSocketFanout serving the display streams to browsers
+        self.fanout = fanout
+        self.socket_path = socket_path if hasattr(socket, "AF_UNIX") else None
+        self.host = host
+        self.port = port
+        self.slice_mode = slice_mode
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.clients: Set[_ControlClient] = set()
+        self._commands: Dict[str, Callable[[_ControlClient, Dict], Awaitable[Any]]] = {
+            "radios": self._cmd_radios,
+            "add_radio": self._cmd_add_radio,
+            "remove_radio": self._cmd_remove_radio,
+            "set_active": self._cmd_set_active,
+            "set_frequency": self._cmd_set_frequency,
+            "set_mode": self._cmd_set_mode,
+            "set_rf_gain": self._cmd_set_rf_gain,
+            "set_af_gain": self._cmd_set_af_gain,
+            "set_ptt": self._cmd_set_ptt,
+            "create_slice": self._cmd_create_slice,
+            "remove_slice": self._cmd_remove_slice,
+            "tx_audio": self._cmd_tx_audio,
+            "subscribe": self._cmd_subscribe,
+            "unsubscribe": self._cmd_unsubscribe,
+        }
+
+        metrics = metrics or manager.metrics
+        self._requests = metrics.counter("daemon_requests_total", "Control API requests")
+        self._dropped = metrics.counter(
+            "daemon_events_dropped_total", "Events replaced before a slow client read them"
+        )
+        metrics.gauge("daemon_clients", "Connected control clients").set_function(
+            lambda: len(self.clients)
+        )
+
+    async def start(self) -> bool:
+        if not await self.manager.start():
+            return False
+        try:
+            if self.socket_path:
+                await self._start_unix()
+            else:
+                self.server = await asyncio.start_server(
+                    self._handle, self.host, self.port, limit=self.MAX_REQUEST_BYTES
+                )
+                self.port = self.server.sockets[0].getsockname()[1]
+                logger.info(f"Control API listening on {self.host}:{self.port}")
+        except OSError as e:
+            logger.error(f"Failed to start control API: {e}")
+            await self.manager.stop()
+            return False
+        return True
+
+    async def _start_unix(self):
+        if os.path.exists(self.socket_path):
+            try:
+                _, writer = await asyncio.open_unix_connection(self.socket_path)
+                writer.close()
+                raise OSError(f"Another daemon is listening on {self.socket_path}")
+            except ConnectionError:
+                os.unlink(self.socket_path)  # Left behind by a daemon that died
+        os.makedirs(os.path.dirname(self.socket_path) or ".", exist_ok=True)
+        self.server = await asyncio.start_unix_server(
+            self._handle, self.socket_path, limit=self.MAX_REQUEST_BYTES
+        )
+        os.chmod(self.socket_path, 0o600)
+        logger.info(f"Control API listening on {self.socket_path}")
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            for client in list(self.clients):
+                client.writer.close()
+            await self.server.wait_closed()
+            self.server = None
+            if self.socket_path and os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+        for audio in self.audio.values():
+            await audio.stop()
+        self.audio.clear()
+        await self.manager.stop()
+
+    async def add_radio(self, name: str, host: str, port: int = 4992) -> Optional[RadioSession]:
+        """Connect a radio, open a slice and its audio, and feed both to subscribers"""
+        if name in self.manager.sessions:
+            return self.manager.sessions[name]
+        session = await self.manager.add_radio(name, host, port)
+        if session is None:
+            return None
+        if not session.api.slices:
+            await session.api.create_slice(mode=self.slice_mode)
+        if self.audio_config is not None:
+            audio = SessionAudio(session, self.audio_config, radio_port=self.tx_port)
+            if await audio.start():
+                audio.add_block_callback(lambda block: self._on_audio(name, audio, block))
+                self.audio[name] = audio
+            else:
+                logger.warning(f"No audio from radio {name}")
+                await audio.stop()
+        if session.supervisor:
+            session.supervisor.add_link_callback(lambda state: self._on_link(name, state))
+        session.display.add_pan_callback(lambda bins: self._on_pan(name, bins))
+        session.display.add_waterfall_callback(lambda tile: self._on_waterfall(name, tile))
+        session.api.add_state_callback(lambda state: self._on_state(name, state))
+        if self.fanout:
+            session.display.add_pan_callback(lambda bins: self.fanout.publish_pan(name, bins))
+            session.display.add_waterfall_callback(
+                lambda tile: self.fanout.publish_waterfall(name, tile)
+            )
+        return session
+
+    # -- connections ------------------------------------------------------
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        client = _ControlClient(writer, self._dropped)
+        client.task = asyncio.create_task(client.run())
+        self.clients.add(client)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    await self._request(client, line)
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError) as e:
+            logger.warning(f"Control client dropped: {e}")
+        finally:
+            self.clients.discard(client)
+            client.task.cancel()
+            writer.close()
+
+    async def _request(self, client: _ControlClient, line: bytes):
+        self._requests.inc()
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise DaemonError("Request must be a JSON object")
+            request_id = request.get("id")
+            handler = self._commands.get(request.get("cmd"))
+            if handler is None:
+                raise DaemonError(f"Unknown command: {request.get('cmd')}")
+            result = await handler(client, request)
+            if "id" in request:
+                client.reply({"id": request_id, "ok": True, "result": result})
+        except DaemonError as e:
+            client.reply({"id": request_id, "ok": False, "error": str(e)})
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            client.reply({"id": request_id, "ok": False, "error": f"Bad request: {e}"})
+        except Exception as e:
+            logger.error(f"Control request failed: {e}")
+            client.reply({"id": request_id, "ok": False, "error": str(e)})
+
+    # -- commands ---------------------------------------------------------
+
+    def _session(self, request: Dict) -> RadioSession:
+        name = request.get("radio") or self.manager.active
+        if name is None:
+            raise DaemonError("No radio connected")
+        session = self.manager.sessions.get(name)
+        if session is None:
+            raise DaemonError(f"Unknown radio: {name}")
+        return session
+
+    def _describe(self, session: RadioSession) -> Dict[str, Any]:
+        return {
+            "name": session.name,
+            "host": session.host,
+            "active": session.active,
+            "connected": session.client.running,
+            "active_slice": session.api.slice_id,
+            "audio": session.name in self.audio,
+            "slices": [self._slice_state(state) for state in session.api.slices.values()],
+        }
+
+    @staticmethod
+    def _slice_state(state) -> Dict[str, Any]:
+        return {
+            "slice": state.slice_id,
+            "frequency": state.frequency,
+            "mode": state.mode,
+            "rf_gain": state.rf_gain,
+            "af_gain": state.af_gain,
+            "ptt": state.ptt,
+        }
+
+    async def _cmd_radios(self, client, request):
+        return [self._describe(session) for session in self.manager.sessions.values()]
+
+    async def _cmd_add_radio(self, client, request):
+        name = str(request["name"])
+        session = await self.add_radio(name, str(request["host"]), int(request.get("port", 4992)))
+        if session is None:
+            raise DaemonError(f"Could not connect to {request['host']}")
+        return self._describe(session)
+
+    async def _cmd_remove_radio(self, client, request):
+        session = self._session(request)
+        audio = self.audio.pop(session.name, None)
+        if audio:
+            await audio.stop()
+        await self.manager.remove_radio(session.name)
+        for other in self.clients:
+            other.subscriptions.pop(session.name, None)
+        return None
+
+    async def _cmd_set_active(self, client, request):
+        if not await self.manager.set_active(str(request["radio"])):
+            raise DaemonError(f"Unknown radio: {request['radio']}")
+        return None
+
+    async def _cmd_set_frequency(self, client, request):
+        session = self._session(request)
+        await session.api.set_frequency(int(request["hz"]), request.get("slice"))
+        return self._describe(session)
+
+    async def _cmd_set_mode(self, client, request):
+        session = self._session(request)
+        await session.api.set_mode(str(request["mode"]).lower(), request.get("slice"))
+        return self._describe(session)
+
+    async def _cmd_set_rf_gain(self, client, request):
+        session = self._session(request)
+        await session.api.set_rf_gain(int(request["level"]), request.get("slice"))
+        return self._describe(session)
+
+    async def _cmd_set_af_gain(self, client, request):
+        session = self._session(request)
+        await session.api.set_af_gain(int(request["level"]), request.get("slice"))
+        return self._describe(session)
+
+    async def _cmd_set_ptt(self, client, request):
+        """PTT on the given slice, else the radio's active slice"""
+        session = self._session(request)
+        if request.get("slice") and not session.api.set_active_slice(request["slice"]):
+            raise DaemonError(f"Unknown slice: {request['slice']}")
+        on = bool(request["on"])
+        audio = self.audio.get(session.name)
+        if audio and not on:
+            audio.flush_tx()
+        await session.api.set_ptt(on)
+        return self._describe(session)
+
+    async def _cmd_create_slice(self, client, request):
+        """Add a slice; with several, each gets its own stream in the radio's audio mix"""
+        session = self._session(request)
+        slice_id = await session.api.create_slice(mode=str(request.get("mode", self.slice_mode)))
+        if not slice_id:
+            raise DaemonError("Failed to create slice")
+        if "hz" in request:
+            await session.api.set_frequency(int(request["hz"]), slice_id)
+        audio = self.audio.get(session.name)
+        if audio and len(session.api.slices) > 1 and self._slice_audio():
+            for other in list(session.api.slices):
+                await audio.add_slice_audio(other)
+        return self._describe(session)
+
+    async def _cmd_remove_slice(self, client, request):
+        session = self._session(request)
+        slice_id = str(request["slice"])
+        if slice_id not in session.api.slices:
+            raise DaemonError(f"Unknown slice: {slice_id}")
+        audio = self.audio.get(session.name)
+        if audio:
+            await audio.remove_slice_audio(slice_id)
+        await session.api.remove_slice(slice_id)
+        # With one slice left its stream duplicates the radio's remote audio
+        remaining = [state for state in session.api.slices.values() if state.dax_channel]
+        if audio and len(remaining) == 1:
+            await audio.remove_slice_audio(remaining[0].slice_id)
+        return self._describe(session)
+
+    async def _cmd_tx_audio(self, client, request):
+        session = self._session(request)
+        audio = self.audio.get(session.name)
+        if audio is None:
+            raise DaemonError(f"Audio is off for radio {session.name}")
+        audio.submit(base64.b64decode(request["pcm"], validate=True))
+        return None
+
+    def _slice_audio(self) -> bool:
+        return self.audio_config.get("audio", {}).get("slice_audio", True)
+
+    async def _cmd_subscribe(self, client, request):
+        session = self._session(request)
+        streams = set(request.get("streams", DEFAULT_STREAMS))
+        unknown = streams - set(STREAMS)
+        if unknown:
+            raise DaemonError(f"Unknown streams: {', '.join(sorted(unknown))}")
+        if "audio" in streams and session.name not in self.audio:
+            raise DaemonError(f"Audio is off for radio {session.name}")
+        client.subscriptions[session.name] = Subscription(
+            streams=streams,
+            width=max(0, int(request.get("width", 0))),
+            fps=max(0.0, float(request.get("fps", 0))),
+        )
+        if "state" in streams:
+            for state in session.api.slices.values():
+                self._send_state(client, session.name, state)
+        return self._describe(session)
+
+    async def _cmd_unsubscribe(self, client, request):
+        if request.get("radio"):
+            client.subscriptions.pop(request["radio"], None)
+        else:
+            client.subscriptions.clear()
+        return None
+
+    # -- events -----------------------------------------------------------
+
+    def _send_state(self, client: _ControlClient, radio: str, state):
+        message = {"event": "state", "radio": radio, **self._slice_state(state)}
+        client.event((radio, "state", state.slice_id), _encode(message))
+
+    def _on_state(self, radio: str, state):
+        line = None
+        for client in self.clients:
+            subscription = client.subscriptions.get(radio)
+            if subscription is None or "state" not in subscription.streams:
+                continue
+            if line is None:
+                line = _encode({"event": "state", "radio": radio, **self._slice_state(state)})
+            client.event((radio, "state", state.slice_id), line)
+
+    def _on_link(self, radio: str, state: str):
+        audio = self.audio.get(radio)
+        if audio and state == LINK_LOST:
+            audio.flush_tx()
+        elif audio:
+            audio.rebind()
+        line = _encode({"event": "link", "radio": radio, "state": state})
+        for client in self.clients:
+            subscription = client.subscriptions.get(radio)
+            if subscription is not None and "state" in subscription.streams:
+                client.event((radio, "link"), line)
+
+    def _on_audio(self, radio: str, audio: SessionAudio, block: bytes):
+        line = None
+        for client in self.clients:
+            subscription = client.subscriptions.get(radio)
+            if subscription is None or "audio" not in subscription.streams:
+                continue
+            if line is None:
+                line = _encode(
+                    {
+                        "event": "audio",
+                        "radio": radio,
+                        "seq": audio.blocks,
+                        "rate": audio.sample_rate,
+                        "pcm": base64.b64encode(block).decode(),
+                    }
+                )
+            client.audio(line)
+
+    def _on_pan(self, radio: str, bins: np.ndarray):
+        now = time.monotonic()
+        encoded: Dict[int, bytes] = {}
+        for client in self.clients:
+            subscription = client.subscriptions.get(radio)
+            if subscription is None or not subscription.take("pan", now):
+                continue
+            line = encoded.get(subscription.width)
+            if line is None:
+                line = encoded[subscription.width] = _encode(
+                    {
+                        "event": "pan",
+                        "radio": radio,
+                        "bins": decimate_bins(bins, subscription.width).tolist(),
+                    }
+                )
+            client.event((radio, "pan"), line)
+
+    def _on_waterfall(self, radio: str, tile: WaterfallTile):
+        now = time.monotonic()
+        encoded: Dict[int, bytes] = {}
+        for client in self.clients:
+            subscription = client.subscriptions.get(radio)
+            if subscription is None or not subscription.take("waterfall", now):
+                continue
+            line = encoded.get(subscription.width)
+            if line is None:
+                rows = decimate_bins(tile.data, subscription.width, axis=1)
+                line = encoded[subscription.width] = _encode(
+                    {
+                        "event": "waterfall",
+                        "radio": radio,
+                        "timecode": tile.timecode,
+                        "first_bin_hz": tile.first_bin_hz,
+                        "bin_bandwidth_hz": tile.bin_bandwidth_hz * tile.width / rows.shape[1],
+                        "rows": rows.tolist(),
+                    }
+                )
+            client.event((radio, "waterfall"), line)
+
+
+class DaemonClient:
+    """Frontend side of the control API
+
+    ``request`` sends a command and returns its result, raising
+    :class:`DaemonError` when the daemon reports an error. ``notify`` sends
+    one without waiting, for streams such as ``tx_audio``; its errors are
+    logged. Events are passed to the event callbacks as decoded dicts.
+    """
+
+    def __init__(self):
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.event_callbacks: List[Callable[[Dict[str, Any]], None]] = []
+        self.close_callbacks: List[Callable[[], None]] = []
+        self._next_id = 0
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def add_event_callback(self, callback: Callable[[Dict[str, Any]], None]):
+        self.event_callbacks.append(callback)
+
+    def add_close_callback(self, callback: Callable[[], None]):
+        """Called when the connection is lost, not after :meth:`close`"""
+        self.close_callbacks.append(callback)
+
+    async def connect(
+        self, socket_path: Optional[str] = None, host: str = "127.0.0.1", port: int = DEFAULT_PORT
+    ) -> bool:
+        try:
+            if socket_path and hasattr(socket, "AF_UNIX"):
+                self.reader, self.writer = await asyncio.open_unix_connection(
+                    socket_path, limit=2**22
+                )
+            else:
+                self.reader, self.writer = await asyncio.open_connection(
+                    host, port, limit=2**22
+                )
+        except OSError as e:
+            logger.error(f"Failed to connect to daemon: {e}")
+            return False
+        self._task = asyncio.create_task(self._read_loop())
+        return True
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+        if self.writer:
+            self.writer.close()
+            self.writer = None
+
+    async def request(self, cmd: str, **args) -> Any:
+        if self.writer is None:
+            raise RuntimeError("Not connected to daemon. Call connect() first.")
+        self._next_id += 1
+        request_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self.writer.write(_encode({"id": request_id, "cmd": cmd, **args}))
+        await self.writer.drain()
+        return await future
+
+    def notify(self, cmd: str, **args):
+        if self.writer is None:
+            raise RuntimeError("Not connected to daemon. Call connect() first.")
+        self.writer.write(_encode({"cmd": cmd, **args}))
+
+    def send_tx_audio(self, pcm: bytes, radio: Optional[str] = None):
+        """Microphone audio for ``radio`` (default: the active one) as 16-bit mono PCM"""
+        args = {"radio": radio} if radio else {}
+        self.notify("tx_audio", pcm=base64.b64encode(pcm).decode(), **args)
+
+    async def _read_loop(self):
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                if "event" in message:
+                    for callback in self.event_callbacks:
+                        callback(message)
+                    continue
+                if message.get("id") is None and not message.get("ok"):
+                    logger.warning(f"Daemon request failed: {message.get('error')}")
+                    continue
+                future = self._pending.pop(message.get("id"), None)
+                if future is None or future.done():
+                    continue
+                if message.get("ok"):
+                    future.set_result(message.get("result"))
+                else:
+                    future.set_exception(DaemonError(message.get("error")))
+        except (ConnectionError, ValueError) as e:
+            logger.warning(f"Daemon connection failed: {e}")
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Daemon connection closed"))
+            self._pending.clear()
+            # close() has already cleared the writer
+            lost = self.writer is not None
+            self.writer = None
+            if lost:
+                for callback in self.close_callbacks:
+                    callback()
+
+
+class DaemonAPI:
+    """One daemon radio behind the interface of :class:`FlexRadioAPI`
+
+    Lets a frontend written against FlexRadioAPI, such as the GUI and the
+    CAT server, work through a :class:`DaemonClient`: ``slices``, the
+    active slice, state callbacks and the async setters, which become
+    control requests. Slice state follows the daemon's replies and
+    ``state`` events. The active slice belongs to this frontend and is sent
+    with each request, so frontends can work different slices. Link
+    callbacks receive the daemon's ``link`` events.
+    """
+
+    def __init__(self, client: DaemonClient, radio: Optional[str] = None):
+        self.client = client
+        # Daemon radio name; None attaches to the daemon's active radio
+        self.radio = radio
+        self.slices: Dict[str, SliceState] = {}
+        self._active_slice: Optional[str] = None
+        self._default_state = SliceState()
+        # Whether the daemon runs this radio's audio
+        self.audio = False
+        self.state_callbacks: List[Callable] = []
+        self.link_callbacks: List[Callable[[str], None]] = []
+        client.add_event_callback(self._on_event)
+
+    @property
+    def slice_id(self) -> Optional[str]:
+        return self._active_slice
+
+    @property
+    def slice_state(self) -> SliceState:
+        if self._active_slice is None:
+            return self._default_state
+        return self.slices[self._active_slice]
+
+    def set_active_slice(self, slice_id: str) -> bool:
+        if slice_id not in self.slices:
+            return False
+        self._active_slice = slice_id
+        return True
+
+    def _slice(self, slice_id: Optional[str]) -> Optional[SliceState]:
+        return self.slices.get(slice_id or self._active_slice)
+
+    def add_state_callback(self, callback: Callable):
+        self.state_callbacks.append(callback)
+
+    def remove_state_callback(self, callback: Callable):
+        if callback in self.state_callbacks:
+            self.state_callbacks.remove(callback)
+
+    def add_link_callback(self, callback: Callable[[str], None]):
+        self.link_callbacks.append(callback)
+
+    async def connect(self, host: Optional[str] = None, port: int = 4992) -> bool:
+        """Subscribe to the radio's state, and its audio if the daemon runs it
+
+        When the daemon has no such radio and ``host`` is given, the daemon
+        is asked to connect to it first.
+        """
+        try:
+            radios = {radio["name"]: radio for radio in await self.client.request("radios")}
+            if self.radio is None:
+                self.radio = next((n for n, r in radios.items() if r["active"]), None)
+            if self.radio not in radios:
+                if not host:
+                    raise DaemonError("The daemon has no radio")
+                self.radio = self.radio or "radio"
+                await self.client.request("add_radio", name=self.radio, host=host, port=port)
+            radio = await self.client.request("subscribe", radio=self.radio, streams=["state"])
+            if radio["audio"]:
+                radio = await self.client.request(
+                    "subscribe", radio=self.radio, streams=["state", "audio"]
+                )
+        except (DaemonError, ConnectionError) as e:
+            logger.error(f"Failed to attach to daemon radio: {e}")
+            return False
+        self.audio = radio["audio"]
+        self._load(radio)
+        return True
+
+    async def disconnect(self):
+        """Leave the radio to the daemon and close the connection"""
+        if self.client.writer is not None:
+            try:
+                await self.client.request("unsubscribe", radio=self.radio)
+            except (DaemonError, ConnectionError) as e:
+                logger.warning(f"Failed to unsubscribe: {e}")
+        await self.client.close()
+
+    async def create_slice(self, mode: str = "usb") -> Optional[str]:
+        before = set(self.slices)
+        if not await self._send("create_slice", mode=mode):
+            return None
+        return next((slice_id for slice_id in self.slices if slice_id not in before), None)
+
+    async def remove_slice(self, slice_id: str):
+        await self._send("remove_slice", slice=slice_id)
+
+    async def set_frequency(self, hz: int, slice_id: Optional[str] = None):
+        state = self._slice(slice_id)
+        if state is None:
+            return
+        if not self._validate_frequency(hz):
+            logger.error(f"Invalid frequency: {hz} Hz. Must be between 1.8 MHz and 30 MHz")
+            return
+        await self._send("set_frequency", hz=hz, slice=state.slice_id)
+
+    async def set_mode(self, mode: str, slice_id: Optional[str] = None):
+        state = self._slice(slice_id)
+        if state is not None:
+            await self._send("set_mode", mode=mode, slice=state.slice_id)
+
+    async def set_rf_gain(self, level: int, slice_id: Optional[str] = None):
+        state = self._slice(slice_id)
+        if state is not None:
+            await self._send("set_rf_gain", level=level, slice=state.slice_id)
+
+    async def set_af_gain(self, level: int, slice_id: Optional[str] = None):
+        state = self._slice(slice_id)
+        if state is not None:
+            await self._send("set_af_gain", level=level, slice=state.slice_id)
+
+    async def set_ptt(self, on: bool):
+        if self.slice_id:
+            await self._send("set_ptt", on=on, slice=self.slice_id)
+
+    def _validate_frequency(self, hz: int) -> bool:
+        """Same range as FlexRadioAPI; the CAT server checks it before queueing a write"""
+        return 1800000 <= hz <= 30000000
+
+    async def _send(self, cmd: str, **args) -> bool:
+        """Run a request for this radio and take the radio state it returns"""
+        try:
+            radio = await self.client.request(cmd, radio=self.radio, **args)
+        except (DaemonError, ConnectionError, RuntimeError) as e:
+            logger.error(f"Daemon request {cmd} failed: {e}")
+            return False
+        self._load(radio)
+        return True
+
+    def _load(self, radio: Dict[str, Any]):
+        slices = {}
+        for item in radio["slices"]:
+            state = self.slices.get(item["slice"]) or SliceState(slice_id=item["slice"])
+            self._update(state, item)
+            slices[state.slice_id] = state
+        self.slices = slices
+        if self._active_slice not in slices:
+            active = radio.get("active_slice")
+            self._active_slice = active if active in slices else next(iter(slices), None)
+
+    @staticmethod
+    def _update(state: SliceState, item: Dict[str, Any]):
+        state.frequency = item["frequency"]
+        state.mode = item["mode"]
+        state.rf_gain = item["rf_gain"]
+        state.af_gain = item["af_gain"]
+        state.ptt = item["ptt"]
+
+    def _on_event(self, message: Dict[str, Any]):
+        if message.get("radio") != self.radio:
+            return
+        if message["event"] == "state":
+            state = self.slices.get(message["slice"])
+            if state is None:
+                # Opened by another frontend
+                state = self.slices[message["slice"]] = SliceState(slice_id=message["slice"])
+            self._update(state, message)
+            for callback in self.state_callbacks:
+                callback(state)
+        elif message["event"] == "link":
+            for callback in self.link_callbacks:
+                callback(message["state"])
+
+
+class AudioPlayout:
+    """Plays a daemon radio's ``audio`` events through AudioManager
+
+    Blocks are reordered and buffered by their ``seq`` in a
+    :class:`JitterBuffer`. ``read_bytes`` is installed as the AudioManager
+    RX callback and cuts the blocks into ``chunk_size`` frames, padding with
+    silence while the buffer fills or after an underrun. The audio has
+    already been through the daemon's RX DSP chain.
+    """
+
+    def __init__(self, radio: str, sample_rate: int, chunk_size: int, jitter_blocks: int = 3):
+        self.radio = radio
+        self.sample_rate = sample_rate
+        self.chunk_size = chunk_size
+        self.jitter = JitterBuffer(target_depth=jitter_blocks)
+        self.underruns = 0
+        self._pending = bytearray()
+        self._block_bytes = chunk_size * 2
+        self._rate_warned = False
+
+    def on_event(self, message: Dict[str, Any]):
+        if message["event"] != "audio" or message.get("radio") != self.radio:
+            return
+        if message["rate"] != self.sample_rate:
+            if not self._rate_warned:
+                logger.warning(
+                    f"Daemon audio is {message['rate']} Hz, audio.sample_rate is "
+                    f"{self.sample_rate} Hz; set both the same"
+                )
+                self._rate_warned = True
+            return
+        self.jitter.push(message["seq"] & 0xF, base64.b64decode(message["pcm"]))
+
+    def read_bytes(self) -> bytes:
+        """AudioManager RX callback: one chunk of 16-bit mono PCM"""
+        size = self.chunk_size * 2
+        while len(self._pending) < size:
+            block, _, lost = self.jitter.pop()
+            if block is None and not lost:
+                break
+            if block is None:
+                block = bytes(self._block_bytes)
+            self._block_bytes = len(block)
+            self._pending += block
+        if len(self._pending) < size:
+            self.underruns += 1
+            self._pending += bytes(size - len(self._pending))
+        chunk = bytes(self._pending[:size])
+        del self._pending[:size]
+        return chunk
+
+
+def _parse_radio(spec: str) -> tuple:
+    """``NAME=HOST[:PORT]`` or ``HOST[:PORT]`` -> (name, host, port)"""
+    name, _, address = spec.rpartition("=")
+    host, _, port = address.partition(":")
+    return name or host, host, int(port) if port else 4992
+
+
+async def _run(args):
+    from config_manager import ConfigManager
+    from discovery import RadioCache
+    from metrics_exporter import MetricsExporter
+    from ws_fanout import WebSocketFanout
+
+    config = ConfigManager()
+    radios = [_parse_radio(spec) for spec in args.radio]
+    if not radios:
+        cache = RadioCache(config.config_dir / "radios.json")
+        cache.load()
+        last = cache.last_radio()
+        radios = [("radio", last.ip, last.port) if last else ("radio", config.get_radio_ip(), 4992)]
+
+    manager = SessionManager(
+        udp_port=config.get("radio.udp_port", 4991),
+        active_fps=config.get("display.panadapter_fps", 15),
+        background_fps=config.get("daemon.background_fps", 2),
+        pan_width=config.get("display.panadapter_width", 1024),
+        reconnect=config.get("radio.reconnect.enabled", True),
+    )
+    fanout = None
+    if config.get("daemon.websocket.enabled", False):
+        fanout = WebSocketFanout(
+            config.get("daemon.websocket.host", "127.0.0.1"),
+            config.get("daemon.websocket.port", 4994),
+            queue_size=config.get("daemon.websocket.queue_size", 4),
+        )
+        if not await fanout.start():
+            fanout = None
+    socket_path = None if args.port else args.socket or config.get("daemon.socket")
+    daemon = RadioDaemon(
+        manager,
+        socket_path=os.path.expanduser(socket_path) if socket_path else None,
+        host=config.get("daemon.host", "127.0.0.1"),
+        port=args.port or config.get("daemon.port", DEFAULT_PORT),
+        fanout=fanout,
+        audio=config.config if config.get("daemon.audio", True) else None,
+        tx_port=config.get("radio.udp_port", 4991),
+    )
+    if not await daemon.start():
+        return
+    exporter = None
+    if config.get("metrics.exporter.enabled", False):
+        exporter = MetricsExporter(
+            config.get("metrics.exporter.host", "127.0.0.1"),
+            config.get("metrics.exporter.port", 9464),
+        )
+        await exporter.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except NotImplementedError:
+            pass  # Windows: Ctrl+C raises KeyboardInterrupt instead
+    try:
+        for name, host, port in radios:
+            if not await daemon.add_radio(name, host, port):
+                logger.error(f"Could not connect to radio {name} at {host}:{port}")
+        await stop.wait()
+    finally:
+        if exporter:
+            await exporter.stop()
+        if fanout:
+            await fanout.stop()
+        await daemon.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless FlexRadio host with a control API")
+    parser.add_argument("--socket", help="Unix socket path (default: daemon.socket in config)")
+    parser.add_argument("--port", type=int, help="serve on 127.0.0.1:PORT instead of a socket")
+    parser.add_argument(
+        "--radio",
+        action="append",
+        default=[],
+        metavar="NAME=HOST[:PORT]",
+        help="radio to connect at startup; repeat for several (default: last radio used)",
+    )
+    args = parser.parse_args()
+    try:
+        asyncio.run(_run(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
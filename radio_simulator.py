@@ -0,0 +1,587 @@
+import argparse
+import asyncio
+import collections
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from vita49 import (
+    DISCOVERY_STREAM_ID,
+    PACKET_CLASS_AUDIO_FLOAT32,
+    PACKET_CLASS_DISCOVERY,
+    PACKET_CLASS_PANADAPTER,
+    PACKET_CLASS_WATERFALL,
+    PACKET_TYPE_EXT_DATA,
+    PacketHeaderWriter,
+    pack_discovery_payload,
+    pack_pan_payload,
+    pack_waterfall_payload,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+VERSION = "1.4.0.0"
+ERR_UNKNOWN_COMMAND = "50000015"
+ERR_BAD_SLICE = "50000016"
+ERR_BAD_PARAMETER = "50000017"
+
+PAN_STREAM_ID = 0x40000000
+WATERFALL_STREAM_ID = 0x42000000
+RX_AUDIO_STREAM_ID = 0x50000000
+TX_AUDIO_STREAM_ID = 0x60000000
+# DAX RX streams: base + DAX channel
+DAX_RX_STREAM_ID = 0x04000000
+
+
+@dataclass
+class SimSlice:
+    frequency: int = 7150000
+    mode: str = "usb"
+    rfpower: int = 50
+    af_gain: int = 50
+    ptt: bool = False
+    dax: int = 0
+
+    def status(self, slice_id: int) -> str:
+        return (
+            f"S|slice|{slice_id}|frequency={self.frequency}|mode={self.mode}"
+            f"|rfpower={self.rfpower}|af_gain={self.af_gain}|ptt={int(self.ptt)}|dax={self.dax}"
+        )
+
+
+@dataclass
+class _ClientSession:
+    handle: int
+    writer: asyncio.StreamWriter
+    host: str
+    udp_port: Optional[int] = None
+    subscriptions: Set[int] = field(default_factory=set)
+    slices: Set[int] = field(default_factory=set)
+    streams: Dict[int, asyncio.Task] = field(default_factory=dict)
+    pan_width: int = 1024
+    pan_center: int = 7150000
+    pan_fps: Optional[float] = None
+    # Delayed TCP lines as (due time, data), written in order by _flush
+    outbox: Deque[Tuple[float, bytes]] = field(default_factory=collections.deque)
+    flush_handle: Optional[asyncio.TimerHandle] = None
+
+
+class RadioSimulator:
+    """Local stand-in for a FlexRadio: TCP command API plus UDP VITA-49 streams
+
+    Implements the subset of the protocol this application speaks:
+    ``C<seq>|<command>`` requests answered with ``R<seq>|<errno>|<message>``,
+    ``S|slice|...`` status pushes to subscribed clients, periodic ``H``
+    heartbeats, and synthetic panadapter, waterfall, RX audio and per-slice
+    DAX RX audio streams sent to the port given by ``client udpport``. Each
+    DAX channel carries a tone of its own (500 Hz + 200 Hz per channel) so
+    mixed slice audio can be told apart.
+
+    With ``discovery_target`` set, the simulator also sends a discovery
+    packet there every ``discovery_interval`` seconds, as a radio
+    broadcasts to port 4992 on its LAN.
+
+    ``latency`` and ``jitter`` (seconds) delay every response, status push
+    and datagram; ``loss`` is the probability of dropping a datagram. With
+    jitter, datagrams may arrive out of order as they would on a real link;
+    TCP lines to a client are always delivered in the order they were sent.
+    ``command_time`` is how long the radio spends on each command; commands
+    from one client are executed one after another, as the radio does.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 4992,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        loss: float = 0.0,
+        pan_fps: float = 15.0,
+        waterfall_fps: float = 10.0,
+        audio_rate: int = 24000,
+        audio_samples_per_packet: int = 128,
+        heartbeat_interval: float = 1.0,
+        command_time: float = 0.0,
+        seed: Optional[int] = None,
+        serial: str = "1234-5678-9012-3456",
+        model: str = "FLEX-6400",
+        nickname: str = "Simulator",
+        discovery_target: Optional[Tuple[str, int]] = None,
+        discovery_interval: float = 1.0,
+    ):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.pan_fps = pan_fps
+        self.waterfall_fps = waterfall_fps
+        self.audio_rate = audio_rate
+        self.audio_samples_per_packet = audio_samples_per_packet
+        self.heartbeat_interval = heartbeat_interval
+        self.command_time = command_time
+        self.serial = serial
+        self.model = model
+        self.nickname = nickname
+        self.discovery_target = discovery_target
+        self.discovery_interval = discovery_interval
+        self.random = random.Random(seed)
+        self.rng = np.random.default_rng(seed)
+
+        self.slices: Dict[int, SimSlice] = {}
+        self.sessions: List[_ClientSession] = []
+        self.commands_handled = 0
+        self.packets_sent = 0
+        self.packets_dropped = 0
+
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._udp: Optional[asyncio.DatagramTransport] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._discovery_task: Optional[asyncio.Task] = None
+        self._next_handle = 1
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._udp, _ = await loop.create_datagram_endpoint(
+            asyncio.DatagramProtocol, local_addr=(self.host, 0)
+        )
+        if self.heartbeat_interval > 0:
+            self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        if self.discovery_target:
+            self._discovery_task = asyncio.create_task(self._discovery_loop())
+        logger.info(f"Radio simulator listening on {self.host}:{self.port}")
+
+    async def stop(self):
+        for task in (self._heartbeat_task, self._discovery_task):
+            if task:
+                task.cancel()
+        for session in list(self.sessions):
+            self._close_session(session)
+            session.writer.close()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._udp:
+            self._udp.close()
+            self._udp = None
+
+    # -- impairments ------------------------------------------------------
+
+    def _delay(self) -> float:
+        if self.jitter:
+            return self.latency + self.random.uniform(0, self.jitter)
+        return self.latency
+
+    def _send_line(self, session: _ClientSession, line: str):
+        data = (line + "\n").encode()
+        loop = asyncio.get_running_loop()
+        delay = self._delay()
+        if delay <= 0 and not session.outbox:
+            self._write(session, data)
+            return
+        # A TCP stream never reorders: a line waits for the one before it
+        due = loop.time() + delay
+        if session.outbox:
+            due = max(due, session.outbox[-1][0])
+        session.outbox.append((due, data))
+        if session.flush_handle is None:
+            session.flush_handle = loop.call_at(due, self._flush, session)
+
+    def _flush(self, session: _ClientSession):
+        loop = asyncio.get_running_loop()
+        session.flush_handle = None
+        while session.outbox and session.outbox[0][0] <= loop.time():
+            self._write(session, session.outbox.popleft()[1])
+        if session.outbox:
+            session.flush_handle = loop.call_at(session.outbox[0][0], self._flush, session)
+
+    @staticmethod
+    def _write(session: _ClientSession, data: bytes):
+        if not session.writer.is_closing():
+            session.writer.write(data)
+
+    def _send_datagram(self, session: _ClientSession, data: bytes):
+        if self._udp is None or session.udp_port is None:
+            return
+        if self.loss and self.random.random() < self.loss:
+            self.packets_dropped += 1
+            return
+        addr = (session.host, session.udp_port)
+        delay = self._delay()
+        if delay > 0:
+            asyncio.get_running_loop().call_later(delay, self._sendto, data, addr)
+        else:
+            self._sendto(data, addr)
+        self.packets_sent += 1
+
+    def _sendto(self, data: bytes, addr):
+        if self._udp is not None:
+            self._udp.sendto(data, addr)
+
+    # -- TCP command API ----------------------------------------------------
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info("peername")
+        session = _ClientSession(self._next_handle, writer, peer[0])
+        self._next_handle += 1
+        self.sessions.append(session)
+        writer.write(f"V{VERSION}\nH{session.handle:08X}\n".encode())
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                text = line.decode(errors="replace").strip()
+                if not text.startswith("C") or "|" not in text:
+                    continue
+                seq, command = text[1:].split("|", 1)
+                if self.command_time:
+                    await asyncio.sleep(self.command_time)
+                try:
+                    errno, message = self.handle_command(session, command.strip())
+                except (ValueError, IndexError) as e:
+                    errno, message = ERR_BAD_PARAMETER, f"Bad command: {e}"
+                self.commands_handled += 1
+                self._send_line(session, f"R{seq}|{errno}|{message}")
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._close_session(session)
+            writer.close()
+
+    def _close_session(self, session: _ClientSession):
+        # Like the radio, a client's slices go away with its connection
+        for slice_id in session.slices:
+            self.slices.pop(slice_id, None)
+        session.slices.clear()
+        for task in session.streams.values():
+            task.cancel()
+        session.streams.clear()
+        if session.flush_handle is not None:
+            session.flush_handle.cancel()
+            session.flush_handle = None
+        if session in self.sessions:
+            self.sessions.remove(session)
+
+    def handle_command(self, session: _ClientSession, command: str):
+        """Apply one command; returns (errno, message)"""
+        words = command.split()
+        if not words:
+            return ERR_UNKNOWN_COMMAND, "Empty command"
+
+        head = words[0]
+        if head == "ping":
+            return "0", ""
+        if head == "client" and len(words) == 3 and words[1] == "udpport":
+            session.udp_port = int(words[2])
+            return "0", ""
+        if head == "slice":
+            return self._slice_command(session, words[1:])
+        if head == "sub" and len(words) >= 3 and words[1] == "slice":
+            return self._subscribe(session, words[2])
+        if head == "xmit":
+            return self._xmit(words[1:])
+        if head == "display" and len(words) >= 3 and words[1] == "pan":
+            return self._pan_command(session, words[2:])
+        if head == "audio" and len(words) >= 3 and words[1] == "client":
+            return self._audio_command(session, words[2:])
+        if head == "stream" and len(words) >= 2 and words[1] == "create":
+            return self._stream_create(session, words[2:])
+        if head == "stream" and len(words) == 3 and words[1] == "remove":
+            self._stop_stream(session, int(words[2], 16))
+            return "0", ""
+        return ERR_UNKNOWN_COMMAND, f"Unknown command: {command}"
+
+    def _slice_command(self, session, args):
+        if not args:
+            return ERR_UNKNOWN_COMMAND, "Missing slice command"
+        if args[0] == "create":
+            slice_id = next(i for i in range(64) if i not in self.slices)
+            mode = args[2] if len(args) > 2 else "usb"
+            self.slices[slice_id] = SimSlice(mode=mode)
+            session.slices.add(slice_id)
+            return "0", str(slice_id)
+        if len(args) < 2 or not args[1].isdigit() or int(args[1]) not in self.slices:
+            return ERR_BAD_SLICE, "Invalid slice"
+
+        slice_id = int(args[1])
+        if args[0] == "remove":
+            del self.slices[slice_id]
+            for s in self.sessions:
+                s.subscriptions.discard(slice_id)
+                s.slices.discard(slice_id)
+            return "0", ""
+        if args[0] == "set":
+            state = self.slices[slice_id]
+            for param in args[2:]:
+                key, _, value = param.partition("=")
+                if key == "frequency":
+                    state.frequency = int(value)
+                elif key == "mode":
+                    state.mode = value
+                elif key == "rfpower":
+                    state.rfpower = int(value)
+                elif key == "af_gain":
+                    state.af_gain = int(value)
+                elif key == "dax":
+                    state.dax = int(value)
+                else:
+                    return ERR_BAD_PARAMETER, f"Unknown slice parameter: {key}"
+            self.push_slice_status(slice_id)
+            return "0", ""
+        return ERR_UNKNOWN_COMMAND, f"Unknown slice command: {args[0]}"
+
+    def _subscribe(self, session, target):
+        if target == "all":
+            session.subscriptions.update(self.slices)
+        elif target.isdigit() and int(target) in self.slices:
+            session.subscriptions.add(int(target))
+        else:
+            return ERR_BAD_SLICE, "Invalid slice"
+        for slice_id in sorted(session.subscriptions):
+            self._send_line(session, self.slices[slice_id].status(slice_id))
+        return "0", ""
+
+    def _xmit(self, args):
+        on = bool(args) and args[0] != "off"
+        if on and (not args[0].isdigit() or int(args[0]) not in self.slices):
+            return ERR_BAD_SLICE, "Invalid slice"
+        for slice_id, state in self.slices.items():
+            target = on and slice_id == int(args[0])
+            if state.ptt != target:
+                state.ptt = target
+                self.push_slice_status(slice_id)
+        return "0", ""
+
+    def _pan_command(self, session, args):
+        if args[0] == "create":
+            session.pan_width = int(args[1]) if len(args) > 1 else 1024
+            session.pan_center = int(args[2]) if len(args) > 2 else 7150000
+            self._start_stream(session, PAN_STREAM_ID, self._pan_stream(session))
+            self._start_stream(session, WATERFALL_STREAM_ID, self._waterfall_stream(session))
+            return "0", f"0x{PAN_STREAM_ID:08X}"
+        if args[0] == "remove":
+            self._stop_stream(session, PAN_STREAM_ID)
+            self._stop_stream(session, WATERFALL_STREAM_ID)
+            return "0", ""
+        if args[0] == "set" and len(args) >= 3:
+            for param in args[2:]:
+                key, _, value = param.partition("=")
+                if key != "fps":
+                    return ERR_BAD_PARAMETER, f"Unknown display parameter: {key}"
+                session.pan_fps = float(value)
+            if PAN_STREAM_ID in session.streams:
+                self._start_stream(session, PAN_STREAM_ID, self._pan_stream(session))
+            return "0", ""
+        return ERR_UNKNOWN_COMMAND, f"Unknown display command: {args[0]}"
+
+    def _audio_command(self, session, args):
+        if args[0] == "create" and len(args) >= 2:
+            if args[1] == "rx":
+                self._start_stream(session, RX_AUDIO_STREAM_ID, self._audio_stream(session))
+                return "0", f"0x{RX_AUDIO_STREAM_ID:08X}"
+            if args[1] == "tx":
+                return "0", f"0x{TX_AUDIO_STREAM_ID:08X}"
+        if args[0] == "remove":
+            self._stop_stream(session, RX_AUDIO_STREAM_ID)
+            return "0", ""
+        return ERR_UNKNOWN_COMMAND, f"Unknown audio command: {' '.join(args)}"
+
+    def _stream_create(self, session, args):
+        params = dict(arg.partition("=")[::2] for arg in args)
+        if params.get("compression", "NONE").upper() == "OPUS":
+            return ERR_BAD_PARAMETER, "Opus streams are not simulated"
+        if params.get("type") == "remote_audio_rx":
+            self._start_stream(session, RX_AUDIO_STREAM_ID, self._audio_stream(session))
+            return "0", f"0x{RX_AUDIO_STREAM_ID:08X}"
+        if params.get("type") == "remote_audio_tx":
+            return "0", f"0x{TX_AUDIO_STREAM_ID:08X}"
+        if params.get("type") == "dax_rx":
+            channel = int(params.get("dax_channel", 0))
+            if not 1 <= channel <= 8:
+                return ERR_BAD_PARAMETER, f"Invalid DAX channel: {channel}"
+            stream_id = DAX_RX_STREAM_ID + channel
+            tone = 500 + 200 * channel
+            self._start_stream(session, stream_id, self._audio_stream(session, stream_id, tone))
+            return "0", f"0x{stream_id:08X}"
+        return ERR_BAD_PARAMETER, f"Unknown stream type: {params.get('type')}"
+
+    def drop_clients(self):
+        """Abort every client connection, as a network outage would"""
+        for session in list(self.sessions):
+            session.writer.transport.abort()
+
+    def push_slice_status(self, slice_id: int):
+        line = self.slices[slice_id].status(slice_id)
+        for session in self.sessions:
+            if slice_id in session.subscriptions:
+                self._send_line(session, line)
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            for session in self.sessions:
+                self._send_line(session, f"H{session.handle:08X}")
+
+    def discovery_fields(self) -> Dict[str, str]:
+        return {
+            "discovery_protocol_version": "3.0.0.2",
+            "model": self.model,
+            "serial": self.serial,
+            "version": VERSION,
+            "nickname": self.nickname,
+            "callsign": "N0CALL",
+            "ip": self.host,
+            "port": str(self.port),
+            "status": "In_Use" if self.sessions else "Available",
+        }
+
+    async def _discovery_loop(self):
+        loop = asyncio.get_running_loop()
+        # Sent from the simulator's own address, like the radio's broadcast
+        transport, _ = await loop.create_datagram_endpoint(
+            asyncio.DatagramProtocol, local_addr=(self.host, 0), allow_broadcast=True
+        )
+        header = PacketHeaderWriter(
+            DISCOVERY_STREAM_ID, PACKET_CLASS_DISCOVERY, 1, packet_type=PACKET_TYPE_EXT_DATA
+        )
+        try:
+            while True:
+                payload = pack_discovery_payload(self.discovery_fields())
+                try:
+                    transport.sendto(
+                        bytes(header.next_header(len(payload), 0)) + payload,
+                        self.discovery_target,
+                    )
+                except OSError as e:
+                    logger.debug(f"Discovery broadcast failed: {e}")
+                await asyncio.sleep(self.discovery_interval)
+        finally:
+            transport.close()
+
+    # -- synthetic UDP streams --------------------------------------------
+
+    def _start_stream(self, session, stream_id, coro):
+        self._stop_stream(session, stream_id)
+        session.streams[stream_id] = asyncio.create_task(coro)
+
+    @staticmethod
+    def _stop_stream(session, stream_id):
+        task = session.streams.pop(stream_id, None)
+        if task:
+            task.cancel()
+
+    async def _paced(self, rate: float):
+        """Yields once per period on an absolute schedule so rates do not drift"""
+        loop = asyncio.get_running_loop()
+        period = 1.0 / rate
+        deadline = loop.time()
+        while True:
+            yield
+            deadline += period
+            await asyncio.sleep(max(0.0, deadline - loop.time()))
+
+    def _spectrum(self, width: int, frame: int) -> np.ndarray:
+        """Noise floor with a few carriers, as uint16 levels (0 = strongest)"""
+        levels = 700 + self.rng.normal(0, 25, width)
+        for position, strength in ((0.3, 450), (0.52, 300), (0.75, 200)):
+            center = int(width * position + 10 * np.sin(frame / 20 + position * 10))
+            lo, hi = max(center - 3, 0), min(center + 4, width)
+            levels[lo:hi] -= strength
+        return np.clip(levels, 0, 1023).astype(np.uint16)
+
+    async def _pan_stream(self, session):
+        header = PacketHeaderWriter(PAN_STREAM_ID, PACKET_CLASS_PANADAPTER, 1)
+        frame = 0
+        async for _ in self._paced(session.pan_fps or self.pan_fps):
+            bins = self._spectrum(session.pan_width, frame)
+            # Split frames across datagrams like the radio does for wide pans
+            for start in range(0, len(bins), 700):
+                chunk = bins[start : start + 700]
+                payload = pack_pan_payload(chunk, frame, start, len(bins))
+                self._send_datagram(session, bytes(header.next_header(len(payload), 0)) + payload)
+            frame += 1
+
+    async def _waterfall_stream(self, session):
+        header = PacketHeaderWriter(WATERFALL_STREAM_ID, PACKET_CLASS_WATERFALL, 1)
+        bandwidth = 192000 / session.pan_width
+        first_bin = session.pan_center - 96000
+        timecode = 0
+        async for _ in self._paced(self.waterfall_fps):
+            line = self._spectrum(session.pan_width, timecode)
+            payload = pack_waterfall_payload(
+                line[None, :], first_bin, bandwidth, timecode, int(1000 / self.waterfall_fps)
+            )
+            self._send_datagram(session, bytes(header.next_header(len(payload), 0)) + payload)
+            timecode += 1
+
+    async def _audio_stream(self, session, stream_id=RX_AUDIO_STREAM_ID, tone=700):
+        spp = self.audio_samples_per_packet
+        header = PacketHeaderWriter(stream_id, PACKET_CLASS_AUDIO_FLOAT32, self.audio_rate)
+        t = np.arange(spp) / self.audio_rate
+        phase = 0.0
+        async for _ in self._paced(self.audio_rate / spp):
+            mono = 0.2 * np.sin(2 * np.pi * tone * t + phase) + self.rng.normal(0, 0.01, spp)
+            phase += 2 * np.pi * tone * spp / self.audio_rate
+            payload = np.repeat(mono[:, None], 2, axis=1).astype(">f4").tobytes()
+            self._send_datagram(session, bytes(header.next_header(len(payload), spp)) + payload)
+
+
+async def _run(args):
+    simulator = RadioSimulator(
+        host=args.host,
+        port=args.port,
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        loss=args.loss,
+        pan_fps=args.pan_fps,
+        waterfall_fps=args.waterfall_fps,
+        command_time=args.command_ms / 1000,
+        discovery_target=(args.discovery, 4992) if args.discovery else None,
+    )
+    await simulator.start()
+    started = time.monotonic()
+    try:
+        while True:
+            await asyncio.sleep(10)
+            logger.info(
+                f"{time.monotonic() - started:.0f}s: {simulator.commands_handled} commands, "
+                f"{simulator.packets_sent} datagrams sent, {simulator.packets_dropped} dropped"
+            )
+    finally:
+        await simulator.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FlexRadio protocol simulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4992)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--loss", type=float, default=0.0, help="datagram loss probability")
+    parser.add_argument("--command-ms", type=float, default=0.0, help="per-command time")
+    parser.add_argument("--pan-fps", type=float, default=15.0)
+    parser.add_argument("--waterfall-fps", type=float, default=10.0)
+    parser.add_argument(
+        "--discovery",
+        metavar="ADDRESS",
+        help="send discovery packets to ADDRESS:4992, e.g. 255.255.255.255 or 127.0.0.1",
+    )
+    args = parser.parse_args()
+    try:
+        asyncio.run(_run(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import numpy as np
+
+
+class Resampler:
+    """Streaming sample-rate converter for mono float32 blocks
+
+    Downsampling runs a windowed-sinc anti-alias filter first; both
+    directions then use linear interpolation. Filter history and the
+    fractional read position carry across blocks, so a stream can be fed in
+    blocks of any size without discontinuities.
+    """
+
+    def __init__(self, input_rate: int, output_rate: int, taps: int = 31):
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+        self.step = input_rate / output_rate
+        self.passthrough = input_rate == output_rate
+
+        if output_rate < input_rate:
+            cutoff = 0.45 * output_rate / input_rate
+            n = np.arange(taps) - (taps - 1) / 2
+            kernel = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(taps)
+            self._kernel = (kernel / kernel.sum()).astype(np.float32)
+        else:
+            self._kernel = None
+        self.reset()
+
+    def reset(self):
+        taps = len(self._kernel) if self._kernel is not None else 1
+        self._history = np.zeros(taps - 1, dtype=np.float32)
+        self._last = np.float32(0.0)
+        self._position = 0.0
+
+    def output_length(self, input_length: int) -> int:
+        """Upper bound on samples produced for a block of input_length"""
+        return int(np.ceil(input_length / self.step)) + 1
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        if self.passthrough or len(samples) == 0:
+            return samples
+
+        if self._kernel is not None:
+            extended = np.concatenate((self._history, samples))
+            filtered = np.convolve(extended, self._kernel, mode="valid").astype(np.float32)
+            self._history = extended[len(extended) - len(self._history) :]
+        else:
+            filtered = samples
+
+        # Index 0 is the last sample of the previous block (position -1)
+        source = np.concatenate(([self._last], filtered))
+        count = int(np.floor((len(filtered) - 1 - self._position) / self.step)) + 1
+        positions = self._position + np.arange(max(count, 0)) * self.step
+        output = np.interp(positions + 1, np.arange(len(source)), source).astype(np.float32)
+
+        self._position = self._position + max(count, 0) * self.step - len(filtered)
+        self._last = filtered[-1]
+        return output
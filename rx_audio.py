@@ -0,0 +1,248 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from audio_codec import CodecStats
+from resampler import Resampler
+from vita49 import VitaPacket
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class JitterBuffer:
+    """Reorders radio audio packets by their 4-bit VITA-49 sequence number
+
+    Packets are held until ``target_depth`` are buffered, then released one
+    per ``pop``. A gap in the sequence is reported as a lost packet together
+    with the following payload (if it has arrived) so the codec can conceal
+    it. Packets arriving after their slot was played are counted as late and
+    dropped; when more than ``max_depth`` are queued the oldest are skipped.
+    """
+
+    def __init__(self, target_depth: int = 3, max_depth: int = 16):
+        self.target_depth = max(1, target_depth)
+        self.max_depth = max(self.target_depth + 1, max_depth)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._packets: Dict[int, bytes] = {}
+        self._last_seen: Optional[int] = None
+        self._next: Optional[int] = None
+        self._primed = False
+        self.late = 0
+        self.lost = 0
+        self.overflows = 0
+        self.underruns = 0
+
+    def __len__(self):
+        return len(self._packets)
+
+    def set_target_depth(self, target_depth: int):
+        """Change the buffering depth, e.g. deeper on a jittery link; applies on the next refill"""
+        with self.lock:
+            self.target_depth = max(1, target_depth)
+            self.max_depth = max(self.target_depth + 1, self.max_depth)
+
+    def _unwrap(self, sequence: int) -> int:
+        if self._last_seen is None:
+            return sequence
+        delta = ((sequence - self._last_seen + 8) & 0xF) - 8
+        return self._last_seen + delta
+
+    def push(self, sequence: int, payload: bytes):
+        with self.lock:
+            seq = self._unwrap(sequence)
+            if self._next is not None and seq < self._next:
+                self.late += 1
+                return
+            self._last_seen = max(seq, self._last_seen) if self._last_seen is not None else seq
+            if self._next is None:
+                self._next = seq
+            self._packets[seq] = payload
+
+            while len(self._packets) > self.max_depth:
+                self.overflows += 1
+                oldest = min(self._packets)
+                del self._packets[oldest]
+                self._next = oldest + 1
+
+    def pop(self) -> Tuple[Optional[bytes], Optional[bytes], bool]:
+        """Release the next slot
+
+        Returns ``(payload, next_payload, lost)``. ``payload`` is None either
+        because the slot was lost (``lost`` is True) or because the buffer is
+        empty or still filling (``lost`` is False).
+        """
+        with self.lock:
+            if not self._primed:
+                if len(self._packets) < self.target_depth:
+                    return None, None, False
+                self._primed = True
+
+            if not self._packets:
+                self.underruns += 1
+                self._primed = False
+                return None, None, False
+
+            seq = self._next
+            self._next += 1
+            payload = self._packets.pop(seq, None)
+            if payload is not None:
+                return payload, None, False
+
+            self.lost += 1
+            return None, self._packets.get(seq + 1), True
+
+
+class RxAudioStream:
+    """Radio RX audio stream: jitter buffer -> decode/conceal -> resample -> int16
+
+    ``on_packet`` is registered with :class:`UdpIngest` and runs on the event
+    loop; ``read_bytes`` is installed as the AudioManager RX callback and
+    runs on the PortAudio thread. Decoding happens on the audio side so a
+    missing packet can be concealed with the FEC data of its successor.
+    """
+
+    def __init__(
+        self,
+        codec,
+        output_rate: int = 48000,
+        chunk_size: int = 1024,
+        jitter_packets: int = 3,
+        gain: float = 1.0,
+    ):
+        self.codec = codec
+        self.output_rate = output_rate
+        self.chunk_size = chunk_size
+        self.gain = gain
+        self.jitter = JitterBuffer(target_depth=jitter_packets)
+        self.stats = CodecStats()
+        self.underruns = 0
+        self.concealed = 0
+
+        self._resampler = Resampler(codec.sample_rate, output_rate)
+        self._out = np.zeros(chunk_size * 4, dtype=np.float32)
+        self._out_len = 0
+        self._silence = np.zeros(codec.frame_size, dtype=np.float32)
+
+    def on_packet(self, packet: VitaPacket):
+        self.jitter.push(packet.sequence, bytes(packet.payload))
+
+    def _next_block(self) -> Optional[np.ndarray]:
+        payload, next_payload, lost = self.jitter.pop()
+        if payload is None and not lost:
+            return None
+
+        start = time.perf_counter()
+        try:
+            if lost:
+                self.concealed += 1
+                samples = self.codec.conceal(next_payload)
+            else:
+                samples = self.codec.decode(payload)
+        except Exception as e:
+            logger.warning(f"RX audio decode error: {e}")
+            samples = self._silence
+        self.stats.record(len(payload) if payload else 0, time.perf_counter() - start)
+        return samples
+
+    def _append(self, samples: np.ndarray):
+        needed = self._out_len + len(samples)
+        if needed > len(self._out):
+            grown = np.zeros(max(needed, 2 * len(self._out)), dtype=np.float32)
+            grown[: self._out_len] = self._out[: self._out_len]
+            self._out = grown
+        self._out[self._out_len : needed] = samples
+        self._out_len = needed
+
+    def read_float(self, frames: Optional[int] = None) -> np.ndarray:
+        frames = frames or self.chunk_size
+        while self._out_len < frames:
+            block = self._next_block()
+            if block is None:
+                break
+            self._append(self._resampler.process(block))
+
+        result = np.zeros(frames, dtype=np.float32)
+        take = min(frames, self._out_len)
+        if take < frames:
+            self.underruns += 1
+        result[:take] = self._out[:take]
+        self._out[: self._out_len - take] = self._out[take : self._out_len]
+        self._out_len -= take
+        if self.gain != 1.0:
+            result *= self.gain
+        return result
+
+    def read_bytes(self) -> bytes:
+        """AudioManager RX callback: one chunk of 16-bit mono PCM"""
+        samples = self.read_float()
+        np.clip(samples, -1.0, 32767 / 32768.0, out=samples)
+        return (samples * 32768.0).astype("<i2").tobytes()
+
+
+class RxAudioMixer:
+    """Sums several RX audio sources, e.g. one stream per slice, into one PCM chunk
+
+    Installed as the AudioManager RX callback in place of a single
+    :class:`RxAudioStream`, so the mix runs through the RX DSP chain like a
+    single stream would. Sources are read even while muted so their jitter
+    buffers keep draining. Sources may be added and removed from the event
+    loop while the PortAudio thread is reading.
+    """
+
+    def __init__(self, chunk_size: int = 1024):
+        self.chunk_size = chunk_size
+        self.lock = threading.Lock()
+        self._sources: Dict[str, Tuple[RxAudioStream, float]] = {}
+
+    def __len__(self):
+        return len(self._sources)
+
+    def __contains__(self, key: str):
+        return key in self._sources
+
+    def add_source(self, key: str, stream: RxAudioStream, gain: float = 1.0):
+        with self.lock:
+            self._sources[key] = (stream, gain)
+
+    def remove_source(self, key: str) -> Optional[RxAudioStream]:
+        with self.lock:
+            source = self._sources.pop(key, None)
+        return source[0] if source else None
+
+    def set_gain(self, key: str, gain: float):
+        with self.lock:
+            if key in self._sources:
+                self._sources[key] = (self._sources[key][0], gain)
+
+    def get_source(self, key: str) -> Optional[RxAudioStream]:
+        source = self._sources.get(key)
+        return source[0] if source else None
+
+    def sources(self) -> Dict[str, RxAudioStream]:
+        return {key: stream for key, (stream, _) in self._sources.items()}
+
+    def read_float(self, frames: Optional[int] = None) -> np.ndarray:
+        frames = frames or self.chunk_size
+        with self.lock:
+            sources = list(self._sources.values())
+        mix = np.zeros(frames, dtype=np.float32)
+        for stream, gain in sources:
+            samples = stream.read_float(frames)
+            if gain == 1.0:
+                mix += samples
+            elif gain:
+                mix += samples * gain
+        return mix
+
+    def read_bytes(self) -> bytes:
+        """AudioManager RX callback: one chunk of 16-bit mono PCM"""
+        samples = self.read_float()
+        np.clip(samples, -1.0, 32767 / 32768.0, out=samples)
+        return (samples * 32768.0).astype("<i2").tobytes()
@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from audio_codec import PcmCodec, create_codecs
+from dsp_chain import DspChain, build_rx_stages, build_tx_stages, load_denoiser
+from rx_audio import RxAudioMixer, RxAudioStream
+from tx_audio import TxAudioPipeline
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class SessionAudio:
+    """One radio's RX and TX audio without a sound card, as the daemon runs it
+
+    RX: the radio's remote audio stream, and each slice stream opened by
+    :meth:`add_slice_audio`, are mixed by an :class:`RxAudioMixer` and run
+    through the RX DSP chain. A clock thread takes one ``chunk_size`` block
+    per block period, as the PortAudio thread does in the GUI, so decoding
+    and the denoiser never hold up the daemon's event loop. Finished blocks
+    are handed back to the loop, where the block callbacks receive them as
+    16-bit mono PCM at ``sample_rate``.
+
+    TX: :meth:`submit` runs microphone PCM from a frontend through the TX
+    DSP chain into a :class:`TxAudioPipeline` aimed at the radio.
+    """
+
+    # Blocks the clock may fall behind, e.g. after a loop stall, before it
+    # skips ahead; the jitter buffers absorb the gap instead of a burst
+    MAX_LAG_BLOCKS = 4
+
+    def __init__(self, session, config: Dict[str, Any], radio_port: int = 4991):
+        self.session = session
+        self.audio_config = config["audio"]
+        self.sample_rate = self.audio_config["sample_rate"]
+        self.chunk_size = self.audio_config["chunk_size"]
+        self.radio_port = radio_port
+        self.denoiser = load_denoiser(config.get("ai_denoiser"))
+        self.rx_chain = DspChain(build_rx_stages(self.audio_config, self.denoiser))
+        self.tx_chain = DspChain(build_tx_stages(self.audio_config))
+        self.mixer = RxAudioMixer(chunk_size=self.chunk_size)
+        self.rx_audio: Optional[RxAudioStream] = None
+        self.tx_pipeline: Optional[TxAudioPipeline] = None
+        self.block_callbacks: List[Callable[[bytes], None]] = []
+        self.blocks = 0
+        # Mixer source key ("remote", "dax1", ...) -> registered stream ID
+        self._stream_ids: Dict[str, int] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        metrics = session.metrics
+        metrics.gauge("rx_jitter_underruns", "RX jitter buffer underruns").set_function(
+            lambda: self.rx_audio.underruns if self.rx_audio else 0
+        )
+        metrics.gauge("rx_jitter_depth", "Packets waiting in the RX jitter buffer").set_function(
+            lambda: len(self.rx_audio.jitter) if self.rx_audio else 0
+        )
+
+    def add_block_callback(self, callback: Callable[[bytes], None]):
+        self.block_callbacks.append(callback)
+
+    async def start(self) -> bool:
+        """Open the radio's RX and TX audio streams and start the block clock"""
+        api = self.session.api
+        rx_codec, tx_codec, compression = create_codecs(self.audio_config)
+        stream_id = await api.enable_rx_audio(compression=compression)
+        if not stream_id:
+            return False
+        try:
+            self.rx_audio = self._stream(rx_codec)
+        except ValueError as e:
+            logger.error(f"Failed to start RX audio stream: {e}")
+            return False
+        self._add_source("remote", stream_id, self.rx_audio)
+        tx_stream_id = await api.enable_tx_audio(compression=compression)
+        if tx_stream_id:
+            self._start_tx(tx_stream_id, tx_codec)
+        self._loop = asyncio.get_running_loop()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name=f"session-audio-{self.session.name}", daemon=True
+        )
+        self._thread.start()
+        return True
+
+    async def stop(self):
+        if self._thread:
+            self._stop.set()
+            await asyncio.to_thread(self._thread.join)
+            self._thread = None
+        if self.tx_pipeline:
+            self.tx_pipeline.stop()
+            self.tx_pipeline = None
+        for stream_id in self._stream_ids.values():
+            self.session.streams.unregister(stream_id)
+        self._stream_ids.clear()
+        if self.denoiser:
+            self.denoiser.cleanup()
+            self.denoiser = None
+
+    def submit(self, pcm: bytes):
+        """Queue 16-bit mono microphone PCM at ``sample_rate`` for transmission"""
+        if self.tx_pipeline:
+            self.tx_pipeline.submit(self.tx_chain.process_bytes(pcm))
+
+    def flush_tx(self):
+        """Discard queued TX audio, e.g. when PTT is released"""
+        if self.tx_pipeline:
+            self.tx_pipeline.flush()
+
+    async def add_slice_audio(self, slice_id: str):
+        """Give a slice its own RX stream in the mixer; the radio-mixed stream is muted"""
+        api = self.session.api
+        state = api.slices.get(slice_id)
+        if state is None or state.dax_channel and f"dax{state.dax_channel}" in self.mixer:
+            return
+        stream_id = await api.enable_slice_audio(slice_id)
+        if not stream_id:
+            return
+        try:
+            stream = self._stream(PcmCodec(self.audio_config.get("rx_radio_rate", 24000)))
+        except ValueError as e:
+            logger.error(f"Failed to start slice {slice_id} audio: {e}")
+            return
+        self._add_source(f"dax{state.dax_channel}", stream_id, stream)
+        self.mixer.set_gain("remote", 0.0)
+
+    async def remove_slice_audio(self, slice_id: str):
+        state = self.session.api.slices.get(slice_id)
+        if state is None or not state.dax_channel:
+            return
+        key = f"dax{state.dax_channel}"
+        stream_id = self._stream_ids.pop(key, None)
+        if stream_id is not None:
+            self.session.streams.unregister(stream_id)
+        self.mixer.remove_source(key)
+        await self.session.api.disable_slice_audio(slice_id)
+        if not any(key.startswith("dax") for key in self._stream_ids):
+            self.mixer.set_gain("remote", 1.0)
+
+    def rebind(self):
+        """Follow the stream IDs the radio assigned during resync"""
+        api = self.session.api
+        current = {"remote": api.rx_audio_stream_id}
+        for state in api.slices.values():
+            if state.dax_channel:
+                current[f"dax{state.dax_channel}"] = state.audio_stream_id
+        for key, old_id in list(self._stream_ids.items()):
+            stream = self.mixer.get_source(key)
+            new_id = current.get(key)
+            if stream is None or not new_id or int(new_id, 16) == old_id:
+                continue
+            self.session.streams.unregister(old_id)
+            self._stream_ids[key] = int(new_id, 16)
+            self.session.streams.register(int(new_id, 16), stream.on_packet)
+        tx_id = api.tx_audio_stream_id
+        if self.tx_pipeline and tx_id and int(tx_id, 16) != self.tx_pipeline.stream_id:
+            self._start_tx(tx_id, self.tx_pipeline.codec)
+
+    def _stream(self, codec) -> RxAudioStream:
+        return RxAudioStream(
+            codec,
+            output_rate=self.sample_rate,
+            chunk_size=self.chunk_size,
+            jitter_packets=self.audio_config.get("jitter_packets", 3),
+        )
+
+    def _add_source(self, key: str, stream_id: str, stream: RxAudioStream):
+        self._stream_ids[key] = int(stream_id, 16)
+        self.session.streams.register(int(stream_id, 16), stream.on_packet)
+        self.mixer.add_source(key, stream)
+
+    def _start_tx(self, stream_id: str, codec=None):
+        if self.tx_pipeline:
+            self.tx_pipeline.stop()
+            self.tx_pipeline = None
+        try:
+            self.tx_pipeline = TxAudioPipeline(
+                self.session.source,
+                int(stream_id, 16),
+                radio_port=self.radio_port,
+                input_rate=self.sample_rate,
+                radio_rate=self.audio_config.get("tx_radio_rate", 24000),
+                max_latency_ms=self.audio_config.get("tx_max_latency_ms", 40),
+                codec=codec,
+            )
+            self.tx_pipeline.start()
+        except (ValueError, OSError) as e:
+            logger.error(f"Failed to start TX audio pipeline: {e}")
+            self.tx_pipeline = None
+
+    def _run(self):
+        period = self.chunk_size / self.sample_rate
+        deadline = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                block = self.rx_chain.process_bytes(self.mixer.read_bytes())
+                self._loop.call_soon_threadsafe(self._deliver, block)
+            except Exception as e:
+                logger.error(f"RX audio block error: {e}")
+            deadline += period
+            now = time.monotonic()
+            if now - deadline > self.MAX_LAG_BLOCKS * period:
+                deadline = now
+            self._stop.wait(max(0.0, deadline - now))
+
+    def _deliver(self, block: bytes):
+        self.blocks += 1
+        for callback in self.block_callbacks:
+            try:
+                callback(block)
+            except Exception as e:
+                logger.error(f"RX audio block callback error: {e}")
@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from connection_supervisor import ConnectionSupervisor
+from flexradio_api import FlexRadioAPI
+from flexradio_client import FlexRadioClient
+from metrics import REGISTRY, MetricsRegistry
+from udp_ingest import StreamDemux, UdpIngest
+from vita49 import (
+    PACKET_CLASS_PANADAPTER,
+    PACKET_CLASS_WATERFALL,
+    VitaPacket,
+    WaterfallTile,
+    parse_pan_payload,
+    parse_waterfall_payload,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class DisplayFeed:
+    """One radio's panadapter frames and waterfall tiles, at most ``fps`` of each per second
+
+    Panadapter frames arrive split over several datagrams and are
+    reassembled here. A frame is accepted or dropped as a whole when its
+    first segment arrives, so a throttled radio costs a payload header parse
+    per datagram and nothing more. ``fps`` of None means no limit.
+    """
+
+    # Accept frames up to 10% early so arrival jitter does not halve a radio
+    # that already sends at the target rate
+    EARLY = 0.9
+
+    def __init__(self, fps: Optional[float] = None):
+        self.fps = fps
+        self.pan_callbacks: List[Callable[[np.ndarray], None]] = []
+        self.waterfall_callbacks: List[Callable[[WaterfallTile], None]] = []
+        self.frames = 0
+        self.tiles = 0
+        self.dropped = 0
+        self._frame: Optional[int] = None
+        self._accept = False
+        self._bins: Optional[np.ndarray] = None
+        self._filled = 0
+        self._next_frame = 0.0
+        self._next_tile = 0.0
+
+    def add_pan_callback(self, callback: Callable[[np.ndarray], None]):
+        self.pan_callbacks.append(callback)
+
+    def add_waterfall_callback(self, callback: Callable[[WaterfallTile], None]):
+        self.waterfall_callbacks.append(callback)
+
+    def _due(self, deadline: float) -> Optional[float]:
+        """Next deadline if a frame may be shown now, None if it is too soon"""
+        if not self.fps:
+            return 0.0
+        now = time.monotonic()
+        if now < deadline:
+            return None
+        return now + self.EARLY / self.fps
+
+    def on_pan(self, packet: VitaPacket):
+        segment = parse_pan_payload(packet.payload)
+        if segment is None:
+            return
+        if segment.frame_index != self._frame:
+            self._frame = segment.frame_index
+            deadline = self._due(self._next_frame)
+            self._accept = deadline is not None
+            if not self._accept:
+                self.dropped += 1
+                return
+            self._next_frame = deadline
+            self._bins = np.empty(segment.total_bins, dtype=np.uint16)
+            self._filled = 0
+        if not self._accept:
+            return
+
+        end = segment.start_bin + len(segment.bins)
+        if end > len(self._bins):
+            return
+        self._bins[segment.start_bin : end] = segment.bins
+        self._filled += len(segment.bins)
+        if self._filled >= len(self._bins):
+            self._accept = False
+            self.frames += 1
+            for callback in self.pan_callbacks:
+                callback(self._bins)
+
+    def on_waterfall(self, packet: VitaPacket):
+        deadline = self._due(self._next_tile)
+        if deadline is None:
+            self.dropped += 1
+            return
+        tile = parse_waterfall_payload(packet.payload)
+        if tile is None:
+            return
+        self._next_tile = deadline
+        self.tiles += 1
+        for callback in self.waterfall_callbacks:
+            callback(tile)
+
+
+class RadioSession:
+    """One radio: its command client, API state and display feed
+
+    The session's client, API and supervisor record into ``metrics``, a
+    registry of its own by default, so counters such as ``commands_total``
+    are per radio. :class:`SessionManager` exports it labelled by name.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        host: str,
+        port: int = 4992,
+        timeout: float = 5.0,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.name = name
+        self.host = host
+        self.metrics = metrics or MetricsRegistry()
+        self.client = FlexRadioClient(host, port, timeout=timeout, metrics=self.metrics)
+        self.api = FlexRadioAPI(self.client, metrics=self.metrics)
+        self.display = DisplayFeed()
+        self.supervisor: Optional[ConnectionSupervisor] = None
+        # Sender address of the radio's datagrams and its demux in the shared ingest
+        self.source: Optional[str] = None
+        self.streams: Optional[StreamDemux] = None
+        self.active = False
+
+
+class SessionManager:
+    """Several radios on one event loop, sharing one UDP port
+
+    Each radio gets a :class:`RadioSession` and its own demux in the shared
+    :class:`UdpIngest`, keyed by the radio's address, since every radio uses
+    the same stream IDs. The active radio's panadapter runs at
+    ``active_fps`` and is displayed unthrottled. Background radios are asked
+    for ``background_fps``, and their display feeds are throttled to the same
+    rate locally, which also covers the waterfall, whose rate the radio does
+    not let us set.
+    """
+
+    def __init__(
+        self,
+        udp_port: int = 4991,
+        udp_host: str = "0.0.0.0",
+        active_fps: int = 15,
+        background_fps: int = 2,
+        pan_width: int = 1024,
+        reconnect: bool = False,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.active_fps = active_fps
+        self.background_fps = background_fps
+        self.pan_width = pan_width
+        self.reconnect = reconnect
+        self.metrics = metrics or REGISTRY
+        self.ingest = UdpIngest(port=udp_port, host=udp_host, metrics=self.metrics)
+        self.sessions: Dict[str, RadioSession] = {}
+        self.active: Optional[str] = None
+        self.metrics.gauge("radio_sessions", "Radios connected").set_function(
+            lambda: len(self.sessions)
+        )
+
+    async def start(self) -> bool:
+        return await self.ingest.start()
+
+    async def stop(self):
+        for name in list(self.sessions):
+            await self.remove_radio(name)
+        self.ingest.stop()
+
+    async def add_radio(self, name: str, host: str, port: int = 4992) -> Optional[RadioSession]:
+        """Connect a radio and open its panadapter; the first radio becomes active"""
+        if name in self.sessions:
+            return self.sessions[name]
+        session = RadioSession(name, host, port)
+        if not await session.client.connect():
+            return None
+        if not await session.api.connect(self.ingest.port):
+            await session.client.disconnect()
+            return None
+
+        # Datagrams come from the radio's address even when it was given by name
+        peer = session.client.writer.transport.get_extra_info("peername")
+        session.source = peer[0] if peer else host
+        session.streams = self.ingest.add_source(session.source)
+        session.streams.register_class(PACKET_CLASS_PANADAPTER, session.display.on_pan)
+        session.streams.register_class(PACKET_CLASS_WATERFALL, session.display.on_waterfall)
+        self.sessions[name] = session
+        self.metrics.add_child(session.metrics, {"radio": name})
+        if self.active is None:
+            self.active = name
+            session.active = True
+
+        await session.api.enable_panadapter(width=self.pan_width)
+        await self._apply_rate(session)
+        if self.reconnect:
+            session.supervisor = ConnectionSupervisor(
+                session.client, session.api, udp_port=self.ingest.port, metrics=session.metrics
+            )
+            session.supervisor.start()
+        role = "active" if session.active else "background"
+        logger.info(f"Radio {name} added ({session.source}, {role})")
+        return session
+
+    async def remove_radio(self, name: str):
+        session = self.sessions.pop(name, None)
+        if session is None:
+            return
+        if session.supervisor:
+            await session.supervisor.stop()
+        self.metrics.remove_child(session.metrics)
+        self.ingest.remove_source(session.source)
+        await session.api.disconnect()
+        if self.active == name:
+            self.active = None
+            if self.sessions:
+                await self.set_active(next(iter(self.sessions)))
+        logger.info(f"Radio {name} removed")
+
+    async def set_active(self, name: str) -> bool:
+        """Give ``name`` the full display rate and throttle the previously active radio"""
+        session = self.sessions.get(name)
+        if session is None:
+            return False
+        previous = self.sessions.get(self.active)
+        self.active = name
+        changed = [session]
+        if previous is not None and previous is not session:
+            previous.active = False
+            changed.append(previous)
+        session.active = True
+        await asyncio.gather(*(self._apply_rate(s) for s in changed))
+        return True
+
+    async def _apply_rate(self, session: RadioSession):
+        session.display.fps = None if session.active else self.background_fps
+        await session.api.set_pan_fps(self.active_fps if session.active else self.background_fps)
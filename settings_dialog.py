@@ -19,18 +19,27 @@ from PyQt6.QtWidgets import (
 )
 
 from ai_denoiser.detector import detect_gpu
-from ai_denoiser.model_manager import get_status_message, needs_download, download_model
+from ai_denoiser.downloader import ModelDownloader
+from ai_denoiser.model_manager import get_status_message, needs_download
 
 logger = logging.getLogger(__name__)
 
 
 class SettingsDialog(QDialog):
     settings_changed = pyqtSignal(dict)
+    # Emitted from the download worker thread; Qt queues them onto the GUI thread
+    download_progress = pyqtSignal(int)
+    download_finished = pyqtSignal(bool)
 
-    def __init__(self, config_manager, audio_manager, parent=None):
+    def __init__(self, config_manager, audio_manager, parent=None, radios=None):
         super().__init__(parent)
         self.config_manager = config_manager
         self.audio_manager = audio_manager
+        # Radios found by discovery, most recently seen first
+        self.radios = radios or []
+        self.downloader = None
+        self.download_progress.connect(self._on_download_progress)
+        self.download_finished.connect(self._on_download_finished)
         self.setWindowTitle("Settings")
         self.resize(550, 450)
         self.setup_ui()
@@ -48,6 +57,18 @@ class SettingsDialog(QDialog):
         ip_layout.addWidget(self.ip_input)
         radio_layout.addLayout(ip_layout)
 
+        if self.radios:
+            found_layout = QHBoxLayout()
+            found_layout.addWidget(QLabel("Discovered Radios:"))
+            self.radio_combo = QComboBox()
+            self.radio_combo.addItem("Select...", None)
+            for radio in self.radios:
+                name = " ".join(part for part in (radio.model, radio.nickname) if part)
+                self.radio_combo.addItem(f"{name} ({radio.ip})", radio.ip)
+            self.radio_combo.currentIndexChanged.connect(self._on_radio_selected)
+            found_layout.addWidget(self.radio_combo)
+            radio_layout.addLayout(found_layout)
+
         width_layout = QHBoxLayout()
         width_layout.addWidget(QLabel("Panadapter Width:"))
         self.width_input = QSpinBox()
@@ -173,6 +194,11 @@ class SettingsDialog(QDialog):
 
         self.setLayout(layout)
 
+    def _on_radio_selected(self, index):
+        ip = self.radio_combo.itemData(index)
+        if ip:
+            self.ip_input.setText(ip)
+
     def _on_ai_checkbox_changed(self, state):
         """Handle AI denoiser checkbox state change"""
         enabled = state == 2  # Qt.CheckState.Checked = 2
@@ -226,31 +252,62 @@ class SettingsDialog(QDialog):
             self.config_manager.set("ai_denoiser.auto_download", True)
             self.config_manager.save_config()
 
-            # Perform download
-            from ai_denoiser.model_manager import download_model
-
             cache_dir = self.config_manager.get(
                 "ai_denoiser.model_cache_dir",
                 os.path.expanduser("~/.cache/flexradio/ai_models"),
             )
 
+            # Download on a worker thread so the dialog stays responsive
+            self.downloader = ModelDownloader(
+                cache_dir,
+                progress_callback=self._emit_download_progress,
+                finished_callback=self.download_finished.emit,
+            )
+            self.ai_download_btn.setEnabled(False)
+            self.ai_download_btn.setText("Downloading... 0%")
+
             if gpu_info.get("meets_requirement"):
-                success = download_model("speechbrain", cache_dir)
-            else:
-                success = download_model("deepfilter", cache_dir)
-
-            if success:
-                QMessageBox.information(
-                    self, "Download Complete", "Model downloaded successfully."
-                )
-                self.ai_status_label.setText("Models downloaded and ready.")
-                self._on_ai_checkbox_changed(self.ai_checkbox.checkState())
+                self.downloader.start("speechbrain")
             else:
-                QMessageBox.warning(
-                    self,
-                    "Download Failed",
-                    "Failed to download model. Please check your internet connection.",
-                )
+                self.downloader.start("deepfilter")
+
+    def _emit_download_progress(self, done: int, total: int, filename: str):
+        """Forward worker progress to the GUI thread as a percentage"""
+        percent = int(done * 100 / total) if total else 0
+        self.download_progress.emit(percent)
+
+    def _on_download_progress(self, percent: int):
+        self.ai_download_btn.setText(f"Downloading... {percent}%")
+
+    def _on_download_finished(self, success: bool):
+        if self.downloader and self.downloader.cancelled:
+            # Cancelled by closing the dialog; nothing to report
+            return
+        if success:
+            QMessageBox.information(
+                self, "Download Complete", "Model downloaded successfully."
+            )
+            self.ai_status_label.setText("Models downloaded and ready.")
+        else:
+            error = self.downloader.error if self.downloader else None
+            QMessageBox.warning(
+                self,
+                "Download Failed",
+                "Failed to download model. Please check your internet connection."
+                + (f"\n\n{error}" if error else ""),
+            )
+        self._on_ai_checkbox_changed(self.ai_checkbox.checkState())
+
+    def _cancel_download(self):
+        """Stop a running download; the partial file is resumed next time"""
+        if self.downloader and self.downloader.is_running():
+            self.download_progress.disconnect(self._on_download_progress)
+            self.download_finished.disconnect(self._on_download_finished)
+            self.downloader.cancel()
+
+    def reject(self):
+        self._cancel_download()
+        super().reject()
 
     def accept(self):
         """Accept settings with validation"""
@@ -290,6 +347,7 @@ class SettingsDialog(QDialog):
             self.audio_manager.set_input_device(settings["audio.input_device"])
 
         self.settings_changed.emit(settings)
+        self._cancel_download()
         super().accept()
 
     def _validate_ip_address(self, ip: str) -> bool:
@@ -0,0 +1,188 @@
+import asyncio
+import collections
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional
+
+from metrics import REGISTRY, Histogram, MetricsRegistry
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StallRecord:
+    started: float
+    thread_name: str
+    probes: List[str]
+    stack: List[str]
+    duration: float = 0.0
+    finished: bool = False
+    last_beat: float = 0.0  # monotonic time of the last heartbeat before the stall
+
+    def format(self) -> str:
+        when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started))
+        state = "" if self.finished else " (ongoing)"
+        lines = [
+            f"=== {when} stall of {self.duration * 1000:.0f} ms{state} in "
+            f"{self.thread_name} [{', '.join(self.probes)}] ==="
+        ]
+        lines.extend(line.rstrip("\n") for line in self.stack)
+        return "\n".join(lines)
+
+
+@dataclass
+class Probe:
+    """Heartbeat from one event loop, bumped by the thread it watches"""
+
+    name: str
+    thread_id: int
+    last_beat: float = field(default_factory=time.monotonic)
+
+    def beat(self):
+        self.last_beat = time.monotonic()
+
+
+class StallWatchdog:
+    """Detects stalls of the GUI thread's Qt and asyncio loops
+
+    Each loop bumps a :class:`Probe` from its own thread. A separate daemon
+    thread polls the probes; when one has been silent for ``threshold``
+    seconds it grabs the blocked thread's stack via ``sys._current_frames``
+    while the stall is still in progress, so the log shows the code that
+    is actually blocking rather than where the loop resumed. The last
+    ``ring_size`` stalls are kept in memory and rewritten to ``log_path``.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.25,
+        poll_interval: float = 0.05,
+        log_path: Optional[str] = None,
+        ring_size: int = 20,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.threshold = threshold
+        self.poll_interval = poll_interval
+        self.log_path = os.path.expanduser(log_path) if log_path else None
+        self.stalls: Deque[StallRecord] = collections.deque(maxlen=ring_size)
+        self.probes: List[Probe] = []
+        self._active: Dict[int, StallRecord] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        metrics = metrics or REGISTRY
+        self._stall_count = metrics.counter("stalls_total", "Event loop stalls over threshold")
+        self._stall_time = metrics.histogram("stall_seconds", "Duration of detected stalls")
+
+    def add_probe(self, name: str, thread_id: Optional[int] = None) -> Probe:
+        """Probe for a loop running on ``thread_id`` (default: calling thread)"""
+        probe = Probe(name, thread_id if thread_id is not None else threading.get_ident())
+        self.probes.append(probe)
+        return probe
+
+    def start(self):
+        if self._thread is not None:
+            return
+        for probe in self.probes:
+            probe.beat()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stall-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            self.check()
+
+    def check(self, now: Optional[float] = None):
+        """Poll all probes once; called from the watchdog thread"""
+        now = time.monotonic() if now is None else now
+        stalled: Dict[int, List[Probe]] = {}
+        for probe in self.probes:
+            if now - probe.last_beat >= self.threshold:
+                stalled.setdefault(probe.thread_id, []).append(probe)
+
+        for thread_id, probes in stalled.items():
+            silent = max(now - p.last_beat for p in probes)
+            record = self._active.get(thread_id)
+            if record is None:
+                self._begin(thread_id, probes, silent)
+            else:
+                record.duration = silent
+                for probe in probes:
+                    if probe.name not in record.probes:
+                        record.probes.append(probe.name)
+
+        for thread_id in [t for t in self._active if t not in stalled]:
+            self._finish(thread_id)
+
+    def _begin(self, thread_id: int, probes: List[Probe], silent: float):
+        frame = sys._current_frames().get(thread_id)
+        stack = traceback.format_stack(frame) if frame is not None else ["  <no frame>\n"]
+        thread = next((t for t in threading.enumerate() if t.ident == thread_id), None)
+        record = StallRecord(
+            started=time.time() - silent,
+            thread_name=thread.name if thread else str(thread_id),
+            probes=[p.name for p in probes],
+            stack=stack,
+            duration=silent,
+            last_beat=min(p.last_beat for p in probes),
+        )
+        self._active[thread_id] = record
+        self.stalls.append(record)
+        self._stall_count.inc()
+        logger.warning(
+            f"{record.thread_name} stalled for {silent * 1000:.0f} ms "
+            f"({', '.join(record.probes)})"
+        )
+        self._write_log()
+
+    def _finish(self, thread_id: int):
+        record = self._active.pop(thread_id)
+        resumed = max(p.last_beat for p in self.probes if p.thread_id == thread_id)
+        record.duration = max(record.duration, resumed - record.last_beat)
+        record.finished = True
+        self._stall_time.record(record.duration)
+        logger.warning(f"{record.thread_name} resumed after {record.duration * 1000:.0f} ms")
+        self._write_log()
+
+    def dump(self) -> str:
+        return "\n\n".join(record.format() for record in self.stalls)
+
+    def _write_log(self):
+        if not self.log_path:
+            return
+        try:
+            directory = os.path.dirname(self.log_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp = self.log_path + ".tmp"
+            with open(tmp, "w") as f:
+                f.write(self.dump() + "\n")
+            os.replace(tmp, self.log_path)
+        except OSError as e:
+            logger.error(f"Failed to write stall log: {e}")
+
+
+async def run_asyncio_probe(
+    probe: Probe, interval: float = 0.05, histogram: Optional[Histogram] = None
+):
+    """Beat ``probe`` from the event loop and record how late each wakeup was"""
+    while True:
+        start = time.monotonic()
+        await asyncio.sleep(interval)
+        probe.beat()
+        if histogram is not None:
+            histogram.record(probe.last_beat - start - interval)
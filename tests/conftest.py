@@ -33,7 +33,6 @@ def mock_client():
     client.connect = AsyncMock(return_value=True)
     client.disconnect = AsyncMock()
     client.send_command = AsyncMock(return_value="R0|0|")
-    client.reader = Mock()
     client.writer = Mock()
     client.host = "192.168.1.100"
     client.port = 4992
@@ -206,6 +206,38 @@ class TestFlexRadioGUI:
         assert gui_app.freq_input.text() == "7.150"
         assert gui_app.current_mode == "usb"
 
+    def test_channel_store_seeded_from_config(self, gui_app):
+        """测试首次启动时把配置中的存储信道写入信道库"""
+        assert (gui_app.config_manager.config_dir / "channels.db").exists()
+        names = {channel.name for channel in gui_app.channel_store.page(100)}
+        assert names == {channel.name for channel in gui_app.memory_manager.all_channels()}
+
+    def test_recall_from_memory_browser(self, gui_app):
+        """测试从信道浏览器召回信道"""
+        from memory_browser import MemoryBrowser
+
+        gui_app.connected = True
+        browser = MemoryBrowser(gui_app.channel_store, 14200000, gui_app)
+        browser.channel_selected.connect(gui_app._recall_channel)
+
+        browser._recall()
+
+        assert gui_app.freq_input.text() == "14.250"
+        assert gui_app.current_mode == "lsb"
+
+    def test_import_channels_in_background(self, gui_app, qtbot, tmp_path):
+        """测试在后台线程导入信道列表，完成后在状态栏显示汇总"""
+        path = tmp_path / "list.csv"
+        path.write_text("name,frequency,mode\nNet,7100000,lsb\nBad,1000,lsb\n")
+        before = len(gui_app.channel_store)
+
+        with qtbot.waitSignal(gui_app.import_finished, timeout=5000) as blocker:
+            gui_app.start_channel_import(str(path))
+
+        assert blocker.args[0].imported == 1
+        assert len(gui_app.channel_store) == before + 1
+        assert gui_app.status_bar.currentMessage().startswith("Imported 1 channels, skipped 1")
+
     def test_on_state_changed_frequency(self, gui_app):
         """测试状态改变（频率）"""
         from flexradio_api import SliceState
@@ -231,6 +263,71 @@ class TestFlexRadioGUI:
         assert gui_app.lsb_btn.isChecked() is True
         assert gui_app.usb_btn.isChecked() is False
 
+    def test_on_state_changed_other_slice(self, gui_app):
+        """测试非当前 slice 的状态只更新全景图标记"""
+        from flexradio_api import SliceState
+
+        gui_app.connected = True
+        gui_app.api.slice_id = "0"
+        gui_app.api.slices["1"] = SliceState(slice_id="1")
+        gui_app._update_slice_controls()
+
+        gui_app._on_state_changed(SliceState(frequency=14250000, slice_id="1"))
+
+        assert gui_app.current_frequency == 7150000
+        assert gui_app.panadapter.slice_markers["1"].value() == 14250000
+        assert [btn.text() for btn in gui_app.slice_buttons.values()] == ["A", "B"]
+        assert gui_app.dual_watch_btn.isChecked() is True
+
+    def test_select_slice(self, gui_app):
+        """测试切换当前 slice 后控件显示该 slice 的状态"""
+        from flexradio_api import SliceState
+
+        gui_app.connected = True
+        gui_app.api.slice_id = "0"
+        gui_app.api.slices["1"] = SliceState(frequency=14250000, mode="lsb", slice_id="1")
+        gui_app._update_slice_controls()
+
+        gui_app.slice_buttons["1"].click()
+
+        assert gui_app.api.slice_id == "1"
+        assert gui_app.freq_input.text() == "14.250"
+        assert gui_app.lsb_btn.isChecked() is True
+        assert gui_app.slice_buttons["0"].isChecked() is False
+
+    def test_connect_through_daemon(self, gui_app, mock_client):
+        """测试经守护进程连接：播放守护进程推送的音频，话筒音频转发给守护进程"""
+        from flexradio_api import SliceState
+
+        api = Mock()
+        api.connect = AsyncMock(return_value=True)
+        api.audio = True
+        api.radio = "shack"
+        api.slice_id = "0"
+        api.slices = {"0": SliceState(frequency=14250000, slice_id="0")}
+        api.slice_state = api.slices["0"]
+        client = Mock()
+        client.connect = AsyncMock(return_value=True)
+        gui_app.use_daemon = True
+
+        with patch("flexradio_gui.DaemonClient", return_value=client):
+            with patch("flexradio_gui.DaemonAPI", return_value=api):
+                gui_app.on_connect()
+                gui_app.async_loop.run_until_complete(asyncio.sleep(0.05))
+
+        assert gui_app.connected is True
+        mock_client.connect.assert_not_called()
+        assert gui_app.freq_input.text() == "14.250"
+        client.add_event_callback.assert_called_with(gui_app.playout.on_event)
+        gui_app.audio_manager.set_rx_callback.assert_called_with(gui_app.playout.read_bytes)
+        gui_app._forward_tx_audio(b"\x01\x00")
+        client.send_tx_audio.assert_called_once_with(b"\x01\x00", "shack")
+
+        gui_app._on_daemon_closed()
+
+        assert gui_app.connected is False and gui_app.playout is None
+        assert gui_app.status_bar.currentMessage() == "Daemon connection lost"
+
     def test_window_geometry_save_load(self, gui_app, qtbot):
         """测试窗口几何状态保存和加载"""
         original_size = gui_app.size()
@@ -259,6 +356,31 @@ class TestFlexRadioGUI:
 
         assert gui_app.ip_label.text() == "Radio IP: 192.168.1.200"
 
+    def test_on_settings_changed_denoiser(self, gui_app):
+        """测试设置中开关 AI 降噪后写入配置并热更新音频处理链"""
+        gui_app.audio_manager = Mock()
+
+        gui_app._on_settings_changed({"ai_denoiser.enabled": True})
+
+        assert gui_app.config_manager.get("ai_denoiser.enabled") is True
+        gui_app.audio_manager.reconfigure.assert_called_once_with(gui_app.config_manager.config)
+
+    def test_last_radio_address_from_discovery(self, gui_app):
+        """测试上次使用的电台以发现缓存中的最新地址为准"""
+        from discovery import DiscoveredRadio
+
+        radio = DiscoveredRadio("1234", model="FLEX-6400", ip="192.168.1.50")
+        gui_app.radio_cache.update(radio)
+        gui_app._on_settings_changed({"radio.ip_address": "192.168.1.50"})
+        assert gui_app.radio_cache.last_serial == "1234"
+
+        moved = DiscoveredRadio("1234", model="FLEX-6400", ip="192.168.1.77")
+        gui_app.radio_cache.update(moved)
+        gui_app._on_radio_discovered(moved)
+
+        assert gui_app._radio_ip() == "192.168.1.77"
+        assert gui_app.ip_label.text() == "Radio IP: 192.168.1.77"
+
     def test_invalid_frequency_input(self, gui_app, qtbot):
         """测试无效频率输入"""
         original_freq = gui_app.current_frequency
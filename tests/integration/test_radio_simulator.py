@@ -0,0 +1,540 @@
+import asyncio
+import base64
+import os
+import threading
+
+import numpy as np
+import pytest
+import pytest_asyncio
+
+from flexradio_api import FlexRadioAPI
+from cat_server import RigctldServer
+from connection_supervisor import LINK_LOST, LINK_RESTORED, ConnectionSupervisor
+from discovery import DiscoveryListener, RadioCache
+from flexradio_client import FlexRadioClient
+from link_monitor import LinkMonitor
+from metrics import MetricsRegistry
+from radio_daemon import AudioPlayout, DaemonAPI, DaemonClient, DaemonError, RadioDaemon
+from radio_simulator import (
+    PAN_STREAM_ID,
+    RX_AUDIO_STREAM_ID,
+    TX_AUDIO_STREAM_ID,
+    WATERFALL_STREAM_ID,
+    RadioSimulator,
+)
+from session_manager import SessionManager
+from udp_ingest import UdpIngest
+from vita49 import parse_pan_payload, parse_waterfall_payload
+from ws_fanout import FRAME_PAN, FRAME_WATERFALL, FanoutViewer, WebSocketFanout
+
+
+@pytest_asyncio.fixture
+async def simulator():
+    sim = RadioSimulator(port=0, heartbeat_interval=0.05, seed=1)
+    await sim.start()
+    yield sim
+    await sim.stop()
+
+
+@pytest_asyncio.fixture
+async def ingest():
+    udp = UdpIngest(port=0, host="127.0.0.1")
+    await udp.start()
+    yield udp
+    udp.stop()
+
+
+async def connect(sim, udp_port=4991):
+    client = FlexRadioClient("127.0.0.1", sim.port, timeout=2.0)
+    assert await client.connect()
+    api = FlexRadioAPI(client)
+    assert await api.connect(udp_port)
+    return client, api
+
+
+def radio_slice(daemon, index, radio="shack"):
+    return list(daemon.manager.sessions[radio].api.slices)[index]
+
+
+async def wait_for(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise TimeoutError
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.integration
+class TestRadioSimulator:
+    """测试本地电台协议模拟器与真实客户端/API 的交互"""
+
+    @pytest.mark.asyncio
+    async def test_command_flow_and_status_push(self, simulator):
+        """测试命令响应与状态推送"""
+        client, api = await connect(simulator)
+        try:
+            slice_id = await api.create_slice("lsb")
+            assert slice_id == "0"
+
+            await api.set_frequency(14250000)
+            await wait_for(lambda: simulator.slices[0].frequency == 14250000)
+
+            simulator.slices[0].mode = "cw"
+            simulator.push_slice_status(0)
+            await wait_for(lambda: api.slice_state.mode == "cw")
+            assert api.slice_state.frequency == 14250000
+        finally:
+            await api.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_two_slices_with_own_audio(self, simulator, ingest):
+        """测试两个 slice 独立状态推送与各自的 DAX 音频流"""
+        client, api = await connect(simulator, ingest.port)
+        received = {}
+        try:
+            first = await api.create_slice("usb")
+            second = await api.create_slice("cw")
+            await api.set_frequency(14025000, slice_id=second)
+            await wait_for(lambda: api.slices[second].frequency == 14025000)
+            assert api.slice_id == first
+            assert api.slices[first].frequency == 7150000
+
+            for slice_id in (first, second):
+                stream_id = int(await api.enable_slice_audio(slice_id), 16)
+                ingest.register(stream_id, lambda p, s=stream_id: received.setdefault(s, p))
+            await wait_for(lambda: len(received) == 2)
+            assert simulator.slices[int(second)].dax == 2
+        finally:
+            await api.disconnect()
+        assert simulator.slices == {}
+
+    @pytest.mark.asyncio
+    async def test_errors_are_reported(self, simulator):
+        """测试错误响应"""
+        client, api = await connect(simulator)
+        try:
+            with pytest.raises(Exception, match="50000016"):
+                await client.send_command("slice set 9 frequency=7000000")
+            with pytest.raises(Exception, match="50000015"):
+                await client.send_command("bogus")
+        finally:
+            await client.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_heartbeats(self, simulator):
+        """测试心跳推送"""
+        heartbeats = []
+        client, api = await connect(simulator)
+        client._handle_heartbeat = heartbeats.append
+        try:
+            await wait_for(lambda: len(heartbeats) >= 2)
+        finally:
+            await client.disconnect()
+        assert heartbeats[0].startswith("H")
+
+    @pytest.mark.asyncio
+    async def test_reconnect_and_resync(self, simulator, ingest):
+        """测试断线后自动重连并恢复 slice、全景图与音频流"""
+        client, api = await connect(simulator, ingest.port)
+        states = []
+        supervisor = ConnectionSupervisor(client, api, udp_port=ingest.port, initial_backoff=0.01)
+        supervisor.add_link_callback(states.append)
+        try:
+            await api.create_slice()
+            await api.set_frequency(14250000)
+            await api.enable_panadapter(width=512)
+            await api.enable_rx_audio()
+            supervisor.start()
+
+            pending = asyncio.create_task(client.send_command("slice list"))
+            await asyncio.sleep(0)
+            simulator.drop_clients()
+            with pytest.raises(ConnectionError):
+                await asyncio.wait_for(pending, 0.5)
+
+            await wait_for(lambda: states == [LINK_LOST, LINK_RESTORED])
+            slice_id = int(api.slice_id)
+            assert simulator.slices[slice_id].frequency == 14250000
+            session = simulator.sessions[0]
+            assert session.udp_port == ingest.port
+            assert slice_id in session.subscriptions
+            assert set(session.streams) == {PAN_STREAM_ID, WATERFALL_STREAM_ID, RX_AUDIO_STREAM_ID}
+        finally:
+            await supervisor.stop()
+            await api.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_keepalive_detects_silent_link(self):
+        """测试电台静默且 ping 无响应时判定断线"""
+        sim = RadioSimulator(port=0, heartbeat_interval=0)
+        await sim.start()
+        client, api = await connect(sim)
+        supervisor = ConnectionSupervisor(client, api, keepalive_interval=0.1)
+        states = []
+        supervisor.add_link_callback(states.append)
+        client.timeout = 0.5
+        try:
+            supervisor.start()
+            sim.latency = 10.0
+            await wait_for(lambda: states == [LINK_LOST])
+        finally:
+            await supervisor.stop()
+            await client.disconnect()
+            await sim.stop()
+
+    @pytest.mark.asyncio
+    async def test_link_monitor_and_pan_fps(self, simulator, ingest):
+        """测试心跳与监管器的保活 ping 驱动链路监测，以及全景图帧率调整"""
+        frames = []
+        ingest.register(PAN_STREAM_ID, frames.append)
+        client, api = await connect(simulator, ingest.port)
+        metrics = MetricsRegistry()
+        monitor = LinkMonitor(ping_interval=0.02, heartbeat_interval=0.05, metrics=metrics)
+        client.set_heartbeat_callback(monitor.on_heartbeat)
+        supervisor = ConnectionSupervisor(client, api, link_monitor=monitor, metrics=metrics)
+        supervisor.start()
+        try:
+            await wait_for(lambda: monitor.heartbeats >= 3 and monitor.srtt is not None)
+            assert monitor.health() > 0.8
+
+            simulator.pan_fps = 50
+            await api.create_slice()
+            await api.enable_panadapter(width=512)
+            await api.set_pan_fps(5)
+            assert simulator.sessions[0].pan_fps == 5
+            await asyncio.sleep(0.05)
+            frames.clear()
+            await asyncio.sleep(0.5)
+            assert 1 <= len(frames) <= 4
+        finally:
+            await supervisor.stop()
+            await api.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_udp_streams(self, simulator, ingest):
+        """测试全景、瀑布与音频 UDP 数据流"""
+        simulator.pan_fps = 50
+        simulator.waterfall_fps = 50
+        frames, lines, audio = [], [], []
+        ingest.register(PAN_STREAM_ID, lambda p: frames.append(parse_pan_payload(p.payload)))
+        ingest.register(
+            WATERFALL_STREAM_ID, lambda p: lines.append(parse_waterfall_payload(p.payload))
+        )
+        ingest.register(RX_AUDIO_STREAM_ID, audio.append)
+
+        client, api = await connect(simulator, ingest.port)
+        try:
+            await api.create_slice()
+            await api.enable_panadapter(width=1024)
+            assert await api.enable_rx_audio() == "0x50000000"
+            await wait_for(lambda: len(frames) >= 4 and len(lines) >= 2 and len(audio) >= 50)
+        finally:
+            await api.disconnect()
+
+        assert {f.start_bin for f in frames} == {0, 700}
+        assert all(f.total_bins == 1024 for f in frames)
+        assert lines[0].width == 1024
+        assert lines[0].first_bin_hz == pytest.approx(7150000 - 96000, abs=1)
+        assert len(audio[0].payload) == 128 * 2 * 4
+        assert ingest.stats[RX_AUDIO_STREAM_ID].lost == 0
+
+    @pytest.mark.asyncio
+    async def test_latency_and_loss_injection(self, ingest):
+        """测试延迟与丢包注入"""
+        sim = RadioSimulator(port=0, latency=0.05, loss=0.5, seed=3, heartbeat_interval=0)
+        await sim.start()
+        try:
+            client, api = await connect(sim, ingest.port)
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            await client.send_command("ping")
+            assert loop.time() - start >= 0.05
+
+            await api.enable_rx_audio()
+            await wait_for(lambda: sim.packets_dropped >= 50)
+            await asyncio.sleep(0.1)
+            await client.disconnect()
+        finally:
+            await sim.stop()
+
+        stats = ingest.stats[RX_AUDIO_STREAM_ID]
+        assert sim.packets_dropped == pytest.approx(sim.packets_sent, rel=0.4)
+        assert stats.lost > 0
+
+    @pytest.mark.asyncio
+    async def test_jitter_keeps_tcp_order(self):
+        """测试抖动下 TCP 响应仍按发送顺序到达"""
+        sim = RadioSimulator(port=0, latency=0.01, jitter=0.05, seed=2, heartbeat_interval=0)
+        await sim.start()
+        reader, writer = await asyncio.open_connection("127.0.0.1", sim.port)
+        try:
+            writer.write(b"".join(f"C{seq}|ping\n".encode() for seq in range(20)))
+            sequences = []
+            while len(sequences) < 20:
+                line = (await asyncio.wait_for(reader.readline(), 2.0)).decode()
+                if line.startswith("R"):
+                    sequences.append(int(line[1:].split("|")[0]))
+        finally:
+            writer.close()
+            await sim.stop()
+        assert sequences == list(range(20))
+
+    @pytest.mark.asyncio
+    async def test_session_manager_two_radios(self):
+        """测试两台电台共用 UDP 端口，仅当前电台全速显示，指标按电台分开"""
+        # Separate loopback addresses, like radios on the LAN
+        radios = [
+            RadioSimulator(host=f"127.0.0.{i}", port=0, heartbeat_interval=0) for i in (2, 3)
+        ]
+        for radio in radios:
+            await radio.start()
+        manager = SessionManager(udp_port=0, udp_host="127.0.0.1", active_fps=20, background_fps=2)
+        assert await manager.start()
+        try:
+            first = await manager.add_radio("a", "127.0.0.2", radios[0].port)
+            second = await manager.add_radio("b", "127.0.0.3", radios[1].port)
+            assert manager.active == "a"
+            assert radios[0].sessions[0].pan_fps == 20
+            assert radios[1].sessions[0].pan_fps == 2
+
+            await asyncio.sleep(1.0)
+            assert first.display.frames > 3 * second.display.frames > 0
+            assert set(manager.ingest.sources) == {"127.0.0.2", "127.0.0.3"}
+            assert first.metrics.get("commands_total") is not second.metrics.get("commands_total")
+            assert [labels for _, labels in manager.metrics.children()][-2:] == [
+                {"radio": "a"},
+                {"radio": "b"},
+            ]
+
+            assert await manager.set_active("b")
+            assert (first.active, second.active) == (False, True)
+            assert radios[0].sessions[0].pan_fps == 2
+            assert radios[1].sessions[0].pan_fps == 20
+            assert second.display.fps is None
+
+            await manager.remove_radio("b")
+            assert manager.active == "a"
+            await wait_for(lambda: radios[1].sessions == [])
+        finally:
+            await manager.stop()
+            for radio in radios:
+                await radio.stop()
+
+    @pytest.mark.asyncio
+    async def test_discovery_then_connect(self, tmp_path):
+        """测试监听模拟电台的发现广播，缓存后按缓存地址连接"""
+        cache = RadioCache(tmp_path / "radios.json")
+        listener = DiscoveryListener(cache, port=0, host="127.0.0.1", metrics=MetricsRegistry())
+        assert await listener.start()
+        found = asyncio.Queue()
+        listener.add_radio_callback(found.put_nowait)
+        radio = RadioSimulator(
+            host="127.0.0.2",
+            port=0,
+            heartbeat_interval=0,
+            discovery_target=("127.0.0.1", listener.port),
+            discovery_interval=0.05,
+        )
+        await radio.start()
+        try:
+            discovered = await asyncio.wait_for(found.get(), 2.0)
+            assert (discovered.ip, discovered.port) == ("127.0.0.2", radio.port)
+            assert discovered.serial == radio.serial
+            cache.set_last_radio(discovered.serial)
+
+            # Repeated broadcasts only refresh last_seen
+            await asyncio.sleep(0.2)
+            assert found.empty()
+            listener.stop()
+
+            restored = RadioCache(tmp_path / "radios.json")
+            restored.load()
+            last = restored.last_radio()
+            client = FlexRadioClient(last.ip, last.port, timeout=2.0)
+            assert await client.connect()
+            await client.disconnect()
+        finally:
+            listener.stop()
+            await radio.stop()
+
+    @pytest.mark.asyncio
+    async def test_daemon_control_and_streams(self, simulator, tmp_path):
+        """测试守护进程经 Unix 套接字控制电台并推送抽取后的频谱帧"""
+        manager = SessionManager(udp_port=0, udp_host="127.0.0.1", metrics=MetricsRegistry())
+        path = str(tmp_path / "daemon.sock")
+        daemon = RadioDaemon(manager, socket_path=path)
+        assert await daemon.start()
+        frontend = DaemonClient()
+        events = []
+        frontend.add_event_callback(events.append)
+        try:
+            assert await frontend.connect(path)
+            radio = await frontend.request(
+                "add_radio", name="shack", host="127.0.0.1", port=simulator.port
+            )
+            assert radio["active"] and len(radio["slices"]) == 1
+
+            await frontend.request("subscribe", width=128, fps=5)
+            await asyncio.sleep(1.0)
+            pans = [e for e in events if e["event"] == "pan"]
+            assert 3 <= len(pans) <= 6
+            assert all(len(e["bins"]) == 128 for e in pans)
+            assert any(e["event"] == "waterfall" for e in events)
+
+            await frontend.request("set_frequency", hz=14250000)
+            await wait_for(
+                lambda: any(e.get("frequency") == 14250000 for e in events if e["event"] == "state")
+            )
+            radios = await frontend.request("radios")
+            assert radios[0]["slices"][0]["frequency"] == 14250000
+
+            with pytest.raises(DaemonError):
+                await frontend.request("set_active", radio="missing")
+        finally:
+            await frontend.close()
+            await daemon.stop()
+        assert not os.path.exists(path)
+
+    @pytest.mark.asyncio
+    async def test_daemon_runs_audio(self, simulator, ingest):
+        """测试守护进程接收并处理电台音频后推送给前端，前端的话筒音频经守护进程发往电台"""
+        manager = SessionManager(udp_port=0, udp_host="127.0.0.1", metrics=MetricsRegistry())
+        config = {"audio": {"sample_rate": 48000, "chunk_size": 1024, "rx_gain": 0.5}}
+        daemon = RadioDaemon(manager, host="127.0.0.1", port=0, audio=config, tx_port=ingest.port)
+        assert await daemon.start()
+        tx_packets = []
+        ingest.register(TX_AUDIO_STREAM_ID, tx_packets.append)
+        frontend = DaemonClient()
+        blocks = []
+        frontend.add_event_callback(lambda e: e["event"] == "audio" and blocks.append(e))
+        try:
+            assert await frontend.connect(host="127.0.0.1", port=daemon.port)
+            await frontend.request("add_radio", name="shack", host="127.0.0.1", port=simulator.port)
+            await frontend.request("subscribe", streams=["audio"])
+            await asyncio.sleep(0.6)
+
+            assert 20 <= len(blocks) <= 32
+            seqs = [block["seq"] for block in blocks]
+            assert seqs == list(range(seqs[0], seqs[-1] + 1))
+            pcm = np.frombuffer(base64.b64decode(blocks[-1]["pcm"]), dtype="<i2")
+            # The simulator's 0.2 tone, halved by the daemon's RX gain stage
+            assert len(pcm) == 1024 and 2500 < np.abs(pcm).max() < 4000
+
+            # RX DSP runs on the audio thread, not the event loop
+            threads = set()
+            chain = daemon.audio["shack"].rx_chain
+            process = chain.process_bytes
+
+            def process_bytes(data):
+                threads.add(threading.current_thread())
+                return process(data)
+
+            chain.process_bytes = process_bytes
+            await wait_for(lambda: threads)
+            assert threading.current_thread() not in threads
+
+            await frontend.request("set_ptt", on=True)
+            for _ in range(5):
+                frontend.send_tx_audio(np.full(1024, 8000, dtype="<i2").tobytes())
+                await asyncio.sleep(0.02)
+            await wait_for(lambda: len(tx_packets) >= 5 * 1024 // 2 // 128)
+            assert daemon.audio["shack"].tx_pipeline.dropped_blocks == 0
+
+            await frontend.request("create_slice", hz=14074000)
+            audio = daemon.audio["shack"]
+            assert sorted(audio.mixer.sources()) == ["dax1", "dax2", "remote"]
+            radio = await frontend.request("remove_slice", slice=radio_slice(daemon, 1))
+            assert len(radio["slices"]) == 1 and sorted(audio.mixer.sources()) == ["remote"]
+        finally:
+            await frontend.close()
+            await daemon.stop()
+
+    @pytest.mark.asyncio
+    async def test_frontend_through_daemon(self, simulator):
+        """测试前端经 DaemonAPI 让守护进程连接电台、调谐、开关 slice，并播放守护进程的音频"""
+        manager = SessionManager(udp_port=0, udp_host="127.0.0.1", metrics=MetricsRegistry())
+        config = {"audio": {"sample_rate": 48000, "chunk_size": 1024}}
+        daemon = RadioDaemon(manager, host="127.0.0.1", port=0, audio=config)
+        assert await daemon.start()
+        client = DaemonClient()
+        api = DaemonAPI(client)
+        closed = []
+        client.add_close_callback(lambda: closed.append(True))
+        try:
+            assert await client.connect(host="127.0.0.1", port=daemon.port)
+            assert await api.connect("127.0.0.1", simulator.port)
+            assert api.radio == "radio" and api.audio and len(api.slices) == 1
+            playout = AudioPlayout(api.radio, 48000, 1024)
+            client.add_event_callback(playout.on_event)
+
+            await api.set_frequency(14250000)
+            assert api.slice_state.frequency == 14250000
+            second = await api.create_slice("lsb")
+            assert second is not None and second != api.slice_id and len(api.slices) == 2
+            await api.remove_slice(second)
+            assert list(api.slices) == [api.slice_id]
+
+            def playing():
+                # The daemon sends silence until the radio's audio has filled its buffer
+                pcm = np.frombuffer(playout.read_bytes(), dtype="<i2")
+                return len(pcm) == 1024 and np.abs(pcm).max() > 5000
+
+            await wait_for(playing)
+
+            await daemon.stop()
+            await wait_for(lambda: closed)
+        finally:
+            await client.close()
+            if daemon.server:
+                await daemon.stop()
+
+    @pytest.mark.asyncio
+    async def test_daemon_websocket_fanout(self, simulator):
+        """测试守护进程把模拟器的频谱与瀑布图经 WebSocket 推送给浏览器端"""
+        manager = SessionManager(udp_port=0, udp_host="127.0.0.1", metrics=MetricsRegistry())
+        fanout = WebSocketFanout(port=0, metrics=MetricsRegistry())
+        assert await fanout.start()
+        daemon = RadioDaemon(manager, host="127.0.0.1", port=0, fanout=fanout)
+        assert await daemon.start()
+        viewer = FanoutViewer()
+        try:
+            await daemon.add_radio("shack", "127.0.0.1", simulator.port)
+            await viewer.connect("127.0.0.1", fanout.port)
+            await viewer.subscribe("shack", width=200, fps=5)
+
+            frames = [await asyncio.wait_for(viewer.receive(), 2) for _ in range(4)]
+
+            kinds = {frame["kind"] for frame in frames}
+            assert kinds == {FRAME_PAN, FRAME_WATERFALL}
+            assert all(frame["rows"].shape[1] == 200 for frame in frames)
+        finally:
+            await viewer.close()
+            await daemon.stop()
+            await fanout.stop()
+
+    @pytest.mark.asyncio
+    async def test_cat_server_shares_connection(self):
+        """测试 CAT 客户端经本应用的连接调谐，快速调谐合并为少量命令"""
+        sim = RadioSimulator(port=0, heartbeat_interval=0, latency=0.02, seed=1)
+        await sim.start()
+        client, api = await connect(sim)
+        server = RigctldServer(api, port=0, metrics=MetricsRegistry())
+        assert await server.start()
+        try:
+            slice_id = await api.create_slice()
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            handled = sim.commands_handled
+            for step in range(40):
+                writer.write(f"F {14074000 + step * 10}\nf\n".encode())
+            await writer.drain()
+            replies = [await reader.readline() for _ in range(80)]
+
+            assert replies[-1] == b"14074390\n"
+            await server.coalescer.flush()
+            assert sim.slices[int(slice_id)].frequency == 14074390
+            assert sim.commands_handled - handled < 10
+            writer.close()
+        finally:
+            await server.stop()
+            await client.disconnect()
+            await sim.stop()
@@ -0,0 +1,133 @@
+import sys
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from audio_codec import CodecStats, OpusCodec, PcmCodec, create_codec, create_codecs
+from vita49 import PACKET_CLASS_AUDIO_INT16, PACKET_CLASS_OPUS
+
+
+@pytest.fixture
+def fake_opuslib():
+    module = MagicMock()
+    module.Decoder.return_value.decode.return_value = np.full(960, 8192, dtype="<i2").tobytes()
+    module.Encoder.return_value.encode.return_value = b"\x01\x02\x03"
+    with patch.dict(sys.modules, {"opuslib": module}):
+        yield module
+
+
+class TestPcmCodec:
+    """测试未压缩 PCM 编解码"""
+
+    def test_decode_float32_stereo_to_mono(self):
+        """测试 float32 立体声解码为单声道"""
+        codec = PcmCodec()
+        payload = np.array([[0.5, 0.5], [-0.25, -0.25]], dtype=">f4").tobytes()
+
+        np.testing.assert_allclose(codec.decode(payload), [0.5, -0.25])
+
+    def test_decode_int16(self):
+        """测试 int16 载荷解码"""
+        codec = PcmCodec(float32=False)
+        payload = np.array([16384, 16384], dtype=">i2").tobytes()
+
+        assert codec.packet_class == PACKET_CLASS_AUDIO_INT16
+        np.testing.assert_allclose(codec.decode(payload), [0.5])
+
+    def test_encode_decode_roundtrip(self):
+        """测试编码后解码还原"""
+        codec = PcmCodec()
+        samples = np.linspace(-0.5, 0.5, 128, dtype=np.float32)
+
+        np.testing.assert_allclose(codec.decode(codec.encode(samples)), samples, atol=1e-6)
+
+    def test_conceal_fades_previous_packet(self):
+        """测试丢包时淡出上一包"""
+        codec = PcmCodec()
+        codec.decode(np.ones((4, 2), dtype=">f4").tobytes())
+
+        concealed = codec.conceal()
+
+        assert len(concealed) == 4
+        assert concealed[0] == pytest.approx(0.5)
+        assert concealed[-1] == 0.0
+
+
+class TestOpusCodec:
+    """测试 Opus 编解码（opuslib 被模拟）"""
+
+    def test_requires_opuslib(self):
+        """测试缺少 opuslib 时报错"""
+        with patch.dict(sys.modules, {"opuslib": None}):
+            with pytest.raises(RuntimeError, match="opuslib"):
+                OpusCodec()
+
+    def test_configures_encoder(self, fake_opuslib):
+        """测试编码器码率与 FEC 配置"""
+        codec = OpusCodec(bitrate=16000)
+
+        assert codec.sample_rate == 48000
+        assert codec.frame_size == 480
+        assert codec.packet_class == PACKET_CLASS_OPUS
+        assert codec.encoder.bitrate == 16000
+        assert codec.encoder.inband_fec == 1
+
+    def test_decode_to_mono_float(self, fake_opuslib):
+        """测试解码输出单声道浮点"""
+        codec = OpusCodec()
+
+        samples = codec.decode(b"\xaa")
+
+        assert len(samples) == 480
+        np.testing.assert_allclose(samples, 0.25)
+
+    def test_conceal_uses_fec_when_next_packet_available(self, fake_opuslib):
+        """测试有后续包时使用 FEC，否则使用 PLC"""
+        codec = OpusCodec()
+        decoder = fake_opuslib.Decoder.return_value
+
+        codec.conceal(b"\x10")
+        decoder.decode.assert_called_with(b"\x10", 480, decode_fec=True)
+
+        codec.conceal(None)
+        decoder.decode.assert_called_with(b"", 480)
+
+    def test_encode(self, fake_opuslib):
+        """测试编码"""
+        codec = OpusCodec()
+
+        assert codec.encode(np.zeros(480, dtype=np.float32)) == b"\x01\x02\x03"
+        pcm = fake_opuslib.Encoder.return_value.encode.call_args.args[0]
+        assert len(pcm) == 480 * 2 * 2
+
+
+class TestCodecHelpers:
+    """测试编解码辅助功能"""
+
+    def test_create_codec_from_config(self, fake_opuslib):
+        """测试根据配置选择编解码器"""
+        assert create_codec({"codec": "pcm"}).name == "pcm"
+        assert create_codec({"codec": "opus", "opus_bitrate": 12000}).name == "opus"
+        assert create_codec({"codec": "bogus"}).name == "pcm"
+
+    def test_create_codecs(self, fake_opuslib):
+        """测试 RX/TX 编解码器与压缩参数，未压缩时不需要 TX 编解码器"""
+        rx_codec, tx_codec, compression = create_codecs({"codec": "opus"})
+        assert (rx_codec.name, tx_codec.name, compression) == ("opus", "opus", "opus")
+
+        rx_codec, tx_codec, compression = create_codecs({"codec": "pcm", "rx_radio_rate": 48000})
+        assert (rx_codec.sample_rate, tx_codec, compression) == (48000, None, None)
+
+    def test_stats_snapshot(self):
+        """测试码率与解码耗时统计"""
+        stats = CodecStats()
+        stats._window_start -= 1.0
+        stats.record(1000, 0.002)
+        stats.record(1000, 0.003)
+
+        bitrate, decode_ms = stats.snapshot()
+
+        assert bitrate == pytest.approx(16.0, rel=0.05)
+        assert decode_ms == pytest.approx(5.0, rel=0.05)
+        assert stats.total_bytes == 2000
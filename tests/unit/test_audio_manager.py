@@ -356,3 +356,153 @@ class TestAudioManager:
             result = manager._tx_stream_callback(b"input_data", 1024, None, 0)
 
             assert result == (None, 0)
+
+    def test_rx_gain_applied_and_reconfigured(self, sample_config, mock_pyaudio):
+        """测试接收增益经 DSP 链生效并可热更新"""
+        import copy
+
+        import numpy as np
+
+        config = copy.deepcopy(sample_config)
+        config["audio"]["rx_gain"] = 0.5
+        with patch("pyaudio.PyAudio", return_value=mock_pyaudio):
+            manager = AudioManager(config)
+            manager.set_rx_callback(Mock(return_value=np.full(4, 16384, "<i2").tobytes()))
+
+            data = manager._rx_stream_callback(None, 4, None, 0)
+            assert (np.frombuffer(data[0], "<i2") == 8192).all()
+
+            config["audio"]["rx_gain"] = 1.0
+            manager.reconfigure(config)
+            data = manager._rx_stream_callback(None, 4, None, 0)
+            assert (np.frombuffer(data[0], "<i2") == 16384).all()
+
+    def test_denoiser_toggled_without_restart(self, sample_config, mock_pyaudio):
+        """测试开关 AI 降噪时热更新处理链，无需重启音频流"""
+        import copy
+
+        config = copy.deepcopy(sample_config)
+        config["ai_denoiser"] = {"enabled": False}
+        denoiser = Mock()
+        with patch("pyaudio.PyAudio", return_value=mock_pyaudio), patch(
+            "ai_denoiser.model_manager.get_denoiser", return_value=denoiser
+        ) as get_denoiser:
+            manager = AudioManager(config)
+            assert manager.rx_chain.get_stage("denoise") is None
+
+            config["ai_denoiser"]["enabled"] = True
+            manager.reconfigure(config)
+            manager.reconfigure(config)
+            assert manager.wait_denoiser(timeout=2)
+            assert manager.rx_chain.get_stage("denoise").denoiser is denoiser
+            get_denoiser.assert_called_once()
+
+            config["ai_denoiser"]["enabled"] = False
+            manager.reconfigure(config)
+            assert manager.wait_denoiser(timeout=2)
+            assert manager.rx_chain.get_stage("denoise") is None
+            denoiser.cleanup.assert_called_once()
+
+    def test_denoiser_loaded_off_caller_thread(self, sample_config, mock_pyaudio):
+        """测试降噪模型在工作线程加载，加载完成前处理链保持原样"""
+        import copy
+        import threading
+
+        config = copy.deepcopy(sample_config)
+        config["ai_denoiser"] = {"enabled": False}
+        loaded = threading.Event()
+        threads = []
+
+        def get_denoiser(denoiser_config):
+            threads.append(threading.current_thread())
+            loaded.wait(2)
+            return Mock()
+
+        with patch("pyaudio.PyAudio", return_value=mock_pyaudio), patch(
+            "ai_denoiser.model_manager.get_denoiser", side_effect=get_denoiser
+        ):
+            manager = AudioManager(config)
+            config["ai_denoiser"]["enabled"] = True
+            manager.reconfigure(config)
+
+            assert manager.rx_chain.get_stage("denoise") is None
+            loaded.set()
+            assert manager.wait_denoiser(timeout=2)
+            assert manager.rx_chain.get_stage("denoise") is not None
+            assert threads[0] is not threading.current_thread()
+
+    def test_replaced_denoiser_released_after_callback(self, sample_config, mock_pyaudio):
+        """测试被替换的降噪器在 RX 回调改用新处理链后才释放"""
+        import copy
+
+        config = copy.deepcopy(sample_config)
+        config["ai_denoiser"] = {"enabled": True}
+        denoiser = Mock()
+        with patch("pyaudio.PyAudio", return_value=mock_pyaudio), patch(
+            "ai_denoiser.model_manager.get_denoiser", return_value=denoiser
+        ):
+            manager = AudioManager(config)
+            manager.start_rx()
+            config["ai_denoiser"]["enabled"] = False
+            manager.reconfigure(config)
+
+            assert not manager.wait_denoiser(timeout=0.1)
+            manager._rx_stream_callback(None, 4, None, 0)
+            assert not manager.wait_denoiser(timeout=0.1)
+            denoiser.cleanup.assert_not_called()
+
+            manager._rx_stream_callback(None, 4, None, 0)
+            assert manager.wait_denoiser(timeout=2)
+            denoiser.cleanup.assert_called_once()
+
+    def test_without_dsp(self, sample_config, mock_pyaudio):
+        """测试音频由守护进程处理时不加载降噪，音频原样通过"""
+        import copy
+
+        import numpy as np
+
+        config = copy.deepcopy(sample_config)
+        config["audio"]["rx_gain"] = 0.5
+        config["ai_denoiser"] = {"enabled": True}
+        with patch("pyaudio.PyAudio", return_value=mock_pyaudio), patch(
+            "ai_denoiser.model_manager.get_denoiser"
+        ) as get_denoiser:
+            manager = AudioManager(config, dsp=False)
+            manager.set_rx_callback(Mock(return_value=np.full(4, 16384, "<i2").tobytes()))
+            manager.reconfigure(config)
+
+            data = manager._rx_stream_callback(None, 4, None, 0)
+            assert (np.frombuffer(data[0], "<i2") == 16384).all()
+            get_denoiser.assert_not_called()
+
+    def test_recorder_receives_rx_and_tx(self, sample_config, mock_pyaudio):
+        """测试录音器接收 RX/TX 音频"""
+        with patch("pyaudio.PyAudio", return_value=mock_pyaudio):
+            manager = AudioManager(sample_config)
+            recorder = Mock()
+            manager.set_recorder(recorder)
+            manager.set_rx_callback(Mock(return_value=b"\x01\x00"))
+            manager.set_tx_callback(Mock())
+
+            manager._rx_stream_callback(None, 1, None, 0)
+            manager._tx_stream_callback(b"\x02\x00", 1, None, 0)
+
+            recorder.submit.assert_any_call("rx", b"\x01\x00")
+            recorder.submit.assert_any_call("tx", b"\x02\x00")
+
+    def test_callback_metrics(self, sample_config, mock_pyaudio):
+        """测试回调耗时与 PortAudio 欠载计数"""
+        import pyaudio
+
+        from metrics import MetricsRegistry
+
+        metrics = MetricsRegistry()
+        with patch("pyaudio.PyAudio", return_value=mock_pyaudio):
+            manager = AudioManager(sample_config, metrics=metrics)
+            manager.set_rx_callback(Mock(return_value=b"\x01\x00"))
+
+            manager._rx_stream_callback(None, 1, None, 0)
+            manager._rx_stream_callback(None, 1, None, pyaudio.paOutputUnderflow)
+
+            assert metrics.get("audio_rx_callback_seconds").count == 2
+            assert metrics.get("audio_output_underflows_total").value == 1
@@ -0,0 +1,105 @@
+import json
+import os
+import wave
+
+import numpy as np
+
+from audio_recorder import AudioRecorder
+
+
+def pcm(value, frames=480):
+    return np.full(frames, value, dtype="<i2").tobytes()
+
+
+def sidecar(path):
+    with open(os.path.splitext(path)[0] + ".json") as f:
+        return json.load(f)
+
+
+class TestAudioRecorder:
+    """测试音频录制"""
+
+    def test_records_tracks_to_wav(self, tmp_path):
+        """测试 RX/TX 分轨写入 WAV"""
+        recorder = AudioRecorder(str(tmp_path), sample_rate=48000)
+        recorder.start()
+        for _ in range(10):
+            assert recorder.submit("rx", pcm(1000))
+        recorder.submit("tx", pcm(-1000))
+        recorder.stop()
+
+        rx_file = next(p for p in recorder.files if os.path.basename(p).startswith("rx_"))
+        with wave.open(rx_file) as f:
+            assert f.getframerate() == 48000
+            assert f.getnframes() == 4800
+            samples = np.frombuffer(f.readframes(4800), dtype="<i2")
+        assert (samples == 1000).all()
+        assert len(recorder.files) == 2
+        assert recorder.bytes_behind == 0
+
+    def test_sidecar_metadata(self, tmp_path):
+        """测试元数据文件记录时间戳与频率/模式变化"""
+        recorder = AudioRecorder(str(tmp_path))
+        recorder.set_metadata(frequency=7150000, mode="lsb")
+        recorder.start()
+        recorder.submit("rx", pcm(0, 4800))
+        recorder.set_metadata(frequency=7150000, mode="lsb")
+        recorder.set_metadata(frequency=14200000, mode="usb")
+        recorder.submit("rx", pcm(0, 4800))
+        recorder.stop()
+
+        meta = sidecar(recorder.files[0])
+        assert meta["metadata"] == {"frequency": 7150000, "mode": "lsb"}
+        assert meta["events"] == [{"offset_s": 0.1, "frequency": 14200000, "mode": "usb"}]
+        assert meta["duration_s"] == 0.2
+        assert meta["start_timestamp"] > 0
+
+    def test_rotates_by_size(self, tmp_path):
+        """测试按文件大小轮转"""
+        recorder = AudioRecorder(str(tmp_path), max_file_bytes=4000, write_chunk_bytes=1)
+        recorder.start()
+        for _ in range(5):
+            recorder.submit("rx", pcm(0, 1000))
+        recorder.stop()
+
+        assert len(recorder.files) == 3
+        assert [sidecar(p)["frames"] for p in recorder.files] == [2000, 2000, 1000]
+
+    def test_rotates_by_time(self, tmp_path):
+        """测试按时长轮转"""
+        recorder = AudioRecorder(str(tmp_path), max_file_seconds=10)
+        recorder._queue.put(("audio", "rx", 100.0, pcm(0)))
+        recorder._queue.put(("audio", "rx", 105.0, pcm(0)))
+        recorder._queue.put(("audio", "rx", 111.0, pcm(0)))
+        recorder.start()
+        recorder.stop()
+
+        assert [sidecar(p)["frames"] for p in recorder.files] == [960, 480]
+
+    def test_drops_when_queue_full(self, tmp_path):
+        """测试队列满时丢弃且不阻塞"""
+        recorder = AudioRecorder(str(tmp_path), queue_size=2)
+        recorder.running = True
+
+        results = [recorder.submit("rx", pcm(0)) for _ in range(4)]
+
+        assert results == [True, True, False, False]
+        assert recorder.dropped_buffers == 2
+        assert recorder.bytes_behind == 2 * 960
+
+    def test_submit_ignored_when_stopped(self, tmp_path):
+        """测试未启动时忽略数据"""
+        recorder = AudioRecorder(str(tmp_path))
+
+        assert not recorder.submit("rx", pcm(0))
+        assert recorder.bytes_behind == 0
+
+    def test_flac_falls_back_to_wav_without_soundfile(self, tmp_path, monkeypatch):
+        """测试缺少 soundfile 时回退为 WAV"""
+        import sys
+
+        monkeypatch.setitem(sys.modules, "soundfile", None)
+
+        recorder = AudioRecorder(str(tmp_path), fmt="flac")
+
+        assert recorder.fmt == "wav"
@@ -0,0 +1,179 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from cat_server import CommandCoalescer, RigctldServer
+from flexradio_api import FlexRadioAPI
+from metrics import MetricsRegistry
+
+
+def make_api():
+    client = Mock()
+    client.send_command = AsyncMock(return_value="")
+    api = FlexRadioAPI(client, metrics=MetricsRegistry())
+    api.slice_id = "0"
+    api.slice_state.frequency = 7074000
+    return api
+
+
+def run(server, line):
+    return server.execute(line.split())
+
+
+class TestCommandCoalescer:
+    """测试写命令合并"""
+
+    @pytest.mark.asyncio
+    async def test_burst_sends_first_and_latest(self):
+        """测试发送期间到达的写入只保留最新值"""
+        metrics = MetricsRegistry()
+        coalescer = CommandCoalescer(metrics)
+        sent = []
+        release = asyncio.Event()
+
+        async def send(value):
+            sent.append(value)
+            await release.wait()
+
+        for value in range(10):
+            coalescer.submit("freq", value, send)
+            await asyncio.sleep(0)
+        assert coalescer.value("freq") == 9
+
+        release.set()
+        await coalescer.flush()
+
+        assert sent == [0, 9]
+        assert metrics.get("cat_writes_coalesced_total").value == 8
+        assert coalescer.value("freq", "idle") == "idle"
+
+    @pytest.mark.asyncio
+    async def test_keys_independent_and_failures_logged(self):
+        """测试不同键互不合并，发送失败不影响后续写入"""
+        coalescer = CommandCoalescer(MetricsRegistry())
+        sent = []
+
+        async def send(value):
+            sent.append(value)
+            if value == "bad":
+                raise RuntimeError("Not connected")
+
+        coalescer.submit("a", "bad", send)
+        coalescer.submit("b", 1, send)
+        await coalescer.flush()
+        coalescer.submit("a", "good", send)
+        await coalescer.flush()
+
+        assert sent == ["bad", 1, "good"]
+
+
+class TestRigctldCommands:
+    """测试 rigctld 命令"""
+
+    def test_reads_from_cache(self):
+        """测试读命令直接由状态缓存回答，不访问电台"""
+        api = make_api()
+        server = RigctldServer(api, metrics=MetricsRegistry())
+
+        assert run(server, "f") == "7074000\n"
+        assert run(server, "\\get_mode") == "USB\n2700\n"
+        assert run(server, "t") == "0\n"
+        assert run(server, "v") == "VFOA\n"
+        api.client.send_command.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_write_visible_before_confirmation(self):
+        """测试写入后立即读回新值，随后经 API 下发"""
+        api = make_api()
+        server = RigctldServer(api, metrics=MetricsRegistry())
+
+        assert run(server, "F 14074000.000000") == "RPRT 0\n"
+        assert run(server, "f") == "14074000\n"
+        await server.coalescer.flush()
+
+        api.client.send_command.assert_awaited_once_with("slice set 0 frequency=14074000")
+        assert api.slice_state.frequency == 14074000
+
+    @pytest.mark.asyncio
+    async def test_tuning_burst_coalesced(self):
+        """测试快速连续调谐合并为少量命令"""
+        api = make_api()
+        server = RigctldServer(api, metrics=MetricsRegistry())
+
+        for step in range(50):
+            run(server, f"F {14000000 + step * 100}")
+        await server.coalescer.flush()
+
+        # All 50 arrived before the first write started, so only the last is sent
+        sent = [call.args[0] for call in api.client.send_command.await_args_list]
+        assert sent == ["slice set 0 frequency=14004900"]
+
+    @pytest.mark.asyncio
+    async def test_mode_and_ptt(self):
+        """测试数据模式写为 DIGL，读回仍为 PKTLSB，PTT 走 API"""
+        api = make_api()
+        server = RigctldServer(api, metrics=MetricsRegistry())
+
+        assert run(server, "M PKTLSB 3000") == "RPRT 0\n"
+        assert run(server, "T 1") == "RPRT 0\n"
+        assert run(server, "t") == "1\n"
+        await server.coalescer.flush()
+
+        sent = [call.args[0] for call in api.client.send_command.await_args_list]
+        assert sent == ["slice set 0 mode=digl", "xmit 0"]
+        assert run(server, "m") == "PKTLSB\n3000\n"
+
+    def test_errors(self):
+        """测试未实现命令、无效参数与未连接电台"""
+        server = RigctldServer(make_api(), metrics=MetricsRegistry())
+
+        assert run(server, "l STRENGTH") == "RPRT -4\n"
+        assert run(server, "F abc") == "RPRT -1\n"
+        assert run(server, "F 100000000") == "RPRT -1\n"
+        assert run(server, "M RTTY 0") == "RPRT -1\n"
+        assert run(server, "S 1 VFOB") == "RPRT -11\n"
+
+        server.api = None
+        assert run(server, "f") == "RPRT -6\n"
+        assert run(server, "F 7000000") == "RPRT -6\n"
+
+    def test_vfo_argument_ignored(self):
+        """测试 VFO 模式客户端附带的 VFO 参数被忽略"""
+        server = RigctldServer(make_api(), metrics=MetricsRegistry())
+
+        assert run(server, "\\get_freq VFOA") == "7074000\n"
+        assert run(server, "\\chk_vfo") == "0\n"
+
+    def test_dump_state(self):
+        """测试能力描述以协议版本 0 开头并以 has_set_parm 结尾"""
+        server = RigctldServer(make_api(), metrics=MetricsRegistry())
+
+        lines = run(server, "\\dump_state").split("\n")
+
+        assert lines[0] == "0"
+        assert lines[3].startswith("1800000.000000 30000000.000000")
+        assert lines[-7:] == ["0x0"] * 6 + [""]
+
+
+class TestRigctldServer:
+    """测试 rigctld TCP 服务"""
+
+    @pytest.mark.asyncio
+    async def test_several_clients(self):
+        """测试多个客户端按行轮询，q 关闭连接"""
+        metrics = MetricsRegistry()
+        server = RigctldServer(make_api(), port=0, metrics=metrics)
+        assert await server.start()
+        try:
+            connections = [
+                await asyncio.open_connection("127.0.0.1", server.port) for _ in range(3)
+            ]
+            for reader, writer in connections:
+                writer.write(b"f\nm\nq\n")
+            replies = [await asyncio.wait_for(reader.read(), 2) for reader, _ in connections]
+
+            assert replies == [b"7074000\nUSB\n2700\n"] * 3
+            assert metrics.get("cat_requests_total").value == 6
+        finally:
+            await server.stop()
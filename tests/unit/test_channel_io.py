@@ -0,0 +1,192 @@
+import io
+
+import pytest
+
+import channel_io
+from channel_io import detect_format, export_channels, import_channels
+from channel_store import ChannelStore
+from memory_manager import MemoryChannel
+
+CHANNELS = [
+    MemoryChannel("40m SSB", 7150000, "lsb", 60, 40, "Evening net"),
+    MemoryChannel("WWV", 10000000, "am"),
+    MemoryChannel("20m FT8", 14074000, "usb", comment="Data, 3 kHz"),
+    MemoryChannel("Repeater", 29620000, "fm"),
+    MemoryChannel("40m CW", 7030000, "cw"),
+]
+
+
+@pytest.fixture
+def store():
+    store = ChannelStore()
+    yield store
+    store.close()
+
+
+def write(path, text):
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+class TestRoundtrip:
+    """测试三种格式的导出与导入"""
+
+    @pytest.mark.parametrize(
+        "name, fmt", [("channels.csv", "csv"), ("chirp.csv", "chirp"), ("log.adi", "adif")]
+    )
+    def test_export_import(self, tmp_path, name, fmt):
+        """测试导出后再导入得到相同信道"""
+        source = ChannelStore()
+        source.add_many(CHANNELS)
+        path = tmp_path / name
+
+        assert export_channels(source, path, fmt) == len(CHANNELS)
+        assert detect_format(path) == fmt
+
+        target = ChannelStore()
+        report = import_channels(target, path)
+
+        assert report.imported == len(CHANNELS) and report.skipped == 0
+        imported, exported = list(target.channels()), list(source.channels())
+        if fmt == "chirp":
+            # CHIRP has no gain columns
+            for channel in exported:
+                channel.rf_gain = channel.af_gain = 50
+        assert imported == exported
+        assert not (tmp_path / (name + ".tmp")).exists()
+
+
+class TestImport:
+    """测试导入的校验与事务"""
+
+    def test_errors_reported_in_aggregate(self, store, tmp_path):
+        """测试无效行被跳过并按原因汇总，记录前几个行号"""
+        rows = ["name,frequency,mode,rf_gain"]
+        rows += [f"Good {i},{7000000 + i},usb," for i in range(3)]
+        rows += [f"High {i},{50000000 + i},usb,50" for i in range(7)]
+        rows += ["Bad mode,7100000,rtty,50", "Bad gain,7100000,usb,150", "No freq,,usb,50"]
+        path = write(tmp_path / "list.csv", "\n".join(rows) + "\n")
+
+        report = import_channels(store, path, batch_size=4)
+
+        assert report.imported == 3 and len(store) == 3
+        assert report.errors == {
+            "invalid frequency": 8,
+            "unsupported mode": 1,
+            "invalid RF gain": 1,
+        }
+        assert report.examples["invalid frequency"] == [5, 6, 7, 8, 9]
+        assert "skipped 10" in report.summary()
+        assert store.get(1).rf_gain == 50
+
+    def test_single_transaction(self, store, tmp_path):
+        """测试 replace 在同一事务中删除旧信道，导入失败时保持原样"""
+        store.add_many(CHANNELS)
+        path = write(tmp_path / "list.csv", "name,frequency,mode\nA,7100000,usb\n")
+
+        def failing(stream, batch_size):
+            yield from channel_io._read_csv(stream, batch_size)
+            raise ValueError("Truncated file")
+
+        channel_io._READERS["broken"] = (failing, 1.0)
+        try:
+            with pytest.raises(ValueError):
+                import_channels(store, path, "broken", replace=True)
+        finally:
+            del channel_io._READERS["broken"]
+        assert len(store) == len(CHANNELS)
+
+        import_channels(store, path, replace=True)
+        assert [channel.name for channel in store.channels()] == ["A"]
+
+    def test_missing_column(self, store, tmp_path):
+        """测试缺少必需列时报错"""
+        path = write(tmp_path / "list.csv", "name,mode\nA,usb\n")
+
+        with pytest.raises(ValueError, match="frequency"):
+            import_channels(store, path)
+
+    def test_chirp_details_and_names(self, store, tmp_path):
+        """测试 CHIRP 的模式映射、中继参数写入备注、空名称用频率命名"""
+        header = ",".join(channel_io.CHIRP_FIELDS)
+        path = write(
+            tmp_path / "chirp.csv",
+            f"{header}\n"
+            "0,RPT,29.620000,-,0.100000,Tone,88.5,88.5,023,NN,NFM,5.00,,,,,\n"
+            "1,,7.150000,,0.000000,,88.5,88.5,023,NN,LSB,5.00,,,,,\n"
+            "2,2m,146.520000,,0.000000,,88.5,88.5,023,NN,FM,5.00,,,,,\n",
+        )
+
+        report = import_channels(store, path)
+
+        channels = list(store.channels())
+        assert report.imported == 2 and report.errors == {"invalid frequency": 1}
+        assert (channels[0].name, channels[0].mode) == ("7.1500 MHz", "lsb")
+        assert channels[1].comment == "-0.100000 MHz T 88.5"
+
+
+class TestAdif:
+    """测试 ADIF 流式解析"""
+
+    LOG = (
+        "Exported log <with> a header\n"
+        "<ADIF_VER:5>3.1.4<EOH>\n"
+        "<CALL:4>K1AB <FREQ:8>3.573000 <MODE:4>MFSK <SUBMODE:3>FT4 <EOR>\n"
+        "<call:4>W1AW <freq:6>14.250 <mode:3>SSB <COMMENT:12>Net <EOR> ok <EOR>\n"
+        "<CALL:4>N0CL <FREQ:5>7.040 <MODE:2>CW <EOR>\n"
+        "<CALL:4>N0FM <FREQ:6>145.50 <MODE:2>FM <EOR>\n"
+        "<CALL:4>N0DV <FREQ:6>14.100 <MODE:4>DSTR <EOR>\n"
+    )
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+    def test_records_across_chunks(self, chunk_size):
+        """测试标签与数据跨越读取块边界时仍正确解析"""
+        records = list(channel_io._adif_records(io.BytesIO(self.LOG.encode()), chunk_size))
+
+        assert [record["CALL"] for record in records] == ["K1AB", "W1AW", "N0CL", "N0FM", "N0DV"]
+        assert records[1]["COMMENT"] == "Net <EOR> ok"
+
+    @pytest.mark.parametrize("chunk_size", [1, 4096])
+    def test_lengths_are_bytes(self, chunk_size):
+        """测试字段长度按字节计算，多字节字符不会错位后续字段"""
+        log = "\ufeff<CALL:5>Jos\u00e9 <COMMENT:9>\u6771\u4eac\u5c40 <FREQ:5>7.150 <EOR>"
+
+        stream = io.BytesIO(log.encode())
+        records = list(channel_io._adif_records(stream, chunk_size))
+
+        assert records == [{"CALL": "Jos\u00e9", "COMMENT": "\u6771\u4eac\u5c40", "FREQ": "7.150"}]
+
+    def test_non_ascii_roundtrip(self, store, tmp_path):
+        """测试非 ASCII 名称与备注经 ADIF 导出后再导入不变"""
+        store.add_many([MemoryChannel("Qu\u00e9bec", 7150000, "lsb", comment="\u6771\u4eac net")])
+        path = tmp_path / "log.adi"
+        export_channels(store, path)
+
+        target = ChannelStore()
+        report = import_channels(target, path)
+
+        assert report.imported == 1
+        assert list(target.channels()) == list(store.channels())
+
+    def test_import(self, store, tmp_path):
+        """测试 ADIF 模式映射，不支持的模式与频率被跳过"""
+        report = import_channels(store, write(tmp_path / "log.adi", self.LOG))
+
+        channels = list(store.channels())
+        assert [(c.name, c.mode) for c in channels] == [
+            ("K1AB", "usb"),
+            ("N0CL", "cw"),
+            ("W1AW", "usb"),
+        ]
+        assert report.errors == {"invalid frequency": 1, "unsupported mode": 1}
+        assert report.examples["unsupported mode"] == [5]
+
+
+class TestDetectFormat:
+    """测试按扩展名与表头识别格式"""
+
+    def test_detect(self, tmp_path):
+        """测试识别 ADIF、CHIRP 与普通 CSV"""
+        assert detect_format(write(tmp_path / "a.ADIF", "")) == "adif"
+        assert detect_format(write(tmp_path / "b.csv", "Location,Name,Frequency\n")) == "chirp"
+        assert detect_format(write(tmp_path / "c.csv", "name,frequency,mode\n")) == "csv"
@@ -0,0 +1,200 @@
+import pytest
+
+from channel_store import ChannelStore, name_key
+from memory_browser import ChannelTableModel, MemoryBrowser
+from memory_manager import MemoryChannel
+
+
+@pytest.fixture
+def store():
+    store = ChannelStore()
+    store.add_many(
+        [
+            MemoryChannel("40m SSB", 7150000, "usb"),
+            MemoryChannel("20m Calling", 14250000, "lsb"),
+            MemoryChannel("Repeater North", 29620000, "fm", comment="Tone 88.5"),
+            MemoryChannel("Repeater South", 29660000, "fm"),
+            MemoryChannel("WWV", 10000000, "am"),
+            MemoryChannel("40m CW", 7030000, "cw"),
+        ]
+    )
+    yield store
+    store.close()
+
+
+def many_channels(count):
+    return [MemoryChannel(f"Channel {i:05d}", 1800000 + i * 100, "usb") for i in range(count)]
+
+
+class TestChannelStore:
+    """测试 SQLite 信道库"""
+
+    def test_add_get_update_delete(self, store):
+        """测试增删改查与行 ID"""
+        channel = MemoryChannel("15m USB", 21250000, "USB")
+        channel_id = store.add(channel)
+
+        assert channel.channel_id == channel_id
+        stored = store.get(channel_id)
+        assert stored == MemoryChannel("15m USB", 21250000, "usb")
+        assert stored.band == "15m"
+
+        assert store.update(channel_id, MemoryChannel("15m Net", 21300000, "usb"))
+        assert store.get(channel_id).name == "15m Net"
+        assert store.delete(channel_id)
+        assert store.get(channel_id) is None
+        assert not store.delete(channel_id)
+        assert len(store) == 6
+
+    def test_nearest(self, store):
+        """测试最近信道查找，可限定波段或模式"""
+        assert store.nearest(7100000).name == "40m SSB"
+        assert store.nearest(7090000).name == "40m CW"
+        assert store.nearest(10000000).name == "WWV"
+        assert store.nearest(1800000).name == "40m CW"
+        assert store.nearest(29900000).name == "Repeater South"
+        assert store.nearest(14000000, band="40m").name == "40m SSB"
+        assert store.nearest(7100000, mode="CW").name == "40m CW"
+        assert store.nearest(7100000, band="80m") is None
+
+    def test_prefix_search(self, store):
+        """测试忽略大小写与多余空格的前缀搜索"""
+        names = [channel.name for channel in store.search("  repeater ")]
+
+        assert names == ["Repeater North", "Repeater South"]
+        assert [c.name for c in store.search("40M")] == ["40m CW", "40m SSB"]
+        assert store.search("zz") == []
+        assert store.count(prefix="rep") == 2
+
+    def test_fuzzy_search(self, store):
+        """测试按字母顺序的模糊匹配，前缀匹配优先"""
+        names = [channel.name for channel in store.fuzzy_search("rptr sth")]
+
+        assert names == ["Repeater South"]
+        assert store.fuzzy_search("w")[0].name == "WWV"
+        assert store.fuzzy_search("100%") == []
+        assert store.fuzzy_search("") == []
+
+    def test_fuzzy_search_ranks_prefix_range_first(self, monkeypatch):
+        """测试模糊搜索先在前缀范围内排序，不足时再用子序列扫描补足"""
+        monkeypatch.setattr("channel_store.FUZZY_CANDIDATES", 5)
+        store = ChannelStore()
+        store.add_many(many_channels(50))
+        store.add_many([MemoryChannel("Xchannel 00049", 7000000, "usb")])
+
+        names = [channel.name for channel in store.fuzzy_search("channel 00049", limit=3)]
+
+        assert names[0] == "Channel 00049"
+        assert "Xchannel 00049" in names
+
+    def test_fuzzy_search_prefix_candidates_in_name_order(self, monkeypatch):
+        """测试前缀范围超过候选上限时按名称顺序取候选，最佳匹配不会遗漏"""
+        monkeypatch.setattr("channel_store.FUZZY_CANDIDATES", 5)
+        store = ChannelStore()
+        store.add_many([MemoryChannel(f"Net control {i:02d}", 7000000, "usb") for i in range(20)])
+        store.add_many([MemoryChannel("Net", 7100000, "lsb")])
+
+        assert [channel.name for channel in store.fuzzy_search("net", limit=1)] == ["Net"]
+
+    def test_page_and_position(self):
+        """测试按频率分页与信道所在行"""
+        store = ChannelStore()
+        store.add_many(many_channels(1000))
+
+        page = store.page(10, after=store.channel_at(499))
+
+        assert [channel.frequency for channel in page] == [1850000 + i * 100 for i in range(10)]
+        assert store.position(page[3]) == 503
+        assert store.page(2, before=page[0]) == store.page(2, after=store.channel_at(497))
+        assert store.count(band="160m") == 1000
+        assert store.page(10, store.channel_at(994, band="160m"), band="160m")[-1].name == (
+            "Channel 00999"
+        )
+        assert [c.name for c in store.search("channel 0", 2, after=page[0])] == [
+            "Channel 00501",
+            "Channel 00502",
+        ]
+
+    def test_bands_and_persistence(self, tmp_path):
+        """测试文件数据库重新打开后数据仍在"""
+        path = tmp_path / "sub" / "channels.db"
+        store = ChannelStore(path)
+        store.add_many([MemoryChannel("A", 14100000, "usb"), MemoryChannel("B", 3600000, "lsb")])
+        store.close()
+
+        reopened = ChannelStore(path)
+        assert len(reopened) == 2
+        assert reopened.bands() == ["80m", "20m"]
+        reopened.close()
+
+    def test_name_key(self):
+        """测试名称规范化"""
+        assert name_key("  Repeater   NORTH ") == "repeater north"
+
+
+class TestChannelTableModel:
+    """测试信道表格的分页加载"""
+
+    def test_loads_pages_on_demand(self, qapp):
+        """测试只加载访问到的页面，并限制缓存页数"""
+        store = ChannelStore()
+        store.add_many(many_channels(10000))
+        model = ChannelTableModel(store)
+
+        assert model.rowCount() == 10000
+        assert model._pages == {}
+        assert model.data(model.index(9999, 0)) == "Channel 09999"
+        assert list(model._pages) == [9999 // model.PAGE_SIZE]
+
+        for row in range(0, 10000, model.PAGE_SIZE):
+            assert model.channel(row).name == f"Channel {row:05d}"
+        assert len(model._pages) == model.MAX_PAGES
+        for row in range(9999, 0, -model.PAGE_SIZE):
+            assert model.channel(row).name == f"Channel {row:05d}"
+
+    def test_pages_around_located_channel(self, qapp):
+        """测试从定位到的信道向前后按键分页，不按偏移扫描"""
+        store = ChannelStore()
+        store.add_many(many_channels(1000))
+        model = ChannelTableModel(store)
+        store.channel_at = None  # A call would fail: only keyset paging is allowed
+
+        row = model.row_of(store.nearest(1800000 + 650 * 100))
+
+        assert row == 650
+        for row in range(650, 1000):
+            assert model.channel(row).name == f"Channel {row:05d}"
+        for row in range(649, -1, -1):
+            assert model.channel(row).name == f"Channel {row:05d}"
+
+    def test_search_and_fuzzy_fallback(self, qapp, store):
+        """测试前缀搜索，没有前缀匹配时退回模糊匹配"""
+        model = ChannelTableModel(store)
+
+        model.set_filter("repeater")
+        assert model.rowCount() == 2 and model.matches is None
+        model.set_filter("rptr", band="10m")
+        assert model.rowCount() == 2 and model.matches is not None
+        model.set_filter("", band="40m")
+        assert [model.data(model.index(row, 0)) for row in range(2)] == ["40m CW", "40m SSB"]
+
+
+class TestMemoryBrowser:
+    """测试信道浏览对话框"""
+
+    def test_opens_at_nearest_and_recalls(self, qtbot, store):
+        """测试打开时选中离 VFO 最近的信道，召回发出信号"""
+        browser = MemoryBrowser(store, 29630000)
+        qtbot.addWidget(browser)
+        recalled = []
+        browser.channel_selected.connect(recalled.append)
+
+        assert browser.selected_channel().name == "Repeater North"
+        browser._recall()
+        assert recalled[0].comment == "Tone 88.5"
+
+        browser.search_input.setText("wwv")
+        assert browser.model.rowCount() == 1
+        browser.select_nearest()
+        assert browser.search_input.text() == ""
+        assert browser.selected_channel().name == "Repeater North"
@@ -0,0 +1,47 @@
+import json
+from unittest.mock import patch
+
+import numpy as np
+
+from bench import denoiser_harness
+from bench.denoiser_harness import add_noise, si_snr, synthesize_ssb
+
+
+class TestDenoiserHarness:
+    """测试降噪基准与质量评估工具"""
+
+    def test_synthetic_signal_snr(self):
+        """测试合成 SSB 信号加噪"""
+        clean = synthesize_ssb(1.0)
+        noisy = add_noise(clean, 10.0)
+
+        assert clean.dtype == np.float32
+        assert len(noisy) == 48000
+        assert np.max(np.abs(clean)) <= 0.5 + 1e-6
+        assert si_snr(clean, clean) > 60
+        assert si_snr(clean, noisy) < si_snr(clean, add_noise(clean, 30.0))
+
+    def test_run_reports_metrics_as_json(self):
+        """测试输出 JSON 结果（仅 CPU，无需下载模型）"""
+        results = denoiser_harness.run(
+            ["passthrough", "dsp", "speechbrain"], 1.0, 5.0, [], isolate=False
+        )
+        json.dumps(results)
+
+        dsp = results["engines"]["dsp"]
+        assert dsp["realtime_factor"] > 0
+        assert {"p50_ms", "p95_ms", "p99_ms"} <= set(dsp["latency"])
+        assert dsp["peak_rss_mb"] > 0
+        quality = dsp["quality"]["synthetic_ssb_5db"]
+        assert quality["si_snr_improvement_db"] > 0
+
+        passthrough = results["engines"]["passthrough"]["quality"]["synthetic_ssb_5db"]
+        assert abs(passthrough["si_snr_improvement_db"]) < 0.5
+        assert "skipped" in results["engines"]["speechbrain"]
+
+    def test_deepfilter_skipped_without_model(self, tmp_path):
+        """测试 DeepFilterNet 模型未下载时报告为跳过，而不是测量直通输出"""
+        with patch.object(denoiser_harness, "MODEL_CACHE_DIR", str(tmp_path)):
+            results = denoiser_harness.run(["deepfilter"], 1.0, 5.0, [], isolate=False)
+
+        assert "skipped" in results["engines"]["deepfilter"]
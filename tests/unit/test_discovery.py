@@ -0,0 +1,165 @@
+import json
+
+from discovery import DiscoveredRadio, DiscoveryListener, RadioCache
+from metrics import MetricsRegistry
+from vita49 import (
+    DISCOVERY_STREAM_ID,
+    PACKET_CLASS_DISCOVERY,
+    PACKET_CLASS_METER,
+    PACKET_TYPE_EXT_DATA,
+    PacketHeaderWriter,
+    pack_discovery_payload,
+)
+
+FIELDS = {
+    "model": "FLEX-6400",
+    "serial": "1234-5678",
+    "version": "3.3.32",
+    "nickname": "Shack",
+    "ip": "192.168.1.50",
+    "port": "4992",
+    "status": "Available",
+}
+
+
+def discovery_packet(writer, **changes):
+    payload = pack_discovery_payload({**FIELDS, **changes})
+    return bytes(writer.next_header(len(payload), 0)) + payload
+
+
+def make_writer():
+    return PacketHeaderWriter(
+        DISCOVERY_STREAM_ID, PACKET_CLASS_DISCOVERY, 1, packet_type=PACKET_TYPE_EXT_DATA
+    )
+
+
+class TestRadioCache:
+    """测试发现结果缓存与持久化"""
+
+    def test_update_reports_changes_only(self):
+        """测试仅新电台或信息变化时返回 True，last_seen 不算变化"""
+        cache = RadioCache()
+        radio = DiscoveredRadio("1234", model="FLEX-6400", ip="192.168.1.50", last_seen=1.0)
+
+        assert cache.update(radio) is True
+        seen_again = DiscoveredRadio("1234", "FLEX-6400", "192.168.1.50", last_seen=2.0)
+        assert cache.update(seen_again) is False
+        assert cache.update(DiscoveredRadio("1234", "FLEX-6400", "192.168.1.77")) is True
+        assert cache.find_by_ip("192.168.1.77").serial == "1234"
+
+    def test_save_and_load(self, tmp_path):
+        """测试缓存写入文件后可恢复上次使用的电台"""
+        path = tmp_path / "radios.json"
+        cache = RadioCache(path)
+        cache.update(DiscoveredRadio("1234", model="FLEX-6400", ip="192.168.1.50"))
+        cache.update(DiscoveredRadio("5678", model="FLEX-6600", ip="192.168.1.60"))
+        cache.set_last_radio("5678")
+        cache.save()
+
+        restored = RadioCache(path)
+        restored.load()
+
+        assert set(restored.radios) == {"1234", "5678"}
+        assert restored.last_radio().ip == "192.168.1.60"
+        assert not path.with_suffix(".tmp").exists()
+
+    def test_save_skipped_when_unchanged(self, tmp_path):
+        """测试没有变化时不重写文件"""
+        path = tmp_path / "radios.json"
+        cache = RadioCache(path)
+        cache.save()
+        assert not path.exists()
+
+        cache.update(DiscoveredRadio("1234", ip="192.168.1.50"))
+        cache.save()
+        path.write_text("{}")
+        cache.save()
+        assert path.read_text() == "{}"
+
+    def test_corrupt_file_ignored(self, tmp_path):
+        """测试损坏的缓存文件被忽略"""
+        path = tmp_path / "radios.json"
+        path.write_text("not json")
+        cache = RadioCache(path)
+
+        cache.load()
+
+        assert cache.radios == {}
+        assert cache.last_radio() is None
+
+    def test_unknown_keys_ignored(self, tmp_path):
+        """测试旧版本或新版本写入的多余字段被忽略"""
+        path = tmp_path / "radios.json"
+        path.write_text(
+            json.dumps({"last_serial": "1", "radios": [{"serial": "1", "ip": "10.0.0.2", "x": 1}]})
+        )
+        cache = RadioCache(path)
+
+        cache.load()
+
+        assert cache.last_radio().ip == "10.0.0.2"
+
+
+class TestDiscoveryListener:
+    """测试发现报文监听"""
+
+    def test_new_radio_and_repeats(self):
+        """测试新电台触发回调，重复广播只刷新 last_seen"""
+        metrics = MetricsRegistry()
+        listener = DiscoveryListener(metrics=metrics)
+        found = []
+        listener.add_radio_callback(found.append)
+        writer = make_writer()
+
+        listener.datagram_received(discovery_packet(writer), ("192.168.1.50", 4992))
+        first_seen = found[0].last_seen
+        listener.datagram_received(discovery_packet(writer), ("192.168.1.50", 4992))
+
+        assert len(found) == 1
+        radio = found[0]
+        assert (radio.serial, radio.model, radio.ip, radio.nickname) == (
+            "1234-5678",
+            "FLEX-6400",
+            "192.168.1.50",
+            "Shack",
+        )
+        assert radio.last_seen >= first_seen
+        assert metrics.get("discovery_packets_total").value == 2
+        assert metrics.get("radios_discovered").value == 1
+
+    def test_changed_address_reported(self):
+        """测试电台地址变化时再次回调"""
+        listener = DiscoveryListener(metrics=MetricsRegistry())
+        found = []
+        listener.add_radio_callback(found.append)
+        writer = make_writer()
+
+        listener.datagram_received(discovery_packet(writer), ("192.168.1.50", 4992))
+        moved = discovery_packet(writer, ip="192.168.1.77")
+        listener.datagram_received(moved, ("192.168.1.77", 4992))
+
+        assert [radio.ip for radio in found] == ["192.168.1.50", "192.168.1.77"]
+        assert listener.cache.radios["1234-5678"].ip == "192.168.1.77"
+
+    def test_ignores_other_packets(self):
+        """测试忽略非发现报文和缺少序列号的报文"""
+        listener = DiscoveryListener(metrics=MetricsRegistry())
+        found = []
+        listener.add_radio_callback(found.append)
+        meter = PacketHeaderWriter(0x700, PACKET_CLASS_METER, 1)
+
+        listener.datagram_received(bytes(meter.next_header(8, 0)) + b"\0" * 8, ("10.0.0.1", 1))
+        listener.datagram_received(b"junk", ("10.0.0.1", 1))
+        listener.datagram_received(discovery_packet(make_writer(), serial=""), ("10.0.0.1", 1))
+
+        assert found == []
+
+    def test_missing_ip_uses_sender(self):
+        """测试报文缺少 IP 时使用发送方地址"""
+        listener = DiscoveryListener(metrics=MetricsRegistry())
+        found = []
+        listener.add_radio_callback(found.append)
+
+        listener.datagram_received(discovery_packet(make_writer(), ip="0.0.0.0"), ("10.0.0.9", 1))
+
+        assert found[0].ip == "10.0.0.9"
@@ -0,0 +1,56 @@
+import numpy as np
+
+from display_subscription import Subscription, decimate_bins
+
+
+class TestDecimation:
+    """测试频谱抽取"""
+
+    def test_keeps_peaks(self):
+        """测试每段保留最强（最小）电平"""
+        bins = np.full(1024, 700, dtype=np.uint16)
+        bins[301] = 100
+        bins[900] = 50
+
+        reduced = decimate_bins(bins, 128)
+
+        assert len(reduced) == 128
+        assert reduced[301 * 128 // 1024] == 100
+        assert reduced[900 * 128 // 1024] == 50
+        assert np.count_nonzero(reduced != 700) == 2
+
+    def test_no_reduction(self):
+        """测试宽度为 0 或不小于原宽度时原样返回"""
+        bins = np.arange(100, dtype=np.uint16)
+
+        assert decimate_bins(bins, 0) is bins
+        assert decimate_bins(bins, 200) is bins
+
+    def test_waterfall_rows(self):
+        """测试瀑布图按行抽取"""
+        rows = np.arange(2 * 1000, dtype=np.uint16).reshape(2, 1000)
+
+        reduced = decimate_bins(rows, 10, axis=1)
+
+        assert reduced.shape == (2, 10)
+        np.testing.assert_array_equal(reduced[:, 0], [0, 1000])
+
+
+class TestSubscription:
+    """测试订阅的逐客户端帧率"""
+
+    def test_fps_limit(self):
+        """测试按客户端帧率放行，各数据流独立计时"""
+        subscription = Subscription(fps=5)
+
+        taken = [t for t in np.arange(0, 1, 1 / 30) if subscription.take("pan", t)]
+
+        assert len(taken) == 5
+        assert subscription.take("waterfall", 0.99)
+
+    def test_unsubscribed_stream(self):
+        """测试未订阅的数据流不放行"""
+        subscription = Subscription(streams={"state"})
+
+        assert not subscription.take("pan", 0.0)
+        assert Subscription().take("pan", 0.0)
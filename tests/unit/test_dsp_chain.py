@@ -0,0 +1,195 @@
+import numpy as np
+import pytest
+
+import dsp_chain
+from dsp_chain import (
+    AgcStage,
+    DenoiseStage,
+    DspChain,
+    DspStage,
+    EqStage,
+    GainStage,
+    LimiterStage,
+    build_rx_stages,
+    build_tx_stages,
+)
+
+
+def tone(freq, n=4800, rate=48000, amplitude=0.5):
+    return (amplitude * np.sin(2 * np.pi * freq * np.arange(n) / rate)).astype(np.float32)
+
+
+def rms(x):
+    return float(np.sqrt(np.mean(x.astype(np.float64) ** 2)))
+
+
+class TestStages:
+    """测试各 DSP 处理级"""
+
+    def test_gain_in_place(self):
+        """测试增益原地处理"""
+        buf = np.full(64, 0.25, dtype=np.float32)
+
+        out = GainStage(2.0).process(buf)
+
+        assert out is buf
+        np.testing.assert_allclose(buf, 0.5)
+
+    def test_agc_converges_to_target(self):
+        """测试 AGC 收敛到目标电平"""
+        agc = AgcStage(target=0.25, attack=0.5, release=0.5)
+        signal = tone(1000, amplitude=0.05)
+        for _ in range(40):
+            block = signal[:480].copy()
+            agc.process(block)
+
+        assert rms(block) == pytest.approx(0.25, rel=0.05)
+
+    def test_agc_respects_max_gain(self):
+        """测试 AGC 最大增益限制"""
+        agc = AgcStage(target=0.25, max_gain=2.0, release=1.0)
+        for _ in range(5):
+            agc.process(tone(1000, n=480, amplitude=0.01))
+
+        assert agc.current_gain == pytest.approx(2.0)
+
+    def test_limiter_caps_peaks(self):
+        """测试限幅器限制峰值"""
+        limiter = LimiterStage(threshold=0.5)
+        buf = tone(1000, n=480, amplitude=1.0)
+
+        limiter.process(buf)
+
+        assert np.abs(buf).max() <= 0.5 + 1e-6
+
+    @pytest.mark.parametrize("use_scipy", [True, False])
+    def test_eq_highpass(self, monkeypatch, use_scipy):
+        """测试高通均衡衰减低频并保留高频"""
+        if not use_scipy:
+            monkeypatch.setattr(dsp_chain, "lfilter", None)
+        elif dsp_chain.lfilter is None:
+            pytest.skip("scipy not installed")
+
+        low = tone(50)
+        high = tone(5000)
+        EqStage([("highpass", 500)]).process(low)
+        EqStage([("highpass", 500)]).process(high)
+
+        assert rms(low[2400:]) < 0.05
+        assert rms(high[2400:]) == pytest.approx(rms(tone(5000)), rel=0.05)
+
+    def test_eq_state_carries_across_blocks(self, monkeypatch):
+        """测试均衡器状态跨块连续"""
+        monkeypatch.setattr(dsp_chain, "lfilter", None)
+        signal = tone(3000, n=960)
+        whole = signal.copy()
+        EqStage([("peak", 3000, 6.0, 1.0)]).process(whole)
+
+        eq = EqStage([("peak", 3000, 6.0, 1.0)])
+        first, second = signal[:480].copy(), signal[480:].copy()
+        eq.process(first)
+        eq.process(second)
+
+        np.testing.assert_allclose(np.concatenate((first, second)), whole, atol=1e-5)
+
+    def test_unknown_eq_band(self):
+        """测试未知均衡类型报错"""
+        with pytest.raises(ValueError):
+            EqStage([("notch", 1000)])
+
+    def test_stage_requires_process(self):
+        """测试缺少 process 的处理级在构造时报错，而不是在音频回调中"""
+
+        class Incomplete(DspStage):
+            name = "incomplete"
+
+        with pytest.raises(TypeError):
+            Incomplete()
+
+    def test_denoise_float_engine(self):
+        """测试浮点降噪引擎直接调用"""
+
+        class Engine:
+            def is_ready(self):
+                return True
+
+            def process_float(self, samples):
+                return samples * 0.5
+
+        buf = np.ones(32, dtype=np.float32)
+        DenoiseStage(Engine()).process(buf)
+
+        np.testing.assert_allclose(buf, 0.5)
+
+
+class TestDspChain:
+    """测试 DSP 处理链"""
+
+    def test_bypass_returns_input(self):
+        """测试空处理链直接透传"""
+        chain = DspChain()
+
+        assert chain.process_bytes(b"abc") == b"abc"
+
+    def test_process_bytes_applies_stages(self):
+        """测试 16 位 PCM 经过处理链"""
+        chain = DspChain([GainStage(0.5)])
+        data = np.full(256, 16384, dtype="<i2").tobytes()
+
+        out = np.frombuffer(chain.process_bytes(data), dtype="<i2")
+
+        assert (out == 8192).all()
+
+    def test_process_bytes_reuses_buffers(self):
+        """测试处理过程复用转换缓冲区"""
+        chain = DspChain([GainStage(0.5)])
+        data = np.zeros(256, dtype="<i2").tobytes()
+        chain.process_bytes(data)
+        float_buf, pcm_buf = chain._float_buf, chain._pcm_buf
+
+        chain.process_bytes(data)
+
+        assert chain._float_buf is float_buf
+        assert chain._pcm_buf is pcm_buf
+
+    def test_records_per_stage_histograms(self):
+        """测试记录每级执行时间"""
+        chain = DspChain([GainStage(2.0), LimiterStage()])
+        for _ in range(10):
+            chain.process(np.zeros(128, dtype=np.float32))
+
+        stats = chain.stats()
+
+        assert set(stats) == {"gain", "limiter"}
+        assert stats["gain"]["count"] == 10
+        assert stats["limiter"]["p99_us"] >= stats["limiter"]["p50_us"]
+
+    def test_hot_reconfigure(self):
+        """测试运行中重新配置处理链"""
+        chain = DspChain([GainStage(2.0)])
+        chain.process(np.zeros(16, dtype=np.float32))
+
+        chain.set_stages([GainStage(0.5), LimiterStage()])
+        buf = chain.process(np.full(16, 0.5, dtype=np.float32))
+
+        np.testing.assert_allclose(buf, 0.25)
+        assert chain.histograms["gain"].count == 2
+        assert chain.get_stage("limiter") is not None
+
+    def test_build_from_config(self):
+        """测试根据配置构建收发处理链"""
+        audio_config = {
+            "rx_gain": 1.5,
+            "rx_agc": {"enabled": True, "target": 0.3},
+            "rx_eq": [["highpass", 200]],
+            "rx_limiter": {"enabled": True, "threshold": 0.8, "release": 0.3},
+            "tx_gain": 1.0,
+        }
+
+        rx = build_rx_stages(audio_config, denoiser=object())
+        tx = build_tx_stages(audio_config)
+
+        assert [s.name for s in rx] == ["gain", "agc", "eq", "denoise", "limiter"]
+        assert rx[1].target == 0.3
+        assert (rx[4].threshold, rx[4].release) == (0.8, 0.3)
+        assert tx == []
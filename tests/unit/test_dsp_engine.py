@@ -0,0 +1,61 @@
+from unittest.mock import patch
+
+import numpy as np
+
+from ai_denoiser.dsp_engine import SpectralGateDenoiser
+from ai_denoiser.model_manager import get_denoiser
+
+
+class TestSpectralGateDenoiser:
+    """测试谱减法 DSP 降噪引擎"""
+
+    def test_output_length_matches_input(self):
+        """测试输出长度与输入一致（任意块长）"""
+        denoiser = SpectralGateDenoiser()
+
+        for size in (1024, 100, 777, 1024, 3):
+            data = np.zeros(size, dtype=np.int16).tobytes()
+            assert len(denoiser.process(data)) == size * 2
+
+    def test_reconstructs_tone_after_latency(self):
+        """测试强信号在固定延迟后基本无损重建"""
+        denoiser = SpectralGateDenoiser(over_subtraction=0.0, gain_floor=1.0)
+        n = np.arange(48000)
+        tone = (0.5 * np.sin(2 * np.pi * 1000 * n / 48000)).astype(np.float32)
+
+        output = np.concatenate(
+            [denoiser.process_float(tone[i : i + 1024]) for i in range(0, len(tone), 1024)]
+        )
+
+        delay = SpectralGateDenoiser.FRAME_SIZE
+        np.testing.assert_allclose(output[delay + 2048 :], tone[2048:-delay], atol=1e-4)
+
+    def test_attenuates_stationary_noise(self):
+        """测试平稳噪声被衰减"""
+        denoiser = SpectralGateDenoiser()
+        rng = np.random.default_rng(0)
+        noise = (rng.standard_normal(48000 * 2) * 1000).astype(np.int16)
+
+        output = np.frombuffer(denoiser.process(noise.tobytes()), dtype=np.int16)
+
+        tail_in = np.std(noise[-24000:].astype(np.float64))
+        tail_out = np.std(output[-24000:].astype(np.float64))
+        assert tail_out < tail_in * 0.5
+
+    def test_empty_and_cleanup(self):
+        """测试空输入和清理"""
+        denoiser = SpectralGateDenoiser()
+
+        assert denoiser.process(b"") is None
+        denoiser.cleanup()
+        assert denoiser.is_ready() is False
+        assert denoiser.process(b"\x00\x00") is None
+
+    def test_get_denoiser_dsp_mode(self, tmp_path):
+        """测试 fallback_mode=dsp 选择 DSP 引擎"""
+        config = {"enabled": True, "model_cache_dir": str(tmp_path), "fallback_mode": "dsp"}
+
+        with patch("ai_denoiser.model_manager.detect_gpu", return_value={}):
+            denoiser = get_denoiser(config)
+
+        assert isinstance(denoiser, SpectralGateDenoiser)
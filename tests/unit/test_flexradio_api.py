@@ -265,9 +265,28 @@ class TestFlexRadioAPI:
         api = FlexRadioAPI(mock_client)
         mock_client.send_command.return_value = mock_radio_responses["responses"]["audio_create_tx"]
 
-        await api.enable_tx_audio(sample_rate=48000)
+        stream_id = await api.enable_tx_audio(sample_rate=48000)
 
         mock_client.send_command.assert_called_once_with("audio client create tx 48000")
+        assert stream_id == "0x60000000"
+        assert api.tx_audio_stream_id == "0x60000000"
+
+    @pytest.mark.asyncio
+    async def test_enable_opus_audio(self, mock_client):
+        """测试启用 Opus 压缩远程音频流"""
+        api = FlexRadioAPI(mock_client)
+        mock_client.send_command.return_value = "0x40000008"
+
+        rx_stream = await api.enable_rx_audio(compression="opus")
+        tx_stream = await api.enable_tx_audio(compression="opus")
+
+        assert mock_client.send_command.call_args_list[0].args == (
+            "stream create type=remote_audio_rx compression=OPUS",
+        )
+        assert mock_client.send_command.call_args_list[1].args == (
+            "stream create type=remote_audio_tx compression=OPUS",
+        )
+        assert rx_stream == tx_stream == "0x40000008"
 
     @pytest.mark.asyncio
     async def test_disable_audio(self, mock_client):
@@ -288,6 +307,60 @@ class TestFlexRadioAPI:
 
         mock_client.send_command.assert_called_once_with("sub slice 1 all")
 
+    @pytest.mark.asyncio
+    async def test_set_pan_fps(self, mock_client):
+        """测试设置全景图帧率"""
+        api = FlexRadioAPI(mock_client)
+        await api.set_pan_fps(10)
+        mock_client.send_command.assert_not_called()
+
+        api.pan_id = "0x40000000"
+        await api.set_pan_fps(10)
+
+        mock_client.send_command.assert_called_once_with("display pan set 0x40000000 fps=10")
+        assert api.pan_fps == 10
+
+    @pytest.mark.asyncio
+    async def test_resync(self, mock_client):
+        """测试重连后以流水线方式恢复 slice、全景图和音频流"""
+        api = FlexRadioAPI(mock_client)
+        api.slice_id = "0"
+        api.pan_id = "0x40000000"
+        api.pan_width = 512
+        api.audio_commands = {"rx": "audio client create rx 48000"}
+        api.slice_state = SliceState(frequency=14250000, mode="lsb", rf_gain=30, ptt=True)
+        mock_client.send_commands = AsyncMock(
+            side_effect=[["", "2", "0x40000001", "0x50000001"], ["", ""]]
+        )
+
+        assert await api.resync(4991) is True
+
+        first, second = [c.args[0] for c in mock_client.send_commands.call_args_list]
+        assert first == [
+            "client udpport 4991",
+            "slice create 0 lsb",
+            "display pan create 512 14250000",
+            "audio client create rx 48000",
+        ]
+        assert second == [
+            "sub slice 2 all",
+            "slice set 2 frequency=14250000 mode=lsb rfpower=30 af_gain=50",
+        ]
+        assert api.slice_id == "2"
+        assert api.pan_id == "0x40000001"
+        assert api.rx_audio_stream_id == "0x50000001"
+        assert api.slice_state.ptt is False
+
+    @pytest.mark.asyncio
+    async def test_resync_failure(self, mock_client):
+        """测试恢复命令失败时返回 False"""
+        api = FlexRadioAPI(mock_client)
+        api.slice_id = "0"
+        mock_client.send_commands = AsyncMock(return_value=["", Exception("50000015: busy")])
+
+        assert await api.resync() is False
+        assert api.slice_id == "0"
+
     def test_handle_status_frequency_update(self, mock_client):
         """测试处理状态消息（频率更新）"""
         api = FlexRadioAPI(mock_client)
@@ -405,3 +478,116 @@ class TestFlexRadioAPI:
         api._update_slice_state(["rfpower=invalid"])
 
         assert api.slice_state.rf_gain == original_gain
+
+
+class TestMultiSlice:
+    """测试多 slice 管理"""
+
+    @pytest.mark.asyncio
+    async def test_second_slice_keeps_active(self, mock_client):
+        """测试第二个 slice 独立订阅且不改变当前 slice"""
+        api = FlexRadioAPI(mock_client)
+        mock_client.send_command.side_effect = ["0", "", "1", ""]
+
+        assert await api.create_slice("usb") == "0"
+        assert await api.create_slice("cw") == "1"
+
+        assert list(api.slices) == ["0", "1"]
+        assert api.slice_id == "0"
+        assert api.slices["1"].mode == "cw"
+        assert call("sub slice 1 all") in mock_client.send_command.call_args_list
+
+    def test_status_routed_by_slice_id(self, mock_client):
+        """测试状态消息按 slice ID 更新对应状态并回调"""
+        api = FlexRadioAPI(mock_client)
+        api.slice_id = "1"
+        api.slices["2"] = SliceState(slice_id="2")
+        callback = Mock()
+        api.add_state_callback(callback)
+
+        api._handle_status("S|slice|2|frequency=14250000")
+
+        assert api.slices["2"].frequency == 14250000
+        assert api.slice_state.frequency == 7150000
+        callback.assert_called_once_with(api.slices["2"])
+
+    @pytest.mark.asyncio
+    async def test_setters_target_slice(self, mock_client):
+        """测试设置命令可指定 slice，PTT 使用当前 slice"""
+        api = FlexRadioAPI(mock_client)
+        api.slice_id = "0"
+        api.slices["1"] = SliceState(slice_id="1")
+
+        await api.set_frequency(14250000, slice_id="1")
+        await api.set_mode("cw", slice_id="1")
+        assert api.set_active_slice("1") is True
+        await api.set_ptt(True)
+
+        assert [c.args[0] for c in mock_client.send_command.call_args_list] == [
+            "slice set 1 frequency=14250000",
+            "slice set 1 mode=cw",
+            "xmit 1",
+        ]
+        assert api.slices["1"].ptt is True
+        assert api.slices["0"].ptt is False
+        assert api.set_active_slice("9") is False
+
+    @pytest.mark.asyncio
+    async def test_remove_active_slice(self, mock_client):
+        """测试移除当前 slice 后切换到剩余 slice"""
+        api = FlexRadioAPI(mock_client)
+        api.slice_id = "0"
+        api.slices["1"] = SliceState(slice_id="1")
+
+        await api.remove_slice("0")
+
+        assert list(api.slices) == ["1"]
+        assert api.slice_id == "1"
+
+    @pytest.mark.asyncio
+    async def test_slice_audio(self, mock_client):
+        """测试每个 slice 使用独立 DAX 通道的音频流"""
+        api = FlexRadioAPI(mock_client)
+        api.slice_id = "0"
+        api.slices["1"] = SliceState(slice_id="1")
+        mock_client.send_commands = AsyncMock(
+            side_effect=[["", "0x04000001"], ["", "0x04000002"], ["", ""]]
+        )
+
+        assert await api.enable_slice_audio("0") == "0x04000001"
+        assert await api.enable_slice_audio("1") == "0x04000002"
+        await api.disable_slice_audio("0")
+
+        calls = [c.args[0] for c in mock_client.send_commands.call_args_list]
+        assert calls[1] == ["slice set 1 dax=2", "stream create type=dax_rx dax_channel=2"]
+        assert calls[2] == ["stream remove 0x04000001", "slice set 0 dax=0"]
+        assert api.slices["0"].audio_stream_id is None
+        assert api.slices["1"].dax_channel == 2
+
+    @pytest.mark.asyncio
+    async def test_resync_two_slices(self, mock_client):
+        """测试重连后恢复两个 slice、当前 slice 和 DAX 音频流"""
+        api = FlexRadioAPI(mock_client)
+        api.slices["0"] = SliceState(frequency=7074000, slice_id="0")
+        api.slice_id = "1"
+        api.slice_state = SliceState(frequency=14074000, mode="cw", dax_channel=2)
+        mock_client.send_commands = AsyncMock(
+            side_effect=[["", "3", "4", "0x04000002"], ["", "", "", ""]]
+        )
+
+        assert await api.resync() is True
+
+        first, second = [c.args[0] for c in mock_client.send_commands.call_args_list]
+        assert first == [
+            "client udpport 4991",
+            "slice create 0 usb",
+            "slice create 0 cw",
+            "stream create type=dax_rx dax_channel=2",
+        ]
+        assert second[2:] == [
+            "sub slice 4 all",
+            "slice set 4 frequency=14074000 mode=cw rfpower=50 af_gain=50 dax=2",
+        ]
+        assert list(api.slices) == ["3", "4"]
+        assert api.slice_id == "4"
+        assert api.slice_state.audio_stream_id == "0x04000002"
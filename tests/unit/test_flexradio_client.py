@@ -3,7 +3,24 @@ from unittest.mock import AsyncMock, MagicMock, Mock, patch
 
 import pytest
 
-from flexradio_client import FlexRadioClient
+from flexradio_client import (
+    PRIORITY_BULK,
+    PRIORITY_DISPLAY,
+    PRIORITY_PTT,
+    PRIORITY_TUNING,
+    FlexRadioClient,
+    RadioProtocol,
+    command_priority,
+)
+
+
+def attach_protocol(client):
+    """Connect ``client`` to a RadioProtocol over a mock transport"""
+    protocol = RadioProtocol(client)
+    protocol.connection_made(Mock())
+    client.writer = protocol
+    client.running = True
+    return protocol
 
 
 class TestFlexRadioClient:
@@ -16,7 +33,6 @@ class TestFlexRadioClient:
         assert client.host == "192.168.1.100"
         assert client.port == 4992
         assert client.timeout == 5.0
-        assert client.reader is None
         assert client.writer is None
         assert client.sequence == 0
         assert client.running is False
@@ -26,33 +42,32 @@ class TestFlexRadioClient:
         """测试成功连接"""
         client = FlexRadioClient("192.168.1.100")
 
-        mock_reader = Mock()
-        mock_writer = Mock()
-
-        with patch("asyncio.open_connection", new_callable=AsyncMock) as mock_open:
-            mock_open.return_value = (mock_reader, mock_writer)
+        mock_protocol = Mock()
+        loop = asyncio.get_running_loop()
+        with patch.object(loop, "create_connection", new_callable=AsyncMock) as mock_create:
+            mock_create.return_value = (Mock(), mock_protocol)
 
             result = await client.connect()
 
             assert result is True
             assert client.running is True
-            assert client.reader == mock_reader
-            assert client.writer == mock_writer
-            mock_open.assert_called_once_with("192.168.1.100", 4992)
+            assert client.writer == mock_protocol
+            assert mock_create.call_args.args[1:] == ("192.168.1.100", 4992)
 
     @pytest.mark.asyncio
     async def test_connect_failure(self):
         """测试连接失败"""
         client = FlexRadioClient("invalid_ip")
 
-        with patch("asyncio.open_connection", new_callable=AsyncMock) as mock_open:
-            mock_open.side_effect = Exception("Connection refused")
+        loop = asyncio.get_running_loop()
+        with patch.object(loop, "create_connection", new_callable=AsyncMock) as mock_create:
+            mock_create.side_effect = Exception("Connection refused")
 
             result = await client.connect()
 
             assert result is False
             assert client.running is False
-            mock_open.assert_called_once()
+            mock_create.assert_called_once()
 
     @pytest.mark.asyncio
     async def test_disconnect(self):
@@ -69,7 +84,6 @@ class TestFlexRadioClient:
         await client.disconnect()
 
         assert client.running is False
-        assert client.reader is None
         assert client.writer is None
         mock_writer.close.assert_called_once()
 
@@ -85,7 +99,7 @@ class TestFlexRadioClient:
         client.writer = mock_writer
         client.running = True
 
-        with patch.object(client, "_receive_responses"):
+        with patch.object(client, "_dispatch"):
             future = asyncio.Future()
             future.set_result("OK")
             client.pending_commands[1] = future
@@ -98,6 +112,7 @@ class TestFlexRadioClient:
                     mock_future_class.return_value = mock_future
 
                     result = await client.send_command("test command")
+                    await asyncio.sleep(0)
 
                     assert result == "OK"
                     mock_writer.write.assert_called_once()
@@ -114,7 +129,7 @@ class TestFlexRadioClient:
         client.writer = mock_writer
         client.running = True
 
-        with patch.object(client, "_receive_responses"):
+        with patch.object(client, "_dispatch"):
             with patch("asyncio.wait_for", new_callable=AsyncMock) as mock_wait:
                 mock_wait.side_effect = asyncio.TimeoutError()
 
@@ -125,6 +140,175 @@ class TestFlexRadioClient:
                     with pytest.raises(TimeoutError):
                         await client.send_command("test command")
 
+    @pytest.mark.asyncio
+    async def test_command_metrics(self):
+        """测试命令计数、往返时间和超时计数"""
+        from metrics import MetricsRegistry
+
+        metrics = MetricsRegistry()
+        client = FlexRadioClient("192.168.1.100", metrics=metrics)
+        client.writer = Mock()
+        client.writer.drain = AsyncMock()
+
+        with patch("asyncio.wait_for", new_callable=AsyncMock) as mock_wait:
+            mock_wait.return_value = "OK"
+            await client.send_command("ping")
+            mock_wait.side_effect = asyncio.TimeoutError()
+            with pytest.raises(TimeoutError):
+                await client.send_command("ping")
+
+        assert metrics.get("commands_total").value == 2
+        assert metrics.get("command_rtt_seconds").count == 1
+        assert metrics.get("command_timeouts_total").value == 1
+
+    @pytest.mark.asyncio
+    async def test_connection_lost_fails_pending(self):
+        """测试连接断开时立即失败所有等待中的命令并通知回调"""
+        client = FlexRadioClient("192.168.1.100", timeout=5.0)
+        protocol = attach_protocol(client)
+        lost = Mock()
+        client.set_disconnect_callback(lost)
+
+        command = asyncio.create_task(client.send_command("slice list"))
+        await asyncio.sleep(0)
+        protocol.connection_lost(None)
+
+        with pytest.raises(ConnectionError):
+            await asyncio.wait_for(command, 1.0)
+        assert client.running is False
+        assert client.writer is None
+        assert client.pending_commands == {}
+        lost.assert_called_once_with("connection closed by radio")
+        protocol.transport.close.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_stale_connection_lost_is_ignored(self):
+        """测试旧连接迟到的断开通知不影响新连接"""
+        client = FlexRadioClient("192.168.1.100")
+        old = attach_protocol(client)
+        attach_protocol(client)
+
+        old.connection_lost(None)
+
+        assert client.running is True
+
+    @pytest.mark.asyncio
+    async def test_send_commands_pipelined(self):
+        """测试批量命令一次写出并按顺序返回结果"""
+        client = FlexRadioClient("192.168.1.100", timeout=1.0)
+        protocol = attach_protocol(client)
+
+        batch = asyncio.create_task(client.send_commands(["ping", "bad", "slice create"]))
+        await asyncio.sleep(0)
+        protocol.data_received(b"R3|0|1\nR1|0|\nR2|50000015|Unknown\n")
+        results = await batch
+
+        protocol.transport.write.assert_called_once_with(b"C1|ping\nC2|bad\nC3|slice create\n")
+        assert results[0] == ""
+        assert isinstance(results[1], Exception)
+        assert results[2] == "1"
+
+    @pytest.mark.asyncio
+    async def test_protocol_framing(self):
+        """测试跨 TCP 分段的行拼接与按首字符分发"""
+        client = FlexRadioClient("192.168.1.100")
+        protocol = attach_protocol(client)
+        status, heartbeats = Mock(), Mock()
+        client.set_status_callback(status)
+        client.set_heartbeat_callback(heartbeats)
+
+        protocol.data_received(b"V1.4.0.0\r\nH0000")
+        protocol.data_received(b"0001\nS|slice|0|freq")
+        assert status.call_count == 0
+        protocol.data_received("uency=7150000|name=\u00e9\nM10000001|hello\n\nS|".encode())
+
+        assert client.version == "1.4.0.0"
+        heartbeats.assert_called_once_with("H00000001")
+        status.assert_called_once_with("S|slice|0|frequency=7150000|name=\u00e9")
+        assert protocol._buffer == bytearray(b"S|")
+
+    @pytest.mark.asyncio
+    async def test_protocol_flow_control(self):
+        """测试写缓冲暂停时 drain 等待恢复"""
+        client = FlexRadioClient("192.168.1.100")
+        protocol = attach_protocol(client)
+
+        protocol.pause_writing()
+        drain = asyncio.create_task(protocol.drain())
+        await asyncio.sleep(0)
+        assert not drain.done()
+        protocol.resume_writing()
+        await asyncio.wait_for(drain, 1.0)
+
+        protocol.connection_lost(None)
+        with pytest.raises(ConnectionResetError):
+            await protocol.drain()
+        await protocol.wait_closed()
+
+    def test_command_priority(self):
+        """测试按命令动词划分优先级"""
+        assert command_priority("xmit 0") == PRIORITY_PTT
+        assert command_priority("interlock timeout=0") == PRIORITY_PTT
+        assert command_priority("slice set 0 frequency=7150000") == PRIORITY_TUNING
+        assert command_priority("ping") == PRIORITY_TUNING
+        assert command_priority("display pan set 0x40000000 fps=5") == PRIORITY_DISPLAY
+        assert command_priority("slice create 0 usb") == PRIORITY_BULK
+        assert command_priority("sub slice all") == PRIORITY_BULK
+
+    @pytest.mark.asyncio
+    async def test_priority_queue_and_in_flight_window(self):
+        """测试在途窗口已满时 PTT 直接发送，其余命令按优先级排队"""
+        client = FlexRadioClient("192.168.1.100", timeout=1.0, max_in_flight=2)
+        protocol = attach_protocol(client)
+
+        def written():
+            return [c.args[0].decode() for c in protocol.transport.write.call_args_list]
+
+        commands = [
+            "sub slice all",
+            "audio client create rx 48000",
+            "display pan set 0x40000000 fps=5",
+            "sub meter all",
+            "slice set 0 af_gain=10",
+        ]
+        tasks = [asyncio.create_task(client.send_command(c)) for c in commands]
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert written() == ["C5|slice set 0 af_gain=10\nC3|display pan set 0x40000000 fps=5\n"]
+
+        ptt = asyncio.create_task(client.send_command("xmit 0"))
+        await asyncio.sleep(0)
+        assert written()[-1] == "C6|xmit 0\n"
+
+        protocol.data_received(b"R6|0|\nR5|0|\nR3|0|\n")
+        await ptt
+        await asyncio.sleep(0)
+        assert written()[2:] == ["C1|sub slice all\nC2|audio client create rx 48000\n"]
+
+        protocol.data_received(b"R1|0|\nR2|0|\n")
+        await asyncio.sleep(0)
+        assert written()[-1] == "C4|sub meter all\n"
+        protocol.data_received(b"R4|0|\n")
+        await asyncio.gather(*tasks)
+        assert client._in_flight == set()
+
+    @pytest.mark.asyncio
+    async def test_one_write_per_loop_iteration(self):
+        """测试同一轮事件循环中提交的命令合并为一次写出"""
+        client = FlexRadioClient("192.168.1.100", timeout=1.0)
+        protocol = attach_protocol(client)
+
+        commands = [f"slice set 0 rfgain={i}" for i in range(5)]
+        tasks = [asyncio.create_task(client.send_command(c)) for c in commands]
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        protocol.transport.write.assert_called_once_with(
+            b"".join(f"C{i + 1}|slice set 0 rfgain={i}\n".encode() for i in range(5))
+        )
+        protocol.data_received(b"".join(f"R{i + 1}|0|\n".encode() for i in range(5)))
+        await asyncio.gather(*tasks)
+
     def test_parse_response_success(self):
         """测试解析成功响应"""
         client = FlexRadioClient("192.168.1.100")
@@ -158,6 +342,11 @@ class TestFlexRadioClient:
 
         client._handle_heartbeat("H44|3|4")
 
+        callback = Mock()
+        client.set_heartbeat_callback(callback)
+        client._handle_heartbeat("H44|3|4")
+        callback.assert_called_once_with("H44|3|4")
+
     def test_handle_status_with_callback(self):
         """测试状态消息处理（有回调）"""
         client = FlexRadioClient("192.168.1.100")
@@ -165,7 +354,7 @@ class TestFlexRadioClient:
         callback_mock = Mock()
         client.set_status_callback(callback_mock)
 
-        client._handle_status("S|slice|1|frequency=7150000")
+        client._dispatch("S|slice|1|frequency=7150000\n")
 
         callback_mock.assert_called_once_with("S|slice|1|frequency=7150000")
 
@@ -173,7 +362,7 @@ class TestFlexRadioClient:
         """测试状态消息处理（无回调）"""
         client = FlexRadioClient("192.168.1.100")
 
-        client._handle_status("S|slice|1|frequency=7150000")
+        client._dispatch("S|slice|1|frequency=7150000\n")
 
     def test_set_status_callback(self):
         """测试设置状态回调"""
@@ -0,0 +1,126 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from connection_supervisor import ConnectionSupervisor
+from link_monitor import LINK_DEGRADED, LINK_GOOD, LINK_POOR, LinkMonitor
+from metrics import MetricsRegistry
+
+
+class TestLinkMonitor:
+    """测试链路质量监测"""
+
+    def test_rtt_estimator(self):
+        """测试平滑 RTT 与抖动估计"""
+        metrics = MetricsRegistry()
+        monitor = LinkMonitor(metrics=metrics)
+
+        monitor.record_rtt(0.010)
+        assert monitor.srtt == pytest.approx(0.010)
+        assert monitor.rttvar == pytest.approx(0.005)
+
+        monitor.record_rtt(0.018)
+        assert monitor.srtt == pytest.approx(0.011)
+        assert monitor.rttvar == pytest.approx(0.00575)
+        assert metrics.get("link_rtt_seconds").value == pytest.approx(0.011)
+        assert metrics.get("ping_rtt_seconds").count == 2
+        assert metrics.get("link_health").value == 1.0
+
+    def test_missed_heartbeats(self):
+        """测试根据心跳间隔判定漏收"""
+        metrics = MetricsRegistry()
+        monitor = LinkMonitor(heartbeat_interval=1.0, metrics=metrics)
+        for t in (0.0, 1.0, 2.1):
+            monitor.on_heartbeat(now=t)
+        assert monitor.missed_heartbeats == 0
+
+        monitor.on_heartbeat(now=5.0)
+        assert monitor.missed_heartbeats == 2
+        assert metrics.get("heartbeats_missed_total").value == 2
+        assert monitor.health(now=5.0) == pytest.approx(1 - 2 / 6)
+
+        # Overdue heartbeats lower the score before the next one arrives
+        assert monitor.health(now=8.0) < monitor.health(now=5.0)
+
+    def test_handle_line_alone_is_not_a_missed_heartbeat(self):
+        """测试仅收到连接时的句柄行不会被视为心跳丢失"""
+        monitor = LinkMonitor(heartbeat_interval=1.0, metrics=MetricsRegistry())
+        monitor.on_heartbeat(now=0.0)
+
+        assert monitor.health(now=100.0) == 1.0
+
+    def test_levels_with_hysteresis(self):
+        """测试健康等级变化与迟滞"""
+        monitor = LinkMonitor(window=10, metrics=MetricsRegistry())
+        levels = Mock()
+        monitor.add_level_callback(levels)
+        for _ in range(8):
+            monitor.record_rtt(0.001)
+
+        monitor.record_missed(2)
+        assert monitor.level == LINK_GOOD
+        monitor.record_missed()
+        assert monitor.level == LINK_DEGRADED
+
+        # 0.8 is enough to stay good but not to return to good
+        for _ in range(8):
+            monitor.record_rtt(0.001)
+        assert monitor.health() == pytest.approx(0.8)
+        assert monitor.level == LINK_DEGRADED
+        monitor.record_rtt(0.001)
+        assert monitor.level == LINK_GOOD
+
+        monitor.record_missed(6)
+        assert monitor.level == LINK_POOR
+        assert [c.args[0] for c in levels.call_args_list] == [
+            LINK_DEGRADED,
+            LINK_GOOD,
+            LINK_POOR,
+        ]
+
+    def test_slow_link_degrades(self):
+        """测试高延迟链路的健康分下降"""
+        monitor = LinkMonitor(metrics=MetricsRegistry())
+        for _ in range(20):
+            monitor.record_rtt(0.3)
+
+        assert monitor.level == LINK_POOR
+
+    @pytest.mark.asyncio
+    async def test_run_pings_client(self):
+        """测试周期 ping 记录往返时间与超时"""
+        monitor = LinkMonitor(ping_interval=0.01, metrics=MetricsRegistry())
+        client = Mock()
+        client.running = True
+        client.send_command = AsyncMock(side_effect=["", TimeoutError("Command timeout"), ""])
+
+        task = asyncio.create_task(monitor.run(client))
+        while client.send_command.call_count < 3:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0)
+        task.cancel()
+
+        client.send_command.assert_called_with("ping")
+        assert monitor.srtt is not None
+        assert monitor.missed_heartbeats == 1
+
+    @pytest.mark.asyncio
+    async def test_supervisor_keepalive_feeds_monitor(self):
+        """测试监管器的保活 ping 即使链路繁忙也发送，并把往返时间与超时交给监测器"""
+        monitor = LinkMonitor(ping_interval=0.01, metrics=MetricsRegistry())
+        client = Mock()
+        client.running = True
+        client.last_received = float("inf")
+        client.send_command = AsyncMock(side_effect=["", TimeoutError("Command timeout")])
+        supervisor = ConnectionSupervisor(
+            client, Mock(), link_monitor=monitor, metrics=MetricsRegistry()
+        )
+
+        await supervisor._keepalive()
+        client.abort.assert_not_called()
+        await supervisor._keepalive()
+
+        assert monitor.srtt is not None
+        assert monitor.missed_heartbeats == 1
+        client.abort.assert_called_once_with("keepalive timeout")
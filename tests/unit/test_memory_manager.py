@@ -1,6 +1,6 @@
 import pytest
 
-from memory_manager import MemoryChannel, MemoryManager
+from memory_manager import MemoryChannel, MemoryManager, band_for
 
 
 class TestMemoryChannel:
@@ -28,6 +28,12 @@ class TestMemoryChannel:
         assert channel.rf_gain == 50
         assert channel.af_gain == 50
 
+    def test_band(self):
+        """测试按频率归属波段"""
+        assert MemoryChannel("Test", 14250000, "usb").band == "20m"
+        assert band_for(29700000) == "10m"
+        assert band_for(10000000) == ""
+
 
 class TestMemoryManager:
     """测试存储管理器"""
@@ -210,6 +216,23 @@ class TestMemoryManager:
         assert len(manager.channels) == 1
         assert manager.channels[0].name == "Valid"
 
+    def test_load_from_config_errors_logged_once(self, caplog):
+        """测试无效信道按错误类型汇总为一条警告，并列出前几个信道名"""
+        manager = MemoryManager()
+        channels = [{"name": f"Bad {i}", "frequency": 100 + i, "mode": "usb"} for i in range(5)]
+        channels.append({"name": "No mode", "frequency": 7150000})
+        channels.append({"name": "Loud", "frequency": 7150000, "mode": "usb", "af_gain": 150})
+
+        with caplog.at_level("WARNING", logger="memory_manager"):
+            manager.load_from_config({"memory": {"channels": channels}})
+
+        assert manager.channels == []
+        assert len(caplog.records) == 1
+        assert "Skipped 7 memory channels" in caplog.text
+        assert "invalid frequency (5x: Bad 0, Bad 1, Bad 2, ...)" in caplog.text
+        assert "missing 'mode' (1x: No mode)" in caplog.text
+        assert "invalid AF gain (1x: Loud)" in caplog.text
+
     def test_save_to_config(self):
         """测试保存到配置"""
         manager = MemoryManager()
@@ -277,3 +300,16 @@ class TestMemoryManager:
         assert len(manager.channels) == 2
         assert manager.channels[0].name == "40m Updated"
         assert manager.channels[1].name == "15m"
+
+    def test_comment_roundtrip(self):
+        """测试备注随配置保存，空备注不写入"""
+        manager = MemoryManager()
+        manager.add_channel(MemoryChannel("Net", 7150000, "lsb", comment="Sunday 0900"))
+        manager.add_channel(MemoryChannel("Plain", 7200000, "lsb"))
+
+        config = manager.save_to_config()
+        restored = MemoryManager()
+        restored.load_from_config(config)
+
+        assert restored.channels[0].comment == "Sunday 0900"
+        assert "comment" not in config["memory"]["channels"][1]
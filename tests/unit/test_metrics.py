@@ -0,0 +1,111 @@
+import math
+
+import pytest
+
+from metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+
+class TestHistogram:
+    """测试 HDR 风格执行时间直方图"""
+
+    def test_percentiles(self):
+        """测试百分位统计"""
+        histogram = Histogram()
+        for _ in range(99):
+            histogram.record(10e-6)
+        histogram.record(5e-3)
+
+        assert histogram.percentile(50) == 11.0
+        assert histogram.percentile(100) == pytest.approx(5000.0)
+        assert histogram.max_us == pytest.approx(5000.0)
+        assert histogram.summary()["count"] == 100
+
+    def test_relative_precision(self):
+        """测试各量级的相对误差不超过 1/8"""
+        histogram = Histogram()
+        for us in (3, 17, 250, 4321, 1_000_000, 90_000_000):
+            histogram.reset()
+            histogram.record(us / 1e6)
+            histogram.max_us = math.inf  # compare against the bucket bound
+            bound = histogram.percentile(50)
+            assert us < bound <= us * 1.125 + 1
+
+    def test_power_of_two_buckets(self):
+        """测试 sub_bucket_bits=0 时退化为二次幂分桶"""
+        histogram = Histogram(sub_bucket_bits=0)
+        histogram.record(10e-6)
+        histogram.max_us = math.inf
+
+        assert histogram.percentile(50) == 16.0
+
+    def test_percentile_since_snapshot(self):
+        """测试按快照计算区间百分位"""
+        histogram = Histogram()
+        for _ in range(100):
+            histogram.record(1e-3)
+        since = histogram.snapshot()
+        for _ in range(10):
+            histogram.record(20e-3)
+
+        assert histogram.percentile(50, since) == pytest.approx(20480.0)
+        assert histogram.percentile(50, histogram.snapshot()) == 0.0
+
+    def test_huge_values_clamped(self):
+        """测试超出范围的值落入最后一个桶"""
+        histogram = Histogram()
+        histogram.record(1e6)
+        histogram.record(-1.0)
+
+        assert sum(histogram.counts) == 2
+        assert histogram.counts[-1] == 1
+        assert histogram.counts[0] == 1
+
+
+class TestMetricsRegistry:
+    """测试指标注册表"""
+
+    def test_get_or_create(self):
+        """测试同名指标返回同一对象"""
+        registry = MetricsRegistry()
+        counter = registry.counter("packets_total")
+        counter.inc()
+        counter.inc(4)
+
+        assert registry.counter("packets_total") is counter
+        assert isinstance(counter, Counter)
+        assert registry.get("packets_total").value == 5
+        assert registry.get("missing") is None
+
+    def test_type_conflict(self):
+        """测试同名不同类型时报错"""
+        registry = MetricsRegistry()
+        registry.counter("x")
+
+        with pytest.raises(ValueError):
+            registry.histogram("x")
+
+    def test_gauge_function(self):
+        """测试函数型 gauge 及异常处理"""
+        registry = MetricsRegistry()
+        gauge = registry.gauge("depth")
+        gauge.set(3)
+        assert gauge.value == 3
+
+        gauge.set_function(lambda: 7)
+        assert gauge.value == 7
+
+        gauge.set_function(lambda: 1 / 0)
+        assert math.isnan(gauge.value)
+        assert isinstance(gauge, Gauge)
+
+    def test_snapshot(self):
+        """测试快照包含计数值与直方图摘要"""
+        registry = MetricsRegistry()
+        registry.counter("a_total").inc(2)
+        registry.histogram("b_seconds").record(1e-3)
+
+        snapshot = registry.snapshot()
+
+        assert snapshot["a_total"] == 2
+        assert snapshot["b_seconds"]["count"] == 1
+        assert snapshot["b_seconds"]["p50_us"] == pytest.approx(1000.0)
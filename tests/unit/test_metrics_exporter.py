@@ -0,0 +1,156 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from metrics import MetricsRegistry, Sample
+from metrics_exporter import MetricsExporter, render
+from udp_ingest import UdpIngest
+from vita49 import PACKET_CLASS_PANADAPTER, PacketHeaderWriter
+
+
+@pytest.fixture
+def registry():
+    registry = MetricsRegistry()
+    registry.counter("commands_total", "Commands sent").inc(3)
+    registry.gauge("radio_connected").set(1)
+    rtt = registry.histogram("command_rtt_seconds", "Command round-trip time")
+    for seconds in (0.0002, 0.0008, 0.003, 0.2):
+        rtt.record(seconds)
+    return registry
+
+
+async def http_get(port, path="/metrics", method="GET"):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return head.decode(), body.decode()
+
+
+class TestRender:
+    """测试 Prometheus 文本格式输出"""
+
+    def test_counters_and_gauges(self, registry):
+        """测试计数器与 gauge 输出"""
+        text = render(registry)
+
+        assert "# HELP flexradio_commands_total Commands sent\n" in text
+        assert "# TYPE flexradio_commands_total counter\n" in text
+        assert "flexradio_commands_total 3\n" in text
+        assert "# TYPE flexradio_radio_connected gauge\n" in text
+        assert "flexradio_radio_connected 1\n" in text
+        assert text.endswith("\n")
+
+    def test_histogram_buckets(self, registry):
+        """测试直方图累计分桶、总和与计数"""
+        text = render(registry)
+
+        assert "# TYPE flexradio_command_rtt_seconds histogram\n" in text
+        assert 'flexradio_command_rtt_seconds_bucket{le="0.00025"} 1\n' in text
+        assert 'flexradio_command_rtt_seconds_bucket{le="0.001"} 2\n' in text
+        assert 'flexradio_command_rtt_seconds_bucket{le="0.005"} 3\n' in text
+        assert 'flexradio_command_rtt_seconds_bucket{le="+Inf"} 4\n' in text
+        assert "flexradio_command_rtt_seconds_count 4\n" in text
+        assert "flexradio_command_rtt_seconds_sum 0.204" in text
+
+    def test_collector_samples(self):
+        """测试采集器输出带标签样本，HELP/TYPE 只输出一次"""
+        registry = MetricsRegistry()
+        registry.add_collector(
+            lambda: [
+                Sample("stream_packets_total", "counter", "Packets", {"stream": "0x1"}, 5),
+                Sample("stream_packets_total", "counter", "Packets", {"stream": 'a"b'}, 7),
+            ]
+        )
+        text = render(registry, prefix="")
+
+        assert text.count("# TYPE stream_packets_total counter") == 1
+        assert 'stream_packets_total{stream="0x1"} 5\n' in text
+        assert 'stream_packets_total{stream="a\\"b"} 7\n' in text
+
+    def test_child_registries(self, registry):
+        """测试子注册表的指标按标签输出为同一指标族，移除后不再输出"""
+        parent = MetricsRegistry()
+        parent.add_child(registry, {"radio": "a"})
+        other = MetricsRegistry()
+        other.counter("commands_total", "Commands sent").inc(5)
+        parent.add_child(other, {"radio": "b"})
+
+        text = render(parent)
+
+        assert text.count("# TYPE flexradio_commands_total counter") == 1
+        assert 'flexradio_commands_total{radio="a"} 3\n' in text
+        assert 'flexradio_commands_total{radio="b"} 5\n' in text
+        assert 'flexradio_command_rtt_seconds_bucket{radio="a",le="0.001"} 2\n' in text
+        assert 'flexradio_command_rtt_seconds_count{radio="a"} 4\n' in text
+
+        parent.remove_child(other)
+        assert 'radio="b"' not in render(parent)
+
+    def test_nan_gauge(self):
+        """测试异常 gauge 输出 NaN"""
+        registry = MetricsRegistry()
+        registry.gauge("broken").set_function(lambda: 1 / 0)
+
+        assert "flexradio_broken NaN\n" in render(registry)
+
+    def test_udp_ingest_per_stream(self):
+        """测试 UDP 接收按流 ID 输出统计"""
+        registry = MetricsRegistry()
+        ingest = UdpIngest(metrics=registry)
+        registry.add_collector(ingest.collect)
+        header = PacketHeaderWriter(0x40000000, PACKET_CLASS_PANADAPTER, 1)
+        for i in range(4):
+            packet = bytes(header.next_header(4, 0)) + b"\x00" * 4
+            if i != 2:
+                ingest.datagram_received(packet, None)
+
+        text = render(registry)
+
+        assert 'flexradio_udp_stream_packets_total{stream="0x40000000"} 3\n' in text
+        assert 'flexradio_udp_stream_lost_packets_total{stream="0x40000000"} 1\n' in text
+        assert "flexradio_udp_packets_total 3\n" in text
+
+
+class TestMetricsExporter:
+    """测试 HTTP 指标端点"""
+
+    @pytest_asyncio.fixture
+    async def exporter(self, registry):
+        exporter = MetricsExporter(port=0, metrics=registry)
+        assert await exporter.start()
+        yield exporter
+        await exporter.stop()
+
+    @pytest.mark.asyncio
+    async def test_scrape(self, exporter):
+        """测试 GET /metrics 返回文本格式"""
+        head, body = await http_get(exporter.port)
+
+        assert head.startswith("HTTP/1.1 200 OK")
+        assert "Content-Type: text/plain; version=0.0.4" in head
+        assert "flexradio_commands_total 3" in body
+        assert exporter.scrapes == 1
+
+    @pytest.mark.asyncio
+    async def test_head_and_errors(self, exporter):
+        """测试 HEAD、404 与 405 响应"""
+        head, body = await http_get(exporter.port, method="HEAD")
+        assert head.startswith("HTTP/1.1 200 OK")
+        assert body == ""
+
+        head, _ = await http_get(exporter.port, path="/")
+        assert head.startswith("HTTP/1.1 404")
+
+        head, _ = await http_get(exporter.port, method="POST")
+        assert head.startswith("HTTP/1.1 405")
+
+    @pytest.mark.asyncio
+    async def test_port_in_use(self, exporter):
+        """测试端口被占用时启动失败"""
+        other = MetricsExporter(port=exporter.port, metrics=MetricsRegistry())
+
+        assert not await other.start()
@@ -0,0 +1,60 @@
+import numpy as np
+
+from metrics import MetricsRegistry
+from metrics_overlay import MetricsOverlay
+from panadapter_display import PanadapterWidget
+
+
+class TestMetricsOverlay:
+    """测试性能叠加层"""
+
+    def test_interval_rates_and_percentiles(self, qtbot):
+        """测试区间速率、丢包率与百分位显示"""
+        from PyQt6.QtWidgets import QWidget
+
+        metrics = MetricsRegistry()
+        parent = QWidget()
+        qtbot.addWidget(parent)
+        overlay = MetricsOverlay(parent, metrics=metrics)
+        overlay.lines()
+
+        packets = metrics.counter("udp_packets_total")
+        packets.inc(99)
+        metrics.counter("udp_lost_packets_total").inc(1)
+        for _ in range(10):
+            metrics.histogram("command_rtt_seconds").record(2e-3)
+
+        lines = "\n".join(overlay.lines())
+        assert "loss 1.00%" in lines
+        assert "p50 2.0 ms" in lines
+
+        lines = "\n".join(overlay.lines())
+        assert "loss 0.00%" in lines
+        assert "RTT       p50 - ms" in lines
+
+    def test_toggle(self, qtbot):
+        """测试开关叠加层"""
+        from PyQt6.QtWidgets import QWidget
+
+        parent = QWidget()
+        qtbot.addWidget(parent)
+        overlay = MetricsOverlay(parent, metrics=MetricsRegistry())
+
+        overlay.set_enabled(True)
+        assert overlay.timer.isActive()
+        assert "UDP" in overlay.text()
+
+        overlay.set_enabled(False)
+        assert not overlay.timer.isActive()
+        assert overlay.isHidden()
+
+    def test_panadapter_records_frames(self, qtbot):
+        """测试频谱显示记录帧数与渲染耗时"""
+        metrics = MetricsRegistry()
+        widget = PanadapterWidget(metrics=metrics)
+        qtbot.addWidget(widget)
+
+        widget.update(np.arange(16.0), np.zeros(16))
+
+        assert metrics.get("pan_frames_total").value == 1
+        assert metrics.get("pan_render_seconds").count == 1
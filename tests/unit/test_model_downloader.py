@@ -0,0 +1,275 @@
+import hashlib
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+from ai_denoiser.deepfilter_engine import DeepFilterDenoiser
+from ai_denoiser.downloader import (
+    ModelDownloader,
+    cached_model_dir,
+    is_model_cached,
+    load_manifest,
+)
+from ai_denoiser.model_manager import needs_download
+
+MODEL_FILES = {
+    "model.pt": os.urandom(700_000),
+    "config.yaml": b"sample_rate: 48000\n",
+    "README.md": b"not matched by allow patterns",
+}
+
+
+class _HFStandInHandler(BaseHTTPRequestHandler):
+    """最小 HuggingFace 替身：文件列表 API + 支持 Range 的文件下载"""
+
+    files = MODEL_FILES
+    ranges = []
+    corrupt = False
+    # False leaves sizes out of the file list
+    sizes = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.startswith("/api/models/"):
+            siblings = [
+                {"rfilename": name, "lfs": {"sha256": hashlib.sha256(data).hexdigest()}}
+                for name, data in self.files.items()
+            ]
+            if self.sizes:
+                for sibling, data in zip(siblings, self.files.values()):
+                    sibling["size"] = sibling["lfs"]["size"] = len(data)
+            body = json.dumps({"siblings": siblings}).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        name = self.path.rsplit("/", 1)[-1]
+        data = self.files.get(name)
+        if data is None:
+            self.send_error(404)
+            return
+        if self.corrupt:
+            data = data[:-1] + b"\x00"
+
+        range_header = self.headers.get("Range")
+        type(self).ranges.append(range_header)
+        if range_header:
+            start = int(range_header.split("=")[1].split("-")[0])
+            if start >= len(data):
+                self.send_error(416)
+                return
+            body = data[start:]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+        else:
+            body = data
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def hf_server():
+    _HFStandInHandler.ranges = []
+    _HFStandInHandler.corrupt = False
+    _HFStandInHandler.sizes = True
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _HFStandInHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+class TestModelDownloader:
+    """测试后台模型下载管理器"""
+
+    def test_download_verifies_and_writes_manifest(self, tmp_path, hf_server):
+        """测试下载、校验并写入清单"""
+        downloader = ModelDownloader(str(tmp_path), base_url=hf_server)
+
+        assert downloader.download("deepfilter") is True
+
+        model_path = tmp_path / "deepfilter" / "model.pt"
+        assert model_path.read_bytes() == MODEL_FILES["model.pt"]
+        assert not (tmp_path / "deepfilter" / "README.md").exists()
+
+        entry = load_manifest(str(tmp_path))["models"]["deepfilter"]
+        assert entry["files"]["model.pt"]["sha256"] == hashlib.sha256(
+            MODEL_FILES["model.pt"]
+        ).hexdigest()
+        assert is_model_cached(str(tmp_path), "deepfilter") is True
+
+    def test_resume_partial_download(self, tmp_path, hf_server):
+        """测试断点续传"""
+        local_dir = tmp_path / "deepfilter"
+        local_dir.mkdir()
+        (local_dir / "model.pt.part").write_bytes(MODEL_FILES["model.pt"][:300_000])
+
+        downloader = ModelDownloader(str(tmp_path), base_url=hf_server)
+
+        assert downloader.download("deepfilter") is True
+        assert "bytes=300000-" in _HFStandInHandler.ranges
+        assert (local_dir / "model.pt").read_bytes() == MODEL_FILES["model.pt"]
+        assert not (local_dir / "model.pt.part").exists()
+
+    @pytest.mark.parametrize("sizes", [True, False])
+    def test_stale_partial_restarts(self, tmp_path, hf_server, sizes):
+        """测试部分文件比远端文件大（远端文件已变更）时删除并从头下载"""
+        local_dir = tmp_path / "deepfilter"
+        local_dir.mkdir()
+        (local_dir / "model.pt.part").write_bytes(MODEL_FILES["model.pt"])
+        files = dict(MODEL_FILES, **{"model.pt": MODEL_FILES["model.pt"][:-10]})
+        # Without sizes the stale file is only noticed when the server answers 416
+        _HFStandInHandler.sizes = sizes
+
+        with patch.object(_HFStandInHandler, "files", files):
+            downloader = ModelDownloader(str(tmp_path), base_url=hf_server)
+            assert downloader.download("deepfilter") is True
+
+        assert (local_dir / "model.pt").read_bytes() == files["model.pt"]
+        assert not (local_dir / "model.pt.part").exists()
+        assert ("bytes=700000-" in _HFStandInHandler.ranges) is not sizes
+
+    def test_checksum_mismatch_fails(self, tmp_path, hf_server):
+        """测试校验失败"""
+        _HFStandInHandler.corrupt = True
+        downloader = ModelDownloader(str(tmp_path), base_url=hf_server)
+
+        assert downloader.download("deepfilter") is False
+        assert "checksum" in downloader.error
+        assert not (tmp_path / "deepfilter" / "model.pt").exists()
+        assert is_model_cached(str(tmp_path), "deepfilter") is None
+
+    def test_verified_files_are_skipped(self, tmp_path, hf_server):
+        """测试已校验文件不重复下载"""
+        downloader = ModelDownloader(str(tmp_path), base_url=hf_server)
+        assert downloader.download("deepfilter") is True
+        _HFStandInHandler.ranges = []
+
+        assert downloader.download("deepfilter") is True
+        assert _HFStandInHandler.ranges == []
+
+    def test_background_download_reports_progress(self, tmp_path, hf_server):
+        """测试后台线程下载和进度回调"""
+        progress = []
+        finished = []
+        downloader = ModelDownloader(
+            str(tmp_path),
+            base_url=hf_server,
+            progress_callback=lambda done, total, name: progress.append((done, total)),
+            finished_callback=finished.append,
+        )
+
+        thread = downloader.start("deepfilter")
+
+        assert thread is not threading.current_thread()
+        assert downloader.wait(timeout=10)
+        assert finished == [True]
+        total = len(MODEL_FILES["model.pt"]) + len(MODEL_FILES["config.yaml"])
+        assert progress[-1] == (total, total)
+        assert all(a[0] <= b[0] for a, b in zip(progress, progress[1:]))
+
+    def test_unknown_model_type(self, tmp_path):
+        """测试未知模型类型"""
+        downloader = ModelDownloader(str(tmp_path), base_url="http://127.0.0.1:9")
+
+        assert downloader.download("unknown") is False
+
+
+class TestNeedsDownloadManifest:
+    """测试 needs_download 使用下载清单"""
+
+    def test_manifest_skips_filesystem_scan(self, tmp_path, hf_server):
+        """测试清单命中时跳过目录扫描"""
+        ModelDownloader(str(tmp_path), base_url=hf_server).download("deepfilter")
+        config = {"enabled": True, "model_cache_dir": str(tmp_path)}
+
+        with patch("ai_denoiser.model_manager.detect_gpu", return_value={}), patch(
+            "ai_denoiser.model_manager.os.listdir"
+        ) as mock_listdir:
+            status = needs_download(config)
+
+        assert status["deepfilter_needed"] is False
+        mock_listdir.assert_not_called()
+
+    def test_falls_back_to_scan_without_manifest(self, tmp_path):
+        """测试无清单时回退到目录扫描"""
+        (tmp_path / "deepfilter").mkdir()
+        (tmp_path / "deepfilter" / "model.pt").write_bytes(b"x")
+        config = {"enabled": True, "model_cache_dir": str(tmp_path)}
+
+        with patch("ai_denoiser.model_manager.detect_gpu", return_value={}):
+            status = needs_download(config)
+
+        assert status["deepfilter_needed"] is False
+
+
+class TestEngineLoading:
+    """测试降噪引擎只从下载缓存加载模型"""
+
+    def make_engine(self, cache_dir):
+        engine = DeepFilterDenoiser(str(cache_dir))
+        engine._ensure_backend = lambda: True
+        engine._DFModel = Mock()
+        return engine
+
+    def test_fails_fast_without_model(self, tmp_path):
+        """测试模型未下载时立即失败，不在调用线程下载"""
+        engine = self.make_engine(tmp_path)
+
+        assert cached_model_dir(str(tmp_path), "deepfilter") is None
+        assert engine.load_model() is False
+        engine._DFModel.assert_not_called()
+
+    def test_loads_downloaded_model(self, tmp_path, hf_server):
+        """测试下载完成后从清单记录的目录加载"""
+        ModelDownloader(str(tmp_path), base_url=hf_server).download("deepfilter")
+        engine = self.make_engine(tmp_path)
+
+        assert cached_model_dir(str(tmp_path), "deepfilter") == str(tmp_path / "deepfilter")
+        assert engine.load_model() is True
+        assert engine.ready
+
+
+class TestSettingsDialogDownload:
+    """测试设置对话框关闭时取消下载"""
+
+    @pytest.mark.parametrize("close", ["reject", "accept"])
+    def test_cancel_on_close_reports_nothing(self, qtbot, tmp_path, close):
+        """测试关闭对话框（取消或确定）取消下载后不弹出失败提示"""
+        from config_manager import ConfigManager
+        from settings_dialog import SettingsDialog
+
+        audio_manager = Mock()
+        audio_manager.get_input_devices.return_value = []
+        with patch.object(Path, "home", return_value=tmp_path), patch(
+            "settings_dialog.detect_gpu", return_value={}
+        ), patch("settings_dialog.needs_download", return_value={}):
+            dialog = SettingsDialog(ConfigManager(), audio_manager)
+            qtbot.addWidget(dialog)
+        dialog.downloader = Mock()
+        dialog.downloader.cancelled = False
+        dialog.downloader.is_running.return_value = True
+
+        def cancel():
+            dialog.downloader.cancelled = True
+            dialog.download_finished.emit(False)
+
+        dialog.downloader.cancel.side_effect = cancel
+        with patch("settings_dialog.QMessageBox") as message_box:
+            getattr(dialog, close)()
+            dialog._on_download_finished(False)
+
+        dialog.downloader.cancel.assert_called_once()
+        message_box.warning.assert_not_called()
@@ -0,0 +1,125 @@
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+onnx = pytest.importorskip("onnx")
+
+from onnx import TensorProto, helper, numpy_helper  # noqa: E402
+
+from ai_denoiser.model_manager import get_denoiser  # noqa: E402
+from ai_denoiser.onnx_engine import OnnxDenoiser  # noqa: E402
+
+FRAMES = 256
+
+
+def _write_half_gain_model(path):
+    """构造一个 [1, FRAMES] -> [1, FRAMES] 的 0.5 倍增益模型 (MatMul)"""
+    weight = (np.eye(FRAMES) * 0.5).astype(np.float32)
+    graph = helper.make_graph(
+        [helper.make_node("MatMul", ["audio", "w"], ["enhanced"])],
+        "half_gain",
+        [helper.make_tensor_value_info("audio", TensorProto.FLOAT, [1, FRAMES])],
+        [helper.make_tensor_value_info("enhanced", TensorProto.FLOAT, [1, FRAMES])],
+        [numpy_helper.from_array(weight, "w")],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)], ir_version=8)
+    onnx.save(model, str(path))
+
+
+@pytest.fixture
+def model_path(tmp_path):
+    path = tmp_path / "onnx" / "denoiser.onnx"
+    path.parent.mkdir()
+    _write_half_gain_model(path)
+    return path
+
+
+class TestOnnxDenoiser:
+    """测试 ONNX Runtime CPU 降噪引擎"""
+
+    def test_load_fp32_and_process(self, tmp_path, model_path):
+        """测试加载 fp32 模型并处理 PCM 数据"""
+        denoiser = OnnxDenoiser(str(tmp_path), quantize=False, num_threads=1)
+
+        assert denoiser.load_model() is True
+        assert denoiser.is_ready()
+        assert denoiser.frames == FRAMES
+
+        samples = (np.arange(FRAMES * 2) % 200 * 100).astype(np.int16)
+        result = np.frombuffer(denoiser.process(samples.tobytes()), dtype=np.int16)
+
+        np.testing.assert_allclose(result, samples // 2, atol=1)
+
+    def test_process_pads_partial_chunk(self, tmp_path, model_path):
+        """测试非整块长度输入"""
+        denoiser = OnnxDenoiser(str(tmp_path), quantize=False, num_threads=1)
+        denoiser.load_model()
+
+        samples = np.full(FRAMES + 10, 0.5, dtype=np.float32)
+        result = denoiser.process_float(samples)
+
+        assert len(result) == FRAMES + 10
+        np.testing.assert_allclose(result, 0.25, atol=1e-6)
+
+    def test_io_buffers_are_reused(self, tmp_path, model_path):
+        """测试 IO binding 缓冲区复用"""
+        denoiser = OnnxDenoiser(str(tmp_path), quantize=False, num_threads=1)
+        denoiser.load_model()
+        input_buffer = denoiser._input
+        output_buffer = denoiser._output
+
+        denoiser.process(b"\x10\x00" * FRAMES)
+        denoiser.process(b"\x20\x00" * FRAMES)
+
+        assert denoiser._input is input_buffer
+        assert denoiser._output is output_buffer
+
+    def test_int8_quantization_cached(self, tmp_path, model_path):
+        """测试 int8 动态量化模型生成并缓存"""
+        denoiser = OnnxDenoiser(str(tmp_path), quantize=True, num_threads=1)
+
+        assert denoiser.load_model() is True
+        quantized = model_path.parent / "denoiser.int8.onnx"
+        assert quantized.exists()
+
+        result = denoiser.process_float(np.full(FRAMES, 0.5, dtype=np.float32))
+        np.testing.assert_allclose(result, 0.25, atol=0.01)
+
+        with patch("onnxruntime.quantization.quantize_dynamic") as mock_quantize:
+            OnnxDenoiser(str(tmp_path), quantize=True, num_threads=1).load_model()
+            mock_quantize.assert_not_called()
+
+    def test_missing_model(self, tmp_path):
+        """测试模型文件缺失"""
+        denoiser = OnnxDenoiser(str(tmp_path))
+
+        assert denoiser.load_model() is False
+        assert denoiser.process(b"\x00\x00" * 10) is None
+
+    def test_cleanup(self, tmp_path, model_path):
+        """测试释放资源"""
+        denoiser = OnnxDenoiser(str(tmp_path), quantize=False, num_threads=1)
+        denoiser.load_model()
+
+        denoiser.cleanup()
+
+        assert denoiser.is_ready() is False
+        assert denoiser.session is None
+
+    def test_get_denoiser_onnx_mode(self, tmp_path, model_path):
+        """测试 fallback_mode=onnx 时选择 ONNX 引擎"""
+        config = {
+            "enabled": True,
+            "model_cache_dir": str(tmp_path),
+            "fallback_mode": "onnx",
+            "onnx_quantize": False,
+            "onnx_threads": 1,
+        }
+
+        with patch("ai_denoiser.model_manager.detect_gpu", return_value={}):
+            denoiser = get_denoiser(config)
+
+        assert isinstance(denoiser, OnnxDenoiser)
+        assert denoiser.is_ready()
@@ -0,0 +1,66 @@
+import json
+
+from bench import perf_suite
+
+
+class TestPerfSuite:
+    """测试端到端性能基准与回归门限"""
+
+    def test_compare_flags_regressions(self):
+        """测试越小越好与越大越好两类指标的回归判断"""
+        baseline = {
+            "benchmarks": {
+                "pan": {"render_ms": 10.0},
+                "status": {"lines_per_s": 100000.0},
+                "waterfall": {"update_ms": 2.0},
+            }
+        }
+        current = {
+            "benchmarks": {
+                "pan": {"render_ms": 14.0},
+                "status": {"lines_per_s": 60000.0},
+                "waterfall": {"update_ms": 1.0},
+            }
+        }
+
+        regressions = perf_suite.compare(current, baseline, 0.25)
+        metrics = {r["metric"] for r in regressions}
+
+        assert metrics == {"pan.render_ms", "status.lines_per_s"}
+        assert perf_suite.compare(current, baseline, 0.5) == []
+
+    def test_compare_fails_missing_metrics(self):
+        """测试已运行的基准缺少门限指标时视为回归，未运行的基准不参与比较"""
+        baseline = {"benchmarks": {"pan": {"render_ms": 10.0}, "waterfall": {"update_ms": 2.0}}}
+        current = {"benchmarks": {"pan": {"error": "no display"}}}
+
+        regressions = perf_suite.compare(current, baseline, 0.25)
+
+        assert regressions == [
+            {"metric": "pan.render_ms", "baseline": 10.0, "current": None, "change": None}
+        ]
+
+    def test_quick_run_emits_json(self):
+        """测试快速模式输出 JSON 结果"""
+        results = perf_suite.run(["status", "audio"], quick=True)
+        json.dumps(results)
+
+        assert results["quick"] is True
+        assert results["benchmarks"]["status"]["lines_per_s"] > 0
+        audio = results["benchmarks"]["audio"]
+        assert audio["callback_p99_ms"] > 0
+        assert audio["underruns"] == 0
+
+    def test_main_fails_on_regression(self, tmp_path):
+        """测试相对基线回归时返回非零退出码"""
+        baseline = tmp_path / "baseline.json"
+        baseline.write_text(json.dumps({"benchmarks": {"status": {"lines_per_s": 1e12}}}))
+        output = tmp_path / "results.json"
+
+        code = perf_suite.main(
+            ["--only", "status", "--quick", "--baseline", str(baseline), "--output", str(output)]
+        )
+
+        assert code == 1
+        results = json.loads(output.read_text())
+        assert results["regressions"][0]["metric"] == "status.lines_per_s"
@@ -0,0 +1,169 @@
+import asyncio
+import base64
+import json
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from flexradio_api import SliceState
+from metrics import MetricsRegistry
+from radio_daemon import (
+    AudioPlayout,
+    DaemonAPI,
+    RadioDaemon,
+    _ControlClient,
+)
+from session_manager import SessionManager
+
+
+class TestControlClient:
+    """测试控制连接的输出队列"""
+
+    @pytest.mark.asyncio
+    async def test_slow_client_keeps_latest_event(self):
+        """测试慢客户端只保留每个数据流的最新事件，回复不丢失"""
+        dropped = MetricsRegistry().counter("dropped")
+        writer = Mock()
+        unblock = asyncio.Event()
+
+        async def drain():
+            await unblock.wait()
+
+        writer.drain = drain
+        client = _ControlClient(writer, dropped)
+        task = asyncio.create_task(client.run())
+
+        client.event(("a", "pan"), b"frame 1\n")
+        await asyncio.sleep(0)
+        for frame in range(2, 6):
+            client.event(("a", "pan"), f"frame {frame}\n".encode())
+        client.reply({"id": 1, "ok": True, "result": None})
+        unblock.set()
+        await asyncio.sleep(0.01)
+        task.cancel()
+
+        written = b"".join(call.args[0] for call in writer.write.call_args_list).split(b"\n")
+        assert written[0] == b"frame 1"
+        assert json.loads(written[1])["id"] == 1
+        assert written[2] == b"frame 5"
+        assert dropped.value == 3
+
+    @pytest.mark.asyncio
+    async def test_audio_blocks_kept_in_order(self):
+        """测试音频块按序排队，超出上限时丢弃最旧的块"""
+        dropped = MetricsRegistry().counter("dropped")
+        writer = Mock()
+        unblock = asyncio.Event()
+
+        async def drain():
+            await unblock.wait()
+
+        writer.drain = drain
+        client = _ControlClient(writer, dropped)
+        task = asyncio.create_task(client.run())
+
+        client.audio(b"block 0\n")
+        await asyncio.sleep(0)
+        for block in range(1, client.MAX_AUDIO_BLOCKS + 3):
+            client.audio(f"block {block}\n".encode())
+        unblock.set()
+        await asyncio.sleep(0.01)
+        task.cancel()
+
+        written = b"".join(call.args[0] for call in writer.write.call_args_list).split(b"\n")
+        blocks = [int(line.split()[1]) for line in written if line]
+        assert blocks == [0] + list(range(3, client.MAX_AUDIO_BLOCKS + 3))
+        assert dropped.value == 2
+
+
+class TestRadioDaemon:
+    """测试守护进程控制请求"""
+
+    @pytest.mark.asyncio
+    async def test_request_errors(self):
+        """测试未知命令、未知电台与格式错误的请求"""
+        daemon = RadioDaemon(SessionManager(metrics=MetricsRegistry()))
+        client = Mock()
+
+        await daemon._request(client, b'{"id": 1, "cmd": "reboot"}')
+        await daemon._request(client, b'{"id": 2, "cmd": "set_frequency", "hz": 7000000}')
+        await daemon._request(client, b"not json")
+        await daemon._request(client, b'{"id": 4, "cmd": "radios"}')
+
+        replies = [call.args[0] for call in client.reply.call_args_list]
+        assert replies[0] == {"id": 1, "ok": False, "error": "Unknown command: reboot"}
+        assert replies[1] == {"id": 2, "ok": False, "error": "No radio connected"}
+        assert replies[2]["ok"] is False and replies[2]["error"].startswith("Bad request")
+        assert replies[3] == {"id": 4, "ok": True, "result": []}
+
+    @pytest.mark.asyncio
+    async def test_requests_without_id(self):
+        """测试不带 id 的请求成功时不回复，失败时仍回复错误"""
+        daemon = RadioDaemon(SessionManager(metrics=MetricsRegistry()))
+        client = Mock()
+
+        await daemon._request(client, b'{"cmd": "radios"}')
+        await daemon._request(client, b'{"cmd": "tx_audio", "pcm": ""}')
+
+        replies = [call.args[0] for call in client.reply.call_args_list]
+        assert replies == [{"id": None, "ok": False, "error": "No radio connected"}]
+
+
+def audio_event(seq, samples, radio="shack", rate=48000):
+    pcm = np.asarray(samples, dtype="<i2").tobytes()
+    return {"event": "audio", "radio": radio, "seq": seq, "rate": rate,
+            "pcm": base64.b64encode(pcm).decode()}
+
+
+class TestDaemonAPI:
+    """测试前端侧的守护进程电台状态"""
+
+    def test_state_and_link_events(self):
+        """测试状态事件更新 slice（含其他前端打开的 slice），忽略其他电台，链路事件转给回调"""
+        api = DaemonAPI(Mock(), "shack")
+        api._load({"active_slice": "0", "slices": [
+            {"slice": "0", "frequency": 7150000, "mode": "usb", "rf_gain": 50, "af_gain": 50,
+             "ptt": False},
+        ]})
+        changes, links = [], []
+        api.add_state_callback(changes.append)
+        api.add_link_callback(links.append)
+        state = {"frequency": 14250000, "mode": "lsb", "rf_gain": 40, "af_gain": 60, "ptt": False}
+
+        api._on_event({"event": "state", "radio": "shack", "slice": "1", **state})
+        api._on_event({"event": "state", "radio": "other", "slice": "0", **state})
+        api._on_event({"event": "link", "radio": "shack", "state": "lost"})
+
+        assert api.slice_id == "0" and api.slice_state.frequency == 7150000
+        assert api.slices["1"] == SliceState(14250000, "lsb", 40, 60, False, "1")
+        assert changes == [api.slices["1"]]
+        assert links == ["lost"]
+
+
+class TestAudioPlayout:
+    """测试守护进程音频的前端播放缓冲"""
+
+    def test_rechunks_blocks(self):
+        """测试按块序号缓冲后切成声卡块大小，缓冲不足时补静音"""
+        playout = AudioPlayout("shack", 48000, chunk_size=4, jitter_blocks=2)
+
+        assert playout.read_bytes() == bytes(8)
+        playout.on_event(audio_event(17, [1, 2, 3]))
+        playout.on_event(audio_event(18, [4, 5, 6]))
+        playout.on_event(audio_event(19, [7, 8, 9], radio="other"))
+
+        assert np.frombuffer(playout.read_bytes(), dtype="<i2").tolist() == [1, 2, 3, 4]
+        assert np.frombuffer(playout.read_bytes(), dtype="<i2").tolist() == [5, 6, 0, 0]
+        assert playout.underruns == 2
+
+    def test_rate_mismatch(self, caplog):
+        """测试采样率与本地不一致时丢弃音频并只警告一次"""
+        playout = AudioPlayout("shack", 48000, chunk_size=4, jitter_blocks=1)
+
+        with caplog.at_level("WARNING", logger="radio_daemon"):
+            playout.on_event(audio_event(0, [1, 2, 3, 4], rate=24000))
+            playout.on_event(audio_event(1, [1, 2, 3, 4], rate=24000))
+
+        assert len(playout.jitter) == 0
+        assert len(caplog.records) == 1
@@ -0,0 +1,44 @@
+import numpy as np
+
+from resampler import Resampler
+
+
+class TestResampler:
+    """测试流式重采样器"""
+
+    def test_passthrough(self):
+        """测试同采样率直通"""
+        resampler = Resampler(48000, 48000)
+        samples = np.arange(10, dtype=np.float32)
+
+        assert resampler.process(samples) is samples
+
+    def test_downsample_block_sizes(self):
+        """测试 48k->24k 分块输出总长度"""
+        resampler = Resampler(48000, 24000)
+
+        total = sum(len(resampler.process(np.zeros(1024, dtype=np.float32))) for _ in range(10))
+
+        assert abs(total - 5120) <= 1
+
+    def test_downsample_preserves_tone_across_blocks(self):
+        """测试分块处理时音调连续"""
+        n = np.arange(48000)
+        tone = np.sin(2 * np.pi * 1000 * n / 48000).astype(np.float32)
+        resampler = Resampler(48000, 24000)
+
+        blocks = [resampler.process(tone[i : i + 1000]) for i in range(0, 48000, 1000)]
+        output = np.concatenate(blocks)
+
+        # 31-tap FIR group delay: 15 input samples = 7.5 output samples
+        m = np.arange(len(output)) - 7.5
+        expected = np.sin(2 * np.pi * 1000 * m / 24000)
+        np.testing.assert_allclose(output[100:-100], expected[100:-100], atol=0.02)
+
+    def test_upsample(self):
+        """测试上采样"""
+        resampler = Resampler(24000, 48000)
+
+        total = sum(len(resampler.process(np.ones(100, dtype=np.float32))) for _ in range(5))
+
+        assert abs(total - 1000) <= 1
@@ -0,0 +1,160 @@
+import numpy as np
+import pytest
+
+from audio_codec import PcmCodec
+from rx_audio import JitterBuffer, RxAudioMixer, RxAudioStream
+
+
+def pcm_payload(value, frames=128):
+    return np.full((frames, 2), value, dtype=">f4").tobytes()
+
+
+class TestJitterBuffer:
+    """测试抖动缓冲"""
+
+    def test_waits_for_target_depth(self):
+        """测试缓冲达到目标深度后才输出"""
+        jitter = JitterBuffer(target_depth=2)
+        jitter.push(0, b"a")
+
+        assert jitter.pop() == (None, None, False)
+
+        jitter.push(1, b"b")
+        assert jitter.pop() == (b"a", None, False)
+        assert jitter.pop() == (b"b", None, False)
+
+    def test_reorders_packets(self):
+        """测试乱序包按序输出"""
+        jitter = JitterBuffer(target_depth=3)
+        for seq, payload in [(0, b"a"), (2, b"c"), (1, b"b")]:
+            jitter.push(seq, payload)
+
+        assert [jitter.pop()[0] for _ in range(3)] == [b"a", b"b", b"c"]
+
+    def test_reports_loss_with_next_payload(self):
+        """测试丢包时返回后续包供 FEC 使用"""
+        jitter = JitterBuffer(target_depth=2)
+        jitter.push(0, b"a")
+        jitter.push(2, b"c")
+
+        jitter.pop()
+        assert jitter.pop() == (None, b"c", True)
+        assert jitter.lost == 1
+
+    def test_sequence_wraparound(self):
+        """测试 4 位序号回绕"""
+        jitter = JitterBuffer(target_depth=1)
+        payloads = []
+        for i in range(20):
+            jitter.push(i & 0xF, bytes([i]))
+            payloads.append(jitter.pop()[0])
+
+        assert payloads == [bytes([i]) for i in range(20)]
+        assert jitter.lost == 0
+
+    def test_late_and_overflow(self):
+        """测试迟到包丢弃与溢出处理"""
+        jitter = JitterBuffer(target_depth=1, max_depth=4)
+        jitter.push(5, b"x")
+        jitter.pop()
+        jitter.push(4, b"late")
+        assert jitter.late == 1
+
+        for seq in range(6, 12):
+            jitter.push(seq, b"y")
+        assert len(jitter) == 4
+        assert jitter.overflows == 2
+
+    def test_underrun_reprimes(self):
+        """测试欠载后重新缓冲"""
+        jitter = JitterBuffer(target_depth=2)
+        jitter.push(0, b"a")
+        jitter.push(1, b"b")
+        jitter.pop()
+        jitter.pop()
+
+        assert jitter.pop() == (None, None, False)
+        assert jitter.underruns == 1
+
+    def test_set_target_depth(self):
+        """测试调整目标深度在下次重新缓冲时生效"""
+        jitter = JitterBuffer(target_depth=1, max_depth=2)
+        jitter.set_target_depth(3)
+        assert jitter.max_depth == 4
+
+        jitter.push(0, b"a")
+        jitter.push(1, b"b")
+        assert jitter.pop() == (None, None, False)
+        jitter.push(2, b"c")
+        assert jitter.pop() == (b"a", None, False)
+
+
+class TestRxAudioStream:
+    """测试接收音频流"""
+
+    def test_read_bytes_resamples_to_output_rate(self):
+        """测试解码并重采样为输出采样率的 int16"""
+        stream = RxAudioStream(PcmCodec(24000), output_rate=48000, chunk_size=256, jitter_packets=1)
+        for seq in range(4):
+            stream.jitter.push(seq, pcm_payload(0.5))
+
+        data = stream.read_bytes()
+
+        samples = np.frombuffer(data, dtype="<i2")
+        assert len(samples) == 256
+        assert np.abs(samples[16:] - 16384).max() <= 2
+        assert stream.stats.total_bytes > 0
+
+    def test_underrun_returns_silence(self):
+        """测试无数据时输出静音并计数"""
+        stream = RxAudioStream(PcmCodec(48000), output_rate=48000, chunk_size=128)
+
+        assert stream.read_bytes() == b"\x00" * 256
+        assert stream.underruns == 1
+
+    def test_conceals_lost_packet(self):
+        """测试丢包隐藏"""
+        stream = RxAudioStream(PcmCodec(48000), output_rate=48000, chunk_size=384, jitter_packets=2)
+        stream.jitter.push(0, pcm_payload(0.5))
+        stream.jitter.push(2, pcm_payload(0.5))
+
+        samples = stream.read_float()
+
+        assert stream.concealed == 1
+        assert samples[:128] == pytest.approx(0.5)
+        assert samples[128] == pytest.approx(0.25)
+        assert samples[256:] == pytest.approx(0.5)
+
+
+class TestRxAudioMixer:
+    """测试多 slice 音频混音"""
+
+    def stream(self, value):
+        stream = RxAudioStream(PcmCodec(48000), output_rate=48000, chunk_size=128, jitter_packets=1)
+        stream.jitter.push(0, pcm_payload(value))
+        return stream
+
+    def test_mixes_sources_with_gain(self):
+        """测试按增益叠加各音源，静音音源仍被读取"""
+        mixer = RxAudioMixer(chunk_size=128)
+        a, b, muted = self.stream(0.25), self.stream(0.5), self.stream(0.5)
+        mixer.add_source("a", a)
+        mixer.add_source("b", b, gain=0.5)
+        mixer.add_source("remote", muted)
+        mixer.set_gain("remote", 0.0)
+
+        samples = mixer.read_float()
+
+        assert samples == pytest.approx(0.5)
+        assert len(muted.jitter) == 0
+
+    def test_remove_source(self):
+        """测试移除音源"""
+        mixer = RxAudioMixer(chunk_size=128)
+        stream = self.stream(0.5)
+        mixer.add_source("a", stream)
+
+        assert "a" in mixer
+        assert mixer.remove_source("a") is stream
+        assert len(mixer) == 0
+        assert mixer.read_bytes() == b"\x00" * 256
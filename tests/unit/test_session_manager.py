@@ -0,0 +1,74 @@
+import numpy as np
+
+from session_manager import DisplayFeed
+from vita49 import (
+    PACKET_CLASS_PANADAPTER,
+    PACKET_CLASS_WATERFALL,
+    PacketHeaderWriter,
+    pack_pan_payload,
+    pack_waterfall_payload,
+    parse_packet,
+)
+
+
+def pan_packets(writer, frame, width=1024, segment=700):
+    bins = np.arange(width, dtype=np.uint16) + frame
+    packets = []
+    for start in range(0, width, segment):
+        payload = pack_pan_payload(bins[start : start + segment], frame, start, width)
+        packets.append(parse_packet(bytes(writer.next_header(len(payload), 0)) + payload))
+    return packets
+
+
+class TestDisplayFeed:
+    """测试全景图帧重组与后台节流"""
+
+    def test_reassembles_frames(self):
+        """测试多个分段拼成完整帧"""
+        feed = DisplayFeed()
+        frames = []
+        feed.add_pan_callback(lambda bins: frames.append(bins.copy()))
+        writer = PacketHeaderWriter(0x40000000, PACKET_CLASS_PANADAPTER, 1)
+
+        for frame in range(3):
+            for packet in pan_packets(writer, frame):
+                feed.on_pan(packet)
+
+        assert len(frames) == 3
+        assert np.array_equal(frames[2], np.arange(1024) + 2)
+
+    def test_throttles_whole_frames(self, monkeypatch):
+        """测试限速时整帧丢弃，不输出残缺帧"""
+        now = [100.0]
+        monkeypatch.setattr("session_manager.time.monotonic", lambda: now[0])
+        feed = DisplayFeed(fps=2)
+        frames = []
+        feed.add_pan_callback(frames.append)
+        writer = PacketHeaderWriter(0x40000000, PACKET_CLASS_PANADAPTER, 1)
+
+        for frame in range(30):
+            for packet in pan_packets(writer, frame):
+                feed.on_pan(packet)
+            now[0] += 1 / 15
+
+        # 2 s of 15 fps input, one frame per 0.45 s (2 fps less the early margin)
+        assert [int(bins[0]) for bins in frames] == [0, 7, 14, 21, 28]
+        assert feed.dropped == 25
+        assert all(len(bins) == 1024 for bins in frames)
+
+    def test_throttles_waterfall(self, monkeypatch):
+        """测试瀑布图同样按帧率节流"""
+        now = [100.0]
+        monkeypatch.setattr("session_manager.time.monotonic", lambda: now[0])
+        feed = DisplayFeed(fps=5)
+        tiles = []
+        feed.add_waterfall_callback(tiles.append)
+        writer = PacketHeaderWriter(0x42000000, PACKET_CLASS_WATERFALL, 1)
+        line = np.zeros((1, 64), dtype=np.uint16)
+
+        for timecode in range(10):
+            payload = pack_waterfall_payload(line, 7000000, 100.0, timecode, 100)
+            feed.on_waterfall(parse_packet(bytes(writer.next_header(len(payload), 0)) + payload))
+            now[0] += 0.1
+
+        assert len(tiles) == 5
@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+import pytest
+
+from metrics import Histogram, MetricsRegistry
+from stall_watchdog import StallWatchdog, run_asyncio_probe
+
+
+def blocking_handler(seconds):
+    time.sleep(seconds)
+
+
+class TestStallWatchdog:
+    """测试事件循环卡顿检测"""
+
+    def test_detects_and_finishes_stall(self, tmp_path):
+        """测试检测卡顿、记录堆栈并在恢复后写入持续时间"""
+        metrics = MetricsRegistry()
+        log = tmp_path / "stalls.log"
+        watchdog = StallWatchdog(threshold=0.1, log_path=str(log), metrics=metrics)
+        qt = watchdog.add_probe("qt")
+        loop = watchdog.add_probe("asyncio")
+
+        watchdog.check(now=qt.last_beat + 0.05)
+        assert not watchdog.stalls
+
+        watchdog.check(now=max(qt.last_beat, loop.last_beat) + 0.2)
+        assert len(watchdog.stalls) == 1
+        record = watchdog.stalls[0]
+        assert record.probes == ["qt", "asyncio"]
+        assert not record.finished
+        assert any("test_detects_and_finishes_stall" in line for line in record.stack)
+        assert "(ongoing)" in log.read_text()
+
+        qt.beat()
+        loop.beat()
+        watchdog.check()
+        assert record.finished
+        assert record.duration >= 0.2
+        assert metrics.get("stalls_total").value == 1
+        assert metrics.get("stall_seconds").count == 1
+        assert "(ongoing)" not in log.read_text()
+
+    def test_ring_buffer(self):
+        """测试只保留最近的若干次卡顿"""
+        watchdog = StallWatchdog(threshold=0.1, ring_size=2, metrics=MetricsRegistry())
+        probe = watchdog.add_probe("qt")
+        for _ in range(3):
+            watchdog.check(now=probe.last_beat + 1.0)
+            probe.beat()
+            watchdog.check()
+
+        assert len(watchdog.stalls) == 2
+        assert watchdog.dump().count("===") == 4
+
+    def test_captures_blocking_stack_from_watchdog_thread(self):
+        """测试由后台线程捕获阻塞线程的堆栈"""
+        watchdog = StallWatchdog(threshold=0.05, poll_interval=0.01, metrics=MetricsRegistry())
+        probe = watchdog.add_probe("qt")
+        watchdog.start()
+        try:
+            blocking_handler(0.3)
+            probe.beat()
+            time.sleep(0.05)
+        finally:
+            watchdog.stop()
+
+        record = next(
+            r for r in watchdog.stalls if any("blocking_handler" in line for line in r.stack)
+        )
+        assert record.finished
+        assert record.thread_name == "MainThread"
+
+    @pytest.mark.asyncio
+    async def test_asyncio_probe_records_lag(self):
+        """测试 asyncio 探针心跳与延迟记录"""
+        watchdog = StallWatchdog(metrics=MetricsRegistry())
+        probe = watchdog.add_probe("asyncio")
+        histogram = Histogram()
+        task = asyncio.create_task(run_asyncio_probe(probe, 0.01, histogram))
+
+        await asyncio.sleep(0.05)
+        blocking_handler(0.05)
+        await asyncio.sleep(0.03)
+        task.cancel()
+
+        assert histogram.count >= 2
+        assert histogram.max_us >= 30000
+        assert time.monotonic() - probe.last_beat < 0.05
@@ -0,0 +1,101 @@
+import socket
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from tx_audio import TxAudioPipeline
+from vita49 import PACKET_CLASS_AUDIO_FLOAT32, PACKET_CLASS_OPUS, parse_packet
+
+
+@pytest.fixture
+def udp_receiver():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.settimeout(2.0)
+    yield sock
+    sock.close()
+
+
+class TestTxAudioPipeline:
+    """测试 TX 音频发送管线"""
+
+    def test_packets_sent_over_udp(self, udp_receiver):
+        """测试麦克风数据转换、重采样并以 VITA-49 发送"""
+        port = udp_receiver.getsockname()[1]
+        pipeline = TxAudioPipeline(
+            "127.0.0.1", 0x84000001, radio_port=port, samples_per_packet=128, max_latency_ms=100
+        )
+        pipeline.start()
+        try:
+            block = np.full(1024, 16384, dtype=np.int16).tobytes()
+            pipeline.submit(block)
+            pipeline.submit(block)
+
+            packets = [parse_packet(udp_receiver.recv(2048)) for _ in range(7)]
+        finally:
+            pipeline.stop()
+
+        assert all(p.stream_id == 0x84000001 for p in packets)
+        assert all(p.packet_class == PACKET_CLASS_AUDIO_FLOAT32 for p in packets)
+        assert [p.sequence for p in packets] == list(range(7))
+        assert [p.timestamp_frac for p in packets[:2]] == [0, 128]
+
+        samples = np.frombuffer(packets[-1].payload, dtype=">f4").reshape(-1, 2)
+        assert samples.shape == (128, 2)
+        np.testing.assert_allclose(samples, 0.5, atol=1e-3)
+
+    def test_drops_oldest_when_backlogged(self):
+        """测试积压时丢弃最旧数据以限制延迟"""
+        pipeline = TxAudioPipeline("127.0.0.1", 1, max_latency_ms=40)
+        blocks = [bytes([i]) * 2048 for i in range(5)]
+
+        for block in blocks:
+            pipeline.submit(block)
+
+        assert pipeline.queued_ms <= 40
+        assert pipeline.dropped_blocks == 4
+        assert list(pipeline._queue) == [blocks[-1]]
+
+    def test_process_block_packetizes_remainder(self):
+        """测试不足一个包的样本保留到下一块"""
+        pipeline = TxAudioPipeline("127.0.0.1", 1, input_rate=24000, radio_rate=24000)
+        sent = []
+        pipeline._send_packet = lambda: sent.append(pipeline._pending.copy())
+
+        pipeline.process_block(np.zeros(200, dtype=np.int16).tobytes())
+        assert len(sent) == 1
+        assert pipeline._pending_len == 72
+
+        pipeline.process_block(np.zeros(56, dtype=np.int16).tobytes())
+        assert len(sent) == 2
+        assert pipeline._pending_len == 0
+
+    def test_flush_clears_queue(self):
+        """测试松开 PTT 时清空队列"""
+        pipeline = TxAudioPipeline("127.0.0.1", 1)
+        pipeline.submit(b"\x00" * 2048)
+
+        pipeline.flush()
+
+        assert pipeline.queued_ms == 0
+        assert not pipeline._queue
+
+    def test_codec_frames_and_encodes_packets(self, udp_receiver):
+        """测试压缩编解码器按其帧长与采样率发送未填充的载荷"""
+        codec = MagicMock(sample_rate=48000, frame_size=480, packet_class=PACKET_CLASS_OPUS)
+        codec.encode.return_value = b"\x01\x02\x03\x04\x05"
+        port = udp_receiver.getsockname()[1]
+        pipeline = TxAudioPipeline("127.0.0.1", 0x84000002, radio_port=port, codec=codec)
+        pipeline.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        pipeline.sock.connect(("127.0.0.1", port))
+        try:
+            pipeline.process_block(np.zeros(960, dtype=np.int16).tobytes())
+            packets = [parse_packet(udp_receiver.recv(2048)) for _ in range(2)]
+        finally:
+            pipeline.sock.close()
+
+        assert codec.encode.call_count == 2
+        assert len(codec.encode.call_args.args[0]) == 480
+        assert all(p.packet_class == PACKET_CLASS_OPUS for p in packets)
+        assert bytes(packets[0].payload) == b"\x01\x02\x03\x04\x05"
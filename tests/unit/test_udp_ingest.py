@@ -0,0 +1,97 @@
+import asyncio
+import socket
+import struct
+
+import pytest
+
+from udp_ingest import UdpIngest
+from vita49 import PACKET_CLASS_METER, PACKET_CLASS_OPUS, PacketHeaderWriter
+
+
+def make_packet(writer, payload=b"\x00" * 8):
+    return bytes(writer.next_header(len(payload), 1)) + payload
+
+
+class TestUdpIngest:
+    """测试 VITA-49 UDP 接收与分发"""
+
+    def test_dispatch_by_stream_and_class(self):
+        """测试按流 ID 与包类型分发"""
+        ingest = UdpIngest()
+        by_stream, by_class = [], []
+        ingest.register(0x40000008, by_stream.append)
+        ingest.register_class(PACKET_CLASS_METER, by_class.append)
+
+        audio = PacketHeaderWriter(0x40000008, PACKET_CLASS_OPUS, 48000)
+        meter = PacketHeaderWriter(0x700, PACKET_CLASS_METER, 48000)
+        ingest.datagram_received(make_packet(audio), None)
+        ingest.datagram_received(make_packet(meter), None)
+        ingest.datagram_received(b"junk", None)
+
+        assert [p.stream_id for p in by_stream] == [0x40000008]
+        assert [p.stream_id for p in by_class] == [0x700]
+        assert ingest.invalid_packets == 1
+
+    def test_counts_lost_packets(self):
+        """测试根据序号统计丢包"""
+        ingest = UdpIngest()
+        writer = PacketHeaderWriter(1, PACKET_CLASS_OPUS, 48000)
+        packets = [make_packet(writer) for _ in range(20)]
+
+        for i, packet in enumerate(packets):
+            if i not in (3, 4, 17):
+                ingest.datagram_received(packet, None)
+
+        assert ingest.stats[1].packets == 17
+        assert ingest.stats[1].lost == 3
+
+    def test_handler_errors_are_contained(self):
+        """测试处理函数异常不影响接收"""
+        ingest = UdpIngest()
+
+        def broken(packet):
+            raise ValueError("boom")
+
+        ingest.register(1, broken)
+        ingest.datagram_received(make_packet(PacketHeaderWriter(1, PACKET_CLASS_OPUS, 48000)), None)
+
+        assert ingest.stats[1].packets == 1
+
+    def test_demux_by_source(self):
+        """测试多台电台共用端口时按发送地址和流 ID 分发"""
+        ingest = UdpIngest()
+        first, second, other = [], [], []
+        ingest.add_source("10.0.0.1").register(7, first.append)
+        ingest.add_source("10.0.0.2").register(7, second.append)
+        ingest.register(7, other.append)
+
+        a = PacketHeaderWriter(7, PACKET_CLASS_OPUS, 48000)
+        b = PacketHeaderWriter(7, PACKET_CLASS_OPUS, 48000)
+        ingest.datagram_received(make_packet(a), ("10.0.0.1", 4991))
+        ingest.datagram_received(make_packet(b), ("10.0.0.2", 4991))
+        ingest.datagram_received(make_packet(a), ("10.0.0.1", 4991))
+        ingest.datagram_received(make_packet(b), ("10.0.0.9", 4991))
+
+        assert (len(first), len(second), len(other)) == (2, 1, 1)
+        assert ingest.sources["10.0.0.1"].stats[7].lost == 0
+        assert {s.labels.get("radio") for s in ingest.collect()} == {None, "10.0.0.1", "10.0.0.2"}
+
+    @pytest.mark.asyncio
+    async def test_receives_over_udp(self):
+        """测试通过本地 UDP 端口接收"""
+        ingest = UdpIngest(port=0, host="127.0.0.1")
+        received = asyncio.Queue()
+        ingest.register(7, received.put_nowait)
+        assert await ingest.start()
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            payload = struct.pack(">I", 42)
+            writer = PacketHeaderWriter(7, PACKET_CLASS_OPUS, 48000)
+            sock.sendto(make_packet(writer, payload), ("127.0.0.1", ingest.port))
+            sock.close()
+
+            packet = await asyncio.wait_for(received.get(), 2.0)
+        finally:
+            ingest.stop()
+
+        assert bytes(packet.payload) == payload
@@ -0,0 +1,109 @@
+import struct
+
+import numpy as np
+import pytest
+
+from vita49 import (
+    HEADER_SIZE,
+    PACKET_CLASS_AUDIO_FLOAT32,
+    PACKET_TYPE_IF_DATA,
+    PacketHeaderWriter,
+    pack_discovery_payload,
+    pack_pan_payload,
+    pack_waterfall_payload,
+    parse_discovery_payload,
+    parse_packet,
+    parse_pan_payload,
+    parse_waterfall_payload,
+)
+
+
+class TestVita49:
+    """测试 VITA-49 报文构造与解析"""
+
+    def test_header_roundtrip(self):
+        """测试报头构造后可被解析"""
+        writer = PacketHeaderWriter(0x84000001, PACKET_CLASS_AUDIO_FLOAT32, 24000)
+        payload = b"\x00" * 1024
+
+        header = writer.next_header(len(payload), 128)
+        packet = parse_packet(bytes(header) + payload)
+
+        assert packet.packet_type == PACKET_TYPE_IF_DATA
+        assert packet.packet_class == PACKET_CLASS_AUDIO_FLOAT32
+        assert packet.stream_id == 0x84000001
+        assert packet.sequence == 0
+        assert packet.timestamp_frac == 0
+        assert len(packet.payload) == 1024
+
+    def test_sequence_and_timestamp_advance(self):
+        """测试序号回绕和采样计数时间戳"""
+        writer = PacketHeaderWriter(1, PACKET_CLASS_AUDIO_FLOAT32, 24000)
+
+        packets = [parse_packet(bytes(writer.next_header(8, 128)) + b"\x00" * 8) for _ in range(17)]
+
+        assert [p.sequence for p in packets[:3]] == [0, 1, 2]
+        assert packets[16].sequence == 0
+        assert packets[5].timestamp_frac == 5 * 128
+
+    def test_header_buffer_is_reused(self):
+        """测试报头缓冲区复用"""
+        writer = PacketHeaderWriter(1, PACKET_CLASS_AUDIO_FLOAT32, 24000)
+
+        first = writer.next_header(8, 1)
+        second = writer.next_header(8, 1)
+
+        assert first.obj is second.obj
+
+    def test_size_field_in_words(self):
+        """测试报头长度字段单位为 32 位字"""
+        writer = PacketHeaderWriter(1, PACKET_CLASS_AUDIO_FLOAT32, 24000)
+
+        (word0,) = struct.unpack(">I", bytes(writer.next_header(1024, 128))[:4])
+
+        assert word0 & 0xFFFF == (HEADER_SIZE + 1024) // 4
+
+    def test_parse_rejects_short_or_classless(self):
+        """测试拒绝过短或无 Class ID 的数据"""
+        assert parse_packet(b"\x00" * 10) is None
+        assert parse_packet(b"\x00" * HEADER_SIZE) is None
+
+
+class TestDisplayPayloads:
+    """测试全景与瀑布载荷编解码"""
+
+    def test_pan_roundtrip(self):
+        """测试全景分段载荷"""
+        bins = np.arange(300, dtype=np.uint16)
+
+        frame = parse_pan_payload(pack_pan_payload(bins, 7, start_bin=700, total_bins=1000))
+
+        assert (frame.start_bin, frame.total_bins, frame.frame_index) == (700, 1000, 7)
+        np.testing.assert_array_equal(frame.bins, bins)
+
+    def test_waterfall_roundtrip(self):
+        """测试瀑布图块载荷"""
+        data = np.arange(20, dtype=np.uint16).reshape(2, 10)
+
+        tile = parse_waterfall_payload(pack_waterfall_payload(data, 7054000, 187.5, 42, 50))
+
+        assert tile.first_bin_hz == pytest.approx(7054000, abs=1)
+        assert tile.bin_bandwidth_hz == pytest.approx(187.5, abs=1)
+        assert (tile.width, tile.height, tile.timecode, tile.line_duration_ms) == (10, 2, 42, 50)
+        np.testing.assert_array_equal(tile.data, data)
+
+    def test_truncated_payloads(self):
+        """测试截断载荷返回 None"""
+        assert parse_pan_payload(pack_pan_payload(np.zeros(10), 0)[:-2]) is None
+        assert parse_waterfall_payload(b"\x00" * 8) is None
+
+    def test_discovery_roundtrip(self):
+        """测试发现报文键值对往返，昵称中的空格以 0x7F 传输"""
+        payload = pack_discovery_payload({"model": "FLEX-6400", "nickname": "Shack Radio"})
+
+        assert len(payload) % 4 == 0
+        assert b" Radio" not in payload
+        assert parse_discovery_payload(payload) == {
+            "model": "FLEX-6400",
+            "nickname": "Shack Radio",
+        }
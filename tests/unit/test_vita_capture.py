@@ -0,0 +1,163 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from udp_ingest import UdpIngest
+from vita49 import PACKET_CLASS_PANADAPTER, PacketHeaderWriter
+from vita_capture import CaptureError, CaptureReader, CaptureWriter, ReplaySource, index_path
+
+
+def packets(count, stream_id=0x40000000):
+    writer = PacketHeaderWriter(stream_id, PACKET_CLASS_PANADAPTER, 48000)
+    return [bytes(writer.next_header(8, 1)) + bytes([i % 256]) * 8 for i in range(count)]
+
+
+@pytest.fixture
+def capture_file(tmp_path):
+    path = str(tmp_path / "test.vcap")
+    writer = CaptureWriter(path, index_interval=0.01)
+    base = 1_000_000_000
+    for i, data in enumerate(packets(100)):
+        writer.write(data, ts_ns=base + i * 1_000_000)  # 1 ms apart
+    writer.close()
+    return path
+
+
+class TestCapture:
+    """测试 VITA-49 原始报文捕获"""
+
+    def test_roundtrip(self, capture_file):
+        """测试写入后按顺序读出"""
+        records = list(CaptureReader(capture_file).records())
+
+        assert len(records) == 100
+        assert records[0] == (1_000_000_000, packets(1)[0])
+        assert [ts for ts, _ in records] == sorted(ts for ts, _ in records)
+
+    def test_index_every_interval(self, capture_file):
+        """测试按时间间隔写索引"""
+        size = os.path.getsize(index_path(capture_file))
+
+        assert size == 10 * 24
+
+    def test_seek_by_timestamp(self, capture_file):
+        """测试按时间戳定位"""
+        records = list(CaptureReader(capture_file).records(start_ns=1_000_000_000 + 42_500_000))
+
+        assert len(records) == 57
+        assert records[0][0] == 1_000_000_000 + 43_000_000
+
+    def test_rebuilds_missing_index(self, capture_file):
+        """测试索引丢失时重建"""
+        os.remove(index_path(capture_file))
+
+        reader = CaptureReader(capture_file)
+
+        assert len(list(reader.records(start_ns=1_000_000_000 + 90_000_000))) == 10
+
+    def test_truncated_capture(self, capture_file):
+        """测试中断的捕获文件忽略不完整记录"""
+        with open(capture_file, "r+b") as f:
+            f.truncate(os.path.getsize(capture_file) - 5)
+
+        assert CaptureReader(capture_file).summary()["datagrams"] == 99
+
+    def test_rejects_other_files(self, tmp_path):
+        """测试拒绝非捕获文件"""
+        path = tmp_path / "bogus.vcap"
+        path.write_bytes(b"x" * 32)
+
+        with pytest.raises(CaptureError):
+            CaptureReader(str(path))
+
+    def test_reopen_appends(self, capture_file):
+        """测试重新打开已有捕获文件时追加写入并延续索引"""
+        size = os.path.getsize(index_path(capture_file))
+        writer = CaptureWriter(capture_file, index_interval=0.01)
+        for i, data in enumerate(packets(50)):
+            writer.write(data, ts_ns=2_000_000_000 + i * 1_000_000)
+        writer.close()
+
+        reader = CaptureReader(capture_file)
+        assert reader.summary()["datagrams"] == 150
+        assert os.path.getsize(index_path(capture_file)) == size + 5 * 24
+        assert len(list(reader.records(start_ns=2_000_000_000 + 45_000_000))) == 5
+
+    def test_reopen_drops_partial_record(self, capture_file):
+        """测试中断后重新打开时丢弃不完整记录，续写的记录可正常读出"""
+        with open(capture_file, "r+b") as f:
+            f.truncate(os.path.getsize(capture_file) - 5)
+
+        writer = CaptureWriter(capture_file, index_interval=0.01)
+        writer.write(b"next", ts_ns=3_000_000_000)
+        writer.close()
+
+        records = list(CaptureReader(capture_file).records())
+        assert len(records) == 100
+        assert records[-1] == (3_000_000_000, b"next")
+
+    def test_refuses_to_overwrite_other_files(self, tmp_path):
+        """测试不覆盖非捕获文件"""
+        path = tmp_path / "notes.txt"
+        path.write_bytes(b"not a capture, keep me")
+
+        with pytest.raises(CaptureError):
+            CaptureWriter(str(path))
+        assert path.read_bytes() == b"not a capture, keep me"
+
+    def test_ingest_tap(self, tmp_path):
+        """测试通过 UDP 接收端旁路捕获"""
+        path = str(tmp_path / "tap.vcap")
+        writer = CaptureWriter(path)
+        ingest = UdpIngest()
+        ingest.add_tap(writer.tap)
+
+        for data in packets(5) + [b"junk"]:
+            ingest.datagram_received(data, None)
+        writer.close()
+
+        assert CaptureReader(path).summary()["datagrams"] == 6
+
+
+class TestReplay:
+    """测试捕获回放"""
+
+    @pytest.mark.asyncio
+    async def test_replay_into_ingest_max_speed(self, capture_file):
+        """测试最大速度回放到 UDP 接收端"""
+        ingest = UdpIngest()
+        received = []
+        ingest.register(0x40000000, received.append)
+
+        source = ReplaySource(CaptureReader(capture_file), ingest.datagram_received, speed=0)
+        await source.run()
+
+        assert len(received) == 100
+        assert ingest.stats[0x40000000].lost == 0
+        assert source.bytes == sum(len(p) for p in packets(100))
+
+    @pytest.mark.asyncio
+    async def test_replay_preserves_timing(self, capture_file):
+        """测试按原始时序（加速）回放"""
+        arrivals = []
+        source = ReplaySource(
+            CaptureReader(capture_file), lambda d, a: arrivals.append(time.perf_counter()), speed=2
+        )
+
+        elapsed = await source.run()
+
+        assert elapsed == pytest.approx(0.0495, abs=0.03)
+        assert arrivals[-1] - arrivals[0] >= 0.045
+
+    @pytest.mark.asyncio
+    async def test_stop(self, capture_file):
+        """测试回放可被停止"""
+        source = ReplaySource(CaptureReader(capture_file), lambda d, a: None, speed=1, loop=True)
+        task = asyncio.ensure_future(source.run())
+        await asyncio.sleep(0.02)
+        source.stop()
+        await asyncio.wait_for(task, 1.0)
+
+        assert 0 < source.packets < 100
@@ -0,0 +1,205 @@
+import asyncio
+import json
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from metrics import MetricsRegistry
+from vita49 import WaterfallTile
+from ws_fanout import (
+    FRAME_PAN,
+    FRAME_WATERFALL,
+    OP_BINARY,
+    OP_TEXT,
+    FanoutViewer,
+    WebSocketFanout,
+    _Viewer,
+    decode_frame,
+    encode_rows,
+    read_ws_frame,
+    ws_frame,
+)
+
+
+def unwrap(message):
+    """Payload of an unmasked server frame"""
+    size = message[1] & 0x7F
+    return message[2 + {126: 2, 127: 8}.get(size, 0) :]
+
+
+def frame_bytes(rows, **kwargs):
+    fanout = WebSocketFanout(metrics=MetricsRegistry(), **kwargs)
+    return unwrap(fanout._message(FRAME_PAN, np.atleast_2d(rows), 7, b""))
+
+
+class TestFrameEncoding:
+    """测试帧编码"""
+
+    @pytest.mark.parametrize("deflate", [True, False])
+    def test_roundtrip(self, deflate):
+        """测试量化后的电平经差分编码可还原"""
+        rng = np.random.default_rng(1)
+        bins = rng.integers(0, 1024, 512).astype(np.uint16)
+
+        frame = decode_frame(frame_bytes(bins, deflate=deflate))
+
+        assert frame["kind"] == FRAME_PAN and frame["sequence"] == 7
+        expected = np.minimum(bins.astype(np.int32) * 255 // 1023, 255)
+        np.testing.assert_array_equal(frame["rows"][0], expected)
+
+    def test_deflate_shrinks_noise_floor(self):
+        """测试平稳噪底压缩后远小于原始数据"""
+        rng = np.random.default_rng(2)
+        bins = (800 + rng.integers(-4, 5, 1024)).astype(np.uint16)
+
+        flags, data = encode_rows(bins)
+        _, raw = encode_rows(bins, deflate=False)
+
+        assert flags and len(raw) == 1024
+        assert len(data) < len(raw) // 2
+
+    def test_levels_clipped(self):
+        """测试超出 level_max 的电平截断为 255"""
+        _, data = encode_rows(np.array([2000, 0], dtype=np.uint16), deflate=False)
+
+        assert data == bytes([255, 1])
+
+
+class TestWebSocketFrames:
+    """测试 WebSocket 帧收发"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("size", [10, 300, 70000])
+    async def test_masked_roundtrip(self, size):
+        """测试各长度编码与客户端掩码"""
+        payload = bytes(range(256)) * (size // 256) + bytes(size % 256)
+        reader = asyncio.StreamReader()
+        reader.feed_data(ws_frame(OP_BINARY, payload, mask=True))
+
+        opcode, received = await read_ws_frame(reader, 1 << 20)
+
+        assert opcode == OP_BINARY and received == payload
+
+    @pytest.mark.asyncio
+    async def test_rejects_oversized_and_fragmented(self):
+        """测试拒绝过大或分片的消息"""
+        reader = asyncio.StreamReader()
+        reader.feed_data(ws_frame(OP_TEXT, b"x" * 200))
+        with pytest.raises(ValueError):
+            await read_ws_frame(reader, 100)
+
+        reader = asyncio.StreamReader()
+        reader.feed_data(bytes([OP_TEXT, 1]) + b"x")
+        with pytest.raises(ValueError):
+            await read_ws_frame(reader, 100)
+
+
+class TestViewerQueue:
+    """测试观看端输出队列"""
+
+    def test_drops_oldest(self):
+        """测试队列满时丢弃最旧帧并计数"""
+        dropped = MetricsRegistry().counter("dropped")
+        viewer = _Viewer(Mock(), 2, dropped)
+
+        for frame in (b"1", b"2", b"3", b"4"):
+            viewer.send(frame)
+
+        assert list(viewer.queue) == [b"3", b"4"]
+        assert dropped.value == 2
+
+
+class TestPublish:
+    """测试帧分发"""
+
+    def make_viewer(self, fanout, radio="shack", **params):
+        viewer = Mock(radio=None, subscription=None)
+        fanout._subscribe(viewer, json.dumps({"radio": radio, **params}).encode())
+        fanout.viewers.add(viewer)
+        return viewer
+
+    def test_encodes_once_per_width(self):
+        """测试相同宽度的观看端共享一次编码结果"""
+        fanout = WebSocketFanout(metrics=MetricsRegistry())
+        narrow = [self.make_viewer(fanout, width=128) for _ in range(3)]
+        wide = self.make_viewer(fanout, width=512)
+        other = self.make_viewer(fanout, radio="portable")
+        fanout._message = Mock(side_effect=lambda kind, rows, seq, extra: bytes(rows.shape[1]))
+
+        fanout.publish_pan("shack", np.zeros(1024, dtype=np.uint16))
+
+        assert fanout._message.call_count == 2
+        frames = [viewer.send.call_args.args[0] for viewer in narrow]
+        assert all(frame is frames[0] for frame in frames) and len(frames[0]) == 128
+        assert len(wide.send.call_args.args[0]) == 512
+        other.send.assert_not_called()
+
+    def test_waterfall_bandwidth_scaled(self):
+        """测试瀑布图抽取后每点带宽按比例放大"""
+        fanout = WebSocketFanout(metrics=MetricsRegistry())
+        viewer = self.make_viewer(fanout, width=100)
+        data = np.full((2, 1000), 500, dtype=np.uint16)
+        tile = WaterfallTile(14.0e6, 10.0, 100, 1000, 2, 42, 0, data)
+
+        fanout.publish_waterfall("shack", tile)
+
+        frame = decode_frame(unwrap(viewer.send.call_args.args[0]))
+        assert frame["kind"] == FRAME_WATERFALL and frame["sequence"] == 42
+        assert frame["rows"].shape == (2, 100)
+        assert frame["first_bin_hz"] == 14.0e6 and frame["bin_bandwidth_hz"] == 100.0
+
+    def test_bad_subscription_ignored(self):
+        """测试格式错误的订阅被忽略"""
+        fanout = WebSocketFanout(metrics=MetricsRegistry())
+        viewer = Mock(radio=None, subscription=None)
+
+        fanout._subscribe(viewer, b'{"width": 10}')
+        fanout._subscribe(viewer, b"not json")
+
+        assert viewer.subscription is None and viewer.radio is None
+
+
+class TestWebSocketFanout:
+    """测试 WebSocket 服务端"""
+
+    @pytest.mark.asyncio
+    async def test_viewer_receives_frames(self):
+        """测试握手、订阅后按观看端的宽度和帧率收帧"""
+        metrics = MetricsRegistry()
+        fanout = WebSocketFanout(port=0, metrics=metrics)
+        assert await fanout.start()
+        viewer = FanoutViewer()
+        try:
+            await viewer.connect("127.0.0.1", fanout.port)
+            await viewer.subscribe("shack", width=64, fps=1000, streams=["pan"])
+            while not fanout.viewers or next(iter(fanout.viewers)).subscription is None:
+                await asyncio.sleep(0.01)
+
+            bins = np.full(1024, 1023, dtype=np.uint16)
+            bins[512] = 0
+            fanout.publish_pan("shack", bins)
+            frame = await asyncio.wait_for(viewer.receive(), 2)
+
+            assert frame["rows"].shape == (1, 64)
+            assert frame["rows"][0, 32] == 0 and frame["rows"][0, 0] == 255
+            assert metrics.get("fanout_viewers").value == 1
+            assert metrics.get("fanout_frames_total").value == 1
+        finally:
+            await viewer.close()
+            await fanout.stop()
+
+    @pytest.mark.asyncio
+    async def test_rejects_plain_http(self):
+        """测试非 WebSocket 请求返回 400"""
+        fanout = WebSocketFanout(port=0, metrics=MetricsRegistry())
+        assert await fanout.start()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", fanout.port)
+            writer.write(b"GET / HTTP/1.1\r\nHost: x\r\n\r\n")
+            response = await asyncio.wait_for(reader.read(), 2)
+            writer.close()
+
+            assert response.startswith(b"HTTP/1.1 400")
+        finally:
+            await fanout.stop()
@@ -0,0 +1,171 @@
+import collections
+import logging
+import socket
+import threading
+from typing import Optional
+
+import numpy as np
+
+from resampler import Resampler
+from vita49 import PACKET_CLASS_AUDIO_FLOAT32, PacketHeaderWriter
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class TxAudioPipeline:
+    """Microphone to radio TX audio: int16 -> float32 -> resample -> VITA-49 -> UDP
+
+    ``submit`` is called from the PortAudio input callback and only queues
+    the captured block. A sender thread does the conversion and
+    packetization. The queue is bounded by ``max_latency_ms`` of audio; when
+    the sender falls behind, the oldest blocks are dropped so TX latency
+    stays bounded instead of growing.
+    """
+
+    def __init__(
+        self,
+        radio_host: str,
+        stream_id: int,
+        radio_port: int = 4991,
+        input_rate: int = 48000,
+        radio_rate: int = 24000,
+        radio_channels: int = 2,
+        samples_per_packet: int = 128,
+        max_latency_ms: float = 40.0,
+        gain: float = 1.0,
+        codec=None,
+    ):
+        self.radio_host = radio_host
+        self.radio_port = radio_port
+        self.stream_id = stream_id
+        self.input_rate = input_rate
+        self.codec = codec
+        if codec is not None:
+            # Compressed streams are framed and clocked by the codec
+            radio_rate = codec.sample_rate
+            samples_per_packet = codec.frame_size
+        self.radio_rate = radio_rate
+        self.samples_per_packet = samples_per_packet
+        self.gain = gain
+        self.max_queued_samples = int(input_rate * max_latency_ms / 1000)
+
+        self.sock: Optional[socket.socket] = None
+        self.running = False
+        self.packets_sent = 0
+        self.dropped_blocks = 0
+        self.send_errors = 0
+
+        self._queue: collections.deque = collections.deque()
+        self._queued_samples = 0
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+        self._resampler = Resampler(input_rate, radio_rate)
+        packet_class = codec.packet_class if codec is not None else PACKET_CLASS_AUDIO_FLOAT32
+        self._header = PacketHeaderWriter(stream_id, packet_class, radio_rate)
+        # Preallocated packet payload: big-endian float32, mono duplicated to every channel
+        self._payload = np.zeros((samples_per_packet, radio_channels), dtype=">f4")
+        self._payload_view = memoryview(self._payload.reshape(-1)).cast("B")
+        self._pending = np.zeros(samples_per_packet, dtype=np.float32)
+        self._pending_len = 0
+
+    @property
+    def queued_ms(self) -> float:
+        return self._queued_samples * 1000.0 / self.input_rate
+
+    def start(self):
+        if self.running:
+            return
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.connect((self.radio_host, self.radio_port))
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name="tx-audio", daemon=True)
+        self._thread.start()
+        logger.info(f"TX audio pipeline started: stream 0x{self.stream_id:08X}")
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        with self._cond:
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+        self.flush()
+        logger.info(
+            f"TX audio pipeline stopped: {self.packets_sent} packets sent, "
+            f"{self.dropped_blocks} blocks dropped"
+        )
+
+    def flush(self):
+        """Discard queued audio, e.g. when PTT is released"""
+        with self._cond:
+            self._queue.clear()
+            self._queued_samples = 0
+        self._pending_len = 0
+        self._resampler.reset()
+
+    def submit(self, in_data: bytes):
+        """Queue captured 16-bit mono PCM; safe to call from the audio callback"""
+        with self._cond:
+            self._queue.append(in_data)
+            self._queued_samples += len(in_data) // 2
+            while self._queued_samples > self.max_queued_samples and len(self._queue) > 1:
+                dropped = self._queue.popleft()
+                self._queued_samples -= len(dropped) // 2
+                self.dropped_blocks += 1
+            self._cond.notify()
+
+    def _run(self):
+        while self.running:
+            with self._cond:
+                while self.running and not self._queue:
+                    self._cond.wait(0.1)
+                if not self.running:
+                    break
+                block = self._queue.popleft()
+                self._queued_samples -= len(block) // 2
+
+            try:
+                self.process_block(block)
+            except Exception as e:
+                logger.error(f"TX audio pipeline error: {e}")
+
+    def process_block(self, block: bytes):
+        """Convert, resample and packetize one captured block"""
+        samples = np.frombuffer(block, dtype="<i2").astype(np.float32)
+        samples *= self.gain / 32768.0
+        resampled = self._resampler.process(samples)
+
+        spp = self.samples_per_packet
+        index = 0
+        while index < len(resampled):
+            take = min(spp - self._pending_len, len(resampled) - index)
+            self._pending[self._pending_len : self._pending_len + take] = resampled[
+                index : index + take
+            ]
+            self._pending_len += take
+            index += take
+            if self._pending_len == spp:
+                self._send_packet()
+                self._pending_len = 0
+
+    def _send_packet(self):
+        if self.codec is not None:
+            payload = self.codec.encode(self._pending)
+        else:
+            np.copyto(self._payload, self._pending[:, None])
+            payload = self._payload_view
+        header = self._header.next_header(len(payload), self.samples_per_packet)
+        try:
+            self.sock.sendmsg([header, payload])
+            self.packets_sent += 1
+        except OSError as e:
+            self.send_errors += 1
+            if self.send_errors == 1 or self.send_errors % 1000 == 0:
+                logger.warning(f"TX audio send failed ({self.send_errors}): {e}")
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from metrics import REGISTRY, MetricsRegistry, Sample
+from vita49 import VitaPacket, parse_packet
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PacketHandler = Callable[[VitaPacket], None]
+DatagramTap = Callable[[bytes, object], None]
+
+
+@dataclass
+class StreamStats:
+    packets: int = 0
+    bytes: int = 0
+    lost: int = 0
+    last_sequence: Optional[int] = None
+
+
+class StreamDemux:
+    """Routes packets by stream ID, falling back to packet class, with per-stream stats"""
+
+    def __init__(self):
+        self.handlers: Dict[int, PacketHandler] = {}
+        self.class_handlers: Dict[int, PacketHandler] = {}
+        self.stats: Dict[int, StreamStats] = {}
+
+    def register(self, stream_id: int, handler: PacketHandler):
+        """Route packets for one stream ID to a handler"""
+        self.handlers[stream_id] = handler
+
+    def register_class(self, packet_class: int, handler: PacketHandler):
+        """Route packets of a class (e.g. all panadapter streams) to a handler"""
+        self.class_handlers[packet_class] = handler
+
+    def unregister(self, stream_id: int):
+        self.handlers.pop(stream_id, None)
+
+    def dispatch(self, packet: VitaPacket, size: int) -> int:
+        """Update stats and call the packet's handler; returns packets lost before it"""
+        stats = self.stats.get(packet.stream_id)
+        if stats is None:
+            stats = self.stats[packet.stream_id] = StreamStats()
+        stats.packets += 1
+        stats.bytes += size
+        lost = 0
+        if stats.last_sequence is not None:
+            lost = (packet.sequence - stats.last_sequence - 1) & 0xF
+            stats.lost += lost
+        stats.last_sequence = packet.sequence
+
+        handler = self.handlers.get(packet.stream_id) or self.class_handlers.get(
+            packet.packet_class
+        )
+        if handler is not None:
+            try:
+                handler(packet)
+            except Exception as e:
+                logger.error(f"Stream 0x{packet.stream_id:08X} handler error: {e}")
+        return lost
+
+
+class UdpIngest(asyncio.DatagramProtocol, StreamDemux):
+    """Receives the radio's VITA-49 UDP streams and demuxes them by stream ID
+
+    Handlers run on the event loop thread and must return quickly; anything
+    expensive belongs behind a queue or buffer owned by the handler.
+
+    Several radios can share one port: every radio uses the same stream IDs,
+    so :meth:`add_source` gives each sender address its own
+    :class:`StreamDemux`. Datagrams from other addresses use this object's
+    own handlers.
+    """
+
+    def __init__(
+        self, port: int = 4991, host: str = "0.0.0.0", metrics: Optional[MetricsRegistry] = None
+    ):
+        StreamDemux.__init__(self)
+        self.port = port
+        self.host = host
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.sources: Dict[str, StreamDemux] = {}
+        self.taps: List[DatagramTap] = []
+        self.invalid_packets = 0
+
+        self.metrics = metrics or REGISTRY
+        self._packets = self.metrics.counter("udp_packets_total", "VITA-49 packets received")
+        self._bytes = self.metrics.counter("udp_bytes_total", "VITA-49 bytes received")
+        self._lost = self.metrics.counter("udp_lost_packets_total", "Packets missing by sequence")
+
+    async def start(self) -> bool:
+        loop = asyncio.get_running_loop()
+        try:
+            self.transport, _ = await loop.create_datagram_endpoint(
+                lambda: self, local_addr=(self.host, self.port)
+            )
+            self.port = self.transport.get_extra_info("sockname")[1]
+            self.metrics.add_collector(self.collect)
+            logger.info(f"UDP ingest listening on port {self.port}")
+            return True
+        except OSError as e:
+            logger.error(f"Failed to open UDP port {self.port}: {e}")
+            return False
+
+    def stop(self):
+        if self.transport:
+            self.metrics.remove_collector(self.collect)
+            self.transport.close()
+            self.transport = None
+            logger.info("UDP ingest stopped")
+
+    def add_source(self, host: str) -> StreamDemux:
+        """Demux for datagrams sent from ``host`` (one radio)"""
+        demux = self.sources.get(host)
+        if demux is None:
+            demux = self.sources[host] = StreamDemux()
+        return demux
+
+    def remove_source(self, host: str):
+        self.sources.pop(host, None)
+
+    def add_tap(self, tap: DatagramTap):
+        """Receive every raw datagram before parsing, e.g. for capture"""
+        self.taps.append(tap)
+
+    def remove_tap(self, tap: DatagramTap):
+        if tap in self.taps:
+            self.taps.remove(tap)
+
+    def datagram_received(self, data: bytes, addr):
+        for tap in self.taps:
+            tap(data, addr)
+
+        packet = parse_packet(data)
+        if packet is None:
+            self.invalid_packets += 1
+            return
+
+        demux = self
+        if self.sources and addr is not None:
+            demux = self.sources.get(addr[0], self)
+        self._packets.inc()
+        self._bytes.inc(len(data))
+        lost = demux.dispatch(packet, len(data))
+        if lost:
+            self._lost.inc(lost)
+
+    def collect(self) -> List[Sample]:
+        """Per-stream counters for the metrics exporter"""
+        samples = []
+        demuxes = [({}, self)] + [({"radio": host}, d) for host, d in list(self.sources.items())]
+        for radio, demux in demuxes:
+            for stream_id, stats in list(demux.stats.items()):
+                labels = dict(radio, stream=f"0x{stream_id:08X}")
+                samples.extend(self._stream_samples(labels, stats))
+        return samples
+
+    @staticmethod
+    def _stream_samples(labels: Dict[str, str], stats: StreamStats) -> List[Sample]:
+        samples = []
+        for name, help, value in (
+            ("udp_stream_packets_total", "Packets received per stream", stats.packets),
+            ("udp_stream_bytes_total", "Bytes received per stream", stats.bytes),
+            ("udp_stream_lost_packets_total", "Packets missing by sequence", stats.lost),
+        ):
+            samples.append(Sample(name, "counter", help, labels, value))
+        return samples
+
+    def error_received(self, exc):
+        logger.warning(f"UDP ingest error: {exc}")
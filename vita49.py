@@ -0,0 +1,235 @@
+import struct
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import numpy as np
+
+# Packet types (VITA-49.0 header bits 31-28)
+PACKET_TYPE_IF_DATA = 0x1
+PACKET_TYPE_EXT_DATA = 0x3
+
+# FlexRadio class ID fields
+FLEX_OUI = 0x001C2D
+FLEX_INFORMATION_CLASS = 0x534C
+PACKET_CLASS_METER = 0x8002
+PACKET_CLASS_PANADAPTER = 0x8003
+PACKET_CLASS_WATERFALL = 0x8004
+PACKET_CLASS_OPUS = 0x8005
+PACKET_CLASS_AUDIO_INT16 = 0x0123
+PACKET_CLASS_AUDIO_FLOAT32 = 0x03E3
+PACKET_CLASS_DISCOVERY = 0xFFFF
+
+# Radios broadcast discovery packets on this stream to UDP port 4992
+DISCOVERY_STREAM_ID = 0x00000800
+
+# Timestamp modes: integer seconds since UTC epoch, fractional sample count
+TSI_UTC = 0x1
+TSF_SAMPLE_COUNT = 0x1
+
+# Header, stream ID, two class ID words, integer timestamp, two fractional words
+HEADER_SIZE = 28
+
+_HEADER = struct.Struct(">IIIIIQ")
+
+# Panadapter payload: start bin, bin count, bin size, total bins, frame index
+_PAN_HEADER = struct.Struct(">HHHHI")
+# Waterfall tile: first bin and bin width (MHz, 20 fractional bits), line
+# duration (ms), width, height, timecode, auto black level
+_WATERFALL_HEADER = struct.Struct(">qqIHHII")
+_MHZ_FIXED = float(1 << 20)
+
+
+@dataclass
+class VitaPacket:
+    packet_type: int
+    packet_class: int
+    stream_id: int
+    sequence: int
+    timestamp_int: int
+    timestamp_frac: int
+    payload: memoryview
+
+
+def parse_packet(data: bytes) -> Optional[VitaPacket]:
+    """Parse a FlexRadio VITA-49 datagram; returns None if it is not one"""
+    if len(data) < HEADER_SIZE:
+        return None
+
+    header, stream_id, oui, class_word, ts_int, ts_frac = _HEADER.unpack_from(data)
+    if not header & (1 << 27):  # Class ID must be present
+        return None
+
+    size = (header & 0xFFFF) * 4
+    end = min(size, len(data)) if size else len(data)
+    return VitaPacket(
+        packet_type=header >> 28,
+        packet_class=class_word & 0xFFFF,
+        stream_id=stream_id,
+        sequence=(header >> 16) & 0xF,
+        timestamp_int=ts_int,
+        timestamp_frac=ts_frac,
+        payload=memoryview(data)[HEADER_SIZE:end],
+    )
+
+
+class PacketHeaderWriter:
+    """Builds VITA-49 headers for one outgoing stream into a reused buffer
+
+    The caller sends ``header`` together with its payload buffer (e.g. via
+    ``socket.sendmsg``), so no bytes object is created per packet.
+    """
+
+    def __init__(
+        self,
+        stream_id: int,
+        packet_class: int,
+        sample_rate: int,
+        packet_type: int = PACKET_TYPE_IF_DATA,
+    ):
+        self.stream_id = stream_id
+        self.packet_class = packet_class
+        self.sample_rate = sample_rate
+        self.packet_type = packet_type
+        self.sequence = 0
+        self.sample_count = 0
+        self.start_time = int(time.time())
+        self.buffer = bytearray(HEADER_SIZE)
+        self.header = memoryview(self.buffer)
+
+    def next_header(self, payload_bytes: int, samples: int) -> memoryview:
+        """Fill the header for the next packet and advance sequence/timestamp
+
+        Args:
+            payload_bytes: Payload size; compressed payloads that are not a
+                multiple of 4 are sent unpadded and the size rounds up
+            samples: Sample frames carried by this packet
+        """
+        words = (HEADER_SIZE + payload_bytes + 3) // 4
+        header = (
+            (self.packet_type << 28)
+            | (1 << 27)
+            | (TSI_UTC << 22)
+            | (TSF_SAMPLE_COUNT << 20)
+            | (self.sequence << 16)
+            | words
+        )
+        ts_int = self.start_time + self.sample_count // self.sample_rate
+        _HEADER.pack_into(
+            self.buffer,
+            0,
+            header,
+            self.stream_id,
+            FLEX_OUI,
+            (FLEX_INFORMATION_CLASS << 16) | self.packet_class,
+            ts_int & 0xFFFFFFFF,
+            self.sample_count,
+        )
+        self.sequence = (self.sequence + 1) & 0xF
+        self.sample_count += samples
+        return self.header
+
+
+@dataclass
+class PanFrame:
+    start_bin: int
+    total_bins: int
+    frame_index: int
+    bins: np.ndarray
+
+
+@dataclass
+class WaterfallTile:
+    first_bin_hz: float
+    bin_bandwidth_hz: float
+    line_duration_ms: int
+    width: int
+    height: int
+    timecode: int
+    auto_black_level: int
+    data: np.ndarray
+
+
+def pack_pan_payload(
+    bins: np.ndarray, frame_index: int, start_bin: int = 0, total_bins: Optional[int] = None
+) -> bytes:
+    """Panadapter payload for (part of) one frame of uint16 bins"""
+    total = total_bins if total_bins is not None else start_bin + len(bins)
+    header = _PAN_HEADER.pack(start_bin, len(bins), 2, total, frame_index)
+    return header + np.asarray(bins, dtype=">u2").tobytes()
+
+
+def parse_pan_payload(payload) -> Optional[PanFrame]:
+    if len(payload) < _PAN_HEADER.size:
+        return None
+    start, count, bin_size, total, frame = _PAN_HEADER.unpack_from(payload)
+    if bin_size != 2 or len(payload) < _PAN_HEADER.size + count * 2:
+        return None
+    bins = np.frombuffer(payload, dtype=">u2", count=count, offset=_PAN_HEADER.size)
+    return PanFrame(start, total, frame, bins)
+
+
+def pack_waterfall_payload(
+    data: np.ndarray,
+    first_bin_hz: float,
+    bin_bandwidth_hz: float,
+    timecode: int,
+    line_duration_ms: int = 100,
+    auto_black_level: int = 0,
+) -> bytes:
+    """Waterfall tile payload; ``data`` is uint16 with shape (height, width)"""
+    data = np.atleast_2d(data)
+    header = _WATERFALL_HEADER.pack(
+        int(first_bin_hz / 1e6 * _MHZ_FIXED),
+        int(bin_bandwidth_hz / 1e6 * _MHZ_FIXED),
+        line_duration_ms,
+        data.shape[1],
+        data.shape[0],
+        timecode,
+        auto_black_level,
+    )
+    return header + data.astype(">u2").tobytes()
+
+
+def parse_waterfall_payload(payload) -> Optional[WaterfallTile]:
+    if len(payload) < _WATERFALL_HEADER.size:
+        return None
+    first, bandwidth, duration, width, height, timecode, black = _WATERFALL_HEADER.unpack_from(
+        payload
+    )
+    count = width * height
+    if len(payload) < _WATERFALL_HEADER.size + count * 2:
+        return None
+    data = np.frombuffer(payload, dtype=">u2", count=count, offset=_WATERFALL_HEADER.size)
+    return WaterfallTile(
+        first_bin_hz=first / _MHZ_FIXED * 1e6,
+        bin_bandwidth_hz=bandwidth / _MHZ_FIXED * 1e6,
+        line_duration_ms=duration,
+        width=width,
+        height=height,
+        timecode=timecode,
+        auto_black_level=black,
+        data=data.reshape(height, width),
+    )
+
+
+def pack_discovery_payload(fields: Dict[str, str]) -> bytes:
+    """Discovery payload: space separated ``key=value`` pairs, NUL padded to 4 bytes
+
+    Spaces inside values (e.g. a nickname) are sent as DEL (0x7F), as the
+    radio does.
+    """
+    text = " ".join(
+        f"{key}={str(value).replace(' ', chr(0x7F))}" for key, value in fields.items()
+    ).encode()
+    return text + b"\0" * (-len(text) % 4)
+
+
+def parse_discovery_payload(payload) -> Dict[str, str]:
+    text = bytes(payload).rstrip(b"\0").decode(errors="replace")
+    fields = {}
+    for pair in text.split():
+        key, sep, value = pair.partition("=")
+        if sep:
+            fields[key] = value.replace("\x7f", " ")
+    return fields
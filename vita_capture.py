@@ -0,0 +1,359 @@
+import argparse
+import asyncio
+import bisect
+import logging
+import os
+import socket
+import struct
+import time
+from typing import Callable, Iterator, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Capture file: 16-byte header, then records of [u64 ts_ns][u32 length][datagram]
+MAGIC = b"VCAP"
+VERSION = 1
+_FILE_HEADER = struct.Struct("<4sHHQ")
+_RECORD_HEADER = struct.Struct("<QI")
+# Index file (<capture>.idx): entries of [u64 ts_ns][u64 file offset][u64 record number]
+_INDEX_ENTRY = struct.Struct("<QQQ")
+
+DatagramSink = Callable[[bytes, Optional[Tuple[str, int]]], None]
+
+
+class CaptureError(Exception):
+    pass
+
+
+def index_path(path: str) -> str:
+    return path + ".idx"
+
+
+def _read_header(path: str) -> int:
+    """Creation time of a capture file; CaptureError if it is not one"""
+    with open(path, "rb") as f:
+        header = f.read(_FILE_HEADER.size)
+    if len(header) < _FILE_HEADER.size:
+        raise CaptureError(f"{path}: truncated header")
+    magic, version, _, created_ns = _FILE_HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise CaptureError(f"{path}: not a VITA capture file")
+    return created_ns
+
+
+def _read_index(path: str) -> List[Tuple[int, int, int]]:
+    """Complete (ts_ns, offset, record number) entries of a capture's index"""
+    try:
+        with open(index_path(path), "rb") as f:
+            raw = f.read()
+    except OSError:
+        return []
+    usable = len(raw) - len(raw) % _INDEX_ENTRY.size
+    return list(_INDEX_ENTRY.iter_unpack(raw[:usable]))
+
+
+def _scan(path: str, offset: int, with_offsets: bool = False):
+    """Yield (ts_ns, data), or (ts_ns, offset, data), for each complete record from offset"""
+    with open(path, "rb", buffering=1 << 20) as f:
+        f.seek(offset)
+        while True:
+            header = f.read(_RECORD_HEADER.size)
+            if len(header) < _RECORD_HEADER.size:
+                return
+            ts_ns, length = _RECORD_HEADER.unpack(header)
+            data = f.read(length)
+            if len(data) < length:
+                return  # partial record at the end of an interrupted capture
+            yield (ts_ns, offset, data) if with_offsets else (ts_ns, data)
+            offset += _RECORD_HEADER.size + length
+
+
+class CaptureWriter:
+    """Append-only capture of raw VITA-49 datagrams with a timestamp index
+
+    ``write`` is cheap enough to call from the UDP receive path: records go
+    into a large userspace buffer and reach the disk as sequential writes.
+    An index entry is appended every ``index_interval`` seconds of capture
+    time so readers can seek without scanning the file.
+
+    Opening an existing capture appends to it. A partial record left by an
+    interrupted capture is dropped first, and the index is extended from
+    its last entry. A file that is not a capture raises CaptureError rather
+    than being overwritten.
+    """
+
+    def __init__(self, path: str, index_interval: float = 0.1, buffer_size: int = 1 << 20):
+        self.path = os.path.expanduser(path)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.index_interval_ns = int(index_interval * 1e9)
+        # Datagrams and payload bytes written by this writer
+        self.records = 0
+        self.bytes = 0
+        self._offset = _FILE_HEADER.size
+        # Number of the next record in the file, as stored in index entries
+        self._record_number = 0
+        self._next_index_ns = 0
+
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            self._resume()
+            self._file = open(self.path, "ab", buffering=buffer_size)
+        else:
+            self._file = open(self.path, "wb", buffering=buffer_size)
+            self._file.write(_FILE_HEADER.pack(MAGIC, VERSION, 0, time.time_ns()))
+            with open(index_path(self.path), "wb"):
+                pass
+        self._index = open(index_path(self.path), "ab", buffering=64 * 1024)
+
+    def _resume(self):
+        """Find the end of the last complete record and bring the index up to it"""
+        _read_header(self.path)
+        size = os.path.getsize(self.path)
+        entries = [entry for entry in _read_index(self.path) if entry[1] < size]
+        if entries:
+            # Everything before the last indexed record is known to be complete;
+            # rescanning from it re-creates that entry
+            _, self._offset, self._record_number = entries.pop()
+        for ts_ns, offset, data in _scan(self.path, self._offset, with_offsets=True):
+            if ts_ns >= self._next_index_ns:
+                entries.append((ts_ns, offset, self._record_number))
+                self._next_index_ns = ts_ns + self.index_interval_ns
+            self._offset = offset + _RECORD_HEADER.size + len(data)
+            self._record_number += 1
+
+        os.truncate(self.path, self._offset)
+        with open(index_path(self.path), "wb") as f:
+            f.write(b"".join(_INDEX_ENTRY.pack(*entry) for entry in entries))
+        logger.info(f"Appending to capture {self.path} ({self._record_number} datagrams)")
+
+    def write(self, data: bytes, ts_ns: Optional[int] = None):
+        if self._file is None:
+            return
+        if ts_ns is None:
+            ts_ns = time.time_ns()
+        if ts_ns >= self._next_index_ns:
+            self._index.write(_INDEX_ENTRY.pack(ts_ns, self._offset, self._record_number))
+            self._next_index_ns = ts_ns + self.index_interval_ns
+
+        self._file.write(_RECORD_HEADER.pack(ts_ns, len(data)))
+        self._file.write(data)
+        self._offset += _RECORD_HEADER.size + len(data)
+        self._record_number += 1
+        self.records += 1
+        self.bytes += len(data)
+
+    def tap(self, data: bytes, addr=None):
+        """UdpIngest tap signature"""
+        self.write(data)
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+            self._index.flush()
+
+    def close(self):
+        if self._file is None:
+            return
+        self._file.close()
+        self._index.close()
+        self._file = None
+        self._index = None
+        logger.info(f"Capture closed: {self.path} ({self.records} datagrams)")
+
+
+class CaptureReader:
+    """Reads a capture file sequentially or from a timestamp
+
+    The index is loaded when present and rebuilt by scanning otherwise
+    (e.g. after a crash left it truncated).
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.expanduser(path)
+        self.created_ns = _read_header(self.path)
+        self._index_ts: List[int] = []
+        self._index_offsets: List[int] = []
+        self._load_index()
+
+    def _load_index(self):
+        for ts_ns, offset, _ in _read_index(self.path):
+            self._index_ts.append(ts_ns)
+            self._index_offsets.append(offset)
+        if not self._index_ts:
+            self._rebuild_index()
+
+    def _rebuild_index(self):
+        for ts_ns, offset, _ in self._scan(_FILE_HEADER.size, with_offsets=True):
+            self._index_ts.append(ts_ns)
+            self._index_offsets.append(offset)
+
+    @property
+    def start_ns(self) -> Optional[int]:
+        return self._index_ts[0] if self._index_ts else None
+
+    def offset_for(self, ts_ns: int) -> int:
+        """File offset of the last indexed record at or before ts_ns"""
+        i = bisect.bisect_right(self._index_ts, ts_ns) - 1
+        return self._index_offsets[i] if i >= 0 else _FILE_HEADER.size
+
+    def _scan(self, offset: int, with_offsets: bool = False):
+        return _scan(self.path, offset, with_offsets)
+
+    def records(self, start_ns: Optional[int] = None) -> Iterator[Tuple[int, bytes]]:
+        """Yield (ts_ns, datagram), optionally starting at a capture timestamp"""
+        offset = self.offset_for(start_ns) if start_ns is not None else _FILE_HEADER.size
+        for ts_ns, data in self._scan(offset):
+            if start_ns is None or ts_ns >= start_ns:
+                yield ts_ns, data
+
+    def summary(self) -> dict:
+        count = 0
+        total = 0
+        first = last = None
+        for ts_ns, data in self.records():
+            count += 1
+            total += len(data)
+            first = ts_ns if first is None else first
+            last = ts_ns
+        duration = (last - first) / 1e9 if count else 0.0
+        return {"datagrams": count, "bytes": total, "duration_s": duration}
+
+
+class ReplaySource:
+    """Feeds captured datagrams into a sink such as ``UdpIngest.datagram_received``
+
+    ``speed`` 1.0 reproduces the original timing, N plays N times faster and
+    0 plays as fast as the sink accepts, yielding to the event loop every
+    ``batch`` datagrams so other tasks keep running.
+    """
+
+    def __init__(
+        self,
+        reader: CaptureReader,
+        sink: DatagramSink,
+        speed: float = 1.0,
+        loop: bool = False,
+        batch: int = 64,
+    ):
+        self.reader = reader
+        self.sink = sink
+        self.speed = speed
+        self.loop = loop
+        self.batch = batch
+        self.packets = 0
+        self.bytes = 0
+        self.max_lag_ms = 0.0
+        self.running = False
+
+    def stop(self):
+        self.running = False
+
+    async def run(self, start_ns: Optional[int] = None):
+        self.running = True
+        started = time.perf_counter()
+        while self.running:
+            await self._play_once(start_ns)
+            if not self.loop:
+                break
+        elapsed = time.perf_counter() - started
+        self.running = False
+        logger.info(
+            f"Replayed {self.packets} datagrams in {elapsed:.2f}s "
+            f"(max lag {self.max_lag_ms:.1f} ms)"
+        )
+        return elapsed
+
+    async def _play_once(self, start_ns: Optional[int]):
+        first_ts = None
+        wall_start = time.perf_counter()
+        since_yield = 0
+        for ts_ns, data in self.reader.records(start_ns):
+            if not self.running:
+                return
+            if first_ts is None:
+                first_ts = ts_ns
+
+            if self.speed > 0:
+                due = wall_start + (ts_ns - first_ts) / 1e9 / self.speed
+                ahead = due - time.perf_counter()
+                if ahead > 0.001:
+                    await asyncio.sleep(ahead)
+                    since_yield = 0
+                elif ahead < 0:
+                    self.max_lag_ms = max(self.max_lag_ms, -ahead * 1000)
+
+            self.sink(data, None)
+            self.packets += 1
+            self.bytes += len(data)
+
+            since_yield += 1
+            if since_yield >= self.batch:
+                await asyncio.sleep(0)
+                since_yield = 0
+
+
+async def _record(args):
+    from udp_ingest import UdpIngest
+
+    writer = CaptureWriter(args.file)
+    ingest = UdpIngest(port=args.port)
+    ingest.add_tap(writer.tap)
+    if not await ingest.start():
+        writer.close()
+        return
+    try:
+        await asyncio.sleep(args.seconds)
+    finally:
+        ingest.stop()
+        writer.close()
+
+
+async def _replay(args):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.connect((args.host, args.port))
+
+    def send(data, addr):
+        try:
+            sock.send(data)
+        except OSError:
+            pass
+
+    source = ReplaySource(CaptureReader(args.file), send, speed=args.speed, loop=args.loop)
+    try:
+        await source.run()
+    finally:
+        sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Capture and replay VITA-49 UDP streams")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    record = sub.add_parser("record", help="capture datagrams arriving on a UDP port")
+    record.add_argument("file")
+    record.add_argument("--port", type=int, default=4991)
+    record.add_argument("--seconds", type=float, default=60.0)
+
+    replay = sub.add_parser("replay", help="send a capture to a UDP port")
+    replay.add_argument("file")
+    replay.add_argument("--host", default="127.0.0.1")
+    replay.add_argument("--port", type=int, default=4991)
+    replay.add_argument("--speed", type=float, default=1.0, help="0 = as fast as possible")
+    replay.add_argument("--loop", action="store_true")
+
+    info = sub.add_parser("info", help="summarize a capture")
+    info.add_argument("file")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        asyncio.run(_record(args))
+    elif args.command == "replay":
+        asyncio.run(_replay(args))
+    else:
+        print(CaptureReader(args.file).summary())
+
+
+if __name__ == "__main__":
+    main()
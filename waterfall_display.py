@@ -1,9 +1,14 @@
+import time
+from typing import Optional
+
 import numpy as np
 import pyqtgraph as pg
 
+from metrics import REGISTRY, MetricsRegistry
+
 
 class WaterfallWidget(pg.GraphicsLayoutWidget):
-    def __init__(self, history_lines: int = 100):
+    def __init__(self, history_lines: int = 100, metrics: Optional[MetricsRegistry] = None):
         super().__init__()
         self.history_lines = history_lines
         self.buffer = np.zeros((history_lines, 1024))
@@ -16,12 +21,19 @@ class WaterfallWidget(pg.GraphicsLayoutWidget):
         self.view_box.addItem(self.img)
 
         colormap = pg.colormap.get("inferno")
-        self.img.setLookupTable(colormap)
+        self.img.setLookupTable(colormap.getLookupTable(nPts=256))
+
+        metrics = metrics or REGISTRY
+        self._lines = metrics.counter("waterfall_lines_total", "Waterfall lines drawn")
+        self._render_time = metrics.histogram("waterfall_render_seconds", "Waterfall update time")
 
     def update(self, new_line: np.ndarray):
+        start = time.perf_counter()
         self.buffer = np.roll(self.buffer, -1, axis=0)
         self.buffer[-1] = new_line
         self.img.setImage(self.buffer, autoLevels=False, levels=(0, 255))
+        self._lines.inc()
+        self._render_time.record(time.perf_counter() - start)
 
     def clear(self):
         self.buffer = np.zeros((self.history_lines, 1024))
@@ -0,0 +1,371 @@
+import asyncio
+import base64
+import collections
+import hashlib
+import json
+import logging
+import os
+import struct
+import time
+import zlib
+from typing import Callable, Deque, Dict, Optional, Set, Tuple
+
+import numpy as np
+
+from display_subscription import Subscription, decimate_bins
+from metrics import REGISTRY, MetricsRegistry
+from vita49 import WaterfallTile
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+FRAME_PAN = 1
+FRAME_WATERFALL = 2
+FLAG_DEFLATE = 0x1
+
+# Kind, flags, bins per row, rows, sequence (pan frame count or waterfall timecode)
+_FRAME_HEADER = struct.Struct(">BBHHI")
+# Waterfall only: first bin and bin width in Hz
+_WATERFALL_HEADER = struct.Struct(">dd")
+
+
+def _accept_key(key: str) -> str:
+    return base64.b64encode(hashlib.sha1(key.encode() + _WS_GUID).digest()).decode()
+
+
+def ws_frame(opcode: int, payload: bytes, mask: bool = False) -> bytes:
+    """One unfragmented WebSocket frame; clients must mask, servers must not"""
+    size = len(payload)
+    if size < 126:
+        header = struct.pack(">BB", 0x80 | opcode, size | (0x80 if mask else 0))
+    elif size < 1 << 16:
+        header = struct.pack(">BBH", 0x80 | opcode, 126 | (0x80 if mask else 0), size)
+    else:
+        header = struct.pack(">BBQ", 0x80 | opcode, 127 | (0x80 if mask else 0), size)
+    if not mask:
+        return header + payload
+    key = os.urandom(4)
+    return header + key + _apply_mask(payload, key)
+
+
+def _apply_mask(payload: bytes, key: bytes) -> bytes:
+    data = np.frombuffer(payload, dtype=np.uint8)
+    mask = np.resize(np.frombuffer(key, dtype=np.uint8), len(data))
+    return (data ^ mask).tobytes()
+
+
+async def read_ws_frame(reader: asyncio.StreamReader, max_size: int) -> Tuple[int, bytes]:
+    """Next (opcode, payload); raises ValueError for fragmented or oversized frames"""
+    first, second = await reader.readexactly(2)
+    if not first & 0x80:
+        raise ValueError("Fragmented WebSocket messages are not supported")
+    size = second & 0x7F
+    if size == 126:
+        (size,) = struct.unpack(">H", await reader.readexactly(2))
+    elif size == 127:
+        (size,) = struct.unpack(">Q", await reader.readexactly(8))
+    if size > max_size:
+        raise ValueError(f"WebSocket message of {size} bytes is too large")
+    key = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(size)
+    if key:
+        payload = _apply_mask(payload, key)
+    return first & 0x0F, payload
+
+
+def encode_rows(rows: np.ndarray, level_max: int = 1023, deflate: bool = True) -> Tuple[int, bytes]:
+    """Rows of uint16 levels as (flags, delta coded uint8 bytes)
+
+    Levels are scaled to 0..255, then each value is sent as the difference
+    from its left neighbour (mod 256). Every frame stays self-contained, so a
+    client that had frames dropped can still decode the next one, and the
+    small differences across a noise floor deflate well.
+    """
+    levels = np.atleast_2d(rows).astype(np.int32)
+    quantized = np.minimum(levels * 255 // level_max, 255).astype(np.uint8)
+    deltas = np.empty_like(quantized)
+    deltas[:, 0] = quantized[:, 0]
+    np.subtract(quantized[:, 1:], quantized[:, :-1], out=deltas[:, 1:])
+    data = deltas.tobytes()
+    if deflate:
+        return FLAG_DEFLATE, zlib.compress(data, 1)
+    return 0, data
+
+
+def decode_frame(payload: bytes) -> Dict:
+    """Decode a binary frame from :class:`WebSocketFanout` (the reference for frontends)"""
+    kind, flags, width, height, sequence = _FRAME_HEADER.unpack_from(payload)
+    offset = _FRAME_HEADER.size
+    frame = {"kind": kind, "sequence": sequence}
+    if kind == FRAME_WATERFALL:
+        frame["first_bin_hz"], frame["bin_bandwidth_hz"] = _WATERFALL_HEADER.unpack_from(
+            payload, offset
+        )
+        offset += _WATERFALL_HEADER.size
+    data = payload[offset:]
+    if flags & FLAG_DEFLATE:
+        data = zlib.decompress(data)
+    deltas = np.frombuffer(data, dtype=np.uint8).reshape(height, width)
+    frame["rows"] = np.cumsum(deltas, axis=1, dtype=np.uint8)
+    return frame
+
+
+class _Viewer:
+    """One WebSocket client: a subscription and a bounded queue of encoded frames"""
+
+    def __init__(self, writer: asyncio.StreamWriter, queue_size: int, dropped):
+        self.writer = writer
+        self.radio: Optional[str] = None
+        self.subscription: Optional[Subscription] = None
+        self.queue: Deque[bytes] = collections.deque(maxlen=queue_size)
+        self._wakeup = asyncio.Event()
+        self._dropped = dropped
+
+    def send(self, frame: bytes):
+        if len(self.queue) == self.queue.maxlen:
+            self._dropped.inc()  # The oldest frame falls out of the deque
+        self.queue.append(frame)
+        self._wakeup.set()
+
+    async def run(self):
+        try:
+            while True:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                while self.queue:
+                    frames = list(self.queue)
+                    self.queue.clear()
+                    self.writer.write(b"".join(frames))
+                    await self.writer.drain()
+        except ConnectionError:
+            pass
+
+
+class WebSocketFanout:
+    """Serves panadapter and waterfall frames to WebSocket viewers
+
+    A viewer picks a radio and its own width and frame rate by sending a
+    text message such as ``{"radio": "shack", "width": 512, "fps": 10}``
+    (``streams`` as in the daemon's ``subscribe``). Frames go out as binary
+    messages, see :func:`encode_rows` and :func:`decode_frame`. Each frame
+    is decimated, encoded and wrapped in a WebSocket frame once per distinct
+    width and the same bytes are queued for every viewer that wants them.
+    Each viewer's queue holds ``queue_size`` frames; when a viewer falls
+    behind its oldest frames are dropped, so publishing never waits on a
+    socket.
+    """
+
+    MAX_HANDSHAKE_BYTES = 8192
+    MAX_MESSAGE_BYTES = 4096
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 4994,
+        queue_size: int = 4,
+        level_max: int = 1023,
+        deflate: bool = True,
+        timeout: float = 5.0,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.queue_size = queue_size
+        self.level_max = level_max
+        self.deflate = deflate
+        self.timeout = timeout
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.viewers: Set[_Viewer] = set()
+        self._pan_frames: Dict[str, int] = collections.defaultdict(int)
+
+        metrics = metrics or REGISTRY
+        self._frames = metrics.counter("fanout_frames_total", "Frames queued to viewers")
+        self._bytes = metrics.counter("fanout_bytes_total", "Bytes queued to viewers")
+        self._dropped = metrics.counter(
+            "fanout_frames_dropped_total", "Frames dropped for viewers that fell behind"
+        )
+        metrics.gauge("fanout_viewers", "Connected WebSocket viewers").set_function(
+            lambda: len(self.viewers)
+        )
+
+    async def start(self) -> bool:
+        try:
+            self.server = await asyncio.start_server(
+                self._handle, self.host, self.port, limit=self.MAX_HANDSHAKE_BYTES
+            )
+        except OSError as e:
+            logger.error(f"Failed to start WebSocket fan-out on {self.host}:{self.port}: {e}")
+            return False
+        self.port = self.server.sockets[0].getsockname()[1]
+        logger.info(f"WebSocket fan-out listening on ws://{self.host}:{self.port}/")
+        return True
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            for viewer in list(self.viewers):
+                viewer.writer.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    # -- publishing -------------------------------------------------------
+
+    def publish_pan(self, radio: str, bins: np.ndarray):
+        self._pan_frames[radio] += 1
+        sequence = self._pan_frames[radio] & 0xFFFFFFFF
+        self._publish(
+            radio, "pan", bins, lambda rows: self._message(FRAME_PAN, rows, sequence, b"")
+        )
+
+    def publish_waterfall(self, radio: str, tile: WaterfallTile):
+        def message(rows):
+            bandwidth = tile.bin_bandwidth_hz * tile.width / rows.shape[1]
+            extra = _WATERFALL_HEADER.pack(tile.first_bin_hz, bandwidth)
+            return self._message(FRAME_WATERFALL, rows, tile.timecode, extra)
+
+        self._publish(radio, "waterfall", tile.data, message)
+
+    def _publish(
+        self, radio: str, stream: str, data: np.ndarray, message: Callable[[np.ndarray], bytes]
+    ):
+        now = time.monotonic()
+        encoded: Dict[int, bytes] = {}
+        for viewer in self.viewers:
+            subscription = viewer.subscription
+            if viewer.radio != radio or subscription is None or not subscription.take(stream, now):
+                continue
+            frame = encoded.get(subscription.width)
+            if frame is None:
+                rows = decimate_bins(np.atleast_2d(data), subscription.width, axis=1)
+                frame = encoded[subscription.width] = message(rows)
+            viewer.send(frame)
+            self._frames.inc()
+            self._bytes.inc(len(frame))
+
+    def _message(self, kind: int, rows: np.ndarray, sequence: int, extra: bytes) -> bytes:
+        flags, data = encode_rows(rows, self.level_max, self.deflate)
+        header = _FRAME_HEADER.pack(kind, flags, rows.shape[1], rows.shape[0], sequence)
+        return ws_frame(OP_BINARY, header + extra + data)
+
+    # -- connections ------------------------------------------------------
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.timeout)
+            key = self._handshake_key(request)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            writer.close()
+            return
+        if key is None:
+            writer.write(b"HTTP/1.1 400 Bad Request\r\nConnection: close\r\n\r\n")
+            writer.close()
+            return
+        writer.write(
+            (
+                "HTTP/1.1 101 Switching Protocols\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Accept: {_accept_key(key)}\r\n\r\n"
+            ).encode()
+        )
+
+        viewer = _Viewer(writer, self.queue_size, self._dropped)
+        task = asyncio.create_task(viewer.run())
+        self.viewers.add(viewer)
+        try:
+            while True:
+                opcode, payload = await read_ws_frame(reader, self.MAX_MESSAGE_BYTES)
+                if opcode == OP_CLOSE:
+                    writer.write(ws_frame(OP_CLOSE, payload[:2]))
+                    break
+                if opcode == OP_PING:
+                    writer.write(ws_frame(OP_PONG, payload))
+                elif opcode == OP_TEXT:
+                    self._subscribe(viewer, payload)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except ValueError as e:
+            logger.warning(f"Closing WebSocket viewer: {e}")
+        finally:
+            self.viewers.discard(viewer)
+            task.cancel()
+            writer.close()
+
+    @staticmethod
+    def _handshake_key(request: bytes) -> Optional[str]:
+        lines = request.decode("latin-1").split("\r\n")
+        if not lines[0].startswith("GET "):
+            return None
+        headers = {}
+        for line in lines[1:]:
+            name, sep, value = line.partition(":")
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+        if headers.get("upgrade", "").lower() != "websocket":
+            return None
+        return headers.get("sec-websocket-key")
+
+    def _subscribe(self, viewer: _Viewer, payload: bytes):
+        try:
+            request = json.loads(payload)
+            radio = str(request["radio"])
+            subscription = Subscription(
+                streams=set(request.get("streams", ("pan", "waterfall"))),
+                width=max(0, int(request.get("width", 0))),
+                fps=max(0.0, float(request.get("fps", 0))),
+            )
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring viewer subscription {payload[:100]!r}: {e}")
+            return
+        viewer.radio, viewer.subscription = radio, subscription
+
+
+class FanoutViewer:
+    """Minimal WebSocket viewer, for tests and benchmarks"""
+
+    def __init__(self):
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def connect(self, host: str, port: int):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.writer.write(
+            (
+                "GET / HTTP/1.1\r\n"
+                f"Host: {host}:{port}\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Key: {key}\r\n"
+                "Sec-WebSocket-Version: 13\r\n\r\n"
+            ).encode()
+        )
+        response = await self.reader.readuntil(b"\r\n\r\n")
+        if _accept_key(key).encode() not in response:
+            raise ConnectionError("WebSocket handshake failed")
+
+    async def subscribe(self, radio: str, **params):
+        self.writer.write(ws_frame(OP_TEXT, json.dumps({"radio": radio, **params}).encode(), True))
+        await self.writer.drain()
+
+    async def receive(self) -> Dict:
+        while True:
+            opcode, payload = await read_ws_frame(self.reader, 1 << 24)
+            if opcode == OP_BINARY:
+                return decode_frame(payload)
+            if opcode == OP_CLOSE:
+                raise ConnectionError("WebSocket closed")
+
+    async def close(self):
+        if self.writer:
+            self.writer.write(ws_frame(OP_CLOSE, struct.pack(">H", 1000), True))
+            self.writer.close()
+            self.writer = None